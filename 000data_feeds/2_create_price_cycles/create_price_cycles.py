@@ -20,12 +20,15 @@ CYCLE LOGIC:
 - There can only be 7 active cycles at any time (one per threshold)
 """
 
+import io
 import sys
 from pathlib import Path
 from datetime import datetime, timezone
 from typing import Optional, Dict, List, Any
 import logging
 
+import numpy as np
+
 # Add project root to path
 PROJECT_ROOT = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
@@ -430,6 +433,10 @@ def process_price_point(
     """
     Process a single price point across all thresholds.
     
+    Scalar reference implementation — the scheduler paths use
+    process_price_batch() / write_price_batch(), which produce the same
+    records and cycle stats in one vectorised pass per batch.
+    
     Returns:
         Tuple of (records_to_insert, updated_next_id)
     """
@@ -554,6 +561,341 @@ def process_price_point(
     return records, current_id
 
 
+# =============================================================================
+# Batch Engine (vectorised, one transaction per batch)
+# =============================================================================
+#
+# process_price_point() above walks every tick × threshold and issues a
+# cycle_tracker UPDATE (plus close/create round-trips on resets) for each —
+# 7+ PostgreSQL writes per 1 s price point. The batch engine computes the
+# same running highest/lowest/reset points with NumPy for a whole array of
+# price points, aggregates the GREATEST/LEAST cycle stats per cycle, and
+# writes everything in one transaction:
+#   - one UPDATE ... FROM (VALUES ...) for the active cycles (stats + close)
+#   - one multi-row INSERT for cycles opened inside the batch
+#   - one COPY for all price_analysis rows
+# Results are identical to calling process_price_point() tick by tick.
+
+_SCAN_WINDOW = 512  # initial look-ahead when searching for the next reset
+
+
+def _pct(num: np.ndarray, base: np.ndarray) -> np.ndarray:
+    """((num - base) / base) * 100 where base > 0, else 0.0 (matches scalar code)."""
+    out = np.zeros(len(num))
+    ok = base > 0
+    out[ok] = ((num[ok] - base[ok]) / base[ok]) * 100
+    return out
+
+
+def scan_threshold(
+    prices: np.ndarray,
+    threshold: float,
+    state: Optional[Dict],
+) -> tuple:
+    """
+    Find cycle resets and running highest/lowest for one threshold.
+
+    A reset happens at tick j when ((p[j] - H) / H) * 100 <= -threshold,
+    H being the highest price of the current cycle including p[j]. The
+    reset tick starts the next cycle (highest = lowest = p[j]).
+
+    Args:
+        prices: float64 array of price points (in id order)
+        threshold: cycle threshold in percent
+        state: current threshold state, or None to open a cycle at tick 0
+
+    Returns:
+        (resets, highest, lowest) — reset tick indices and the per-tick
+        highest/lowest recorded after processing each tick.
+    """
+    n = len(prices)
+    highest = np.empty(n)
+    lowest = np.empty(n)
+    resets: List[int] = []
+    if n == 0:
+        return np.array(resets, dtype=np.int64), highest, lowest
+
+    if state:
+        h, l, a = state['highest_price_recorded'], state['lowest_price_recorded'], 0
+    else:
+        # First record for this threshold: tick 0 opens the first cycle
+        resets.append(0)
+        h = l = highest[0] = lowest[0] = prices[0]
+        a = 1
+
+    window = _SCAN_WINDOW
+    while a < n:
+        b = min(n, a + window)
+        seg = prices[a:b]
+        hi = np.maximum(np.maximum.accumulate(seg), h)
+        hits = np.flatnonzero(((seg - hi) / hi) * 100 <= -threshold)
+        end = hits[0] if hits.size else b - a
+        lo = np.minimum(np.minimum.accumulate(seg[:end]), l) if end else seg[:0]
+        highest[a:a + end] = hi[:end]
+        lowest[a:a + end] = lo
+        if hits.size:
+            r = a + end
+            resets.append(r)
+            h = l = highest[r] = lowest[r] = prices[r]
+            a = r + 1
+            window = _SCAN_WINDOW
+        else:
+            h, l = hi[-1], lo[-1]
+            a = b
+            window *= 2
+
+    return np.array(resets, dtype=np.int64), highest, lowest
+
+
+def process_price_batch(
+    price_points: List[Dict],
+    threshold_states: Dict[float, Dict],
+    next_analysis_id: int,
+    next_cycle_id: int,
+) -> Dict[str, Any]:
+    """
+    Vectorised equivalent of calling process_price_point() for every point.
+
+    price_points must be non-empty and in id order. Updates threshold_states
+    in place and returns the write plan consumed by write_price_batch():
+        cycle_updates  – rows for cycles that were active before the batch
+        new_cycles     – cycle_tracker rows opened inside the batch
+        analysis       – column arrays for price_analysis
+        next_analysis_id / next_cycle_id – IDs to use for the next batch
+    """
+    n = len(price_points)
+    ids = np.fromiter((p['id'] for p in price_points), dtype=np.int64, count=n)
+    prices = np.fromiter((p['price'] for p in price_points), dtype=np.float64, count=n)
+    ts = [p['ts'] for p in price_points]
+    tick = np.arange(n)
+
+    cycle_updates: List[tuple] = []
+    new_cycles: List[tuple] = []
+    per_threshold: List[Dict[str, np.ndarray]] = []
+    cycle_id = next_cycle_id
+
+    for threshold in THRESHOLDS:
+        state = threshold_states.get(threshold)
+        resets, highest, lowest = scan_threshold(prices, threshold, state)
+
+        # Cycle index per tick: 0 = cycle active before the batch, k = k-th reset
+        cyc = np.searchsorted(resets, tick, side='right')
+        n_cycles = len(resets) + 1
+        start_price = np.empty(n_cycles)
+        start_id = np.empty(n_cycles, dtype=np.int64)
+        cycle_ids = np.empty(n_cycles, dtype=np.int64)
+        if state:
+            start_price[0] = state['sequence_start_price']
+            start_id[0] = state['sequence_start_id']
+            cycle_ids[0] = state['price_cycle']
+        start_price[1:] = prices[resets]
+        start_id[1:] = ids[resets]
+        cycle_ids[1:] = np.arange(cycle_id, cycle_id + len(resets))
+        cycle_id += len(resets)
+
+        ssp = start_price[cyc]
+        pct_increase = _pct(highest, ssp)
+        per_threshold.append({
+            'sequence_start_id': start_id[cyc],
+            'sequence_start_price': ssp,
+            'percent_increase': pct_increase,
+            'highest': highest,
+            'lowest': lowest,
+            'change_from_highest': _pct(prices, highest),
+            'increase_from_lowest': _pct(prices, lowest),
+            'price_cycle': cycle_ids[cyc],
+        })
+
+        # update_cycle_stats() calls: one per tick, except the tick that opens
+        # the very first cycle. Normal ticks update their own cycle with the
+        # running values; a reset tick updates the cycle it closes with the
+        # highest/lowest reached BEFORE the reset price.
+        is_reset = np.zeros(n, dtype=bool)
+        is_reset[resets] = True
+        u_cycle = np.where(is_reset, cyc - 1, cyc)
+        prev_high = np.concatenate(([state['highest_price_recorded'] if state else 0.0], highest[:-1]))
+        prev_low = np.concatenate(([state['lowest_price_recorded'] if state else 0.0], lowest[:-1]))
+        u_high = np.where(is_reset, prev_high, highest)
+        u_low = np.where(is_reset, prev_low, lowest)
+        u_inc = np.where(is_reset, _pct(prev_high, start_price[u_cycle.clip(0)]), pct_increase)
+        u_from = np.where(is_reset, _pct(prev_high, prev_low), _pct(prices, lowest))
+        keep = u_cycle >= (0 if state else 1)
+        u_cycle, u_high, u_low, u_inc, u_from = (
+            u_cycle[keep], u_high[keep], u_low[keep], u_inc[keep], u_from[keep])
+
+        groups = np.flatnonzero(np.r_[True, u_cycle[1:] != u_cycle[:-1]]) if len(u_cycle) else np.array([], dtype=np.int64)
+        counts = np.diff(np.r_[groups, len(u_cycle)])
+        agg = {}
+        if len(groups):
+            agg = dict(zip(u_cycle[groups].tolist(), zip(
+                counts.tolist(),
+                np.maximum.reduceat(u_high, groups).tolist(),
+                np.minimum.reduceat(u_low, groups).tolist(),
+                np.maximum.reduceat(u_inc, groups).tolist(),
+                np.maximum.reduceat(u_from, groups).tolist(),
+            )))
+
+        # Cycle k closes at the tick that opens cycle k+1
+        def _end_time(k: int):
+            return ts[resets[k]] if k < len(resets) else None
+
+        if state and 0 in agg:
+            cycle_updates.append((int(cycle_ids[0]), *agg[0], _end_time(0)))
+        now = datetime.now(timezone.utc)
+        for k in range(1, n_cycles):
+            count, hi, lo, inc, frm = agg.get(k, (0, start_price[k], start_price[k], 0.0, 0.0))
+            start_time, end_time = ts[resets[k - 1]], _end_time(k)
+            if end_time is not None and end_time < start_time:
+                logger.error(f"PREVENTED DATA CORRUPTION: Cycle #{cycle_ids[k]} end_time ({end_time}) < start_time ({start_time})")
+                end_time = None
+            # create_new_cycle() values merged with GREATEST/LEAST stats updates
+            new_cycles.append((
+                int(cycle_ids[k]), COIN_ID, threshold, start_time, end_time,
+                int(start_id[k]), float(start_price[k]),
+                max(float(start_price[k]), hi), min(float(start_price[k]), lo),
+                max(0.0, inc), max(0.0, frm), 1 + count, now,
+            ))
+
+        last = n - 1
+        threshold_states[threshold] = {
+            'sequence_start_id': int(start_id[cyc[last]]),
+            'sequence_start_price': float(ssp[last]),
+            'highest_price_recorded': float(highest[last]),
+            'lowest_price_recorded': float(lowest[last]),
+            'price_cycle': int(cycle_ids[cyc[last]]),
+        }
+
+    # price_analysis rows in the same order as the scalar path: tick-major,
+    # then threshold — so IDs line up with what process_price_point() assigns.
+    n_thr = len(THRESHOLDS)
+    analysis = {
+        name: np.stack([t[name] for t in per_threshold], axis=1).reshape(-1)
+        for name in per_threshold[0]
+    }
+    analysis['id'] = np.arange(next_analysis_id, next_analysis_id + n * n_thr)
+    analysis['price_point_id'] = np.repeat(ids, n_thr)
+    analysis['current_price'] = np.repeat(prices, n_thr)
+    analysis['percent_threshold'] = np.tile(np.array(THRESHOLDS), n)
+    analysis['created_at'] = np.repeat(np.array(ts, dtype='datetime64[us]'), n_thr)
+
+    logger.debug(f"Batch: {n} price points, {len(new_cycles)} new cycles, "
+                 f"{len(cycle_updates)} active cycle updates")
+    return {
+        'cycle_updates': cycle_updates,
+        'new_cycles': new_cycles,
+        'analysis': analysis,
+        'n_records': n * n_thr,
+        'next_analysis_id': next_analysis_id + n * n_thr,
+        'next_cycle_id': cycle_id,
+    }
+
+
+_ANALYSIS_COLUMNS = [
+    'id', 'coin_id', 'price_point_id', 'sequence_start_id', 'sequence_start_price',
+    'current_price', 'percent_threshold', 'percent_increase', 'highest_price_recorded',
+    'lowest_price_recorded', 'procent_change_from_highest_price_recorded',
+    'percent_increase_from_lowest', 'price_cycle', 'created_at',
+]
+
+
+def _analysis_csv(analysis: Dict[str, np.ndarray]) -> io.BytesIO:
+    """Render price_analysis column arrays as CSV for COPY FROM STDIN."""
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+
+    n = len(analysis['id'])
+    tbl = pa.table({
+        'id': analysis['id'],
+        'coin_id': np.full(n, COIN_ID, dtype=np.int64),
+        'price_point_id': analysis['price_point_id'],
+        'sequence_start_id': analysis['sequence_start_id'],
+        'sequence_start_price': analysis['sequence_start_price'],
+        'current_price': analysis['current_price'],
+        'percent_threshold': analysis['percent_threshold'],
+        'percent_increase': analysis['percent_increase'],
+        'highest_price_recorded': analysis['highest'],
+        'lowest_price_recorded': analysis['lowest'],
+        'procent_change_from_highest_price_recorded': analysis['change_from_highest'],
+        'percent_increase_from_lowest': analysis['increase_from_lowest'],
+        'price_cycle': analysis['price_cycle'],
+        'created_at': analysis['created_at'],
+    })
+    buf = io.BytesIO()
+    pacsv.write_csv(tbl, buf, pacsv.WriteOptions(include_header=False))
+    buf.seek(0)
+    return buf
+
+
+def write_price_batch(batch: Dict[str, Any]) -> bool:
+    """
+    Persist a process_price_batch() plan in a single transaction.
+
+    Active cycle stats/closes go out as one UPDATE ... FROM (VALUES ...),
+    cycles opened in the batch as one multi-row INSERT, and price_analysis
+    rows via COPY into a staging table (ON CONFLICT (id) DO NOTHING).
+    """
+    from psycopg2.extras import execute_values
+
+    try:
+        with get_postgres() as conn:
+            with conn.cursor() as cursor:
+                if batch['cycle_updates']:
+                    updated = execute_values(cursor, """
+                        UPDATE cycle_tracker AS c SET
+                            total_data_points = c.total_data_points + v.n,
+                            highest_price_reached = GREATEST(c.highest_price_reached, v.hi),
+                            lowest_price_reached = LEAST(c.lowest_price_reached, v.lo),
+                            max_percent_increase = GREATEST(c.max_percent_increase, v.inc),
+                            max_percent_increase_from_lowest = GREATEST(c.max_percent_increase_from_lowest, v.frm),
+                            cycle_end_time = CASE
+                                WHEN v.end_time IS NOT NULL AND v.end_time >= c.cycle_start_time
+                                THEN v.end_time ELSE c.cycle_end_time END
+                        FROM (VALUES %s) AS v(id, n, hi, lo, inc, frm, end_time)
+                        WHERE c.id = v.id
+                        RETURNING c.id, (v.end_time IS NOT NULL AND c.cycle_end_time IS NULL) AS close_prevented
+                    """, batch['cycle_updates'],
+                        template="(%s::bigint, %s::int, %s::numeric, %s::numeric, %s::numeric, %s::numeric, %s::timestamp)",
+                        fetch=True)
+                    for row in updated:
+                        if row['close_prevented']:
+                            logger.error(f"PREVENTED DATA CORRUPTION: Cycle #{row['id']} end_time < start_time")
+
+                if batch['new_cycles']:
+                    execute_values(cursor, """
+                        INSERT INTO cycle_tracker (
+                            id, coin_id, threshold, cycle_start_time, cycle_end_time,
+                            sequence_start_id, sequence_start_price, highest_price_reached,
+                            lowest_price_reached, max_percent_increase, max_percent_increase_from_lowest,
+                            total_data_points, created_at
+                        ) VALUES %s
+                        ON CONFLICT (id) DO NOTHING
+                    """, batch['new_cycles'], page_size=1000)
+
+                if batch['n_records']:
+                    cols = ", ".join(_ANALYSIS_COLUMNS)
+                    cursor.execute("""
+                        CREATE TEMP TABLE _price_analysis_stage
+                        (LIKE price_analysis INCLUDING DEFAULTS) ON COMMIT DROP
+                    """)
+                    cursor.copy_expert(
+                        f"COPY _price_analysis_stage ({cols}) FROM STDIN WITH (FORMAT csv)",
+                        _analysis_csv(batch['analysis']),
+                    )
+                    cursor.execute(f"""
+                        INSERT INTO price_analysis ({cols})
+                        SELECT {cols} FROM _price_analysis_stage
+                        ON CONFLICT (id) DO NOTHING
+                    """)
+
+        logger.debug(f"Batch write complete: {batch['n_records']} price_analysis records, "
+                     f"{len(batch['new_cycles'])} new cycles")
+        return True
+
+    except Exception as e:
+        logger.error(f"Price batch write failed: {e}", exc_info=True)
+        return False
+
+
 # =============================================================================
 # Cycle Initialization
 # =============================================================================
@@ -711,17 +1053,19 @@ def cleanup_duplicate_active_cycles():
 # Main Entry Point
 # =============================================================================
 
-def process_all_historical_prices(batch_size: int = 1000) -> int:
+def process_all_historical_prices(batch_size: int = 50000) -> int:
     """
     Process ALL unprocessed historical price points (for startup after backfill).
     
     CRITICAL: This processes ALL price points in chronological order, not just a batch.
     It loops continuously until every single price point has been processed into cycles.
     
-    OPTIMIZED: Releases DuckDB lock between batches to avoid blocking API/scheduler.
+    Each batch goes through the vectorised batch engine and is written in a
+    single transaction. Threshold states are loaded once and carried in memory
+    between batches, so catch-up costs one read + one write transaction per batch.
     
     Args:
-        batch_size: Number of price points to process per batch (default: 1000)
+        batch_size: Number of price points to process per batch (default: 50000)
                     This is just for memory efficiency - ALL prices will be processed.
     
     Returns:
@@ -740,16 +1084,15 @@ def process_all_historical_prices(batch_size: int = 1000) -> int:
     batch_count = 0
     max_iterations = 100000  # Safety limit to prevent infinite loops
     
+    threshold_states = get_threshold_states()
+    last_price_point_id, _ = get_last_processed_price_point_id()
     next_id = get_next_analysis_id()
+    next_cycle_id = get_next_cycle_id()
     
     iteration = 0
     while iteration < max_iterations:
         iteration += 1
         
-        threshold_states = get_threshold_states()
-        
-        last_price_point_id, _ = get_last_processed_price_point_id()
-        
         price_points = get_new_price_points(last_price_point_id, batch_size)
         
         if not price_points:
@@ -760,29 +1103,15 @@ def process_all_historical_prices(batch_size: int = 1000) -> int:
         batch_count += 1
         logger.info(f"Processing batch {batch_count}: {len(price_points)} price points (total processed so far: {total_processed})")
         
-        # Process all price points in this batch
-        all_records = []
-        for price_data in price_points:
-            records, next_id = process_price_point(price_data, threshold_states, next_id)
-            all_records.extend(records)
-        
-        # Batch insert all records using PyArrow (FAST!)
-        if all_records:
-            success = insert_price_analysis_batch(all_records)
-            if success:
-                total_processed += len(price_points)
-                logger.info(f"  Batch {batch_count}: Inserted {len(all_records)} price_analysis records (total: {total_processed} price points)")
-            else:
-                logger.error(f"  Batch {batch_count}: Failed to insert price analysis records")
-                break
-        else:
-            logger.warning(f"  Batch {batch_count}: No records generated (skipping)")
+        batch = process_price_batch(price_points, threshold_states, next_id, next_cycle_id)
+        if not write_price_batch(batch):
+            logger.error(f"  Batch {batch_count}: Failed to write price cycle batch")
             break
         
-        # CRITICAL: Small sleep to allow other threads/processes to access DuckDB
-        # This prevents blocking the API server and scheduler
-        import time
-        time.sleep(0.01)  # 10ms pause between batches - allows lock release
+        next_id, next_cycle_id = batch['next_analysis_id'], batch['next_cycle_id']
+        last_price_point_id = price_points[-1]['id']
+        total_processed += len(price_points)
+        logger.info(f"  Batch {batch_count}: Inserted {batch['n_records']} price_analysis records (total: {total_processed} price points)")
     
     if iteration >= max_iterations:
         logger.error(f"Safety limit reached ({max_iterations} iterations) - stopping to prevent infinite loop")
@@ -830,22 +1159,14 @@ def process_price_cycles() -> int:
     # Load current threshold states
     threshold_states = get_threshold_states()
     
-    # Get starting ID for new records
-    next_id = get_next_analysis_id()
-    
-    # Process all price points
-    all_records = []
-    for price_data in price_points:
-        records, next_id = process_price_point(price_data, threshold_states, next_id)
-        all_records.extend(records)
-    
-    # Batch insert all records
-    if all_records:
-        success = insert_price_analysis_batch(all_records)
-        if success:
-            logger.info(f"Inserted {len(all_records)} price analysis records ({len(price_points)} price points x {len(THRESHOLDS)} thresholds)")
-        else:
-            logger.error("Failed to insert price analysis records")
+    # Process all price points in one vectorised pass, one write transaction
+    batch = process_price_batch(
+        price_points, threshold_states, get_next_analysis_id(), get_next_cycle_id()
+    )
+    if write_price_batch(batch):
+        logger.info(f"Inserted {batch['n_records']} price analysis records ({len(price_points)} price points x {len(THRESHOLDS)} thresholds)")
+    else:
+        logger.error("Failed to write price cycle batch")
     
     return len(price_points)
 
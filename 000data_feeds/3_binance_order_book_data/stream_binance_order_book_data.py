@@ -1,16 +1,21 @@
 """
 Binance Order Book Stream
 =========================
-Streams SOL/USDT order book data from Binance WebSocket.
-Dual-writes to in-memory DuckDB (TradingDataEngine) and MySQL.
+Streams SOL/USDT (plus any BINANCE_OB_EXTRA_SYMBOLS) order book data from
+Binance WebSocket into order_book_features, one row per snapshot per symbol.
 
 Migrated from: 000old_code/solana_node/binance/order_book_streaming.py
 
 Architecture:
 - WebSocket connection to Binance (100ms updates)
-- Non-blocking writes via TradingDataEngine
+- WebSocket thread only parses and enqueues snapshots (never touches storage)
+- Several symbols share one combined-stream connection; rows carry `symbol`
+- OrderBookWriter thread computes features as snapshots arrive (everything
+  queued at once; order_book_kernel.py vectorises backlogs) and flushes
+  multi-row COPY batches to PostgreSQL every N rows / M ms, with a
+  backpressure policy (coalesce to the latest snapshot, or sample) when the
+  queue backs up
 - Auto-reconnect on disconnect
-- Background MySQL sync (handled by engine)
 
 Usage:
     # Start stream (called by scheduler/master.py)
@@ -29,20 +34,30 @@ PROJECT_ROOT = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
 
 import websocket
+import csv
+import io
 import json
+import os
 import time
 import threading
 import logging
-from datetime import datetime, timedelta, timezone
-from typing import Dict, List, Optional, Callable
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Callable
 from collections import deque
 
-from core.database import postgres_insert
+import psycopg2
+
+from core.database import get_postgres
 from core.config import settings
+from order_book_kernel import OrderBookFeatureKernel
 
 # Configure logging
 logger = logging.getLogger("binance_stream")
 
+# Symbols streamed alongside the primary one, e.g. "BTCUSDT,ETHUSDT". Their rows
+# go to order_book_features only (the DuckDB raw cache is SOL-only).
+EXTRA_SYMBOLS = [s.strip().upper() for s in os.getenv("BINANCE_OB_EXTRA_SYMBOLS", "").split(",") if s.strip()]
+
 # DuckDB raw cache — lazy singleton so import errors don't break the stream
 _ob_cache = None
 
@@ -54,51 +69,263 @@ def _get_ob_cache():
     return _ob_cache
 
 
-def _compute_microprice(best_bid: float, bid_size: float, best_ask: float, ask_size: float) -> float:
-    """Compute microprice (size-weighted mid price)."""
-    denom = bid_size + ask_size
-    if denom <= 0:
-        return (best_bid + best_ask) / 2.0
-    return (best_bid * ask_size + best_ask * bid_size) / denom
-
-
-def _depth_within_bps(levels: List[List[float]], mid: float, bps: float, is_bids: bool) -> float:
-    """Calculate total depth within X basis points of mid price."""
-    if mid <= 0:
-        return 0.0
-    limit = mid * (1.0 - bps / 10000.0) if is_bids else mid * (1.0 + bps / 10000.0)
-    total = 0.0
-    for price, size in levels:
-        if is_bids:
-            if price >= limit:
-                total += float(size)
-            else:
-                break
-        else:
-            if price <= limit:
-                total += float(size)
+# =============================================================================
+# Off-thread writer
+# =============================================================================
+
+# Flush a COPY batch every WRITER_FLUSH_ROWS rows or WRITER_FLUSH_MS ms
+WRITER_FLUSH_ROWS = 50
+WRITER_FLUSH_MS = 500
+# Pending snapshots between the socket and the writer before backpressure kicks in
+WRITER_MAX_PENDING = 200
+# Rows kept for retry while PostgreSQL is unavailable (oldest dropped beyond this)
+WRITER_MAX_RETRY_ROWS = 20_000
+WRITER_MAX_RETRY_BACKOFF_S = 5.0
+BACKPRESSURE_POLICIES = ('coalesce', 'sample')
+# Errors caused by the rows themselves: retrying the same batch cannot succeed
+ROW_ERRORS = (psycopg2.DataError, psycopg2.IntegrityError)
+
+
+def _copy_value(value: Any) -> Any:
+    """CSV field for COPY: NULL as empty, UTC timestamps as naive UTC."""
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value.isoformat(sep=' ')
+    return value
+
+
+def copy_order_book_rows(rows: List[Dict]) -> int:
+    """Write feature rows to order_book_features with one COPY."""
+    columns = list(rows[0].keys())
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for row in rows:
+        writer.writerow([_copy_value(row.get(c)) for c in columns])
+    buf.seek(0)
+    with get_postgres() as conn:
+        with conn.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY order_book_features ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+                buf,
+            )
+    return len(rows)
+
+
+class OrderBookWriter:
+    """
+    Bounded hand-off between the WebSocket thread and storage.
+
+    submit() is O(1) and never blocks on I/O. A dedicated thread wakes on
+    every submitted snapshot and turns everything queued into feature rows
+    with one `process` call (snapshots in arrival order, one row or None back
+    per snapshot), so features, the raw-cache append and the callback are
+    not held back by the batching; only the COPY waits for `flush_rows` rows
+    or `flush_ms` milliseconds. When `max_pending` snapshots are waiting:
+      - 'coalesce': pending snapshots are dropped, only the newest is kept
+        (each depth message is a full top-N book, so nothing is lost but
+        intermediate states)
+      - 'sample': from half full, only every `sample_every`-th snapshot is
+        accepted; once full, new snapshots are dropped
+    If PostgreSQL is down, rows are retried on the next flush (up to
+    WRITER_MAX_RETRY_ROWS) while the socket keeps streaming. A batch failing
+    on its data (ROW_ERRORS) is split until the offending rows are isolated;
+    those are logged and dropped, the rest is written.
+    """
+
+    def __init__(
+        self,
+        process: Callable[[List[Dict]], List[Optional[Dict]]],
+        flush_rows: int = WRITER_FLUSH_ROWS,
+        flush_ms: int = WRITER_FLUSH_MS,
+        max_pending: int = WRITER_MAX_PENDING,
+        backpressure: str = 'coalesce',
+        sample_every: int = 5,
+        sink: Callable[[List[Dict]], int] = copy_order_book_rows,
+    ):
+        if backpressure not in BACKPRESSURE_POLICIES:
+            raise ValueError(f"backpressure must be one of {BACKPRESSURE_POLICIES}")
+        self.process = process
+        self.flush_rows = flush_rows
+        self.flush_ms = flush_ms
+        self.max_pending = max_pending
+        self.backpressure = backpressure
+        self.sample_every = max(1, sample_every)
+        self.sink = sink
+
+        self._pending: deque = deque()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._sample_counter = 0
+        self._retry_backoff = 0.0
+        self._retry_at = 0.0
+
+        self.stats = {
+            'submitted': 0,
+            'dropped': 0,
+            'processed': 0,
+            'rows_written': 0,
+            'flushes': 0,
+            'write_errors': 0,
+            'rows_lost': 0,
+            'rows_rejected': 0,
+            'last_lag_ms': None,
+            'max_lag_ms': 0.0,
+        }
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="OrderBookWriter", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Drain what is queued, flush, and stop the thread."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def submit(self, snapshot: Dict) -> bool:
+        """Queue a snapshot (WebSocket thread). Returns False if it was dropped."""
+        with self._cond:
+            self.stats['submitted'] += 1
+            n = len(self._pending)
+            if self.backpressure == 'coalesce':
+                if n >= self.max_pending:
+                    self.stats['dropped'] += n
+                    self._pending.clear()
+            elif n >= self.max_pending:
+                self.stats['dropped'] += 1
+                return False
+            elif n >= self.max_pending // 2:
+                self._sample_counter += 1
+                if self._sample_counter % self.sample_every:
+                    self.stats['dropped'] += 1
+                    return False
             else:
-                break
-    return float(total)
+                self._sample_counter = 0
+            self._pending.append(snapshot)
+            self._cond.notify()
+        return True
+
+    def get_statistics(self) -> Dict:
+        with self._cond:
+            return {**self.stats, 'queue_depth': len(self._pending), 'backpressure': self.backpressure}
+
+    def _run(self) -> None:
+        rows: List[Dict] = []
+        last_flush = time.monotonic()
+        while True:
+            with self._cond:
+                # Process as soon as anything is queued; time out for the COPY deadline
+                deadline = last_flush + self.flush_ms / 1000.0
+                while not self._pending and not self._stopping:
+                    wait = deadline - time.monotonic()
+                    if wait <= 0:
+                        break
+                    self._cond.wait(wait)
+                batch = list(self._pending)
+                self._pending.clear()
+                stopping = self._stopping
+
+            if batch:
+                try:
+                    rows.extend(row for row in self.process(batch) if row)
+                except Exception as e:
+                    logger.error(f"Order book processing error ({len(batch)} snapshots): {e}")
+                self.stats['processed'] += len(batch)
+
+            now = time.monotonic()
+            due = (now - last_flush) * 1000.0 >= self.flush_ms
+            if rows and (stopping or (now >= self._retry_at and (len(rows) >= self.flush_rows or due))):
+                rows = self._flush(rows)
+                last_flush = time.monotonic()
+            elif due:
+                last_flush = time.monotonic()
+
+            if stopping and not self._pending:
+                if rows:
+                    self.stats['rows_lost'] += len(rows)
+                    logger.warning(f"Order book writer stopped with {len(rows)} unwritten rows")
+                return
+
+    def _flush(self, rows: List[Dict]) -> List[Dict]:
+        """Write rows; returns what is left to retry."""
+        chunks = [rows]
+        written: Optional[Dict] = None
+        while chunks:
+            chunk = chunks.pop(0)
+            try:
+                self.sink(chunk)
+            except ROW_ERRORS as e:
+                if len(chunk) == 1:
+                    self.stats['rows_rejected'] += 1
+                    row = chunk[0]
+                    logger.error(f"Order book row rejected ({row.get('symbol')} @ "
+                                 f"{row.get('timestamp')}), dropped: {e}")
+                else:
+                    # Bisect to isolate the bad rows, keeping arrival order
+                    mid = len(chunk) // 2
+                    chunks[:0] = [chunk[:mid], chunk[mid:]]
+                continue
+            except Exception as e:
+                rows = [row for c in [chunk] + chunks for row in c]
+                self.stats['write_errors'] += 1
+                logger.error(f"Order book batch write failed ({len(rows)} rows, will retry): {e}")
+                overflow = len(rows) - WRITER_MAX_RETRY_ROWS
+                if overflow > 0:
+                    self.stats['rows_lost'] += overflow
+                    rows = rows[overflow:]
+                # Back off (doubling, capped) so an outage isn't hit once per message
+                self._retry_backoff = min(WRITER_MAX_RETRY_BACKOFF_S,
+                                          max(self.flush_ms / 1000.0, self._retry_backoff * 2))
+                self._retry_at = time.monotonic() + self._retry_backoff
+                return rows
+            self.stats['rows_written'] += len(chunk)
+            written = chunk[-1]
+
+        self._retry_backoff = 0.0
+        self.stats['flushes'] += 1
+        if written is None:
+            return []
+        ts = written.get('timestamp')
+        if isinstance(ts, datetime) and ts.tzinfo is not None:
+            lag = (datetime.now(timezone.utc) - ts).total_seconds() * 1000.0
+            self.stats['last_lag_ms'] = round(lag, 1)
+            self.stats['max_lag_ms'] = max(self.stats['max_lag_ms'], round(lag, 1))
+        return []
 
 
 class BinanceOrderBookCollector:
     """
     Binance order book collector with WebSocket streaming.
     
-    Streams order book data and writes to TradingDataEngine (in-memory DuckDB).
-    The engine handles MySQL sync automatically in the background.
+    Streams order book data for one or more symbols and writes feature rows to
+    order_book_features (primary symbol also to the DuckDB raw cache).
     """
     
-    def __init__(self, symbol: str = "SOLUSDT", mode: str = "conservative"):
+    def __init__(self, symbol: str = "SOLUSDT", mode: str = "conservative",
+                 backpressure: str = "coalesce", extra_symbols: Optional[List[str]] = None):
         """
         Initialize the collector.
         
         Args:
-            symbol: Trading pair symbol (default: SOLUSDT)
+            symbol: Primary trading pair symbol (default: SOLUSDT)
             mode: Rate limiting mode - "conservative" (2% of limits) or "aggressive" (12%)
+            backpressure: Writer queue policy - "coalesce" (keep latest) or "sample"
+            extra_symbols: More pairs on the same connection (default: BINANCE_OB_EXTRA_SYMBOLS)
         """
-        self.symbol = symbol
+        self.symbol = symbol.upper()
+        self.symbols = list(dict.fromkeys(
+            [self.symbol] + [s.upper() for s in (EXTRA_SYMBOLS if extra_symbols is None else extra_symbols)]
+        ))
         self.mode = mode
         
         # Rate limiting configuration
@@ -118,16 +345,18 @@ class BinanceOrderBookCollector:
         self.config = self.rate_limits[self.mode]
         logger.info(f"Initialized {self.mode} mode: {self.config['description']}")
         
-        # WebSocket URLs
+        # WebSocket URLs (combined stream when there is more than one symbol;
+        # its messages are wrapped as {"stream": "<symbol>@depth..", "data": {...}})
         self.ws_urls = {
-            'depth5': f"wss://stream.binance.com:9443/ws/{symbol.lower()}@depth5@100ms",
-            'depth10': f"wss://stream.binance.com:9443/ws/{symbol.lower()}@depth10@100ms",
-            'depth20': f"wss://stream.binance.com:9443/ws/{symbol.lower()}@depth20@100ms",
-            'depth50': f"wss://stream.binance.com:9443/ws/{symbol.lower()}@depth50@100ms"
+            f'depth{n}': self._stream_url(n) for n in (5, 10, 20, 50)
         }
         
-        # Data buffers (for feature calculations like net_liquidity_change_1s)
-        self.features_buffer = deque(maxlen=1000)
+        # Feature kernel (keeps the per-symbol history for net_liquidity_change_1s)
+        self.kernel = OrderBookFeatureKernel()
+        
+        # Socket -> storage hand-off (features are computed on the writer thread)
+        self.writer = OrderBookWriter(self._process_batch, backpressure=backpressure)
+        self._callback: Optional[Callable] = None
         
         # State
         self.is_streaming = False
@@ -144,199 +373,108 @@ class BinanceOrderBookCollector:
             'last_update': None
         }
     
+    def _stream_url(self, depth: int) -> str:
+        streams = [f"{s.lower()}@depth{depth}@100ms" for s in self.symbols]
+        if len(streams) == 1:
+            return f"wss://stream.binance.com:9443/ws/{streams[0]}"
+        return f"wss://stream.binance.com:9443/stream?streams={'/'.join(streams)}"
+
     def calculate_features(self, orderbook_data: Dict) -> Optional[Dict]:
         """
         Calculate trading features from order book data.
         
         Returns a dict with all feature columns for the order_book_features table.
+        The snapshot is recorded in the symbol's net_liquidity_change_1s history.
         """
         if not orderbook_data or 'bids' not in orderbook_data or 'asks' not in orderbook_data:
             return None
-        
-        bids = orderbook_data['bids']
-        asks = orderbook_data['asks']
-        
-        if not bids or not asks:
-            return None
-        
-        # Basic price levels
-        best_bid = bids[0][0]
-        best_ask = asks[0][0]
-        mid_price = (best_bid + best_ask) / 2
-        absolute_spread = max(0.0, best_ask - best_bid)
-        relative_spread_bps = (absolute_spread / mid_price * 10000) if mid_price > 0 else 0.0
-        
-        # Depth calculations (top 10 levels)
-        bid_depth_10 = float(sum(b[1] for b in bids[:10]))
-        ask_depth_10 = float(sum(a[1] for a in asks[:10]))
-        total_depth_10 = bid_depth_10 + ask_depth_10
-        volume_imbalance = (bid_depth_10 - ask_depth_10) / total_depth_10 if total_depth_10 > 0 else 0.0
-        
-        # VWAP calculations
-        bid_vwap = float(sum(b[0] * b[1] for b in bids[:10]) / bid_depth_10) if bid_depth_10 > 0 else 0.0
-        ask_vwap = float(sum(a[0] * a[1] for a in asks[:10]) / ask_depth_10) if ask_depth_10 > 0 else 0.0
-        
-        # Slope calculations (price-size regression)
-        def _slope(levels: List[List[float]]) -> float:
-            if len(levels) < 2:
-                return 0.0
-            prices = [lvl[0] for lvl in levels]
-            sizes = [lvl[1] for lvl in levels]
-            n = len(prices)
-            sum_x = sum(prices)
-            sum_y = sum(sizes)
-            sum_xy = sum(x * y for x, y in zip(prices, sizes))
-            sum_x2 = sum(x * x for x in prices)
-            denom = (n * sum_x2 - sum_x * sum_x)
-            if denom == 0:
-                return 0.0
-            return float((n * sum_xy - sum_x * sum_y) / denom)
-        
-        bid_slope = _slope(bids[:5]) if len(bids) >= 5 else 0.0
-        ask_slope = _slope(asks[:5]) if len(asks) >= 5 else 0.0
-        
-        # Microprice (size-weighted)
-        top_bid_size = float(bids[0][1]) if bids else 0.0
-        top_ask_size = float(asks[0][1]) if asks else 0.0
-        microprice = _compute_microprice(best_bid, top_bid_size, best_ask, top_ask_size)
-        microprice_dev_bps = ((microprice - mid_price) / mid_price * 10000) if mid_price > 0 else 0.0
-        
-        # Depth within basis points
-        bid_depth_bps_5 = _depth_within_bps(bids, mid_price, 5.0, True)
-        ask_depth_bps_5 = _depth_within_bps(asks, mid_price, 5.0, False)
-        bid_depth_bps_10 = _depth_within_bps(bids, mid_price, 10.0, True)
-        ask_depth_bps_10 = _depth_within_bps(asks, mid_price, 10.0, False)
-        bid_depth_bps_25 = _depth_within_bps(bids, mid_price, 25.0, True)
-        ask_depth_bps_25 = _depth_within_bps(asks, mid_price, 25.0, False)
-        
-        # Depth imbalance ratio (10bps)
-        depth_imbalance_10bps = (bid_depth_bps_10 - ask_depth_bps_10) / (bid_depth_bps_10 + ask_depth_bps_10) if (bid_depth_bps_10 + ask_depth_bps_10) > 0 else 0.0
-        
-        # VWAP within 10bps
-        vwap_10bps = (bid_vwap * bid_depth_10 + ask_vwap * ask_depth_10) / total_depth_10 if total_depth_10 > 0 else 0.0
-        
-        # Net liquidity change over ~1 second
-        net_liquidity_change_1s = None
-        try:
-            cutoff = orderbook_data['timestamp'] - timedelta(seconds=1)
-            prev = None
-            for f in reversed(self.features_buffer):
-                if f.get('timestamp', f.get('ts', datetime.min)) <= cutoff:
-                    prev = f
-                    break
-            if prev:
-                prev_total = float(prev.get('total_depth_10', 0.0))
-                net_liquidity_change_1s = float(total_depth_10 - prev_total)
-        except Exception:
-            net_liquidity_change_1s = None
-
-        # Columns matching order_book_features table (include symbol if column exists)
-        features = {
-            'timestamp': orderbook_data['timestamp'],
-            'symbol': self.symbol,
-            'mid_price': mid_price,
-            'spread_bps': relative_spread_bps,
-            'bid_liquidity': bid_depth_10,
-            'ask_liquidity': ask_depth_10,
-            'volume_imbalance': volume_imbalance,
-            'depth_imbalance_ratio': depth_imbalance_10bps,
-            'microprice': microprice,
-            'vwap': vwap_10bps,
-            'total_depth_10': total_depth_10,
-            'bid_vwap_10': bid_vwap,
-            'ask_vwap_10': ask_vwap,
-            'bid_slope': bid_slope,
-            'ask_slope': ask_slope,
-            'microprice_dev_bps': microprice_dev_bps,
-            'bid_depth_bps_5': bid_depth_bps_5,
-            'ask_depth_bps_5': ask_depth_bps_5,
-            'bid_depth_bps_10': bid_depth_bps_10,
-            'ask_depth_bps_10': ask_depth_bps_10,
-            'bid_depth_bps_25': bid_depth_bps_25,
-            'ask_depth_bps_25': ask_depth_bps_25,
-            'net_liquidity_change_1s': net_liquidity_change_1s,
-            'bids_json': json.dumps(bids[:20]),
-            'asks_json': json.dumps(asks[:20]),
-            'source': orderbook_data['source']
-        }
-        return features
-    
-    def _write_to_engine(self, features: Dict) -> bool:
-        """Write features to PostgreSQL and DuckDB raw cache."""
-        try:
-            # Write to PostgreSQL
-            postgres_insert('order_book_features', features)
-            self.stats['writes_queued'] += 1
-
-            # Dual-write to DuckDB raw cache (non-blocking, buffered)
-            try:
-                _get_ob_cache().append(
-                    ts             = features['timestamp'],
-                    mid_price      = features.get('mid_price'),
-                    spread_bps     = features.get('spread_bps'),
-                    bid_liq        = features.get('bid_liquidity'),
-                    ask_liq        = features.get('ask_liquidity'),
-                    vol_imb        = features.get('volume_imbalance'),
-                    depth_ratio    = features.get('depth_imbalance_ratio'),
-                    microprice     = features.get('microprice'),
-                    microprice_dev = features.get('microprice_dev_bps'),
-                    net_liq_1s     = features.get('net_liquidity_change_1s'),
-                    bid_slope      = features.get('bid_slope'),
-                    ask_slope      = features.get('ask_slope'),
-                    bid_dep_5bps   = features.get('bid_depth_bps_5'),
-                    ask_dep_5bps   = features.get('ask_depth_bps_5'),
+        return self.calculate_features_batch([orderbook_data])[0]
+
+    def calculate_features_batch(self, snapshots: List[Dict]) -> List[Optional[Dict]]:
+        """Feature rows for snapshots in arrival order (None where a side is empty)."""
+        return self.kernel.compute([
+            snap if 'symbol' in snap else {**snap, 'symbol': self.symbol}
+            for snap in snapshots
+        ])
+
+    def _process_batch(self, snapshots: List[Dict]) -> List[Optional[Dict]]:
+        """Writer thread: features for queued snapshots, raw-cache append, user callback."""
+        rows = self.calculate_features_batch(snapshots)
+        for features, orderbook in zip(rows, snapshots):
+            if features:
+                if features['symbol'] == self.symbol:
+                    self._append_to_cache(features)
+
+                self.stats['websocket_messages'] += 1
+                self.stats['writes_queued'] += 1
+                self.stats['last_update'] = features['timestamp']
+
+            # Call user callback if provided
+            if self._callback:
+                try:
+                    self._callback(features, orderbook)
+                except Exception as e:
+                    logger.error(f"Order book callback error: {e}")
+            elif features and self.stats['websocket_messages'] % 100 == 0:
+                # Log every 100th message
+                logger.info(
+                    f"WS: {features['symbol']} @ ${features.get('mid_price', 0):.2f} | "
+                    f"Spread: {features.get('spread_bps', 0):.2f}bps | "
+                    f"[{self.stats['websocket_messages']} messages]"
                 )
-            except Exception as de:
-                logger.debug(f"DuckDB OB write skipped: {de}")
+        return rows
 
-            return True
-        except Exception as e:
-            logger.error(f"PostgreSQL write error: {e}")
-            self.stats['errors'] += 1
-            return False
+    def _append_to_cache(self, features: Dict) -> None:
+        """Dual-write to DuckDB raw cache (buffered)."""
+        try:
+            _get_ob_cache().append(
+                ts             = features['timestamp'],
+                mid_price      = features.get('mid_price'),
+                spread_bps     = features.get('spread_bps'),
+                bid_liq        = features.get('bid_liquidity'),
+                ask_liq        = features.get('ask_liquidity'),
+                vol_imb        = features.get('volume_imbalance'),
+                depth_ratio    = features.get('depth_imbalance_ratio'),
+                microprice     = features.get('microprice'),
+                microprice_dev = features.get('microprice_dev_bps'),
+                net_liq_1s     = features.get('net_liquidity_change_1s'),
+                bid_slope      = features.get('bid_slope'),
+                ask_slope      = features.get('ask_slope'),
+                bid_dep_5bps   = features.get('bid_depth_bps_5'),
+                ask_dep_5bps   = features.get('ask_depth_bps_5'),
+            )
+        except Exception as de:
+            logger.debug(f"DuckDB OB write skipped: {de}")
     
     def start(self, callback_func: Optional[Callable] = None, auto_restart: bool = True):
         """
         Start WebSocket streaming.
         
         Args:
-            callback_func: Optional callback for each update (features, orderbook)
+            callback_func: Optional callback for each update (features, orderbook);
+                runs on the writer thread
             auto_restart: Auto-reconnect on disconnect (default: True)
         """
+        self._callback = callback_func
+        self.writer.start()
+        
         def on_message(ws, message):
+            # Parse and enqueue only -- features and storage run on the writer thread
             try:
                 self.message_count += 1
                 data = json.loads(message)
+                symbol = self.symbol
+                if 'stream' in data:
+                    symbol = data['stream'].split('@', 1)[0].upper()
+                    data = data['data']
                 
-                orderbook = {
+                self.writer.submit({
                     'timestamp': datetime.now(timezone.utc),
+                    'symbol': symbol,
                     'bids': [[float(bid[0]), float(bid[1])] for bid in data['bids']],
                     'asks': [[float(ask[0]), float(ask[1])] for ask in data['asks']],
                     'source': 'WEBSOCKET'
-                }
-                
-                features = self.calculate_features(orderbook)
-                if features:
-                    # Add to buffer for net_liquidity_change calculation
-                    self.features_buffer.append(features)
-                    
-                    # Write to engine (non-blocking)
-                    self._write_to_engine(features)
-
-                    self.stats['websocket_messages'] += 1
-                    self.stats['last_update'] = features.get('timestamp', features.get('ts'))
-                
-                # Call user callback if provided
-                if callback_func:
-                    callback_func(features, orderbook)
-                else:
-                    # Log every 100th message
-                    if self.stats['websocket_messages'] % 100 == 0:
-                        logger.info(
-                            f"WS: {self.symbol} @ ${features.get('mid_price', 0):.2f} | "
-                            f"Spread: {features.get('relative_spread_bps', 0):.2f}bps | "
-                            f"[{self.stats['websocket_messages']} messages]"
-                        )
+                })
                 
             except Exception as e:
                 logger.error(f"WebSocket message error: {e}")
@@ -356,7 +494,7 @@ class BinanceOrderBookCollector:
                 self.start(callback_func, auto_restart)
         
         def on_open(ws):
-            logger.info(f"WebSocket connected: {self.symbol} ({self.mode} mode)")
+            logger.info(f"WebSocket connected: {', '.join(self.symbols)} ({self.mode} mode)")
             self.is_streaming = True
             self.start_time = time.time()
             self.message_count = 0
@@ -388,6 +526,7 @@ class BinanceOrderBookCollector:
         self._stopping = True
         if self.ws:
             self.ws.close()
+        self.writer.stop()
         self.is_streaming = False
         logger.info("WebSocket stream stopped")
     
@@ -398,14 +537,16 @@ class BinanceOrderBookCollector:
         return {
             'mode': self.mode,
             'symbol': self.symbol,
+            'symbols': self.symbols,
             'uptime_seconds': uptime,
             'websocket_messages': self.stats['websocket_messages'],
             'writes_queued': self.stats['writes_queued'],
             'errors': self.stats['errors'],
-            'buffer_size': len(self.features_buffer),
+            'buffer_size': self.kernel.buffered(self.symbol),
             'is_streaming': self.is_streaming,
             'last_update': self.stats['last_update'],
-            'messages_per_minute': (self.stats['websocket_messages'] / uptime * 60) if uptime > 0 else 0
+            'messages_per_minute': (self.stats['websocket_messages'] / uptime * 60) if uptime > 0 else 0,
+            'writer': self.writer.get_statistics(),
         }
 
 
@@ -492,6 +633,9 @@ if __name__ == "__main__":
             print(f"Messages: {stats['websocket_messages']:,}")
             print(f"Writes: {stats['writes_queued']:,}")
             print(f"Errors: {stats['errors']}")
+            w = stats['writer']
+            print(f"Writer: {w['rows_written']:,} rows / {w['flushes']:,} flushes | "
+                  f"dropped {w['dropped']:,} | queue {w['queue_depth']} | lag {w['last_lag_ms']} ms")
             print(f"Rate: {stats['messages_per_minute']:.1f} msg/min")
             print(f"Uptime: {stats['uptime_seconds']/60:.1f} min")
     except KeyboardInterrupt:
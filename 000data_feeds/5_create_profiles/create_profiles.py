@@ -36,7 +36,11 @@ import time
 PROJECT_ROOT = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
 
-from core.database import get_postgres
+import duckdb
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from core.database import get_postgres, postgres_arrow_table, postgres_copy_arrow
 # Configure logging
 logger = logging.getLogger("wallet_profiles")
 
@@ -45,8 +49,7 @@ MIN_BUYS = 3  # Minimum buy trades to qualify a wallet
 BATCH_SIZE = 50000  # Large DuckDB/Arrow batch to cut iterations
 
 # All thresholds from cycle_tracker (matching create_price_cycles.py)
-# Temporarily narrowed to 0.3 to reduce runtime
-THRESHOLDS = [0.3]
+THRESHOLDS = [0.2, 0.25, 0.3, 0.35, 0.4, 0.45, 0.5]
 
 
 # =============================================================================
@@ -521,156 +524,244 @@ def cleanup_old_profiles(hours: int = 24) -> int:
 def process_wallet_profiles() -> int:
     """
     Main entry point for the scheduler.
-    Process trades and build wallet profiles for all thresholds.
+    Process trades and build wallet profiles for all thresholds in one pass.
     
     UPDATED FOR POSTGRESQL: Reads from PostgreSQL instead of DuckDB.
     
     Returns:
         Total number of profiles inserted across all thresholds
     """
-    total_inserted = 0
+    try:
+        inserted = build_profiles_postgres(THRESHOLDS)
+    except Exception as e:
+        logger.error(f"Error building wallet profiles: {e}", exc_info=True)
+        return 0
     
-    for threshold in THRESHOLDS:
-        try:
-            inserted = build_profiles_for_threshold_postgres(threshold)
-            if inserted > 0:
-                total_inserted += inserted
-                logger.info(f"Threshold {threshold}: inserted {inserted} profiles")
-        except Exception as e:
-            logger.error(f"Error processing threshold {threshold}: {e}", exc_info=True)
+    for threshold, count in inserted.items():
+        if count > 0:
+            logger.info(f"Threshold {threshold}: inserted {count} profiles")
     
+    total_inserted = sum(inserted.values())
     if total_inserted > 0:
         logger.info(f"Inserted {total_inserted} profiles across all thresholds")
     
     return total_inserted
 
 
+# =============================================================================
+# Incremental Builder (PostgreSQL)
+# =============================================================================
+# One pass per run covers every threshold:
+# - wallet buy counts (eligibility) are cached in-process and advanced from a
+#   trade-id watermark instead of being regrouped over the whole trades table
+# - new buy trades are read once for all thresholds (those still pending for
+#   at least one of them)
+# - cycles are matched with an interval join and the entry price (first SOL
+#   price after the trade) with an ASOF JOIN, both in DuckDB
+# - profiles are written with a single COPY
+
+# Full recount of wallet buys; in between only new trades are counted.
+# Archival removes old trades, so counts drift upwards until the next recount.
+ELIGIBILITY_REFRESH_SECONDS = 3600
+
+PROFILE_COLUMNS = [
+    'wallet_address', 'threshold', 'trade_id', 'trade_timestamp', 'price_cycle',
+    'price_cycle_start_time', 'price_cycle_end_time', 'trade_entry_price_org',
+    'stablecoin_amount', 'trade_entry_price', 'sequence_start_price',
+    'highest_price_reached', 'lowest_price_reached', 'long_short', 'short',
+]
+
+
+class WalletBuyCounts:
+    """Buy-trade count per wallet, kept current from a trade-id watermark."""
+    
+    def __init__(self, min_buys: int = MIN_BUYS):
+        self.min_buys = min_buys
+        self.counts: Dict[str, int] = {}
+        self.eligible: Set[str] = set()
+        self.last_trade_id = 0
+        self.refreshed_at = 0.0
+    
+    def update(self) -> None:
+        full = time.time() - self.refreshed_at >= ELIGIBILITY_REFRESH_SECONDS
+        counted = postgres_arrow_table("""
+            SELECT wallet_address, COUNT(*) AS buys, MAX(id) AS max_id
+            FROM sol_stablecoin_trades
+            WHERE direction = 'buy' AND id > %s
+            GROUP BY wallet_address
+        """, [0 if full else self.last_trade_id])
+        
+        if full:
+            self.counts = {}
+            self.eligible = set()
+            self.last_trade_id = 0
+            self.refreshed_at = time.time()
+        counts = self.counts
+        for wallet, buys in zip(counted['wallet_address'].to_pylist(), counted['buys'].to_pylist()):
+            total = counts.get(wallet, 0) + buys
+            counts[wallet] = total
+            if total >= self.min_buys:
+                self.eligible.add(wallet)
+        if counted.num_rows:
+            self.last_trade_id = max(self.last_trade_id, pc.max(counted['max_id']).as_py())
+
+
+_wallet_buy_counts = WalletBuyCounts()
+
+
+def build_profiles_postgres(thresholds: List[float] = THRESHOLDS) -> Dict[float, int]:
+    """
+    Build wallet profiles for new buy trades across all thresholds.
+    
+    A trade is profiled for a threshold when its wallet has at least MIN_BUYS
+    buys, it falls inside a completed cycle of that threshold and a SOL price
+    exists after it. Each threshold's last_trade_id advances over every trade
+    it has decided (up to its latest completed cycle end), so runs of
+    ineligible trades don't stall it.
+    
+    Returns:
+        Profiles inserted per threshold
+    """
+    thresholds = [float(t) for t in thresholds]
+    inserted = {t: 0 for t in thresholds}
+    
+    with get_postgres() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT threshold, MAX(cycle_end_time) AS max_end
+                FROM cycle_tracker
+                WHERE threshold = ANY(%s) AND cycle_end_time IS NOT NULL
+                GROUP BY threshold
+            """, [thresholds])
+            latest_end = {float(r['threshold']): r['max_end'] for r in cursor.fetchall()}
+            cursor.execute(
+                "SELECT threshold, last_trade_id FROM wallet_profiles_state WHERE threshold = ANY(%s)",
+                [thresholds]
+            )
+            last_ids = {float(r['threshold']): int(r['last_trade_id']) for r in cursor.fetchall()}
+    
+    active = [t for t in thresholds if latest_end.get(t)]
+    if not active:
+        logger.debug("No completed cycles for any threshold")
+        return inserted
+    watermarks = [last_ids.get(t, 0) for t in active]
+    ends = [latest_end[t] for t in active]
+    
+    # Trades still pending for at least one threshold
+    trades = postgres_arrow_table("""
+        SELECT id AS trade_id, wallet_address, trade_timestamp,
+               COALESCE(price, 0) AS trade_price, stablecoin_amount,
+               COALESCE(perp_direction, '') AS perp_direction
+        FROM sol_stablecoin_trades t
+        WHERE direction = 'buy' AND id > %s
+        AND EXISTS (
+            SELECT 1 FROM unnest(%s::bigint[], %s::timestamp[]) AS b(last_trade_id, latest_end)
+            WHERE t.id > b.last_trade_id AND t.trade_timestamp <= b.latest_end
+        )
+        ORDER BY id
+        LIMIT %s
+    """, [min(watermarks), watermarks, ends, BATCH_SIZE])
+    if trades.num_rows == 0:
+        return inserted
+    
+    _wallet_buy_counts.update()
+    eligible = _wallet_buy_counts.eligible
+    trades = trades.append_column('eligible', pa.array(
+        [w in eligible for w in trades['wallet_address'].to_pylist()], pa.bool_()
+    ))
+    
+    first_ts = pc.min(trades['trade_timestamp']).as_py()
+    last_ts = pc.max(trades['trade_timestamp']).as_py()
+    cycles = postgres_arrow_table("""
+        SELECT id AS cycle_id, threshold::float8 AS threshold,
+               cycle_start_time, cycle_end_time, sequence_start_price,
+               highest_price_reached, lowest_price_reached
+        FROM cycle_tracker
+        WHERE threshold = ANY(%s) AND cycle_end_time IS NOT NULL
+        AND cycle_end_time >= %s AND cycle_start_time <= %s
+    """, [active, first_ts, last_ts])
+    prices = postgres_arrow_table("""
+        SELECT timestamp AS price_ts, price
+        FROM prices
+        WHERE token = 'SOL' AND timestamp > %s
+        AND timestamp <= COALESCE(
+            (SELECT MIN(timestamp) FROM prices WHERE token = 'SOL' AND timestamp > %s),
+            'infinity'
+        )
+    """, [first_ts, last_ts])
+    bounds = pa.table({
+        'threshold': pa.array(active, pa.float64()),
+        'last_trade_id': pa.array(watermarks, pa.int64()),
+        'latest_end': pa.array(ends, pa.timestamp('us')),
+    })
+    
+    duck = duckdb.connect()
+    try:
+        # Materialised so the planner sees real row counts (a registered Arrow
+        # table estimates ~1 row, which turns the joins into nested loops)
+        for name, table in (('trades', trades), ('cycles', cycles), ('prices', prices), ('bounds', bounds)):
+            duck.register(f'{name}_arrow', table)
+            duck.execute(f"CREATE TABLE {name} AS SELECT * FROM {name}_arrow")
+        duck.execute("""
+            CREATE TABLE pending AS
+            SELECT t.*, b.threshold, b.last_trade_id, b.latest_end
+            FROM trades t
+            JOIN bounds b ON t.trade_id > b.last_trade_id AND t.trade_timestamp <= b.latest_end
+        """)
+        profiles = duck.execute("""
+            WITH matched AS (
+                SELECT p.*, c.cycle_id, c.cycle_start_time, c.cycle_end_time,
+                       c.sequence_start_price, c.highest_price_reached, c.lowest_price_reached
+                FROM pending p
+                JOIN cycles c ON c.threshold = p.threshold
+                    AND c.cycle_start_time <= p.trade_timestamp
+                    AND c.cycle_end_time >= p.trade_timestamp
+                WHERE p.eligible
+                QUALIFY ROW_NUMBER() OVER (PARTITION BY p.trade_id, p.threshold ORDER BY c.cycle_id) = 1
+            )
+            SELECT m.wallet_address, m.threshold, m.trade_id, m.trade_timestamp,
+                   m.cycle_id AS price_cycle,
+                   m.cycle_start_time AS price_cycle_start_time,
+                   m.cycle_end_time AS price_cycle_end_time,
+                   m.trade_price AS trade_entry_price_org, m.stablecoin_amount,
+                   pr.price AS trade_entry_price, m.sequence_start_price,
+                   m.highest_price_reached, m.lowest_price_reached,
+                   m.perp_direction AS long_short,
+                   CASE m.perp_direction WHEN 'long' THEN 0 WHEN 'short' THEN 1 ELSE 2 END::SMALLINT AS short
+            FROM matched m
+            ASOF JOIN prices pr ON m.trade_timestamp < pr.price_ts
+            ORDER BY m.trade_id, m.threshold
+        """).fetch_arrow_table()
+        # Decided = inside the threshold's completed range with a later price known
+        decided = duck.execute("""
+            SELECT threshold, MAX(trade_id)
+            FROM pending
+            WHERE trade_timestamp < (SELECT MAX(price_ts) FROM prices)
+            GROUP BY threshold
+        """).fetchall()
+    finally:
+        duck.close()
+    
+    if profiles.num_rows:
+        postgres_copy_arrow("wallet_profiles", profiles.select(PROFILE_COLUMNS))
+        per_threshold = pc.value_counts(profiles['threshold']).to_pylist()
+        for item in per_threshold:
+            inserted[item['values']] = item['counts']
+    
+    for threshold, max_id in decided:
+        _pg_update_last_processed_id(threshold, max_id)
+    
+    return inserted
+
+
 def build_profiles_for_threshold_postgres(threshold: float) -> int:
     """
-    Build wallet profiles for a specific threshold using PostgreSQL directly.
+    Build wallet profiles for a single threshold using PostgreSQL directly.
     
     Returns number of profiles inserted.
     """
     try:
-        # Get last processed trade ID from state
-        last_trade_id = _pg_get_last_processed_id(threshold)
-        if last_trade_id is None:
-            last_trade_id = 0
-        
-        with get_postgres() as conn:
-            with conn.cursor() as cursor:
-                # Get latest completed cycle end time
-                cursor.execute("""
-                    SELECT MAX(cycle_end_time) as max_end
-                    FROM cycle_tracker
-                    WHERE threshold = %s AND cycle_end_time IS NOT NULL
-                """, [float(threshold)])
-                result = cursor.fetchone()
-                latest_cycle_end = result['max_end'] if result and result['max_end'] else None
-                
-                if not latest_cycle_end:
-                    logger.debug(f"No completed cycles for threshold {threshold}")
-                    return 0
-                
-                # Build profiles using single efficient query
-                cursor.execute("""
-                    WITH eligible_wallets AS (
-                        SELECT wallet_address
-                        FROM sol_stablecoin_trades
-                        WHERE direction = 'buy'
-                        GROUP BY wallet_address
-                        HAVING COUNT(id) >= %s
-                    ),
-                    trades_with_cycles AS (
-                        SELECT 
-                            t.id as trade_id,
-                            t.wallet_address,
-                            t.trade_timestamp,
-                            t.price as trade_price,
-                            t.stablecoin_amount,
-                            COALESCE(t.perp_direction, '') as perp_direction,
-                            c.id as cycle_id,
-                            c.cycle_start_time,
-                            c.cycle_end_time,
-                            c.sequence_start_price,
-                            c.highest_price_reached,
-                            c.lowest_price_reached
-                        FROM sol_stablecoin_trades t
-                        INNER JOIN eligible_wallets ew ON t.wallet_address = ew.wallet_address
-                        INNER JOIN cycle_tracker c ON (
-                            c.threshold = %s
-                            AND c.cycle_start_time <= t.trade_timestamp
-                            AND c.cycle_end_time >= t.trade_timestamp
-                            AND c.cycle_end_time IS NOT NULL
-                        )
-                        WHERE t.direction = 'buy'
-                        AND t.trade_timestamp <= %s
-                        AND t.id > %s
-                        ORDER BY t.id ASC
-                        LIMIT %s
-                    ),
-                    trades_with_prices AS (
-                        SELECT 
-                            twc.*,
-                            (
-                                SELECT p.price 
-                                FROM prices p 
-                                WHERE p.token = 'SOL'
-                                AND p.timestamp > twc.trade_timestamp 
-                                ORDER BY p.timestamp ASC 
-                                LIMIT 1
-                            ) as entry_price
-                        FROM trades_with_cycles twc
-                    )
-                    SELECT *
-                    FROM trades_with_prices
-                    WHERE entry_price IS NOT NULL
-                """, [MIN_BUYS, float(threshold), latest_cycle_end, last_trade_id, BATCH_SIZE])
-                
-                results = cursor.fetchall()
-        
-        if not results:
-            return 0
-        
-        # Build profile records
-        profiles = []
-        for record in results:
-            perp_direction = record.get('perp_direction', '')
-            if perp_direction == 'long':
-                short_value = 0
-            elif perp_direction == 'short':
-                short_value = 1
-            else:
-                short_value = 2
-            
-            profiles.append({
-                'wallet_address': record['wallet_address'],
-                'threshold': threshold,
-                'trade_id': record['trade_id'],
-                'trade_timestamp': record['trade_timestamp'],
-                'price_cycle': record['cycle_id'],
-                'price_cycle_start_time': record['cycle_start_time'],
-                'price_cycle_end_time': record['cycle_end_time'],
-                'trade_entry_price_org': float(record['trade_price']) if record['trade_price'] else 0,
-                'stablecoin_amount': record['stablecoin_amount'],
-                'trade_entry_price': float(record['entry_price']),
-                'sequence_start_price': float(record['sequence_start_price']),
-                'highest_price_reached': float(record['highest_price_reached']),
-                'lowest_price_reached': float(record['lowest_price_reached']),
-                'long_short': perp_direction,
-                'short': short_value
-            })
-        
-        # Insert profiles into PostgreSQL
-        inserted = insert_profiles_batch_postgres(profiles)
-        
-        # Update state
-        if profiles:
-            max_id = max(p['trade_id'] for p in profiles)
-            _pg_update_last_processed_id(threshold, max_id)
-        
-        return inserted
-        
+        return build_profiles_postgres([threshold]).get(float(threshold), 0)
     except Exception as e:
         logger.error(f"Failed to build profiles for threshold {threshold}: {e}", exc_info=True)
         return 0
@@ -678,49 +769,17 @@ def build_profiles_for_threshold_postgres(threshold: float) -> int:
 
 def insert_profiles_batch_postgres(profiles: List[Dict]) -> int:
     """
-    Insert profiles into PostgreSQL.
+    Insert profiles into PostgreSQL with one COPY.
     Returns number of records inserted.
     """
     if not profiles:
         return 0
     
     try:
-        # Prepare batch insert data
-        batch_data = []
-        for profile in profiles:
-            batch_data.append((
-                profile['wallet_address'],
-                profile['threshold'],
-                profile['trade_id'],
-                profile['trade_timestamp'],
-                profile['price_cycle'],
-                profile['price_cycle_start_time'],
-                profile['price_cycle_end_time'],
-                profile['trade_entry_price_org'],
-                profile['stablecoin_amount'],
-                profile['trade_entry_price'],
-                profile['sequence_start_price'],
-                profile['highest_price_reached'],
-                profile['lowest_price_reached'],
-                profile['long_short'],
-                profile['short'],
-            ))
-        
-        with get_postgres() as conn:
-            with conn.cursor() as cursor:
-                # Use executemany for batch insert
-                cursor.executemany("""
-                    INSERT INTO wallet_profiles 
-                    (wallet_address, threshold, trade_id, trade_timestamp, price_cycle,
-                     price_cycle_start_time, price_cycle_end_time, trade_entry_price_org,
-                     stablecoin_amount, trade_entry_price, sequence_start_price,
-                     highest_price_reached, lowest_price_reached, long_short, short)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    ON CONFLICT DO NOTHING
-                """, batch_data)
-        
-        return len(batch_data)
-        
+        table = pa.Table.from_pylist(
+            [{col: profile[col] for col in PROFILE_COLUMNS} for profile in profiles]
+        )
+        return postgres_copy_arrow("wallet_profiles", table)
     except Exception as e:
         logger.error(f"PostgreSQL insert failed: {e}", exc_info=True)
         return 0
@@ -25,17 +25,26 @@ CRITICAL: Also includes no_go trades!
 Fallback mechanism:
 - If cycle not found, looks up price 15 minutes after followed_at (trail window)
 - Falls back to trade's own higest_price_reached only as last resort
+
+Set-based: one query reads every pending buyin, one reads the SOL prices
+covering their outcome times, and all updates go out as a single
+UPDATE ... FROM (VALUES ...). Diagnostics: POTENTIAL_GAINS_DIAGNOSTICS=1.
 """
 
+import os
 import sys
+from datetime import timedelta
 from pathlib import Path
 import logging
 
+import numpy as np
+from psycopg2.extras import execute_values
+
 # Add project root to path
 PROJECT_ROOT = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
 
-from core.database import get_postgres, postgres_execute
+from core.database import get_postgres, postgres_arrow_table, postgres_execute
 
 # Configure logger
 logger = logging.getLogger("update_potential_gains")
@@ -43,6 +52,164 @@ logger = logging.getLogger("update_potential_gains")
 # Threshold for cycle_tracker lookup
 THRESHOLD = 0.3
 
+# Outcome window for orphaned trades (the trail window duration)
+TRAIL_WINDOW = timedelta(minutes=15)
+
+# Set to 1 to log the diagnostic COUNT(*) queries on every run
+DIAGNOSTICS = os.getenv("POTENTIAL_GAINS_DIAGNOSTICS", "0") == "1"
+
+
+def _log_diagnostics(cursor) -> None:
+    """
+    Explain why buyins are (not) getting potential_gains. Costs a dozen
+    COUNT(*) queries, so it only runs with POTENTIAL_GAINS_DIAGNOSTICS=1.
+    """
+    # Diagnostic queries to understand why no records match
+    try:
+        cursor.execute("SELECT COUNT(*) as count FROM follow_the_goat_buyins")
+        total_buyins = cursor.fetchone()['count']
+
+        cursor.execute("SELECT COUNT(*) as count FROM follow_the_goat_buyins WHERE price_cycle IS NOT NULL")
+        buyins_with_price_cycle = cursor.fetchone()['count']
+
+        cursor.execute("SELECT COUNT(*) as count FROM follow_the_goat_buyins WHERE potential_gains IS NULL")
+        buyins_null_potential = cursor.fetchone()['count']
+
+        cursor.execute("SELECT COUNT(*) as count FROM follow_the_goat_buyins WHERE our_entry_price IS NOT NULL AND our_entry_price > 0")
+        buyins_valid_entry = cursor.fetchone()['count']
+
+        cursor.execute("SELECT COUNT(*) as count FROM follow_the_goat_buyins WHERE higest_price_reached IS NOT NULL")
+        buyins_with_highest = cursor.fetchone()['count']
+
+        cursor.execute("SELECT COUNT(*) as count FROM cycle_tracker WHERE cycle_end_time IS NOT NULL AND threshold = %s", [THRESHOLD])
+        completed_cycles = cursor.fetchone()['count']
+
+        cursor.execute("SELECT COUNT(*) as count FROM cycle_tracker WHERE threshold = %s", [THRESHOLD])
+        total_cycles = cursor.fetchone()['count']
+
+        # Check what threshold values actually exist
+        cursor.execute("SELECT DISTINCT threshold FROM cycle_tracker ORDER BY threshold")
+        threshold_values = cursor.fetchall()
+        threshold_list = [str(t['threshold']) for t in threshold_values] if threshold_values else []
+
+        cursor.execute("""
+            SELECT COUNT(*) as count
+            FROM follow_the_goat_buyins buyins
+            INNER JOIN cycle_tracker ct ON ct.id = buyins.price_cycle
+            WHERE ct.cycle_end_time IS NOT NULL AND ct.threshold = %s
+        """, [THRESHOLD])
+        buyins_linked_to_completed = cursor.fetchone()['count']
+
+        # Check for orphaned price_cycle references
+        cursor.execute("""
+            SELECT COUNT(*) as count
+            FROM follow_the_goat_buyins buyins
+            WHERE buyins.price_cycle IS NOT NULL
+              AND NOT EXISTS (
+                  SELECT 1 FROM cycle_tracker ct WHERE ct.id = buyins.price_cycle
+              )
+        """)
+        orphaned_buyins = cursor.fetchone()['count']
+
+        # Check oldest completed cycle
+        cursor.execute("""
+            SELECT MIN(cycle_end_time) as oldest
+            FROM cycle_tracker
+            WHERE cycle_end_time IS NOT NULL AND threshold = %s
+        """, [THRESHOLD])
+        oldest_cycle_result = cursor.fetchone()
+        oldest_cycle_str = str(oldest_cycle_result['oldest']) if oldest_cycle_result and oldest_cycle_result['oldest'] else "N/A"
+
+        # CRITICAL CHECK: Are cycles assigned to trades using the WRONG threshold?
+        cursor.execute("""
+            SELECT COUNT(*) as count
+            FROM follow_the_goat_buyins buyins
+            INNER JOIN cycle_tracker ct ON ct.id = buyins.price_cycle
+            WHERE ct.threshold != %s
+              AND buyins.potential_gains IS NULL
+              AND ct.cycle_end_time IS NOT NULL
+        """, [THRESHOLD])
+        wrong_threshold_cycles = cursor.fetchone()['count']
+
+        if wrong_threshold_cycles > 0:
+            # Get sample of wrong thresholds
+            cursor.execute("""
+                SELECT ct.threshold, COUNT(*) as cnt
+                FROM follow_the_goat_buyins buyins
+                INNER JOIN cycle_tracker ct ON ct.id = buyins.price_cycle
+                WHERE ct.threshold != %s
+                  AND buyins.potential_gains IS NULL
+                  AND ct.cycle_end_time IS NOT NULL
+                GROUP BY ct.threshold
+            """, [THRESHOLD])
+            wrong_samples = cursor.fetchall()
+            wrong_threshold_str = ", ".join([f"{t['threshold']}({t['cnt']})" for t in wrong_samples])
+        else:
+            wrong_threshold_str = "none"
+
+        logger.debug(f"Diagnostics - Total buyins: {total_buyins}, "
+                   f"With price_cycle: {buyins_with_price_cycle}, "
+                   f"NULL potential_gains: {buyins_null_potential}, "
+                   f"Valid entry price: {buyins_valid_entry}, "
+                   f"With higest_price_reached: {buyins_with_highest}, "
+                   f"Completed cycles (threshold={THRESHOLD}): {completed_cycles}/{total_cycles}, "
+                   f"Buyins linked to completed: {buyins_linked_to_completed}, "
+                   f"Buyins with WRONG threshold: {wrong_threshold_cycles} ({wrong_threshold_str}), "
+                   f"Orphaned price_cycle refs: {orphaned_buyins}, "
+                   f"Oldest completed cycle: {oldest_cycle_str}, "
+                   f"Available thresholds: {', '.join(threshold_list)}")
+
+        # Warning if we have trades referencing cycles with wrong threshold
+        if wrong_threshold_cycles > 0:
+            logger.warning(f"Found {wrong_threshold_cycles} trades with cycles at WRONG threshold (not {THRESHOLD}): {wrong_threshold_str}. "
+                         f"Trade creation uses hardcoded threshold={THRESHOLD} but cycle might have different threshold!")
+
+        # Warning if we have orphaned references (cycles were cleaned up too early)
+        if orphaned_buyins > 0:
+            logger.warning(f"Found {orphaned_buyins} orphaned price_cycle references - cycles may have been cleaned up before trades were processed. "
+                         f"Check cycle retention settings (should be 72h to match trades).")
+    except Exception as diag_error:
+        logger.debug(f"Diagnostic queries failed (non-critical): {diag_error}")
+
+    # CRITICAL: Check if there are trades that SHOULD match but don't
+    cursor.execute("""
+        SELECT 
+            buyins.id,
+            buyins.price_cycle,
+            ct.id as cycle_found,
+            ct.threshold,
+            ct.cycle_end_time,
+            buyins.our_entry_price
+        FROM follow_the_goat_buyins buyins
+        LEFT JOIN cycle_tracker ct ON ct.id = buyins.price_cycle
+        WHERE buyins.potential_gains IS NULL
+          AND buyins.price_cycle IS NOT NULL
+          AND buyins.our_entry_price IS NOT NULL
+          AND buyins.our_entry_price > 0
+          AND buyins.our_status IN ('sold', 'completed', 'no_go')
+        LIMIT 5
+    """)
+    potential_missing = cursor.fetchall()
+
+    if potential_missing:
+        logger.warning(f"Found {len(potential_missing)} trades with NULL potential_gains that should be calculated:")
+        for row in potential_missing:
+            buyin_id = row['id']
+            price_cycle = row['price_cycle']
+            cycle_found = row['cycle_found']
+            threshold = row['threshold']
+            cycle_end_time = row['cycle_end_time']
+
+            if cycle_found is None:
+                logger.warning(f"  Buyin #{buyin_id}: price_cycle={price_cycle} NOT FOUND in cycle_tracker (orphaned)")
+            elif cycle_end_time is None:
+                logger.warning(f"  Buyin #{buyin_id}: price_cycle={price_cycle} threshold={threshold} - cycle NOT CLOSED yet")
+            elif threshold != THRESHOLD:
+                logger.warning(f"  Buyin #{buyin_id}: price_cycle={price_cycle} has WRONG threshold={threshold} (expected {THRESHOLD})")
+            else:
+                logger.warning(f"  Buyin #{buyin_id}: price_cycle={price_cycle} threshold={threshold} end={cycle_end_time} - SHOULD work but doesn't?")
+
+
 
 def get_records_to_update():
     """
@@ -55,51 +222,42 @@ def get_records_to_update():
     - our_entry_price is valid (not null, > 0)
     - Includes both 'sold', 'completed', AND 'no_go' trades
     
+    All outcomes are resolved in one pass: the pending buyins are read with
+    their outcome time (cycle_end_time, or followed_at + 15 minutes when the
+    cycle is gone), then matched against the SOL prices covering those times
+    with a sorted as-of lookup (last price at or before the outcome time).
+    
     Returns:
         list: List of tuples (buyin_id, calculated_potential_gains)
     """
-    # Query 1: Trades with existing cycle_tracker records
-    # Uses LATERAL JOIN to look up the actual SOL price at cycle_end_time.
-    # This gives the REAL outcome (can be negative) instead of the peak.
-    query_with_cycle = """
+    # Trades with existing cycle_tracker records: outcome at cycle_end_time.
+    # Orphaned trades (cycle archived/deleted): outcome 15 minutes after entry
+    # (the trail window), falling back to higest_price_reached only if there
+    # is no price data.
+    query_pending = """
     SELECT 
         buyins.id,
-        ((p_end.price - buyins.our_entry_price) / buyins.our_entry_price) * 100 AS potential_gains
+        buyins.our_entry_price::float8 AS entry_price,
+        ct.cycle_end_time AS outcome_time,
+        NULL::float8 AS fallback_gains,
+        FALSE AS orphaned
     FROM follow_the_goat_buyins buyins
     INNER JOIN cycle_tracker ct ON ct.id = buyins.price_cycle
-    CROSS JOIN LATERAL (
-        SELECT price FROM prices
-        WHERE token = 'SOL'
-          AND timestamp <= ct.cycle_end_time
-        ORDER BY timestamp DESC
-        LIMIT 1
-    ) p_end
     WHERE buyins.potential_gains IS NULL 
       AND ct.cycle_end_time IS NOT NULL
       AND ct.threshold = %s
       AND buyins.our_entry_price IS NOT NULL
       AND buyins.our_entry_price > 0
-    """
-    
-    # Query 2: Orphaned trades (cycle archived/deleted)
-    # Look up SOL price 15 minutes after entry (the trail window duration).
-    # This gives the real outcome at the point the system would have evaluated.
-    # Falls back to higest_price_reached only if no price data is available.
-    query_orphaned = """
+    UNION ALL
     SELECT 
         buyins.id,
-        COALESCE(
-            ((p_end.price - buyins.our_entry_price) / buyins.our_entry_price) * 100,
-            ((buyins.higest_price_reached - buyins.our_entry_price) / buyins.our_entry_price) * 100
-        ) AS potential_gains
+        buyins.our_entry_price::float8 AS entry_price,
+        buyins.followed_at + %s AS outcome_time,
+        CASE WHEN buyins.higest_price_reached > 0 THEN
+            (((buyins.higest_price_reached - buyins.our_entry_price) / buyins.our_entry_price) * 100)::float8
+        END AS fallback_gains,
+        TRUE AS orphaned
     FROM follow_the_goat_buyins buyins
-    LEFT JOIN LATERAL (
-        SELECT price FROM prices
-        WHERE token = 'SOL'
-          AND timestamp <= buyins.followed_at + INTERVAL '15 minutes'
-        ORDER BY timestamp DESC
-        LIMIT 1
-    ) p_end ON true
     WHERE buyins.potential_gains IS NULL
       AND buyins.price_cycle IS NOT NULL
       AND buyins.our_status IN ('sold', 'completed', 'no_go')
@@ -108,174 +266,58 @@ def get_records_to_update():
       AND NOT EXISTS (
           SELECT 1 FROM cycle_tracker ct WHERE ct.id = buyins.price_cycle
       )
-      AND (p_end.price IS NOT NULL OR (buyins.higest_price_reached IS NOT NULL AND buyins.higest_price_reached > 0))
     """
     
     try:
-        with get_postgres() as conn:
-            with conn.cursor() as cursor:
-                # Diagnostic queries to understand why no records match
-                try:
-                    cursor.execute("SELECT COUNT(*) as count FROM follow_the_goat_buyins")
-                    total_buyins = cursor.fetchone()['count']
-                    
-                    cursor.execute("SELECT COUNT(*) as count FROM follow_the_goat_buyins WHERE price_cycle IS NOT NULL")
-                    buyins_with_price_cycle = cursor.fetchone()['count']
-                    
-                    cursor.execute("SELECT COUNT(*) as count FROM follow_the_goat_buyins WHERE potential_gains IS NULL")
-                    buyins_null_potential = cursor.fetchone()['count']
-                    
-                    cursor.execute("SELECT COUNT(*) as count FROM follow_the_goat_buyins WHERE our_entry_price IS NOT NULL AND our_entry_price > 0")
-                    buyins_valid_entry = cursor.fetchone()['count']
-                    
-                    cursor.execute("SELECT COUNT(*) as count FROM follow_the_goat_buyins WHERE higest_price_reached IS NOT NULL")
-                    buyins_with_highest = cursor.fetchone()['count']
-                    
-                    cursor.execute("SELECT COUNT(*) as count FROM cycle_tracker WHERE cycle_end_time IS NOT NULL AND threshold = %s", [THRESHOLD])
-                    completed_cycles = cursor.fetchone()['count']
-                    
-                    cursor.execute("SELECT COUNT(*) as count FROM cycle_tracker WHERE threshold = %s", [THRESHOLD])
-                    total_cycles = cursor.fetchone()['count']
-                    
-                    # Check what threshold values actually exist
-                    cursor.execute("SELECT DISTINCT threshold FROM cycle_tracker ORDER BY threshold")
-                    threshold_values = cursor.fetchall()
-                    threshold_list = [str(t['threshold']) for t in threshold_values] if threshold_values else []
-                    
-                    cursor.execute("""
-                        SELECT COUNT(*) as count
-                        FROM follow_the_goat_buyins buyins
-                        INNER JOIN cycle_tracker ct ON ct.id = buyins.price_cycle
-                        WHERE ct.cycle_end_time IS NOT NULL AND ct.threshold = %s
-                    """, [THRESHOLD])
-                    buyins_linked_to_completed = cursor.fetchone()['count']
-                    
-                    # Check for orphaned price_cycle references
-                    cursor.execute("""
-                        SELECT COUNT(*) as count
-                        FROM follow_the_goat_buyins buyins
-                        WHERE buyins.price_cycle IS NOT NULL
-                          AND NOT EXISTS (
-                              SELECT 1 FROM cycle_tracker ct WHERE ct.id = buyins.price_cycle
-                          )
-                    """)
-                    orphaned_buyins = cursor.fetchone()['count']
-                    
-                    # Check oldest completed cycle
-                    cursor.execute("""
-                        SELECT MIN(cycle_end_time) as oldest
-                        FROM cycle_tracker
-                        WHERE cycle_end_time IS NOT NULL AND threshold = %s
-                    """, [THRESHOLD])
-                    oldest_cycle_result = cursor.fetchone()
-                    oldest_cycle_str = str(oldest_cycle_result['oldest']) if oldest_cycle_result and oldest_cycle_result['oldest'] else "N/A"
-                    
-                    # CRITICAL CHECK: Are cycles assigned to trades using the WRONG threshold?
-                    cursor.execute("""
-                        SELECT COUNT(*) as count
-                        FROM follow_the_goat_buyins buyins
-                        INNER JOIN cycle_tracker ct ON ct.id = buyins.price_cycle
-                        WHERE ct.threshold != %s
-                          AND buyins.potential_gains IS NULL
-                          AND ct.cycle_end_time IS NOT NULL
-                    """, [THRESHOLD])
-                    wrong_threshold_cycles = cursor.fetchone()['count']
-                    
-                    if wrong_threshold_cycles > 0:
-                        # Get sample of wrong thresholds
-                        cursor.execute("""
-                            SELECT ct.threshold, COUNT(*) as cnt
-                            FROM follow_the_goat_buyins buyins
-                            INNER JOIN cycle_tracker ct ON ct.id = buyins.price_cycle
-                            WHERE ct.threshold != %s
-                              AND buyins.potential_gains IS NULL
-                              AND ct.cycle_end_time IS NOT NULL
-                            GROUP BY ct.threshold
-                        """, [THRESHOLD])
-                        wrong_samples = cursor.fetchall()
-                        wrong_threshold_str = ", ".join([f"{t['threshold']}({t['cnt']})" for t in wrong_samples])
-                    else:
-                        wrong_threshold_str = "none"
-                    
-                    logger.debug(f"Diagnostics - Total buyins: {total_buyins}, "
-                               f"With price_cycle: {buyins_with_price_cycle}, "
-                               f"NULL potential_gains: {buyins_null_potential}, "
-                               f"Valid entry price: {buyins_valid_entry}, "
-                               f"With higest_price_reached: {buyins_with_highest}, "
-                               f"Completed cycles (threshold={THRESHOLD}): {completed_cycles}/{total_cycles}, "
-                               f"Buyins linked to completed: {buyins_linked_to_completed}, "
-                               f"Buyins with WRONG threshold: {wrong_threshold_cycles} ({wrong_threshold_str}), "
-                               f"Orphaned price_cycle refs: {orphaned_buyins}, "
-                               f"Oldest completed cycle: {oldest_cycle_str}, "
-                               f"Available thresholds: {', '.join(threshold_list)}")
-                    
-                    # Warning if we have trades referencing cycles with wrong threshold
-                    if wrong_threshold_cycles > 0:
-                        logger.warning(f"Found {wrong_threshold_cycles} trades with cycles at WRONG threshold (not {THRESHOLD}): {wrong_threshold_str}. "
-                                     f"Trade creation uses hardcoded threshold={THRESHOLD} but cycle might have different threshold!")
-                    
-                    # Warning if we have orphaned references (cycles were cleaned up too early)
-                    if orphaned_buyins > 0:
-                        logger.warning(f"Found {orphaned_buyins} orphaned price_cycle references - cycles may have been cleaned up before trades were processed. "
-                                     f"Check cycle retention settings (should be 72h to match trades).")
-                except Exception as diag_error:
-                    logger.debug(f"Diagnostic queries failed (non-critical): {diag_error}")
-                
-                # Execute both queries and combine results
-                results = []
-                
-                # Get trades with existing cycles
-                cursor.execute(query_with_cycle, [THRESHOLD])
-                results_with_cycle = cursor.fetchall()
-                results.extend([(r['id'], r['potential_gains']) for r in results_with_cycle])
-                logger.debug(f"Found {len(results_with_cycle)} buyins with existing cycles")
-                
-                # Get orphaned trades (cycle archived/deleted)
-                cursor.execute(query_orphaned)
-                results_orphaned = cursor.fetchall()
-                results.extend([(r['id'], r['potential_gains']) for r in results_orphaned])
-                if results_orphaned:
-                    logger.info(f"Found {len(results_orphaned)} orphaned buyins (cycle archived) - using trade's own highest price")
-                
-                # CRITICAL: Check if there are trades that SHOULD match but don't
-                cursor.execute("""
-                    SELECT 
-                        buyins.id,
-                        buyins.price_cycle,
-                        ct.id as cycle_found,
-                        ct.threshold,
-                        ct.cycle_end_time,
-                        buyins.our_entry_price
-                    FROM follow_the_goat_buyins buyins
-                    LEFT JOIN cycle_tracker ct ON ct.id = buyins.price_cycle
-                    WHERE buyins.potential_gains IS NULL
-                      AND buyins.price_cycle IS NOT NULL
-                      AND buyins.our_entry_price IS NOT NULL
-                      AND buyins.our_entry_price > 0
-                      AND buyins.our_status IN ('sold', 'completed', 'no_go')
-                    LIMIT 5
-                """)
-                potential_missing = cursor.fetchall()
-                
-                if potential_missing:
-                    logger.warning(f"Found {len(potential_missing)} trades with NULL potential_gains that should be calculated:")
-                    for row in potential_missing:
-                        buyin_id = row['id']
-                        price_cycle = row['price_cycle']
-                        cycle_found = row['cycle_found']
-                        threshold = row['threshold']
-                        cycle_end_time = row['cycle_end_time']
-                        
-                        if cycle_found is None:
-                            logger.warning(f"  Buyin #{buyin_id}: price_cycle={price_cycle} NOT FOUND in cycle_tracker (orphaned)")
-                        elif cycle_end_time is None:
-                            logger.warning(f"  Buyin #{buyin_id}: price_cycle={price_cycle} threshold={threshold} - cycle NOT CLOSED yet")
-                        elif threshold != THRESHOLD:
-                            logger.warning(f"  Buyin #{buyin_id}: price_cycle={price_cycle} has WRONG threshold={threshold} (expected {THRESHOLD})")
-                        else:
-                            logger.warning(f"  Buyin #{buyin_id}: price_cycle={price_cycle} threshold={threshold} end={cycle_end_time} - SHOULD work but doesn't?")
-                
-                return results
+        if DIAGNOSTICS:
+            with get_postgres() as conn:
+                with conn.cursor() as cursor:
+                    _log_diagnostics(cursor)
+        
+        pending = postgres_arrow_table(query_pending, [THRESHOLD, TRAIL_WINDOW])
+        if pending.num_rows == 0:
+            return []
+        
+        times = pending['outcome_time'].to_numpy(zero_copy_only=False).astype('datetime64[us]')
+        entry = pending['entry_price'].to_numpy(zero_copy_only=False)
+        gains = np.full(pending.num_rows, np.nan)
+        
+        known = ~np.isnat(times)
+        if known.any():
+            # SOL prices from the last one at or before the earliest outcome time
+            prices = postgres_arrow_table("""
+                SELECT timestamp, price
+                FROM prices
+                WHERE token = 'SOL'
+                  AND timestamp >= COALESCE(
+                      (SELECT MAX(timestamp) FROM prices WHERE token = 'SOL' AND timestamp <= %s),
+                      '-infinity'
+                  )
+                  AND timestamp <= %s
+                ORDER BY timestamp
+            """, [times[known].min().item(), times[known].max().item()])
+            price_times = prices['timestamp'].to_numpy(zero_copy_only=False).astype('datetime64[us]')
+            price_values = prices['price'].to_numpy(zero_copy_only=False)
+            
+            idx = np.searchsorted(price_times, times, side='right') - 1
+            found = known & (idx >= 0)
+            if found.any():
+                end_price = price_values[idx[found]]
+                gains[found] = ((end_price - entry[found]) / entry[found]) * 100
+        
+        # Orphaned trades without price data fall back to higest_price_reached
+        fallback = pending['fallback_gains'].to_numpy(zero_copy_only=False).astype(np.float64)
+        gains = np.where(np.isnan(gains), fallback, gains)
+        
+        ready = ~np.isnan(gains)
+        ids = pending['id'].to_numpy(zero_copy_only=False)
+        results = list(zip(ids[ready].tolist(), gains[ready].tolist()))
+        
+        orphaned = int(np.count_nonzero(ready & pending['orphaned'].to_numpy(zero_copy_only=False)))
+        logger.debug(f"Found {len(results) - orphaned} buyins with existing cycles")
+        if orphaned:
+            logger.info(f"Found {orphaned} orphaned buyins (cycle archived) - using price 15 minutes after entry")
+        return results
     except Exception as e:
         logger.error(f"Error fetching records to update: {e}")
         import traceback
@@ -283,6 +325,34 @@ def get_records_to_update():
         return []
 
 
+def apply_potential_gains(records) -> int:
+    """
+    Write (buyin_id, potential_gains) pairs with a single UPDATE ... FROM (VALUES ...).
+    Rows that already have potential_gains are left alone.
+    
+    Returns:
+        int: Number of rows updated
+    """
+    if not records:
+        return 0
+    with get_postgres() as conn:
+        with conn.cursor() as cursor:
+            execute_values(
+                cursor,
+                """
+                UPDATE follow_the_goat_buyins AS buyins
+                SET potential_gains = v.potential_gains
+                FROM (VALUES %s) AS v(id, potential_gains)
+                WHERE buyins.id = v.id
+                  AND buyins.potential_gains IS NULL
+                """,
+                records,
+                template="(%s::bigint, %s::float8)",
+                page_size=len(records),
+            )
+            return cursor.rowcount
+
+
 def update_potential_gains_postgres(record_id: int, potential_gains_value: float) -> bool:
     """
     Update potential_gains in PostgreSQL for a specific record.
@@ -323,23 +393,12 @@ def update_all_potential_gains() -> dict:
             "failed": 0
         }
     
-    updated_count = 0
-    failed_count = 0
-    
-    for record_id, potential_gains_value in records:
-        if potential_gains_value is not None:
-            # PostgreSQL only
-            pg_ok = update_potential_gains_postgres(record_id, potential_gains_value)
-            
-            if pg_ok:
-                updated_count += 1
-                logger.debug(f"Updated record {record_id} with potential_gains: {potential_gains_value:.2f}%")
-            else:
-                failed_count += 1
-                logger.warning(f"Update failed for record {record_id}")
-        else:
-            logger.debug(f"Skipping record {record_id} - calculated value is NULL")
-            failed_count += 1
+    try:
+        updated_count = apply_potential_gains(records)
+    except Exception as e:
+        logger.error(f"PostgreSQL bulk update error: {e}")
+        updated_count = 0
+    failed_count = len(records) - updated_count
     
     result = {
         "success": True,
@@ -31,7 +31,6 @@ import json
 import logging
 import sys
 import time
-from itertools import combinations as iter_combinations
 from pathlib import Path
 from datetime import datetime, timezone, timedelta
 from typing import Dict, List, Any, Optional, Tuple
@@ -45,6 +44,8 @@ PROJECT_ROOT = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
 
 from core.database import get_postgres
+from core.filter_plan import FilterLayout, compile_filter_plan, frame_matrix
+from core.filter_search import ComboSearch
 
 # Setup logging
 logger = logging.getLogger("create_new_patterns")
@@ -95,6 +96,9 @@ ABSOLUTE_PRICE_COLUMNS = frozenset([
 # Train/test split ratio
 TRAIN_FRAC = 0.70
 
+# Exhaustive combo search: (combo size, top-N ranked features to draw from)
+COMBO_SEARCH_LEVELS = [(2, 30), (3, 20), (4, 15)]
+
 
 def _read_from_postgres(query: str, params: list = None) -> list:
     """Execute a read query on PostgreSQL.
@@ -178,6 +182,8 @@ def load_config() -> Dict[str, Any]:
         "percentile_high": 90,
         "skip_columns": [],
         "is_ratio": False,
+        "combo_search_levels": COMBO_SEARCH_LEVELS,
+        "combo_search_workers": 1,
         "section_prefixes": {
             "pm_": "price_movements",
             "tx_": "transactions",
@@ -208,7 +214,7 @@ def load_config() -> Dict[str, Any]:
                     value = row['setting_value']
                     
                     # Parse JSON fields
-                    if key in ['skip_columns', 'section_prefixes']:
+                    if key in ['skip_columns', 'section_prefixes', 'combo_search_levels']:
                         try:
                             config[key] = json.loads(value) if value else defaults[key]
                         except (json.JSONDecodeError, TypeError):
@@ -228,7 +234,8 @@ def load_config() -> Dict[str, Any]:
                         else:
                             config[key] = str(value).strip().lower() in ['1', 'true', 'yes', 'on']
                     # Parse integer fields
-                    elif key in ['analysis_hours', 'min_filters_in_combo', 'max_filters_in_combo']:
+                    elif key in ['analysis_hours', 'min_filters_in_combo', 'max_filters_in_combo',
+                                'combo_search_workers']:
                         try:
                             config[key] = int(value) if value else defaults[key]
                         except (ValueError, TypeError):
@@ -328,11 +335,35 @@ def _compute_raw_features_at(con, ts, window_min: int = 5) -> Optional[Dict[str,
         return None
 
 
+# Per-buyin raw features in the feature store; the raw cache lags a few minutes
+GATEWAY_FEATURE_SET = 'gateway_raw_5m'
+GATEWAY_FEATURE_SETTLE_SECONDS = 600
+
+
+def _compute_gateway_features(buyins: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Feature-store compute hook: raw features for each new buyin (None -> skipped)."""
+    from core.raw_data_cache import open_reader
+
+    con = open_reader()
+    rows = []
+    try:
+        for b in buyins:
+            # Ensure timezone-aware for Parquet timestamps
+            ts = b['followed_at'].replace(tzinfo=timezone.utc)
+            feats = _compute_raw_features_at(con, ts, window_min=5)
+            if feats is not None:
+                rows.append({'buyin_id': b['buyin_id'], **feats})
+    finally:
+        con.close()
+    return rows
+
+
 def load_trade_data(engine=None, hours: int = 24) -> pd.DataFrame:
-    """Load gateway filter training data from raw Parquet cache + follow_the_goat_buyins.
+    """Load gateway filter training data from the feature store.
 
     For each real copy-trade in the last N hours:
-      1. Look up raw OB/trade/whale features in a 5-min window ending at followed_at
+      1. Raw OB/trade/whale features in a 5-min window ending at followed_at,
+         computed once per buyin and kept in the feature store
       2. Label: is_good = potential_gains >= good_trade_threshold
 
     The `engine` parameter is accepted for API compatibility but is not used.
@@ -341,73 +372,47 @@ def load_trade_data(engine=None, hours: int = 24) -> pd.DataFrame:
     config = load_config()
     threshold = float(config.get('good_trade_threshold', 0.3))
 
-    from core.raw_data_cache import OB_PARQUET, open_reader
+    from core.feature_store import get_feature_store
+    from core.raw_data_cache import OB_PARQUET
 
     if not OB_PARQUET.exists() or OB_PARQUET.stat().st_size < 10_000:
         logger.warning("Raw Parquet not ready — no gateway filter data available")
         return pd.DataFrame()
 
-    # Load real buyins with confirmed outcomes
-    logger.info("  Loading follow_the_goat_buyins from PostgreSQL...")
+    store = get_feature_store()
+    store.sync()
+    added = store.sync_derived(GATEWAY_FEATURE_SET, _compute_gateway_features,
+                               settle_seconds=GATEWAY_FEATURE_SETTLE_SECONDS)
+
+    # Real buyins with confirmed outcomes
     cutoff = datetime.now(timezone.utc) - timedelta(hours=hours)
-    with get_postgres() as conn:
-        with conn.cursor() as cursor:
-            cursor.execute("""
-                SELECT id, followed_at, potential_gains
-                FROM follow_the_goat_buyins
-                WHERE followed_at >= %s
-                  AND potential_gains IS NOT NULL
-                  AND wallet_address NOT LIKE 'TRAINING_TEST_%%'
-                  AND wallet_address NOT LIKE 'PUMP_V4_%%'
-                ORDER BY followed_at
-            """, [cutoff])
-            buyins = cursor.fetchall()
-
-    if not buyins:
-        logger.warning("No real buyins with outcomes found")
+    df = store.load_derived(
+        GATEWAY_FEATURE_SET, since=cutoff,
+        buyin_columns=['followed_at', 'potential_gains', 'wallet_address'],
+    ).to_pandas()
+    if not df.empty:
+        wallets = df.pop('wallet_address').fillna('')
+        df = df[~(wallets.str.startswith('TRAINING_TEST_') | wallets.str.startswith('PUMP_V4_'))]
+
+    if df.empty:
+        logger.warning("No real buyins with outcomes and raw features found")
         return pd.DataFrame()
 
-    logger.info(f"  {len(buyins)} buyins found — computing raw features...")
-    con = open_reader()
+    df = df.rename(columns={'buyin_id': 'trade_id'})
+    df['followed_at'] = df['followed_at'].dt.tz_localize(timezone.utc)
+    df.insert(3, 'is_good', (df['potential_gains'] >= threshold).astype(int))
+    df.insert(4, 'minute', 0)
+    df = df.reset_index(drop=True)
 
-    rows = []
-    skipped = 0
-    for b in buyins:
-        ts = b['followed_at']
-        # Ensure timezone-aware for Parquet timestamps
-        if ts.tzinfo is None:
-            ts = ts.replace(tzinfo=timezone.utc)
-        feats = _compute_raw_features_at(con, ts, window_min=5)
-        if feats is None:
-            skipped += 1
-            continue
-        rows.append({
-            'trade_id':       b['id'],
-            'followed_at':    ts,
-            'potential_gains': float(b['potential_gains']),
-            'is_good':        int(float(b['potential_gains']) >= threshold),
-            'minute':         0,
-            **feats,
-        })
-
-    con.close()
-
-    if not rows:
-        logger.warning(f"No feature rows computed (skipped {skipped}/{len(buyins)})")
-        return pd.DataFrame()
-
-    df = pd.DataFrame(rows)
     elapsed = time.time() - t0
     good = int(df['is_good'].sum())
     logger.info(
-        f"  {len(df)} rows computed in {elapsed:.1f}s "
-        f"(good={good}, bad={len(df)-good}, skipped={skipped})"
+        f"  {len(df)} rows loaded in {elapsed:.1f}s "
+        f"(good={good}, bad={len(df)-good}, {added} new feature rows)"
     )
     return df
 
 
-
-
 def get_filterable_columns(df: pd.DataFrame) -> List[str]:
     """
     Get list of numeric columns suitable for filtering.
@@ -618,59 +623,30 @@ def rank_and_range_features(
     return results
 
 
+def _frame_column_slot(filter_row: Dict[str, Any]) -> Tuple[str, int, str, str]:
+    """Filter-plan slot for a flat DataFrame column (no section/minute lookup)."""
+    column = filter_row['field_column']
+    return ('frame', 0, column, column)
+
+
 def precompute_filter_masks(
     df: pd.DataFrame,
     ranked_features: List[Dict[str, Any]],
 ) -> Dict[str, np.ndarray]:
-    """Pre-compute boolean pass/fail masks for each filter."""
-    masks = {}
-    for feat in ranked_features:
-        col = feat['column']
-        if col not in df.columns:
-            continue
-        vals = df[col].values
-        masks[col] = (vals >= feat['from']) & (vals <= feat['to'])
-    return masks
-
-
-def score_combo_fast(
-    combo_cols: Tuple[str, ...],
-    masks: Dict[str, np.ndarray],
-    is_good: np.ndarray,
-    is_bad: np.ndarray,
-    n_total: int,
-) -> Optional[Dict[str, float]]:
-    """
-    Score a filter combination using pre-computed masks.
-    Returns metrics dict or None if combo has too few passing trades.
+    """Pre-compute boolean pass/fail masks for each filter.
+    
+    Evaluated with the compiled filter-plan engine pattern_validator uses
+    live (NULL/NaN fails, like include_null=0 on the synced filters).
     """
-    combined = masks[combo_cols[0]]
-    for col in combo_cols[1:]:
-        combined = combined & masks[col]
-
-    good_after = int((is_good & combined).sum())
-    bad_after = int((is_bad & combined).sum())
-    total_after = good_after + bad_after
-
-    if total_after < 5:
-        return None
-
-    good_before = int(is_good.sum())
-    bad_before = int(is_bad.sum())
-
-    precision = good_after / total_after * 100 if total_after else 0
-    good_kept_pct = good_after / good_before * 100 if good_before else 0
-    bad_removed_pct = (bad_before - bad_after) / bad_before * 100 if bad_before else 0
-    pass_rate = total_after / n_total * 100
-
-    return {
-        'precision': round(precision, 2),
-        'good_kept_pct': round(good_kept_pct, 2),
-        'bad_removed_pct': round(bad_removed_pct, 2),
-        'pass_rate': round(pass_rate, 2),
-        'good_after': good_after,
-        'bad_after': bad_after,
-    }
+    features = [feat for feat in ranked_features if feat['column'] in df.columns]
+    layout = FilterLayout()
+    plan = compile_filter_plan(0, [
+        {'id': i, 'field_column': feat['column'], 'from_value': feat['from'], 'to_value': feat['to']}
+        for i, feat in enumerate(features)
+    ], _frame_column_slot, layout)
+    values, states = frame_matrix(layout, df, plan.slots.tolist())
+    passed = plan.evaluate(values, states)
+    return {feat['column']: passed[:, i] for i, feat in enumerate(features)}
 
 
 def find_best_combo_for_minute(
@@ -679,13 +655,18 @@ def find_best_combo_for_minute(
     columns: List[str],
     minute: int,
     threshold: float,
+    levels: Optional[List[Tuple[int, int]]] = None,
+    workers: int = 1,
 ) -> Optional[Dict[str, Any]]:
     """
     Find the best filter combination for a specific minute using:
     1. Cohen's d ranking on train data
-    2. Exhaustive combo search (pairs, triples, quads)
+    2. Exhaustive combo search (pairs, triples, quads -- see COMBO_SEARCH_LEVELS)
     3. Validation on test data (must beat baseline precision)
     
+    `levels` overrides the (size, top-N) search levels; `workers` > 1 runs
+    the search on a process pool.
+    
     Returns the best combo dict or None.
     """
     # Rank features on training data
@@ -695,11 +676,9 @@ def find_best_combo_for_minute(
 
     # Pre-compute masks
     is_good_train = (df_train['potential_gains'] >= threshold).values
-    is_bad_train = ~is_good_train
     n_train = len(df_train)
 
     is_good_test = (df_test['potential_gains'] >= threshold).values
-    is_bad_test = ~is_good_test
     n_test = len(df_test)
 
     baseline_train = is_good_train.sum() / n_train * 100 if n_train > 0 else 0
@@ -708,25 +687,17 @@ def find_best_combo_for_minute(
     masks_train = precompute_filter_masks(df_train, ranked)
     masks_test = precompute_filter_masks(df_test, ranked)
 
-    candidates = []  # (test_precision, combo_dict)
+    search = ComboSearch(
+        columns=[r['column'] for r in ranked],
+        masks_train=masks_train, is_good_train=is_good_train,
+        masks_test=masks_test, is_good_test=is_good_test,
+        min_passing=5, min_good_kept_pct=3,
+        baseline_train=baseline_train, baseline_test=baseline_test,
+    )
 
-    def test_combo(cols: Tuple[str, ...]):
-        if not all(c in masks_train and c in masks_test for c in cols):
-            return
-
-        # Score on train -- must beat baseline
-        train_m = score_combo_fast(cols, masks_train, is_good_train, is_bad_train, n_train)
-        if train_m is None or train_m['precision'] <= baseline_train:
-            return
-        # Must keep at least 3% of good trades on train
-        if train_m['good_kept_pct'] < 3:
-            return
-
-        # Score on test -- must beat baseline
-        test_m = score_combo_fast(cols, masks_test, is_good_test, is_bad_test, n_test)
-        if test_m is None or test_m['precision'] <= baseline_test:
-            return
+    candidates = []  # (test_precision, combo_dict)
 
+    def add_candidate(cols: Tuple[str, ...], train_m: Dict[str, float], test_m: Dict[str, float]):
         overfit = round(train_m['precision'] - test_m['precision'], 2)
 
         candidates.append({
@@ -744,24 +715,18 @@ def find_best_combo_for_minute(
             'ranked_features': ranked,  # Keep for range lookup
         })
 
-    # Get column names at various top-N levels
-    top30 = [r['column'] for r in ranked[:30]]
-    top20 = [r['column'] for r in ranked[:20]]
-    top15 = [r['column'] for r in ranked[:15]]
-
-    # Exhaustive pairs from top 30
-    for combo in iter_combinations(top30, 2):
-        test_combo(combo)
-
-    # Exhaustive triples from top 20
-    for combo in iter_combinations(top20, 3):
-        test_combo(combo)
+    def test_combo(cols: Tuple[str, ...]):
+        hit = search.evaluate(cols)
+        if hit is not None:
+            add_candidate(cols, *hit)
 
-    # Exhaustive quads from top 15
-    for combo in iter_combinations(top15, 4):
-        test_combo(combo)
+    # Exhaustive search (default: pairs from top 30, triples from top 20,
+    # quads from top 15) -- bitset DFS with pruning, same results and order
+    for cols, train_m, test_m in search.search(levels or COMBO_SEARCH_LEVELS, workers=workers):
+        add_candidate(cols, train_m, test_m)
 
     # Greedy 5-6 expansion from best quads
+    top20 = [r['column'] for r in ranked[:20]]
     quad_candidates = [c for c in candidates if c['n_filters'] == 4]
     if quad_candidates:
         best_quads = sorted(quad_candidates, key=lambda x: x['test_precision'], reverse=True)[:5]
@@ -1223,6 +1188,9 @@ def run() -> Dict[str, Any]:
         
         # Step 4: Search for best combo across all minutes
         logger.info("\n[Step 3/6] Exhaustive combo search across minutes...")
+        search_levels = [tuple(lv) for lv in config.get('combo_search_levels') or COMBO_SEARCH_LEVELS]
+        search_workers = max(1, int(config.get('combo_search_workers') or 1))
+        logger.info(f"  Search levels (size, top-N): {search_levels} | workers: {search_workers}")
         
         all_suggestions = []
         best_combo_overall = None
@@ -1268,7 +1236,8 @@ def run() -> Dict[str, Any]:
             
             # Find best combo for this minute
             combo = find_best_combo_for_minute(
-                df_train_min, df_test_min, filterable_columns, minute, threshold
+                df_train_min, df_test_min, filterable_columns, minute, threshold,
+                levels=search_levels, workers=search_workers,
             )
             
             if combo:
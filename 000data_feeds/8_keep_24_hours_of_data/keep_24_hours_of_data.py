@@ -5,9 +5,12 @@ Archives PostgreSQL data older than 24 hours to Parquet files.
 
 This script:
 1. Identifies transactional data older than 24 hours
-2. Exports to compressed Parquet files (organized by table and date)
-3. Deletes archived data from PostgreSQL
-4. Preserves all configuration tables (never archived)
+2. Streams it (COPY, core.database.postgres_arrow_batches) into Arrow record batches
+3. Writes new part files into a Hive-partitioned dataset per table
+   (<subdir>/<table>/date=YYYY-MM-DD/hour=H/part-<run>.parquet) -- earlier
+   parts are never read back or rewritten, so memory stays flat
+4. Deletes archived data from PostgreSQL in bounded batches
+5. Preserves all configuration tables (never archived)
 
 Triggered by: master2.py (hourly via APScheduler)
 Storage: /root/follow_the_goat/archived_data/
@@ -17,10 +20,14 @@ Usage:
     python 000data_feeds/8_keep_24_hours_of_data/keep_24_hours_of_data.py
     
     # Or via master2.py (automated)
+
+    # Query the archive directly
+    duckdb.sql(f"SELECT * FROM read_parquet('{archive_glob('prices')}', hive_partitioning=true)")
 """
 
 import sys
 import os
+import uuid
 from pathlib import Path
 from datetime import datetime, timezone, timedelta
 from typing import Dict, List, Optional, Tuple
@@ -30,8 +37,7 @@ import logging
 PROJECT_ROOT = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
 
-from core.database import get_postgres, postgres_execute
-import pandas as pd
+from core.database import postgres_arrow_batches, postgres_execute
 import pyarrow as pa
 import pyarrow.parquet as pq
 
@@ -43,6 +49,8 @@ ARCHIVE_BASE_DIR = PROJECT_ROOT / "archived_data"
 RETENTION_HOURS = 24  # Keep last 24 hours in PostgreSQL
 COMPRESSION = 'snappy'  # Parquet compression algorithm
 DRY_RUN = os.getenv("ARCHIVE_DRY_RUN", "0") == "1"  # Set to 1 to test without deleting
+FETCH_BLOCK_BYTES = int(os.getenv("ARCHIVE_FETCH_BLOCK_BYTES", str(4 << 20)))  # CSV bytes per Arrow batch
+DELETE_BATCH_ROWS = int(os.getenv("ARCHIVE_DELETE_BATCH_ROWS", "50000"))  # rows per DELETE transaction
 
 # =============================================================================
 # LOGGING
@@ -104,10 +112,106 @@ def ensure_archive_directories():
     
     logger.info(f"Archive base directory: {ARCHIVE_BASE_DIR}")
 
+
+def table_archive_dir(table_name: str) -> Path:
+    """Root of a table's Hive-partitioned dataset (date=/hour= below it)."""
+    return ARCHIVE_BASE_DIR / ARCHIVABLE_TABLES[table_name][1] / table_name
+
+
+def archive_glob(table_name: str) -> str:
+    """Glob over every archived part of a table (for DuckDB read_parquet)."""
+    return str(table_archive_dir(table_name) / "date=*" / "hour=*" / "*.parquet")
+
+# =============================================================================
+# PARTITIONED PARQUET WRITER
+# =============================================================================
+
+class _HourlyPartWriter:
+    """Writes time-ordered batches into date=/hour= part files of one table.
+
+    Each run writes its own part file per hour it touches (written as .tmp and
+    renamed on close, so readers never see half-written files). Existing parts
+    are left untouched.
+    """
+
+    def __init__(self, table_dir: Path, timestamp_column: str, run_id: str):
+        self.table_dir = table_dir
+        self.timestamp_column = timestamp_column
+        self.run_id = run_id
+        self.files: List[Path] = []
+        self.rows_written = 0
+        self._key: Optional[Tuple[str, int]] = None
+        self._writer: Optional[pq.ParquetWriter] = None
+        self._tmp_path: Optional[Path] = None
+
+    def write(self, batch: pa.RecordBatch) -> None:
+        keys = [self._hour_key(ts) for ts in batch.column(self.timestamp_column).to_pylist()]
+        start = 0
+        for i in range(1, len(keys) + 1):
+            if i == len(keys) or keys[i] != keys[start]:
+                self._write_run(batch.slice(start, i - start), keys[start])
+                start = i
+
+    def close(self) -> None:
+        if self._writer is None:
+            return
+        self._writer.close()
+        final_path = self._tmp_path.with_suffix('')
+        self._tmp_path.rename(final_path)
+        self.files.append(final_path)
+        self._writer, self._tmp_path, self._key = None, None, None
+
+    def abort(self) -> None:
+        """Remove everything this run wrote (so a retry doesn't duplicate rows)."""
+        if self._writer is not None:
+            self._writer.close()
+            self._tmp_path.unlink(missing_ok=True)
+            self._writer, self._tmp_path, self._key = None, None, None
+        for path in self.files:
+            path.unlink(missing_ok=True)
+        self.files = []
+
+    @property
+    def bytes_written(self) -> int:
+        return sum(p.stat().st_size for p in self.files)
+
+    @staticmethod
+    def _hour_key(ts: datetime) -> Tuple[str, int]:
+        return ts.strftime('%Y-%m-%d'), ts.hour
+
+    def _write_run(self, batch: pa.RecordBatch, key: Tuple[str, int]) -> None:
+        if key != self._key:
+            self.close()
+            part_dir = self.table_dir / f"date={key[0]}" / f"hour={key[1]}"
+            part_dir.mkdir(parents=True, exist_ok=True)
+            self._tmp_path = part_dir / f"part-{self.run_id}.parquet.tmp"
+            self._writer = pq.ParquetWriter(self._tmp_path, batch.schema, compression=COMPRESSION)
+            self._key = key
+        self._writer.write_batch(batch)
+        self.rows_written += batch.num_rows
+
 # =============================================================================
 # ARCHIVAL LOGIC
 # =============================================================================
 
+def delete_archived_rows(table_name: str, timestamp_column: str, cutoff_time: datetime) -> int:
+    """Delete rows older than cutoff in bounded batches (one short transaction each)."""
+    delete_query = f"""
+        DELETE FROM {table_name}
+        WHERE ctid = ANY(ARRAY(
+            SELECT ctid FROM {table_name}
+            WHERE {timestamp_column} < %s
+            LIMIT %s
+        ))
+    """
+    total = 0
+    while True:
+        deleted = postgres_execute(delete_query, [cutoff_time, DELETE_BATCH_ROWS])
+        total += deleted
+        if deleted < DELETE_BATCH_ROWS:
+            return total
+
+
 def archive_table_data(
     table_name: str,
     timestamp_column: str,
@@ -117,9 +221,9 @@ def archive_table_data(
     Archive data from a single table to Parquet.
     
     Process:
-    1. Query data older than RETENTION_HOURS
-    2. Save to Parquet file (date-based naming)
-    3. Delete archived rows from PostgreSQL
+    1. Stream data older than RETENTION_HOURS through COPY as Arrow batches
+    2. Append each chunk to the hourly part files of the table's dataset
+    3. Delete archived rows from PostgreSQL in bounded batches
     4. Return stats
     
     Args:
@@ -137,90 +241,49 @@ def archive_table_data(
         'rows_deleted': 0,
         'file_size_bytes': 0,
         'file_path': None,
+        'files_written': 0,
         'error': None
     }
     
+    cutoff_time = datetime.now(timezone.utc) - timedelta(hours=RETENTION_HOURS)
+    run_id = f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    table_dir = ARCHIVE_BASE_DIR / subdirectory / table_name
+    writer = _HourlyPartWriter(table_dir, timestamp_column, run_id)
+    deleting = False
+
     try:
-        # STEP 1: Query old data
-        cutoff_time = datetime.now(timezone.utc) - timedelta(hours=RETENTION_HOURS)
-        
+        # STEP 1+2: Stream old data into hourly part files
         logger.info(f"Archiving {table_name}: data older than {cutoff_time.isoformat()}")
         
-        with get_postgres() as conn:
-            with conn.cursor() as cursor:
-                # Query old data
-                query = f"""
-                    SELECT * FROM {table_name}
-                    WHERE {timestamp_column} < %s
-                    ORDER BY {timestamp_column}
-                """
-                cursor.execute(query, [cutoff_time])
-                rows = cursor.fetchall()
-                stats['rows_queried'] = len(rows)
+        # COPY straight into Arrow record batches: only one block in memory
+        for batch in postgres_arrow_batches(f"""
+            SELECT * FROM {table_name}
+            WHERE {timestamp_column} < %s
+            ORDER BY {timestamp_column}
+        """, [cutoff_time], block_bytes=FETCH_BLOCK_BYTES):
+            stats['rows_queried'] += batch.num_rows
+            writer.write(batch)
+        writer.close()
         
         if stats['rows_queried'] == 0:
             logger.debug(f"No old data to archive from {table_name}")
             return stats
         
-        logger.info(f"Found {stats['rows_queried']} rows to archive from {table_name}")
-        
-        # STEP 2: Convert to DataFrame and save to Parquet
-        df = pd.DataFrame(rows)
-        
-        # Serialize any object/mixed-type columns (lists, dicts, etc.) to JSON strings
-        # so PyArrow can handle them without type errors
-        import json
-        for col in df.columns:
-            if df[col].dtype == object:
-                def _to_json(v):
-                    if v is None:
-                        return None
-                    if isinstance(v, (list, dict)):
-                        return json.dumps(v)
-                    return v
-                df[col] = df[col].map(_to_json)
-        
-        # Generate filename with current date
-        date_str = datetime.now(timezone.utc).strftime('%Y-%m-%d')
-        filename = f"{table_name}_{date_str}.parquet"
-        file_path = ARCHIVE_BASE_DIR / subdirectory / filename
-        
-        # Ensure parent directory exists
-        file_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        # Check if file exists (append mode)
-        if file_path.exists():
-            logger.info(f"Appending to existing file: {file_path}")
-            # Read existing data
-            existing_df = pd.read_parquet(file_path)
-            # Combine with new data
-            df = pd.concat([existing_df, df], ignore_index=True)
-            logger.info(f"Combined {len(existing_df)} existing + {stats['rows_queried']} new rows")
-        
-        # Write to Parquet with compression
-        df.to_parquet(
-            file_path,
-            compression=COMPRESSION,
-            index=False,
-            engine='pyarrow'
-        )
-        
-        stats['rows_archived'] = stats['rows_queried']
-        stats['file_size_bytes'] = file_path.stat().st_size
-        stats['file_path'] = str(file_path)
+        stats['rows_archived'] = writer.rows_written
+        stats['files_written'] = len(writer.files)
+        stats['file_size_bytes'] = writer.bytes_written
+        stats['file_path'] = str(table_dir)
         
         logger.info(
-            f"Archived {stats['rows_archived']} rows to {file_path} "
+            f"Archived {stats['rows_archived']} rows from {table_name} into "
+            f"{stats['files_written']} part file(s) under {table_dir} "
             f"({stats['file_size_bytes'] / 1024 / 1024:.2f} MB)"
         )
         
         # STEP 3: Delete archived data from PostgreSQL
         if not DRY_RUN:
-            delete_query = f"""
-                DELETE FROM {table_name}
-                WHERE {timestamp_column} < %s
-            """
-            rows_deleted = postgres_execute(delete_query, [cutoff_time])
+            deleting = True
+            rows_deleted = delete_archived_rows(table_name, timestamp_column, cutoff_time)
             stats['rows_deleted'] = rows_deleted
             
             logger.info(f"Deleted {rows_deleted} rows from {table_name}")
@@ -236,6 +299,9 @@ def archive_table_data(
         return stats
         
     except Exception as e:
+        # Nothing deleted yet: drop this run's parts so the next run doesn't duplicate them
+        if not deleting:
+            writer.abort()
         stats['error'] = str(e)
         logger.error(f"Error archiving {table_name}: {e}", exc_info=True)
         return stats
@@ -0,0 +1,356 @@
+"""
+Bundle Detector
+===============
+In-memory sliding-window bundle detection for follow_the_goat plays with
+bundle_trades enabled ("N distinct wallets buying within X seconds").
+
+Buy trades are fed in once (pushed trade events, or the catch-up query) and
+kept in one time-ordered stream per perp mode (any / long_only / short_only),
+restricted to wallets some bundle play watches and to the longest
+window_seconds among those plays. Evaluating a play is a two-pointer sweep
+over its wallets' earliest in-window buys, so neither a configuration
+refresh nor a new trade needs a sol_stablecoin_trades scan per play.
+
+Selection is the same as the per-play SQL filter it replaces:
+- each wallet counts once, at its earliest buy inside window_seconds
+- a cluster is every wallet whose earliest buy lies in [t, t + seconds],
+  where t is some wallet's earliest buy (forward-only window)
+- the largest cluster wins (it must reach num_wallets); on a tie, the
+  cluster whose starting wallet traded most recently
+
+Usage:
+    detector = BundleDetector()
+    detector.register_play(play_id, wallets, bundle_config, perp_mode)
+    detector.retain_plays(active_bundle_play_ids)
+    touched = detector.add_trades([(trade_id, wallet, ts_us, perp_direction), ...])
+    results = detector.evaluate_many(touched)   # {play_id: (wallets, context)}
+"""
+
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+PERP_MODES = ('any', 'long_only', 'short_only')
+# perp_direction value each filtered stream accepts (same test as the SQL filter)
+_PERP_DIRECTIONS = {'long': 'long_only', 'short': 'short_only'}
+_US = 1_000_000
+_EPOCH = datetime(1970, 1, 1)
+
+
+def parse_bundle_config(bundle_config: Dict[str, Any]) -> Tuple[int, int, int]:
+    """Return (required_wallets, seconds, window_seconds) with the usual defaults and floors."""
+    try:
+        required_wallets = int(bundle_config.get('num_wallets', bundle_config.get('num_trades', 3)))
+    except (TypeError, ValueError):
+        required_wallets = 3
+    required_wallets = max(required_wallets, 1)
+
+    try:
+        seconds_threshold = int(bundle_config.get('seconds', 5))
+    except (TypeError, ValueError):
+        seconds_threshold = 5
+    seconds_threshold = max(seconds_threshold, 1)
+
+    try:
+        window_seconds = int(bundle_config.get('window_seconds', 600))
+    except (TypeError, ValueError):
+        window_seconds = 600
+    window_seconds = max(window_seconds, seconds_threshold)
+
+    return required_wallets, seconds_threshold, window_seconds
+
+
+def to_epoch_us(ts: datetime) -> int:
+    """Microseconds since the epoch (naive timestamps are UTC, as stored in PostgreSQL)."""
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return (ts - _EPOCH) // timedelta(microseconds=1)
+
+
+def _from_epoch_us(ts_us: int) -> datetime:
+    """Naive UTC datetime, like trade_timestamp read from PostgreSQL."""
+    return _EPOCH + timedelta(microseconds=ts_us)
+
+
+# =============================================================================
+# STREAMS AND PLAYS
+# =============================================================================
+
+class _PerpStream:
+    """Buys from watched wallets for one perp mode, oldest first."""
+
+    def __init__(self) -> None:
+        self.trades: Deque[Tuple[int, str, int]] = deque()  # (ts_us, wallet, trade_id)
+        self.by_wallet: Dict[str, Deque[int]] = {}          # wallet -> buy times, ascending
+        self.ids: Set[int] = set()
+        self.wallet_plays: Dict[str, Set[int]] = {}         # watched wallet -> play ids
+        self.horizon_us = 0
+
+    def add(self, trade_id: int, wallet: str, ts_us: int) -> Optional[Set[int]]:
+        """Store one buy; returns the plays watching the wallet, or None if ignored."""
+        plays = self.wallet_plays.get(wallet)
+        if not plays or trade_id in self.ids:
+            return None
+        item = (ts_us, wallet, trade_id)
+        if not self.trades or self.trades[-1] <= item:
+            self.trades.append(item)
+        else:
+            insort(self.trades, item)
+        times = self.by_wallet.get(wallet)
+        if times is None:
+            self.by_wallet[wallet] = deque((ts_us,))
+        elif times[-1] <= ts_us:
+            times.append(ts_us)
+        else:
+            insort(times, ts_us)
+        self.ids.add(trade_id)
+        return plays
+
+    def expire(self, now_us: int) -> None:
+        cutoff = now_us - self.horizon_us
+        trades = self.trades
+        while trades and trades[0][0] < cutoff:
+            _, wallet, trade_id = trades.popleft()
+            self.ids.discard(trade_id)
+            times = self.by_wallet[wallet]
+            times.popleft()
+            if not times:
+                del self.by_wallet[wallet]
+
+    def forget(self, wallets: Set[str]) -> None:
+        """Drop everything held for wallets no play watches any more."""
+        if not wallets:
+            return
+        for wallet in wallets:
+            self.by_wallet.pop(wallet, None)
+        kept: Deque[Tuple[int, str, int]] = deque()
+        for item in self.trades:
+            if item[1] in wallets:
+                self.ids.discard(item[2])
+            else:
+                kept.append(item)
+        self.trades = kept
+
+
+class _BundlePlay:
+    __slots__ = ('play_id', 'wallets', 'wallet_set', 'required', 'seconds_us', 'window_us', 'perp_mode')
+
+    def __init__(self, play_id: int, wallets: List[str], bundle_config: Dict[str, Any], perp_mode: str):
+        required, seconds, window_seconds = parse_bundle_config(bundle_config)
+        self.play_id = play_id
+        self.wallets = list(wallets)
+        self.wallet_set = set(wallets)
+        self.required = required
+        self.seconds_us = seconds * _US
+        self.window_us = window_seconds * _US
+        self.perp_mode = perp_mode if perp_mode in PERP_MODES else 'any'
+
+
+# =============================================================================
+# DETECTOR
+# =============================================================================
+
+class BundleDetector:
+    """
+    Shared bundle state for all bundle plays.
+
+    Thread-safe: trades may be added from the push listener thread while the
+    main loop registers plays or evaluates them.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._streams: Dict[str, _PerpStream] = {mode: _PerpStream() for mode in PERP_MODES}
+        self._plays: Dict[int, _BundlePlay] = {}
+        # Highest trade id loaded by the catch-up query; reset to 0 whenever
+        # newly watched wallets (or a longer window) need the full horizon
+        self.synced_trade_id = 0
+        self.stats = {'trades_added': 0, 'evaluations': 0}
+
+    # -------------------------------------------------------------------------
+    # Configuration
+    # -------------------------------------------------------------------------
+
+    def register_play(
+        self,
+        play_id: int,
+        wallet_addresses: List[str],
+        bundle_config: Dict[str, Any],
+        perp_mode: str,
+    ) -> None:
+        """Add or update a play (its candidate wallets and bundle settings)."""
+        play = _BundlePlay(play_id, [w for w in wallet_addresses if w], bundle_config, perp_mode)
+        with self._lock:
+            old = self._plays.get(play_id)
+            self._plays[play_id] = play
+            stream = self._streams[play.perp_mode]
+            needs_history = play.window_us > stream.horizon_us
+            for wallet in play.wallet_set:
+                plays = stream.wallet_plays.setdefault(wallet, set())
+                if not plays:
+                    needs_history = True
+                plays.add(play_id)
+            if old is not None:
+                keep = play.wallet_set if old.perp_mode == play.perp_mode else set()
+                self._detach(old, keep)
+            self._update_horizon(stream)
+            if needs_history:
+                self.synced_trade_id = 0
+
+    def retain_plays(self, play_ids: Iterable[int]) -> None:
+        """Forget every play not in play_ids."""
+        keep = set(play_ids)
+        with self._lock:
+            for play_id in [p for p in self._plays if p not in keep]:
+                self._detach(self._plays.pop(play_id), set())
+            for stream in self._streams.values():
+                self._update_horizon(stream)
+
+    def _detach(self, play: _BundlePlay, keep: Set[str]) -> None:
+        stream = self._streams[play.perp_mode]
+        orphaned = set()
+        for wallet in play.wallet_set - keep:
+            plays = stream.wallet_plays.get(wallet)
+            if plays is None:
+                continue
+            plays.discard(play.play_id)
+            if not plays:
+                del stream.wallet_plays[wallet]
+                orphaned.add(wallet)
+        stream.forget(orphaned)
+
+    def _update_horizon(self, stream: _PerpStream) -> None:
+        stream.horizon_us = max(
+            (p.window_us for p in self._plays.values() if self._streams[p.perp_mode] is stream),
+            default=0,
+        )
+
+    def tracked_wallets(self) -> List[str]:
+        with self._lock:
+            wallets: Set[str] = set()
+            for stream in self._streams.values():
+                wallets.update(stream.wallet_plays)
+            return list(wallets)
+
+    @property
+    def horizon_seconds(self) -> int:
+        return max(s.horizon_us for s in self._streams.values()) // _US
+
+    @property
+    def play_ids(self) -> List[int]:
+        return list(self._plays)
+
+    # -------------------------------------------------------------------------
+    # Trades
+    # -------------------------------------------------------------------------
+
+    def add_trades(
+        self,
+        trades: Iterable[Tuple[int, str, int, Optional[str]]],
+        now_us: Optional[int] = None,
+    ) -> Set[int]:
+        """
+        Feed buy trades as (trade_id, wallet_address, ts_us, perp_direction).
+
+        Unwatched wallets and already-seen trade ids are ignored. Returns the
+        ids of plays watching a wallet that traded (the ones worth evaluating).
+        """
+        touched: Set[int] = set()
+        added = 0
+        any_stream = self._streams['any']
+        with self._lock:
+            for trade_id, wallet, ts_us, perp_direction in trades:
+                plays = any_stream.add(trade_id, wallet, ts_us)
+                if plays:
+                    touched |= plays
+                    added += 1
+                perp_mode = _PERP_DIRECTIONS.get(perp_direction)
+                if perp_mode is not None:
+                    plays = self._streams[perp_mode].add(trade_id, wallet, ts_us)
+                    if plays:
+                        touched |= plays
+                        added += 1
+            now_us = now_us if now_us is not None else int(time.time() * _US)
+            for stream in self._streams.values():
+                stream.expire(now_us)
+            self.stats['trades_added'] += added
+        return touched
+
+    # -------------------------------------------------------------------------
+    # Evaluation
+    # -------------------------------------------------------------------------
+
+    def evaluate(
+        self, play_id: int, now_us: Optional[int] = None
+    ) -> Tuple[List[str], Optional[Dict[str, Any]]]:
+        """Qualifying wallets (in the play's original order) and the bundle context."""
+        return self.evaluate_many([play_id], now_us).get(play_id, ([], None))
+
+    def evaluate_many(
+        self, play_ids: Iterable[int], now_us: Optional[int] = None
+    ) -> Dict[int, Tuple[List[str], Optional[Dict[str, Any]]]]:
+        """Evaluate several plays against the current window in one pass."""
+        now_us = now_us if now_us is not None else int(time.time() * _US)
+        results: Dict[int, Tuple[List[str], Optional[Dict[str, Any]]]] = {}
+        with self._lock:
+            for stream in self._streams.values():
+                stream.expire(now_us)
+            for play_id in play_ids:
+                play = self._plays.get(play_id)
+                if play is not None:
+                    results[play_id] = self._evaluate(play, now_us)
+                    self.stats['evaluations'] += 1
+        return results
+
+    def _evaluate(
+        self, play: _BundlePlay, now_us: int
+    ) -> Tuple[List[str], Optional[Dict[str, Any]]]:
+        by_wallet = self._streams[play.perp_mode].by_wallet
+        cutoff = now_us - play.window_us
+
+        # (earliest in-window buy, -latest buy, wallet) for each active wallet
+        if len(play.wallet_set) < len(by_wallet):
+            active = [w for w in play.wallet_set if w in by_wallet]
+        else:
+            active = [w for w in by_wallet if w in play.wallet_set]
+        points = []
+        for wallet in active:
+            times = by_wallet[wallet]
+            i = bisect_left(times, cutoff)
+            if i < len(times):
+                points.append((times[i], -times[-1], wallet))
+        points.sort()
+
+        # Two-pointer sweep: window [start, start + seconds] from each distinct start
+        best_count, best_latest, best_lo, best_hi = 0, None, 0, 0
+        n = len(points)
+        hi = 0
+        for lo in range(n):
+            start, neg_latest, _ = points[lo]
+            if lo and points[lo - 1][0] == start:
+                continue  # same window as the previous start
+            while hi < n and points[hi][0] - start <= play.seconds_us:
+                hi += 1
+            count = hi - lo
+            # Starts sharing a timestamp are ordered most recent trader first
+            if count > best_count or (count == best_count and -neg_latest > best_latest):
+                best_count, best_latest, best_lo, best_hi = count, -neg_latest, lo, hi
+
+        if best_count < play.required:
+            return [], None
+
+        participating = [p[2] for p in points[best_lo:best_hi]]
+        best_wallets = set(participating)
+        window_start = _from_epoch_us(points[best_lo][0])
+        return [w for w in play.wallets if w in best_wallets], {
+            'window_start': window_start,
+            'window_end': window_start + timedelta(microseconds=play.seconds_us),
+            'window_duration_seconds': play.seconds_us // _US,
+            'wallet_count': best_count,
+            'participating_wallets': participating,
+            'required_wallet_count': play.required,
+            'source_wallet_count': len(play.wallets),
+        }
@@ -14,12 +14,20 @@ This module:
 Architecture (DuckDB-first for maximum speed):
 - DuckDB: Hot storage for ALL data (plays, buyins, trades, price data)
 - MySQL: Archive only (writes go to both, reads from DuckDB)
-- Trade detection: Runs every 1 second from DuckDB
-- Trades synced from MySQL to DuckDB every 5 seconds by scheduler
+- Trade detection: push-based -- the webhook NOTIFYs committed buy trades
+  (core.trade_events) and a listener thread handles trades from tracked
+  wallets immediately; the per-tick poll of sol_stablecoin_trades remains as
+  a catch-up path (every FOLLOW_THE_GOAT_CATCHUP_SECONDS while the listener
+  is connected, every tick otherwise or with FOLLOW_THE_GOAT_PUSH=0)
+- Bundle filtering: in memory (bundle_detector) -- candidate wallets' buys
+  are loaded once and then fed from the same pushed / polled trades, so
+  bundle plays pick up wallets as soon as a bundle forms instead of at the
+  next configuration refresh (FOLLOW_THE_GOAT_BUNDLE_STREAM=0 restores the
+  per-play SQL filter at refresh time)
 
 Performance:
 - Trade detection: <10ms (DuckDB in-memory queries)
-- Bundle filtering: <50ms (DuckDB)
+- Bundle filtering: <1ms per play (in-memory sweep)
 - Full cycle: <100ms typical
 
 Usage:
@@ -55,6 +63,8 @@ sys.path.insert(0, str(PROJECT_ROOT))
 sys.path.insert(0, str(MODULE_DIR))
 
 from core.database import get_postgres, postgres_insert, postgres_update, postgres_execute
+from core.price_service import get_price_service
+from core.trade_events import TradeEvent, TradeEventListener
 
 # Import our modules (direct imports after adding module dir to path)
 from trail_generator import generate_trail_payload, TrailError
@@ -66,6 +76,7 @@ from pattern_validator import (
 from pre_entry_price_movement import (
     calculate_pre_entry_metrics,
 )
+from bundle_detector import BundleDetector, parse_bundle_config, to_epoch_us
 
 # =============================================================================
 # CONFIGURATION
@@ -77,6 +88,13 @@ DEFAULT_MONITOR_INTERVAL_SECONDS = float(
 DEFAULT_CONFIG_REFRESH_SECONDS = float(
     os.getenv('FOLLOW_THE_GOAT_CONFIG_REFRESH_SECONDS', '60.0')
 )
+# Push-based trade detection (LISTEN/NOTIFY); polling becomes a catch-up path
+DEFAULT_PUSH_MODE = os.getenv('FOLLOW_THE_GOAT_PUSH', '1') == '1'
+DEFAULT_CATCHUP_INTERVAL_SECONDS = float(
+    os.getenv('FOLLOW_THE_GOAT_CATCHUP_SECONDS', '5.0')
+)
+# In-memory bundle detection fed by the trade stream (0 = SQL filter per play)
+DEFAULT_BUNDLE_STREAM = os.getenv('FOLLOW_THE_GOAT_BUNDLE_STREAM', '1') == '1'
 
 # Setup logging
 LOGS_DIR = Path(__file__).parent / "logs"
@@ -259,6 +277,9 @@ class WalletFollower:
         live_trade: bool = False,
         monitor_interval_seconds: float = DEFAULT_MONITOR_INTERVAL_SECONDS,
         config_refresh_interval_seconds: float = DEFAULT_CONFIG_REFRESH_SECONDS,
+        push_mode: bool = DEFAULT_PUSH_MODE,
+        catchup_interval_seconds: float = DEFAULT_CATCHUP_INTERVAL_SECONDS,
+        bundle_stream: bool = DEFAULT_BUNDLE_STREAM,
     ):
         """
         Initialize WalletFollower.
@@ -269,6 +290,11 @@ class WalletFollower:
             live_trade: If True, trades are live. If False, test mode
             monitor_interval_seconds: Seconds between monitoring loop iterations
             config_refresh_interval_seconds: Seconds between configuration refreshes
+            push_mode: If True, handle NOTIFYed trades as they arrive and poll
+                only every catchup_interval_seconds while the listener is up
+            catchup_interval_seconds: Polling interval while push mode is live
+            bundle_stream: If True, bundle plays are evaluated in memory from
+                the trade stream and re-evaluated whenever their wallets trade
         """
         self.plays: List[Dict[str, Any]] = []
         self.target_wallets: List[str] = []
@@ -276,6 +302,8 @@ class WalletFollower:
         self.last_trade_ids: Dict[str, int] = {}
         self._trade_id_lock = threading.Lock()
         self._stats_lock = threading.Lock()
+        # Serialises detect+process between the poll tick and the push listener
+        self._process_lock = threading.RLock()
         
         self.stats = {
             'trades_followed': 0,
@@ -290,6 +318,9 @@ class WalletFollower:
             'wallets_tracked': 0,
             'plays_loaded': 0,
             'cycles_seen': set(),  # Track unique price cycles
+            'trades_pushed': 0,
+            'catchup_polls': 0,
+            'bundle_updates': 0,
         }
         
         # Configuration
@@ -298,8 +329,19 @@ class WalletFollower:
         self.live_trade = live_trade
         self.monitor_interval_seconds = max(0.1, float(monitor_interval_seconds))
         self.config_refresh_interval_seconds = max(0.0, float(config_refresh_interval_seconds))
+        self.push_mode = push_mode
+        self.catchup_interval_seconds = max(0.0, float(catchup_interval_seconds))
         self.shutdown_requested = False
         
+        self._listener: Optional[TradeEventListener] = None
+        self._last_poll: float = 0.0
+        
+        self.bundle_stream = bundle_stream
+        self._bundle_detector = BundleDetector()
+        # Bundle play id -> wallet_play_map entry / currently qualifying wallets
+        self._bundle_plays: Dict[int, Dict[str, Any]] = {}
+        self._bundle_wallets: Dict[int, List[str]] = {}
+        
         self._last_config_refresh: float = 0.0
         self._plays_signature: Optional[str] = None
         
@@ -521,106 +563,110 @@ class WalletFollower:
     # WALLET DISCOVERY
     # =========================================================================
     
+    @staticmethod
+    def _play_info(play: Dict[str, Any]) -> Dict[str, Any]:
+        """Per-play fields carried in wallet_play_map entries."""
+        return {
+            'play_id': play['id'],
+            'play_name': play.get('name', f"Play {play['id']}"),
+            'max_buys_per_cycle': play['max_buys_per_cycle'],
+            'perp_mode': play.get('perp_mode', 'any'),
+            'pattern_validator_enable': bool(play.get('pattern_validator_enable')),
+            'project_ids': play.get('project_ids', []),
+        }
+    
+    def discover_play_wallets(self, play: Dict[str, Any]) -> List[str]:
+        """Candidate wallets for a play (wallet cache, else its find_wallets_sql)."""
+        play_id = play['id']
+        cache_config = play.get('cache_config')
+        cache_settings = play.get('cache_settings')
+        
+        # Check cache first
+        if self.is_cache_valid(play_id, cache_config, cache_settings):
+            return [w for w in cache_settings.get('wallets', []) if w]
+        
+        # Execute wallet discovery query against PostgreSQL
+        find_wallets_json = play.get('find_wallets_sql')
+        if not find_wallets_json:
+            logger.warning(f"Play #{play_id}: No find_wallets_sql configured")
+            return []
+        
+        try:
+            if isinstance(find_wallets_json, str):
+                query_data = json.loads(find_wallets_json)
+            else:
+                query_data = find_wallets_json
+            
+            query = query_data.get('query')
+            if not query:
+                logger.error(f"Play #{play_id}: Missing 'query' in find_wallets_sql")
+                return []
+            
+            with get_postgres() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(query)
+                    results = cursor.fetchall()
+            
+            initial_wallet_addresses = [
+                r.get('wallet_address') for r in results if r.get('wallet_address')
+            ]
+            
+            if not initial_wallet_addresses:
+                logger.warning(f"Play #{play_id}: No wallets found")
+                return []
+            
+            logger.info(f"Play #{play_id}: Initial query returned {len(initial_wallet_addresses)} wallet(s)")
+            
+            # Save to cache
+            if cache_config and cache_config.get('enabled'):
+                self.save_wallets_to_cache(play_id, initial_wallet_addresses)
+            
+            return initial_wallet_addresses
+            
+        except json.JSONDecodeError as e:
+            logger.error(f"Play #{play_id}: Invalid JSON in find_wallets_sql: {e}")
+        except Exception as e:
+            logger.error(f"Play #{play_id}: Error executing wallet query: {e}")
+        return []
+    
     def get_wallets_for_plays(self) -> List[Dict[str, Any]]:
         """Execute wallet discovery queries for all plays."""
         all_wallets_with_plays: List[Dict[str, Any]] = []
         run_start = time.time()
         
-        for play in self.plays:
-            play_id = play['id']
-            play_name = play.get('name', f"Play {play_id}")
-            max_buys = play['max_buys_per_cycle']
-            perp_mode = play.get('perp_mode', 'any')
+        discovered = [(play, self.discover_play_wallets(play)) for play in self.plays]
+        discovered = [(play, wallets) for play, wallets in discovered if wallets]
+        
+        # Bundle plays: register candidates with the detector, load their trades once
+        bundle_in_memory = self._sync_bundle_plays(discovered)
+        bundle_plays: Dict[int, Dict[str, Any]] = {}
+        bundle_wallets: Dict[int, List[str]] = {}
+        
+        for play, wallet_addresses in discovered:
+            play_info = self._play_info(play)
+            play_id = play_info['play_id']
             bundle_config = play.get('bundle_config')
-            cache_config = play.get('cache_config')
-            cache_settings = play.get('cache_settings')
-            
-            # Check cache first
-            if self.is_cache_valid(play_id, cache_config, cache_settings):
-                cached_wallets = cache_settings.get('wallets', [])
-                
-                # Apply bundle filter on cached wallets
-                filtered_wallets = cached_wallets
-                if bundle_config and bundle_config.get('enabled'):
-                    filtered_wallets, _ = self.filter_wallets_by_bundle(
-                        cached_wallets, bundle_config, perp_mode, play_id, play_name
-                    )
-                
-                for wallet_address in filtered_wallets:
-                    if wallet_address:
-                        all_wallets_with_plays.append({
-                            'wallet_address': wallet_address,
-                            'play_id': play_id,
-                            'play_name': play_name,
-                            'max_buys_per_cycle': max_buys,
-                            'perp_mode': perp_mode,
-                            'pattern_validator_enable': bool(play.get('pattern_validator_enable')),
-                            'project_ids': play.get('project_ids', []),
-                        })
-                
-                continue
-            
-            # Execute wallet discovery query against PostgreSQL
-            find_wallets_json = play.get('find_wallets_sql')
-            if not find_wallets_json:
-                logger.warning(f"Play #{play_id}: No find_wallets_sql configured")
-                continue
             
-            try:
-                if isinstance(find_wallets_json, str):
-                    query_data = json.loads(find_wallets_json)
+            # Apply bundle filter
+            filtered_wallets = wallet_addresses
+            if bundle_config and bundle_config.get('enabled'):
+                if bundle_in_memory:
+                    filtered_wallets, _ = self._bundle_detector.evaluate(play_id)
                 else:
-                    query_data = find_wallets_json
-                
-                query = query_data.get('query')
-                if not query:
-                    logger.error(f"Play #{play_id}: Missing 'query' in find_wallets_sql")
-                    continue
-                
-                with get_postgres() as conn:
-                    with conn.cursor() as cursor:
-                        cursor.execute(query)
-                        results = cursor.fetchall()
-                
-                initial_wallet_addresses = [
-                    r.get('wallet_address') for r in results if r.get('wallet_address')
-                ]
-                
-                if not initial_wallet_addresses:
-                    logger.warning(f"Play #{play_id}: No wallets found")
-                    continue
-                
-                logger.info(f"Play #{play_id}: Initial query returned {len(initial_wallet_addresses)} wallet(s)")
-                
-                # Apply bundle filter
-                filtered_wallets = initial_wallet_addresses
-                if bundle_config and bundle_config.get('enabled'):
                     filtered_wallets, _ = self.filter_wallets_by_bundle(
-                        initial_wallet_addresses, bundle_config, perp_mode, play_id, play_name
+                        wallet_addresses, bundle_config, play_info['perp_mode'], play_id, play_info['play_name']
                     )
-                    logger.info(f"Play #{play_id}: Bundle filter kept {len(filtered_wallets)}/{len(initial_wallet_addresses)}")
-                
-                # Save to cache
-                if cache_config and cache_config.get('enabled') and initial_wallet_addresses:
-                    self.save_wallets_to_cache(play_id, initial_wallet_addresses)
-                
-                # Add to results
-                for wallet_address in filtered_wallets:
-                    if wallet_address:
-                        all_wallets_with_plays.append({
-                            'wallet_address': wallet_address,
-                            'play_id': play_id,
-                            'play_name': play_name,
-                            'max_buys_per_cycle': max_buys,
-                            'perp_mode': perp_mode,
-                            'pattern_validator_enable': bool(play.get('pattern_validator_enable')),
-                            'project_ids': play.get('project_ids', []),
-                        })
-                
-            except json.JSONDecodeError as e:
-                logger.error(f"Play #{play_id}: Invalid JSON in find_wallets_sql: {e}")
-            except Exception as e:
-                logger.error(f"Play #{play_id}: Error executing wallet query: {e}")
+                logger.info(f"Play #{play_id}: Bundle filter kept {len(filtered_wallets)}/{len(wallet_addresses)}")
+                bundle_plays[play_id] = play_info
+                bundle_wallets[play_id] = filtered_wallets
+            
+            for wallet_address in filtered_wallets:
+                all_wallets_with_plays.append({'wallet_address': wallet_address, **play_info})
+        
+        with self._process_lock:
+            # Live bundle updates only while the detector is fed
+            self._bundle_plays = bundle_plays if bundle_in_memory else {}
+            self._bundle_wallets = bundle_wallets
         
         total_ms = round((time.time() - run_start) * 1000, 3)
         discovery_count = len(all_wallets_with_plays)
@@ -648,6 +694,9 @@ class WalletFollower:
         each making at least one trade, all within a 2-second window.
         
         A single wallet making 5 trades in 2 seconds does NOT count as a bundle.
+        
+        SQL path, used when the in-memory BundleDetector is off or could not
+        load its trades; both select the same window.
         """
         if not wallet_addresses:
             return [], None
@@ -655,24 +704,7 @@ class WalletFollower:
         if not bundle_config.get('enabled'):
             return wallet_addresses, None
         
-        try:
-            required_wallets = int(bundle_config.get('num_wallets', bundle_config.get('num_trades', 3)))
-        except (TypeError, ValueError):
-            required_wallets = 3
-        required_wallets = max(required_wallets, 1)
-        
-        try:
-            seconds_threshold = int(bundle_config.get('seconds', 5))
-        except (TypeError, ValueError):
-            seconds_threshold = 5
-        seconds_threshold = max(seconds_threshold, 1)
-        
-        raw_window_seconds = bundle_config.get('window_seconds', 600)
-        try:
-            window_seconds = int(raw_window_seconds)
-        except (TypeError, ValueError):
-            window_seconds = 600
-        window_seconds = max(window_seconds, seconds_threshold)
+        required_wallets, seconds_threshold, window_seconds = parse_bundle_config(bundle_config)
         
         # Build perp condition
         perp_condition = ''
@@ -803,6 +835,119 @@ class WalletFollower:
             logger.error(f"Play #{play_id} ({play_name}): Error executing bundle filter query: {e}")
             return wallet_addresses, None
     
+    # =========================================================================
+    # IN-MEMORY BUNDLE DETECTION
+    # =========================================================================
+    
+    def _sync_bundle_plays(self, discovered: List[Tuple[Dict[str, Any], List[str]]]) -> bool:
+        """Register bundle plays with the detector and load their trades.
+        
+        Returns False when the SQL filter has to be used instead (disabled,
+        no bundle plays, or the trades could not be loaded).
+        """
+        detector = self._bundle_detector
+        bundle_play_ids = []
+        if self.bundle_stream:
+            for play, wallet_addresses in discovered:
+                bundle_config = play.get('bundle_config')
+                if bundle_config and bundle_config.get('enabled'):
+                    detector.register_play(
+                        play['id'], wallet_addresses, bundle_config, play.get('perp_mode', 'any')
+                    )
+                    bundle_play_ids.append(play['id'])
+        detector.retain_plays(bundle_play_ids)
+        if not bundle_play_ids:
+            return False
+        return self.sync_bundle_trades() is not None
+    
+    def sync_bundle_trades(self) -> Optional[set]:
+        """Load buys from bundle candidate wallets into the detector.
+        
+        One query for every bundle play: trades after the last id loaded, or
+        the whole window when the detector needs history for new wallets.
+        Returns the ids of plays whose wallets traded, or None on error.
+        """
+        detector = self._bundle_detector
+        wallets = detector.tracked_wallets()
+        if not wallets:
+            return set()
+        
+        try:
+            with get_postgres() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute("""
+                        SELECT id, wallet_address, perp_direction,
+                               (EXTRACT(EPOCH FROM trade_timestamp) * 1000000)::bigint AS ts_us
+                        FROM sol_stablecoin_trades
+                        WHERE wallet_address = ANY(%s)
+                          AND direction = 'buy'
+                          AND id > %s
+                          AND trade_timestamp >= NOW() - INTERVAL %s
+                        ORDER BY trade_timestamp ASC
+                    """, [wallets, detector.synced_trade_id, f"{detector.horizon_seconds} seconds"])
+                    trades = cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Error loading bundle trades: {e}")
+            return None
+        
+        if trades:
+            detector.synced_trade_id = max(detector.synced_trade_id, max(t['id'] for t in trades))
+        return detector.add_trades(
+            (t['id'], t['wallet_address'], int(t['ts_us']), t['perp_direction']) for t in trades
+        )
+    
+    def apply_bundle_updates(self, play_ids) -> int:
+        """Re-evaluate bundle plays and swap changed wallet sets into wallet_play_map.
+        
+        Newly qualifying wallets start from their persisted last trade id, as
+        on a configuration refresh, so the trades that formed the bundle are
+        followed. Returns the number of plays whose wallets changed.
+        """
+        play_ids = [p for p in play_ids if p in self._bundle_plays]
+        if not play_ids:
+            return 0
+        results = self._bundle_detector.evaluate_many(play_ids)
+        
+        with self._process_lock:
+            changed = {
+                play_id: wallets for play_id, (wallets, _) in results.items()
+                if play_id in self._bundle_plays and wallets != self._bundle_wallets.get(play_id)
+            }
+            if not changed:
+                return 0
+            
+            wallet_play_map: Dict[str, List[Dict[str, Any]]] = {}
+            for wallet, play_infos in self.wallet_play_map.items():
+                kept = [info for info in play_infos if info['play_id'] not in changed]
+                if kept:
+                    wallet_play_map[wallet] = kept
+            for play_id, wallets in changed.items():
+                play_info = self._bundle_plays[play_id]
+                for wallet in wallets:
+                    wallet_play_map.setdefault(wallet, []).append(dict(play_info))
+                logger.info(
+                    f"Play #{play_id}: bundle wallets {len(self._bundle_wallets.get(play_id, []))} -> {len(wallets)}"
+                )
+                self._bundle_wallets[play_id] = wallets
+            
+            previous_wallets = set(self.target_wallets)
+            ordered_wallets = [w for w in self.target_wallets if w in wallet_play_map]
+            for wallet in wallet_play_map:
+                if wallet not in previous_wallets:
+                    self._update_last_trade_id(wallet, self.get_last_processed_trade_id(wallet))
+                    ordered_wallets.append(wallet)
+            
+            self.target_wallets = ordered_wallets
+            self.wallet_play_map = wallet_play_map
+            self.stats['wallets_tracked'] = len(ordered_wallets)
+            
+            with self._trade_id_lock:
+                for wallet in previous_wallets - set(wallet_play_map):
+                    self.last_trade_ids.pop(wallet, None)
+        
+        self._increment_stat('bundle_updates', len(changed))
+        return len(changed)
+    
     # =========================================================================
     # CONFIGURATION REFRESH
     # =========================================================================
@@ -830,6 +975,8 @@ class WalletFollower:
                 self.plays = []
                 self.target_wallets = []
                 self.wallet_play_map = {}
+                self._bundle_plays = {}
+                self._bundle_detector.retain_plays([])
                 self._last_config_refresh = now
                 return not force
             
@@ -852,10 +999,10 @@ class WalletFollower:
             # Discover wallets
             wallets_with_plays = self.get_wallets_for_plays()
             
-            # Rebuild wallet maps
+            # Rebuild wallet maps (swapped in below, the push listener reads them)
             ordered_wallets: List[str] = []
             seen_wallets = set()
-            self.wallet_play_map = {}
+            wallet_play_map: Dict[str, List[Dict[str, Any]]] = {}
             
             for entry in wallets_with_plays:
                 wallet_address = entry.get('wallet_address')
@@ -865,10 +1012,10 @@ class WalletFollower:
                 ordered_wallets.append(wallet_address)
                 
                 play_id = entry.get('play_id')
-                if wallet_address not in self.wallet_play_map:
-                    self.wallet_play_map[wallet_address] = []
+                if wallet_address not in wallet_play_map:
+                    wallet_play_map[wallet_address] = []
                 
-                self.wallet_play_map[wallet_address].append({
+                wallet_play_map[wallet_address].append({
                     'play_id': play_id,
                     'play_name': entry.get('play_name'),
                     'max_buys_per_cycle': entry.get('max_buys_per_cycle'),
@@ -877,19 +1024,23 @@ class WalletFollower:
                     'project_ids': entry.get('project_ids', []),
                 })
             
-            # Update target wallets
-            previous_wallets = set(self.target_wallets)
-            self.target_wallets = ordered_wallets
-            self.stats['wallets_tracked'] = len(self.target_wallets)
-            
-            # Initialize last_trade_ids for new wallets
-            for wallet in ordered_wallets:
-                if wallet not in previous_wallets:
-                    self.last_trade_ids[wallet] = self.get_last_processed_trade_id(wallet)
-            
-            # Remove old wallets
-            for wallet in previous_wallets - set(ordered_wallets):
-                self.last_trade_ids.pop(wallet, None)
+            with self._process_lock:
+                # Update target wallets
+                previous_wallets = set(self.target_wallets)
+                
+                # Initialize last_trade_ids for new wallets
+                for wallet in ordered_wallets:
+                    if wallet not in previous_wallets:
+                        self._update_last_trade_id(wallet, self.get_last_processed_trade_id(wallet))
+                
+                self.target_wallets = ordered_wallets
+                self.wallet_play_map = wallet_play_map
+                self.stats['wallets_tracked'] = len(self.target_wallets)
+                
+                # Remove old wallets
+                with self._trade_id_lock:
+                    for wallet in previous_wallets - set(ordered_wallets):
+                        self.last_trade_ids.pop(wallet, None)
             
             self._last_config_refresh = now
             
@@ -994,6 +1145,93 @@ class WalletFollower:
             logger.error(f"Error checking for new trades: {e}")
             return []
     
+    def fetch_trades_by_id(self, trade_ids: List[int]) -> List[Dict[str, Any]]:
+        """Load specific buy trades (same columns and window as the poll query)."""
+        if not trade_ids:
+            return []
+        with get_postgres() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    SELECT id, signature, trade_timestamp, stablecoin_amount, sol_amount, 
+                           price, direction, wallet_address, perp_direction
+                    FROM sol_stablecoin_trades 
+                    WHERE id = ANY(%s)
+                      AND direction = 'buy' 
+                      AND trade_timestamp >= NOW() - INTERVAL '5 minutes'
+                    ORDER BY wallet_address, id ASC
+                """, [trade_ids])
+                return cursor.fetchall()
+    
+    # =========================================================================
+    # PUSH-BASED DETECTION
+    # =========================================================================
+    
+    def start_push_listener(self) -> None:
+        """Start (or revive) the LISTEN thread for NOTIFYed buy trades."""
+        if not self.push_mode:
+            return
+        if self._listener is None:
+            self._listener = TradeEventListener(
+                self.handle_trade_events,
+                application_name="ftg_follow_the_goat",
+                on_connect=self._request_catchup,
+            )
+        if not self._listener.is_alive():
+            self._listener.start()
+    
+    def stop_push_listener(self) -> None:
+        if self._listener is not None:
+            self._listener.stop()
+    
+    def _push_connected(self) -> bool:
+        return self._listener is not None and self._listener.connected
+    
+    def _request_catchup(self) -> None:
+        """Poll on the next tick (anything committed while we were not listening)."""
+        self._last_poll = 0.0
+    
+    def handle_trade_events(self, events: List[TradeEvent]) -> int:
+        """
+        Listener thread: process pushed buy trades from tracked wallets.
+        
+        Wallets are matched against the in-memory wallet -> plays map; only
+        the matching trades are read back (by primary key). Returns the number
+        of trades processed. Bundle plays are re-evaluated first, so a trade
+        that completes a bundle is followed straight away.
+        """
+        if self._bundle_plays:
+            touched = self._bundle_detector.add_trades(
+                (e.id, e.wallet_address, to_epoch_us(e.trade_timestamp), e.perp_direction) for e in events
+            )
+            if touched:
+                self.apply_bundle_updates(touched)
+        
+        wallet_play_map = self.wallet_play_map
+        wanted = [
+            e.id for e in events
+            if e.wallet_address in wallet_play_map and e.id > self._get_last_trade_id(e.wallet_address)
+        ]
+        if not wanted:
+            return 0
+        
+        try:
+            trades = self.fetch_trades_by_id(wanted)
+        except Exception as e:
+            # The catch-up poll will find them
+            logger.error(f"Error loading pushed trades: {e}")
+            self._request_catchup()
+            return 0
+        
+        with self._process_lock:
+            # The poll path may have handled some of them meanwhile
+            trades = [t for t in trades if t['id'] > self._get_last_trade_id(t['wallet_address'])]
+            if not trades:
+                return 0
+            self._increment_stat('trades_pushed', len(trades))
+            logger.debug(f"Push: {len(trades)} new trade(s) from {len(set(t['wallet_address'] for t in trades))} wallet(s)")
+            self.process_new_trades(trades)
+        return len(trades)
+    
     @staticmethod
     def _trade_matches_perp_mode(trade: Dict[str, Any], perp_mode: str) -> bool:
         """Check if trade matches the play's perp mode."""
@@ -1016,7 +1254,11 @@ class WalletFollower:
     # =========================================================================
     
     def get_current_market_price(self) -> Optional[float]:
-        """Get current SOL price from prices table."""
+        """Get current SOL price (in-process price service, prices table as fallback)."""
+        service = get_price_service()
+        price = service.latest_price() if service else None
+        if price is not None:
+            return price
         try:
             with get_postgres() as conn:
                 with conn.cursor() as cursor:
@@ -1044,6 +1286,11 @@ class WalletFollower:
         In master2.py context, get_postgres() returns the registered local DuckDB.
         """
         if at_timestamp is None:
+            # "Now" is the open cycle, which the price service keeps in memory
+            service = get_price_service()
+            cycle_id = service.active_cycle_id(0.3) if service else None
+            if cycle_id is not None:
+                return cycle_id
             at_timestamp = datetime.now(timezone.utc)
         
         timestamp_str = at_timestamp.strftime('%Y-%m-%d %H:%M:%S')
@@ -1260,6 +1507,7 @@ class WalletFollower:
             trail_generated = True
             step_logger.end(trail_token, {
                 'minute_spans': len(trail_payload.get('price_movements', [])),
+                'stage_timings_ms': trail_payload.get('stage_timings_ms', {}),
             })
             logger.info(f"✓ Generated trail for buyin #{buyin_id}")
         except TrailError as e:
@@ -1467,6 +1715,12 @@ class WalletFollower:
             'plays_loaded': self.stats['plays_loaded'],
             'unique_cycles_seen': len(cycles_seen),
             'recent_cycles': sorted(list(cycles_seen))[-5:] if cycles_seen else [],
+            'push_mode': self.push_mode,
+            'push_connected': self._push_connected(),
+            'trades_pushed': self.stats.get('trades_pushed', 0),
+            'catchup_polls': self.stats.get('catchup_polls', 0),
+            'bundle_plays': len(self._bundle_plays),
+            'bundle_updates': self.stats.get('bundle_updates', 0),
         }
     
     def run_single_cycle(self) -> bool:
@@ -1474,14 +1728,29 @@ class WalletFollower:
         try:
             self.refresh_configuration()
             
-            if not self.target_wallets:
+            if not self.target_wallets and not self._bundle_plays:
                 logger.debug("No target wallets - skipping cycle")
                 return False
             
-            new_trades = self.check_for_new_trades()
+            # While pushes arrive, polling is only a periodic catch-up
+            self.start_push_listener()
+            now = time.time()
+            if self._push_connected() and now - self._last_poll < self.catchup_interval_seconds:
+                return False
+            self._last_poll = now
+            if self._push_connected():
+                self._increment_stat('catchup_polls')
+            
+            if self._bundle_plays:
+                touched = self.sync_bundle_trades()
+                if touched:
+                    self.apply_bundle_updates(touched)
+            
+            with self._process_lock:
+                new_trades = self.check_for_new_trades()
+                stats = self.process_new_trades(new_trades) if new_trades else None
             
             if new_trades:
-                stats = self.process_new_trades(new_trades)
                 
                 # Log summary if any blocking happened
                 if stats['blocked_max_buys'] > 0 or stats['blocked_validator'] > 0 or stats['blocked_pre_entry'] > 0:
@@ -1519,6 +1788,7 @@ class WalletFollower:
         logger.info(f"Mode: {'SINGLE RUN' if run_once else 'CONTINUOUS'}")
         logger.info(f"Live trade: {self.live_trade}")
         logger.info(f"Interval: {target_interval:.1f}s")
+        logger.info(f"Trade detection: {'push + catch-up poll' if self.push_mode else 'poll'}")
         logger.info("=" * 80)
         
         # Initial configuration load
@@ -1573,6 +1843,8 @@ class WalletFollower:
                 self._increment_stat('errors')
                 time.sleep(5)
         
+        self.stop_push_listener()
+        
         # Final stats
         stats = self.get_statistics()
         logger.info("=" * 80)
@@ -0,0 +1,705 @@
+"""
+Market Window Cache
+===================
+In-process sliding window over the market tables that trail_generator reads.
+
+Every buy-in trail covers `followed_at - 15min .. followed_at`. When several
+wallets buy within a few seconds, those windows overlap almost completely, so
+instead of running the same eight PostgreSQL queries per buy-in this module
+keeps the last ~20 minutes of each source as columnar NumPy arrays and serves
+window slices from memory:
+
+- order_book_features    (per-minute order book signals)
+- sol_stablecoin_trades  (per-minute transaction aggregates)
+- whale_movements        (per-minute whale aggregates)
+- prices                 (SOL / BTC / ETH minute candles, SOL 30s buckets and
+                          raw SOL ticks for pattern detection)
+
+PostgreSQL remains the source of truth. The window is refreshed incrementally
+by id watermark (same scheme as pump_highfreq_cache) at most once per
+REFRESH_INTERVAL_SECONDS, and rows older than the window are evicted.
+
+Per-bucket aggregates (1 minute, 30 seconds) are memoized by bucket start.
+Only buckets that lie entirely inside the requested window are memoized —
+partial edge buckets are recomputed — and a memoized bucket is dropped as
+soon as a late row lands in it.
+
+A window the cache cannot serve (older than the cache horizon, longer than
+CACHE_MINUTES, or after a refresh error) is a miss; the caller falls back to
+its SQL query. Hit/miss counters are exposed via get_market_cache_stats().
+
+Usage:
+    from market_window_cache import get_market_window_cache
+
+    cache = get_market_window_cache()
+    rows = cache.order_book_signals(start, end) if cache else None
+    if rows is None:
+        rows = ...  # SQL path
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from core.database import get_postgres
+
+logger = logging.getLogger(__name__)
+
+CACHE_ENABLED = os.getenv("TRAIL_MARKET_CACHE", "1") != "0"
+CACHE_MINUTES = int(os.getenv("TRAIL_CACHE_MINUTES", "20"))
+REFRESH_INTERVAL_SECONDS = float(os.getenv("TRAIL_CACHE_REFRESH_SECONDS", "1.0"))
+
+PRICE_TOKENS = ("SOL", "BTC", "ETH")
+# order_book_features can hold several Binance symbols; the cache tracks this one
+OB_SYMBOL = "SOLUSDT"
+
+_LOAD_BATCH = 100000
+_US = 1_000_000
+_MINUTE_US = 60 * _US
+_HALF_MINUTE_US = 30 * _US
+_EPOCH = datetime(1970, 1, 1)
+
+
+# =============================================================================
+# TIME HELPERS (naive UTC <-> int64 microseconds)
+# =============================================================================
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _to_us(dt: datetime) -> int:
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return (dt - _EPOCH) // timedelta(microseconds=1)
+
+
+def _from_us(us: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=int(us))
+
+
+def _ts_array(values: List[Any]) -> np.ndarray:
+    return np.array(values, dtype="datetime64[us]").astype(np.int64)
+
+
+# =============================================================================
+# SOURCES — columns loaded from PostgreSQL and row-wise normalisation
+# =============================================================================
+
+def _floats(rows: List[Dict[str, Any]], col: str) -> np.ndarray:
+    return np.array([r[col] for r in rows], dtype=np.float64)
+
+
+def _lower(rows: List[Dict[str, Any]], col: str) -> np.ndarray:
+    # str(None).lower() == 'none' — matches the pandas astype(str) path
+    return np.array([str(r[col]).lower() for r in rows], dtype=object)
+
+
+def _prepare_order_book(rows: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    return {c: _floats(rows, c) for c in _OB_COLUMNS}
+
+
+def _prepare_trades(rows: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """Same normalisation as fetch_transactions(): NULL → 0, derive missing sol_amount."""
+    sol = np.nan_to_num(_floats(rows, "sol_amount"), nan=0.0)
+    stable = np.nan_to_num(_floats(rows, "stablecoin_amount"), nan=0.0)
+    price = np.nan_to_num(_floats(rows, "price"), nan=0.0)
+    missing = sol == 0
+    if missing.any():
+        with np.errstate(divide="ignore", invalid="ignore"):
+            derived = stable / np.where(price == 0, np.nan, price)
+        sol = np.where(missing, derived, sol)
+        sol = np.where(np.isnan(sol), 0.0, sol)
+    direction = _lower(rows, "direction")
+    perp = _lower(rows, "perp_direction")
+    return {
+        "sol_amount": sol,
+        "stablecoin_amount": stable,
+        "price": price,
+        "is_buy": direction == "buy",
+        "is_sell": direction == "sell",
+        "is_long": perp == "long",
+        "is_short": perp == "short",
+    }
+
+
+_WHALE_DIRECTIONS = {
+    "sending": "out", "sent": "out", "outbound": "out",
+    "receiving": "in", "received": "in", "inbound": "in",
+}
+
+
+def _prepare_whales(rows: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """Same normalisation as fetch_whale_activity(): in/out mapping, NULL → 0."""
+    direction = np.array(
+        [_WHALE_DIRECTIONS.get(d, d) for d in _lower(rows, "direction")], dtype=object
+    )
+    sol_change = np.nan_to_num(_floats(rows, "sol_change"), nan=0.0)
+    abs_change = np.nan_to_num(_floats(rows, "abs_change"), nan=0.0)
+    return {
+        "abs_sol_change": np.where(np.abs(abs_change) > 0, np.abs(abs_change), np.abs(sol_change)),
+        "percentage_moved": np.nan_to_num(_floats(rows, "percentage_moved"), nan=0.0),
+        "is_in": direction == "in",
+        "is_out": direction == "out",
+    }
+
+
+def _prepare_prices(rows: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    return {"price": _floats(rows, "price")}
+
+
+_OB_COLUMNS = [
+    "mid_price", "microprice", "volume_imbalance", "spread_bps", "microprice_dev_bps",
+    "bid_liquidity", "ask_liquidity", "total_depth_10", "bid_depth_bps_10",
+    "ask_depth_bps_10", "bid_slope", "ask_slope", "bid_vwap_10", "ask_vwap_10",
+    "net_liquidity_change_1s",
+]
+
+# name -> (table, timestamp column, selected columns, row preparation)
+_SOURCES: Dict[str, Tuple[str, str, List[str], Callable]] = {
+    "order_book": ("order_book_features", "timestamp", _OB_COLUMNS, _prepare_order_book),
+    "trades": ("sol_stablecoin_trades", "trade_timestamp",
+               ["sol_amount", "stablecoin_amount", "price", "direction", "perp_direction"],
+               _prepare_trades),
+    "whales": ("whale_movements", "timestamp",
+               ["sol_change", "abs_change", "percentage_moved", "direction"],
+               _prepare_whales),
+    "prices": ("prices", "timestamp", ["token", "price"], _prepare_prices),
+}
+
+
+# =============================================================================
+# BUCKET AGGREGATES
+# =============================================================================
+
+def _last(x: np.ndarray) -> Optional[float]:
+    v = x[-1]
+    return None if np.isnan(v) else float(v)
+
+
+def _avg(x: np.ndarray) -> Optional[float]:
+    """SQL AVG(): NULLs ignored, NULL when every value is NULL."""
+    valid = x[~np.isnan(x)]
+    return float(valid.mean()) if valid.size else None
+
+
+def _agg_order_book(ts: np.ndarray, c: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    """One minute of order_book_features (the minute_aggregates CTE)."""
+    net = c["net_liquidity_change_1s"]
+    return {
+        "mid_price": _last(c["mid_price"]),
+        "microprice": _last(c["microprice"]),
+        "volume_imbalance": _avg(c["volume_imbalance"]),
+        "relative_spread_bps": _avg(c["spread_bps"]),
+        "microprice_dev_bps": _avg(c["microprice_dev_bps"]),
+        "bid_depth_10": _avg(c["bid_liquidity"]),
+        "ask_depth_10": _avg(c["ask_liquidity"]),
+        "total_depth_10": _avg(c["total_depth_10"]),
+        "bid_depth_bps_10": _avg(c["bid_depth_bps_10"]),
+        "ask_depth_bps_10": _avg(c["ask_depth_bps_10"]),
+        "bid_slope": _avg(c["bid_slope"]),
+        "ask_slope": _avg(c["ask_slope"]),
+        "bid_vwap_10": _avg(c["bid_vwap_10"]),
+        "ask_vwap_10": _avg(c["ask_vwap_10"]),
+        "net_liquidity_change_sum": float(net[~np.isnan(net)].sum()),
+        "sample_count": int(ts.size),
+        "coverage_seconds": (int(ts[-1]) - int(ts[0])) / _US,
+    }
+
+
+def _agg_trades(ts: np.ndarray, c: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    """One minute of trades — the columns of fetch_transactions()' groupby."""
+    sol, stable, price = c["sol_amount"], c["stablecoin_amount"], c["price"]
+    large = stable > 10000
+    return {
+        "total_sol_volume": float(sol.sum()),
+        "total_usd_volume": float(stable.sum()),
+        "trade_count": int(ts.size),
+        "buy_volume": float(sol[c["is_buy"]].sum()),
+        "sell_volume": float(sol[c["is_sell"]].sum()),
+        "buy_count": int(c["is_buy"].sum()),
+        "sell_count": int(c["is_sell"].sum()),
+        "long_volume": float(sol[c["is_long"]].sum()),
+        "short_volume": float(sol[c["is_short"]].sum()),
+        "large_trade_volume": float(stable[large].sum()),
+        "large_trade_count": int(large.sum()),
+        "avg_trade_size": float(stable.mean()),
+        "min_price": float(price.min()),
+        "max_price": float(price.max()),
+        "avg_price": float(price.mean()),
+        "open_price": float(price[0]),
+        "close_price": float(price[-1]),
+    }
+
+
+def _agg_whales(ts: np.ndarray, c: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    """One minute of whale movements — the columns of fetch_whale_activity()' agg_by_minute."""
+    moved, pct = c["abs_sol_change"], c["percentage_moved"]
+    is_in, is_out = c["is_in"], c["is_out"]
+    inflow = float(moved[is_in].sum())
+    outflow = float(moved[is_out].sum())
+    massive = pct > 10
+    return {
+        "inflow_sol": inflow,
+        "inflow_count": int(is_in.sum()),
+        "outflow_sol": outflow,
+        "outflow_count": int(is_out.sum()),
+        "net_flow_sol": inflow - outflow,
+        "total_sol_moved": float(moved.sum()),
+        "total_movements": int(ts.size),
+        "massive_move_sol": float(moved[massive].sum()),
+        "massive_move_count": int(massive.sum()),
+        "strong_accumulation_sol": float(moved[is_in & (pct > 5)].sum()),
+        "strong_distribution_sol": float(moved[is_out & (pct > 5)].sum()),
+        "avg_move_size": float(moved.mean()),
+        "max_move_size": float(moved.max()),
+        "avg_percentage_moved": float(pct.mean()),
+    }
+
+
+def _agg_prices(ts: np.ndarray, c: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    """OHLC bucket of price ticks (minute candles and 30-second buckets)."""
+    p = c["price"]
+    return {
+        "open": float(p[0]),
+        "close": float(p[-1]),
+        "high": float(p.max()),
+        "low": float(p.min()),
+        "avg": float(p.mean()),
+        "stddev": float(p.std(ddof=1)) if p.size > 1 else None,
+        "count": int(p.size),
+    }
+
+
+# =============================================================================
+# DERIVED ROWS (the outer SELECTs of the trail_generator queries)
+# =============================================================================
+
+def _r(x: Optional[float], digits: int) -> Optional[float]:
+    return None if x is None else round(x, digits)
+
+
+def _div(a: Optional[float], b: Optional[float]) -> Optional[float]:
+    """a / NULLIF(b, 0) with NULL propagation."""
+    if a is None or b is None or b == 0:
+        return None
+    return a / b
+
+
+def _sub(a: Optional[float], b: Optional[float]) -> Optional[float]:
+    return None if a is None or b is None else a - b
+
+
+def _mul(a: Optional[float], k: float) -> Optional[float]:
+    return None if a is None else a * k
+
+
+def _order_book_rows(minutes: List[Tuple[int, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Python port of fetch_order_book_signals()' SELECT over minute_aggregates."""
+    by_minute = dict(minutes)
+    empty: Dict[str, Any] = {}
+    rows = []
+    for number, (minute, m0) in enumerate(minutes, start=1):
+        m1 = by_minute.get(minute - _MINUTE_US, empty)
+        m2 = by_minute.get(minute - 2 * _MINUTE_US, empty)
+        m3 = by_minute.get(minute - 3 * _MINUTE_US, empty)
+        m5 = by_minute.get(minute - 5 * _MINUTE_US, empty)
+        m10 = by_minute.get(minute - 10 * _MINUTE_US, empty)
+        mid = m0["mid_price"]
+        bid, ask, total = m0["bid_depth_10"], m0["ask_depth_10"], m0["total_depth_10"]
+        bid_slope, ask_slope = m0["bid_slope"], m0["ask_slope"]
+        rows.append({
+            "minute_timestamp": _from_us(minute),
+            "mid_price": mid,
+            "minute_number": number,
+            "price_change_1m": _r(_mul(_div(_sub(mid, m1.get("mid_price")), m1.get("mid_price")), 100), 6),
+            "price_change_5m": _r(_mul(_div(_sub(mid, m5.get("mid_price")), m5.get("mid_price")), 100), 6),
+            "price_change_10m": _r(_mul(_div(_sub(mid, m10.get("mid_price")), m10.get("mid_price")), 100), 6),
+            "volume_imbalance": _r(m0["volume_imbalance"], 6),
+            "imbalance_shift_1m": _r(_sub(m0["volume_imbalance"], m1.get("volume_imbalance")), 6),
+            "depth_imbalance_ratio": _r(_div(bid, ask), 6),
+            "bid_liquidity_share_pct": _r(_mul(_div(bid, total), 100), 6),
+            "ask_liquidity_share_pct": _r(_mul(_div(ask, total), 100), 6),
+            "depth_imbalance_pct": _r(_mul(_div(_sub(bid, ask), total), 100), 6),
+            "total_liquidity": _r(total, 2),
+            "liquidity_change_3m": _r(_mul(_div(_sub(total, m3.get("total_depth_10")), m3.get("total_depth_10")), 100), 6),
+            "microprice_deviation": _r(m0["microprice_dev_bps"], 6),
+            "microprice_acceleration_2m": _r(_sub(m0["microprice_dev_bps"], m2.get("microprice_dev_bps")), 6),
+            "spread_bps": _r(m0["relative_spread_bps"], 6),
+            "aggression_ratio": _r(_div(
+                None if bid_slope is None else abs(bid_slope),
+                None if ask_slope is None else abs(ask_slope),
+            ), 6),
+            "vwap_spread_bps": _r(_mul(_div(_sub(m0["ask_vwap_10"], m0["bid_vwap_10"]), m0["bid_vwap_10"]), 10000), 6),
+            "net_flow_5m": _r(m0["net_liquidity_change_sum"], 2),
+            "net_flow_to_liquidity_ratio": _r(_div(m0["net_liquidity_change_sum"], total), 6),
+            "sample_count": m0["sample_count"],
+            "coverage_seconds": m0["coverage_seconds"],
+        })
+    rows.reverse()
+    return rows[:15]
+
+
+def _price_rows(minutes: List[Tuple[int, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Python port of fetch_price_movements()' SELECT over minute_aggregates."""
+    by_minute = dict(minutes)
+    rows = []
+    for number, (minute, m0) in enumerate(minutes, start=1):
+        m1 = by_minute.get(minute - _MINUTE_US)
+        m5 = by_minute.get(minute - 5 * _MINUTE_US)
+        m10 = by_minute.get(minute - 10 * _MINUTE_US)
+        o, c, hi, lo, avg = m0["open"], m0["close"], m0["high"], m0["low"], m0["avg"]
+        body = c - o
+        change_pct = _mul(_div(body, o), 100)
+        volatility_pct = _mul(_div(hi - lo, avg), 100)
+        accel = None
+        if m1 is not None and m1["close"] > 0 and m1["open"] > 0:
+            accel = _mul(_sub(_div(body, o), _div(m1["close"] - m1["open"], m1["open"])), 100)
+        change_5m = (c - m5["close"]) / m5["close"] * 100 if m5 is not None and m5["close"] > 0 else None
+        change_10m = (c - m10["close"]) / m10["close"] * 100 if m10 is not None and m10["close"] > 0 else None
+        rows.append({
+            "minute_timestamp": _from_us(minute),
+            "minute_number": number,
+            "price_change_1m": _r(change_pct, 6),
+            "momentum_volatility_ratio": _r(_div(change_pct, volatility_pct), 6),
+            "momentum_acceleration_1m": _r(accel, 6),
+            "price_change_5m": _r(change_5m, 6),
+            "price_change_10m": _r(change_10m, 6),
+            "volatility_pct": _r(volatility_pct, 6),
+            "body_range_ratio": _r(_div(_mul(_div(abs(body), avg), 100), volatility_pct), 6),
+            "price_stddev_pct": _r(_mul(_div(m0["stddev"], avg), 100), 6),
+            "candle_body_pct": _r(_mul(_div(abs(body), avg), 100), 6),
+            "upper_wick_pct": _r(_mul(_div(hi - max(o, c), avg), 100), 6),
+            "lower_wick_pct": _r(_mul(_div(min(o, c) - lo, avg), 100), 6),
+            "open_price": round(o, 4),
+            "high_price": round(hi, 4),
+            "low_price": round(lo, 4),
+            "close_price": round(c, 4),
+            "avg_price": round(avg, 4),
+            "price_updates": m0["count"],
+        })
+    rows.reverse()
+    return rows[:15]
+
+
+def _thirty_second_rows(buckets: List[Tuple[int, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Python port of fetch_30_second_data()' SELECT."""
+    return [
+        {
+            "bucket_ts": _from_us(bucket),
+            "open_price": b["open"],
+            "close_price": b["close"],
+            "high_price": b["high"],
+            "low_price": b["low"],
+            "avg_price": b["avg"],
+            "price_stddev": b["stddev"],
+            "tick_count": b["count"],
+            "price_change_30s": _r(_mul(_div(b["close"] - b["open"], b["open"]), 100), 6),
+            "volatility_30s": _r(_mul(_div(b["high"] - b["low"], b["avg"]), 100), 6),
+        }
+        for bucket, b in buckets
+    ]
+
+
+# =============================================================================
+# COLUMNAR WINDOW BUFFER
+# =============================================================================
+
+class _WindowBuffer:
+    """Timestamp-sorted columnar rows of one source (or one price token)."""
+
+    __slots__ = ("ts", "cols")
+
+    def __init__(self) -> None:
+        self.ts = np.empty(0, dtype=np.int64)
+        self.cols: Dict[str, np.ndarray] = {}
+
+    def append(self, ts: np.ndarray, cols: Dict[str, np.ndarray]) -> None:
+        if not self.cols:
+            self.ts, self.cols = ts, cols
+        else:
+            self.ts = np.concatenate([self.ts, ts])
+            self.cols = {k: np.concatenate([v, cols[k]]) for k, v in self.cols.items()}
+        # Rows arrive in id order; late inserts can be out of timestamp order
+        if self.ts.size > 1 and (np.diff(self.ts) < 0).any():
+            order = np.argsort(self.ts, kind="stable")
+            self.ts = self.ts[order]
+            self.cols = {k: v[order] for k, v in self.cols.items()}
+
+    def evict_before(self, cutoff_us: int) -> None:
+        i = int(np.searchsorted(self.ts, cutoff_us, side="left"))
+        if i:
+            self.ts = self.ts[i:]
+            self.cols = {k: v[i:] for k, v in self.cols.items()}
+
+    def bounds(self, start_us: int, end_us: int) -> Tuple[int, int]:
+        """Index range of rows with start <= ts <= end."""
+        return (int(np.searchsorted(self.ts, start_us, side="left")),
+                int(np.searchsorted(self.ts, end_us, side="right")))
+
+
+# =============================================================================
+# CACHE
+# =============================================================================
+
+class MarketWindowCache:
+    """Sliding window of market data shared by every trail generated in this process."""
+
+    def __init__(self, minutes: int = CACHE_MINUTES,
+                 refresh_interval: float = REFRESH_INTERVAL_SECONDS) -> None:
+        self.minutes = minutes
+        self.refresh_interval = refresh_interval
+        self._lock = threading.RLock()
+        self._stats = {"hits": 0, "misses": 0, "bucket_hits": 0, "bucket_misses": 0,
+                       "refreshes": 0, "rows_loaded": 0, "refresh_errors": 0}
+        self._reset()
+
+    def _reset(self) -> None:
+        self._buffers: Dict[str, _WindowBuffer] = {}
+        self._watermarks: Dict[str, int] = {name: 0 for name in _SOURCES}
+        # buffer key -> bucket width (µs) -> bucket start (µs) -> aggregate
+        self._memo: Dict[str, Dict[int, Dict[int, Dict[str, Any]]]] = {}
+        self._floor_us: Optional[int] = None
+        self._as_of_us: Optional[int] = None
+        self._last_refresh = 0.0
+
+    # -------------------------------------------------------------------------
+    # Refresh
+    # -------------------------------------------------------------------------
+
+    def _load(self, cursor, name: str, cutoff: datetime) -> int:
+        """Pull rows past the id watermark and append them to the buffers."""
+        table, ts_col, cols, prepare = _SOURCES[name]
+        token_filter = {
+            "prices": "AND token = ANY(%s)",
+            "order_book": "AND symbol = %s",
+        }.get(name, "")
+        loaded = 0
+        while True:
+            params: List[Any] = [self._watermarks[name], cutoff]
+            if name == "prices":
+                params.append(list(PRICE_TOKENS))
+            elif name == "order_book":
+                params.append(OB_SYMBOL)
+            cursor.execute(f"""
+                SELECT id, {ts_col} AS ts, {", ".join(cols)}
+                FROM {table}
+                WHERE id > %s AND {ts_col} >= %s {token_filter}
+                ORDER BY id
+                LIMIT {_LOAD_BATCH}
+            """, params)
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            self._watermarks[name] = int(rows[-1]["id"])
+            if name == "prices":
+                for token in PRICE_TOKENS:
+                    token_rows = [r for r in rows if r["token"] == token]
+                    if token_rows:
+                        self._append(f"prices:{token}", token_rows, prepare)
+            else:
+                self._append(name, rows, prepare)
+            loaded += len(rows)
+            if len(rows) < _LOAD_BATCH:
+                break
+        return loaded
+
+    def _append(self, key: str, rows: List[Dict[str, Any]], prepare: Callable) -> None:
+        ts = _ts_array([r["ts"] for r in rows])
+        self._buffers.setdefault(key, _WindowBuffer()).append(ts, prepare(rows))
+        # A late row invalidates the memoized bucket it falls into
+        for width, memo in self._memo.get(key, {}).items():
+            for bucket in np.unique(ts - ts % width):
+                memo.pop(int(bucket), None)
+
+    def _refresh(self) -> None:
+        now = _utcnow()
+        cutoff = now - timedelta(minutes=self.minutes)
+        cutoff_us = _to_us(cutoff)
+        loaded = 0
+        with get_postgres() as conn:
+            with conn.cursor() as cursor:
+                for name in _SOURCES:
+                    loaded += self._load(cursor, name, cutoff)
+
+        for key, buf in self._buffers.items():
+            buf.evict_before(cutoff_us)
+        for widths in self._memo.values():
+            for memo in widths.values():
+                for bucket in [b for b in memo if b < cutoff_us]:
+                    del memo[bucket]
+
+        self._floor_us = cutoff_us if self._floor_us is None else max(self._floor_us, cutoff_us)
+        self._as_of_us = _to_us(now)
+        self._last_refresh = time.monotonic()
+        self._stats["refreshes"] += 1
+        self._stats["rows_loaded"] += loaded
+
+    def _window(self, start: datetime, end: datetime) -> Optional[Tuple[int, int]]:
+        """Refresh if stale and return (start_us, end_us) when the cache covers the window."""
+        start_us, end_us = _to_us(start), _to_us(end)
+        if start_us < _to_us(_utcnow() - timedelta(minutes=self.minutes)):
+            self._stats["misses"] += 1
+            return None
+        if (time.monotonic() - self._last_refresh >= self.refresh_interval
+                or self._as_of_us is None or end_us > self._as_of_us):
+            try:
+                self._refresh()
+            except Exception as e:
+                logger.warning(f"Market window cache refresh failed, using SQL: {e}")
+                self._stats["refresh_errors"] += 1
+                self._reset()
+        if self._as_of_us is None or start_us < self._floor_us or end_us > self._as_of_us:
+            self._stats["misses"] += 1
+            return None
+        self._stats["hits"] += 1
+        return start_us, end_us
+
+    # -------------------------------------------------------------------------
+    # Bucketing
+    # -------------------------------------------------------------------------
+
+    def _buckets(self, key: str, width: int, agg: Callable,
+                 start_us: int, end_us: int) -> List[Tuple[int, Dict[str, Any]]]:
+        """Non-empty buckets of `width` µs over [start, end], oldest first."""
+        buf = self._buffers.get(key)
+        if buf is None:
+            return []
+        i0, i1 = buf.bounds(start_us, end_us)
+        if i0 == i1:
+            return []
+        ts = buf.ts[i0:i1]
+        starts = ts - ts % width
+        edges = np.flatnonzero(np.diff(starts)) + 1
+        lo = np.concatenate([[0], edges])
+        hi = np.concatenate([edges, [ts.size]])
+        memo = self._memo.setdefault(key, {}).setdefault(width, {})
+        out = []
+        for a, b in zip(lo.tolist(), hi.tolist()):
+            bucket = int(starts[a])
+            # Only buckets wholly inside the window are shared between callers
+            whole = bucket >= start_us and bucket + width - 1 <= end_us
+            result = memo.get(bucket) if whole else None
+            if result is None:
+                result = agg(ts[a:b], {k: v[i0 + a:i0 + b] for k, v in buf.cols.items()})
+                if whole:
+                    memo[bucket] = result
+                self._stats["bucket_misses"] += 1
+            else:
+                self._stats["bucket_hits"] += 1
+            out.append((bucket, result))
+        return out
+
+    # -------------------------------------------------------------------------
+    # Window slices (None = not covered, caller falls back to SQL)
+    # -------------------------------------------------------------------------
+
+    def order_book_signals(self, start: datetime, end: datetime) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            window = self._window(start, end)
+            if window is None:
+                return None
+            return _order_book_rows(self._buckets("order_book", _MINUTE_US, _agg_order_book, *window))
+
+    def trade_minutes(self, start: datetime, end: datetime) -> Optional[pd.DataFrame]:
+        """Per-minute trade aggregates, same columns as fetch_transactions()' groupby."""
+        with self._lock:
+            window = self._window(start, end)
+            if window is None:
+                return None
+            return self._minute_frame(self._buckets("trades", _MINUTE_US, _agg_trades, *window))
+
+    def whale_minutes(self, start: datetime, end: datetime) -> Optional[pd.DataFrame]:
+        """Per-minute whale aggregates, same columns as fetch_whale_activity()' groupby."""
+        with self._lock:
+            window = self._window(start, end)
+            if window is None:
+                return None
+            return self._minute_frame(self._buckets("whales", _MINUTE_US, _agg_whales, *window))
+
+    def price_movements(self, start: datetime, end: datetime, token: str) -> Optional[List[Dict[str, Any]]]:
+        if token not in PRICE_TOKENS:
+            return None
+        with self._lock:
+            window = self._window(start, end)
+            if window is None:
+                return None
+            return _price_rows(self._buckets(f"prices:{token}", _MINUTE_US, _agg_prices, *window))
+
+    def thirty_second_data(self, start: datetime, end: datetime, token: str = "SOL") -> Optional[List[Dict[str, Any]]]:
+        if token not in PRICE_TOKENS:
+            return None
+        with self._lock:
+            window = self._window(start, end)
+            if window is None:
+                return None
+            return _thirty_second_rows(
+                self._buckets(f"prices:{token}", _HALF_MINUTE_US, _agg_prices, *window)
+            )
+
+    def second_prices(self, start: datetime, end: datetime, token: str = "SOL") -> Optional[pd.DataFrame]:
+        """Raw price ticks indexed by `ts`, as fetch_second_prices() returns them."""
+        if token not in PRICE_TOKENS:
+            return None
+        with self._lock:
+            window = self._window(start, end)
+            if window is None:
+                return None
+            buf = self._buffers.get(f"prices:{token}")
+            if buf is None:
+                return pd.DataFrame(columns=["price"])
+            i0, i1 = buf.bounds(*window)
+            index = pd.DatetimeIndex(buf.ts[i0:i1].astype("datetime64[us]").astype("datetime64[ns]"), name="ts")
+            return pd.DataFrame({"price": buf.cols["price"][i0:i1].copy()}, index=index)
+
+    @staticmethod
+    def _minute_frame(minutes: List[Tuple[int, Dict[str, Any]]]) -> pd.DataFrame:
+        if not minutes:
+            return pd.DataFrame()
+        df = pd.DataFrame([agg for _, agg in minutes])
+        df.insert(0, "minute_timestamp", pd.to_datetime(
+            np.array([m for m, _ in minutes], dtype="datetime64[us]")
+        ))
+        return df
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out = dict(self._stats)
+            lookups = out["hits"] + out["misses"]
+            out["hit_rate"] = round(out["hits"] / lookups, 4) if lookups else 0.0
+            out["rows_cached"] = {k: int(b.ts.size) for k, b in self._buffers.items()}
+            return out
+
+
+# =============================================================================
+# SINGLETON
+# =============================================================================
+
+_cache: Optional[MarketWindowCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_market_window_cache() -> Optional[MarketWindowCache]:
+    """Process-wide cache, or None when disabled via TRAIL_MARKET_CACHE=0."""
+    global _cache
+    if not CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = MarketWindowCache()
+    return _cache
+
+
+def get_market_cache_stats() -> Dict[str, Any]:
+    """Hit/miss counters of the process-wide cache (empty when disabled)."""
+    cache = get_market_window_cache()
+    return cache.stats() if cache else {}
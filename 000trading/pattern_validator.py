@@ -22,7 +22,9 @@ import os
 import statistics
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
 
 import sys
 PROJECT_ROOT = Path(__file__).parent.parent
@@ -31,6 +33,15 @@ sys.path.insert(0, str(PROJECT_ROOT))
 sys.path.insert(0, str(MODULE_DIR))
 
 from core.database import get_postgres
+from core.filter_plan import (
+    FilterLayout,
+    FilterPlan,
+    SlotKey,
+    compile_filter_plan,
+    evaluate_plans,
+    plan_slots,
+    set_slot,
+)
 
 # Import trail generator (direct import after adding module dir to path)
 from trail_generator import (
@@ -339,6 +350,15 @@ PRE_ENTRY_ALIAS_MAP = {
     "entry_whale_flow": ("wh_net_flow_ratio", "whale_activity"),
 }
 
+# Sections computed from the whole trail window (the filter minute is ignored)
+WINDOW_LEVEL_SECTIONS = frozenset({"second_prices", "patterns", "micro_patterns", "pre_entry"})
+
+# Compiled project filter plans (see core.filter_plan), keyed by project_id.
+# Each plan carries the version of the filter rows it was compiled from and is
+# recompiled when _fetch_filter_versions reports a different one.
+_FILTER_LAYOUT = FilterLayout()
+_FILTER_PLAN_CACHE: Dict[int, FilterPlan] = {}
+
 
 # =============================================================================
 # SCHEMA LOADING
@@ -916,17 +936,174 @@ def _evaluate_filter_condition(
     return True
 
 
+def _resolve_project_filter(filter_def: Dict[str, Any]) -> SlotKey:
+    """Resolve a filter row to its (section, minute, lookup field, column) slot."""
+    field_column = filter_def.get("field_column", "")
+    field_name = filter_def.get("field_name", "")
+    minute = filter_def.get("minute")
+    minute = 0 if minute is None else int(minute)
+    
+    # Resolve legacy pre-entry aliases (e.g. entry_buy_pressure -> tx_buy_sell_pressure)
+    alias_key = field_name or field_column
+    if alias_key in PRE_ENTRY_ALIAS_MAP:
+        real_column, section = PRE_ENTRY_ALIAS_MAP[alias_key]
+        logger.debug("Resolved alias %s -> %s (section=%s)", alias_key, real_column, section)
+        field_column = real_column
+    else:
+        section = _get_section_from_field_column(field_column) or filter_def.get("section")
+    
+    if not section:
+        logger.warning("Could not determine section for filter id=%s, field=%s",
+                       filter_def.get("id"), field_column or field_name)
+        return (None, minute, None, None)
+    
+    # For pre_entry section, the keys are stored as full column names (e.g. pre_entry_change_3m)
+    # For other sections, strip the prefix to get the field name (e.g. tx_buy_sell_pressure -> buy_sell_pressure)
+    if section == "pre_entry":
+        lookup_field = field_column or field_name
+    else:
+        lookup_field = _get_field_name_from_column(field_column) or field_name
+    return (section, minute, lookup_field, field_column or field_name)
+
+
+def _fetch_filter_versions(project_ids: Iterable[int]) -> Optional[Dict[int, str]]:
+    """Fingerprint of each project's active filter rows (projects without filters are absent).
+    
+    One round trip for all projects; returns None if the query fails.
+    """
+    try:
+        with get_postgres() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    SELECT project_id,
+                           md5(string_agg(
+                               (id, name, section, minute, field_name, field_column,
+                                from_value, to_value, include_null)::text,
+                               ';' ORDER BY id
+                           )) AS version
+                    FROM pattern_config_filters
+                    WHERE project_id = ANY(%s) AND is_active = 1
+                    GROUP BY project_id
+                """, [list(project_ids)])
+                return {row['project_id']: row['version'] for row in cursor.fetchall()}
+    except Exception as e:
+        logger.error("Failed to fetch filter versions for project_ids=%s: %s", project_ids, e)
+        return None
+
+
+def get_project_filter_plans(project_ids: Iterable[int]) -> Dict[int, FilterPlan]:
+    """Compiled filter plans for the given projects, recompiled only when their filters changed.
+    
+    If the version check fails, cached plans are used as they are and
+    projects without one are compiled from a direct fetch (not cached).
+    """
+    project_ids = list(dict.fromkeys(project_ids))
+    versions = _fetch_filter_versions(project_ids) if project_ids else {}
+    plans: Dict[int, FilterPlan] = {}
+    
+    for project_id in project_ids:
+        cached = _FILTER_PLAN_CACHE.get(project_id)
+        if versions is None:
+            if cached is not None:
+                plans[project_id] = cached
+                continue
+            version = None
+            filters = _fetch_project_filters(project_id)
+        else:
+            version = versions.get(project_id)
+            if cached is not None and cached.version == version:
+                plans[project_id] = cached
+                continue
+            filters = _fetch_project_filters(project_id) if version is not None else []
+        
+        plan = compile_filter_plan(project_id, filters, _resolve_project_filter, _FILTER_LAYOUT, version)
+        # A failed fetch also returns [] - only cache plans that match their version
+        if versions is not None and (filters or version is None):
+            _FILTER_PLAN_CACHE[project_id] = plan
+            logger.info("Compiled filter plan for project_id=%s (%d filters, version=%s)",
+                        project_id, len(plan), version)
+        plans[project_id] = plan
+    
+    return plans
+
+
+def clear_filter_plan_cache(project_id: Optional[int] = None) -> int:
+    """Drop compiled filter plans (one project, or all). Returns the number removed."""
+    if project_id is not None:
+        return 1 if _FILTER_PLAN_CACHE.pop(project_id, None) is not None else 0
+    count = len(_FILTER_PLAN_CACHE)
+    _FILTER_PLAN_CACHE.clear()
+    return count
+
+
+def _fill_filter_row(
+    trail_data: Dict[str, Any],
+    slots: Iterable[int],
+    values: np.ndarray,
+    states: np.ndarray,
+) -> None:
+    """Read the given layout slots from a trail into a (values, states) row."""
+    minute_rows: Dict[Tuple[str, int], Optional[Dict[str, Any]]] = {}
+    for slot in slots:
+        if slot == 0:
+            continue
+        section, minute, field, _ = _FILTER_LAYOUT.keys[slot]
+        key = (section, 0 if section in WINDOW_LEVEL_SECTIONS else minute)
+        if key not in minute_rows:
+            minute_rows[key] = _find_minute_data(trail_data, section, minute)
+        minute_data = minute_rows[key]
+        if minute_data is not None:
+            set_slot(values, states, slot, minute_data.get(field))
+
+
+def extract_filter_row(
+    trail_data: Dict[str, Any],
+    plans: Iterable[FilterPlan],
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Flat (values, states) vector holding every slot the plans read from this trail."""
+    values, states = _FILTER_LAYOUT.empty_row()
+    _fill_filter_row(trail_data, plan_slots(plans), values, states)
+    return values, states
+
+
+def evaluate_projects_batch(
+    trails: Sequence[Dict[str, Any]],
+    project_ids: Sequence[int],
+) -> np.ndarray:
+    """GO/NO_GO for many trails against many projects, for backtests.
+    
+    Returns a bool matrix of shape (len(trails), len(project_ids)); entry
+    [i, j] is what validate_with_project_filters decides for trail i and
+    project j. A trail passes validate_with_multiple_projects if any entry
+    of its row is True.
+    """
+    plans = get_project_filter_plans(project_ids)
+    ordered = [plans[project_id] for project_id in project_ids]
+    slots = plan_slots(ordered)
+    values, states = _FILTER_LAYOUT.empty_matrix(len(trails))
+    for i, trail_data in enumerate(trails):
+        _fill_filter_row(trail_data, slots, values[i], states[i])
+    return evaluate_plans(ordered, values, states)
+
+
 def validate_with_project_filters(
     trail_data: Dict[str, Any],
     project_id: int,
-    play_id: int
+    play_id: int,
+    plan: Optional[FilterPlan] = None,
+    row: Optional[Tuple[np.ndarray, np.ndarray]] = None,
 ) -> Dict[str, Any]:
-    """Validate trail data against project filters."""
+    """Validate trail data against project filters.
+    
+    `plan` / `row` let callers evaluating several projects share one plan
+    lookup and one trail extraction (see validate_with_multiple_projects).
+    """
     logger.info("Validating with project filters for project_id=%s, play_id=%s", project_id, play_id)
     
-    filters = _fetch_project_filters(project_id)
+    if plan is None:
+        plan = get_project_filter_plans([project_id])[project_id]
     
-    if not filters:
+    if not len(plan):
         logger.warning("No active filters found for project_id=%s, defaulting to NO_GO", project_id)
         return {
             "decision": "NO_GO",
@@ -939,129 +1116,22 @@ def validate_with_project_filters(
             "play_id": play_id,
         }
     
-    filter_results = []
-    filters_passed = 0
-    filters_failed = 0
-    
-    for filter_def in filters:
-        filter_id = filter_def.get("id")
-        filter_name = filter_def.get("name", "")
-        field_column = filter_def.get("field_column", "")
-        field_name = filter_def.get("field_name", "")
-        from_value = filter_def.get("from_value")
-        to_value = filter_def.get("to_value")
-        minute = filter_def.get("minute")
-        include_null = bool(filter_def.get("include_null", 0))
-        
-        if minute is None:
-            minute = 0
-        else:
-            minute = int(minute)
-        
-        # Resolve legacy pre-entry aliases (e.g. entry_buy_pressure -> tx_buy_sell_pressure)
-        alias_key = field_name or field_column
-        if alias_key in PRE_ENTRY_ALIAS_MAP:
-            real_column, real_section = PRE_ENTRY_ALIAS_MAP[alias_key]
-            logger.debug("Resolved alias %s -> %s (section=%s)", alias_key, real_column, real_section)
-            field_column = real_column
-            section = real_section
-        else:
-            section = _get_section_from_field_column(field_column)
-            if not section:
-                section = filter_def.get("section")
-                if section:
-                    section_map = {
-                        "price_movements": "price_movements",
-                        "transactions": "transactions", 
-                        "order_book_signals": "order_book_signals",
-                        "whale_activity": "whale_activity",
-                        "second_prices": "second_prices",
-                        "patterns": "patterns",
-                        "micro_patterns": "micro_patterns",
-                        "btc_price_movements": "btc_price_movements",
-                        "eth_price_movements": "eth_price_movements",
-                        "cross_asset": "cross_asset",
-                        "thirty_second": "thirty_second",
-                        "micro_move": "micro_move",
-                        "pre_entry": "pre_entry",
-                    }
-                    section = section_map.get(section, section)
-        
-        if not section:
-            logger.warning("Could not determine section for filter id=%s, field=%s", filter_id, field_column or field_name)
-            filter_results.append({
-                "filter_id": filter_id,
-                "filter_name": filter_name,
-                "field": field_column or field_name,
-                "minute": minute,
-                "from_value": float(from_value) if from_value is not None else None,
-                "to_value": float(to_value) if to_value is not None else None,
-                "actual_value": None,
-                "passed": False,
-                "error": "unknown_section",
-            })
-            filters_failed += 1
-            continue
-        
-        minute_data = _find_minute_data(trail_data, section, minute)
-        
-        if minute_data is None:
-            logger.debug("No data found for section=%s, minute=%s", section, minute)
-            filter_results.append({
-                "filter_id": filter_id,
-                "filter_name": filter_name,
-                "field": field_column or field_name,
-                "section": section,
-                "minute": minute,
-                "from_value": float(from_value) if from_value is not None else None,
-                "to_value": float(to_value) if to_value is not None else None,
-                "actual_value": None,
-                "passed": include_null,
-                "error": "no_minute_data",
-            })
-            if include_null:
-                filters_passed += 1
-            else:
-                filters_failed += 1
-            continue
-        
-        # For pre_entry section, the keys are stored as full column names (e.g. pre_entry_change_3m)
-        # For other sections, strip the prefix to get the field name (e.g. tx_buy_sell_pressure -> buy_sell_pressure)
-        if section == "pre_entry":
-            lookup_field = field_column or field_name
-        else:
-            lookup_field = _get_field_name_from_column(field_column) or field_name
-        actual_value = minute_data.get(lookup_field)
-        
-        passed = _evaluate_filter_condition(actual_value, from_value, to_value, include_null=include_null)
-        
-        filter_result = {
-            "filter_id": filter_id,
-            "filter_name": filter_name,
-            "field": field_column or field_name,
-            "section": section,
-            "minute": minute,
-            "from_value": float(from_value) if from_value is not None else None,
-            "to_value": float(to_value) if to_value is not None else None,
-            "actual_value": float(actual_value) if actual_value is not None else None,
-            "passed": passed,
-        }
-        
-        filter_results.append(filter_result)
-        
-        if passed:
-            filters_passed += 1
-        else:
-            filters_failed += 1
+    values, states = row if row is not None else extract_filter_row(trail_data, [plan])
+    passed = plan.evaluate(values, states)
+    filter_results = plan.results(values, states, passed)
+    
+    filters_total = len(plan)
+    filters_passed = int(passed.sum())
+    filters_failed = filters_total - filters_passed
     
     all_pass = filters_failed == 0 and filters_passed > 0
     decision = "GO" if all_pass else "NO_GO"
     
-    reason = "all_filters_passed" if all_pass else f"{filters_failed}_of_{len(filters)}_filters_failed"
+    reason = "all_filters_passed" if all_pass else f"{filters_failed}_of_{filters_total}_filters_failed"
     
     logger.info(
         "Project filter validation complete: decision=%s, passed=%s, failed=%s, total=%s",
-        decision, filters_passed, filters_failed, len(filters)
+        decision, filters_passed, filters_failed, filters_total
     )
     
     return {
@@ -1070,7 +1140,7 @@ def validate_with_project_filters(
         "filter_results": filter_results,
         "filters_passed": filters_passed,
         "filters_failed": filters_failed,
-        "filters_total": len(filters),
+        "filters_total": filters_total,
         "project_id": project_id,
         "play_id": play_id,
     }
@@ -1180,8 +1250,14 @@ def validate_with_multiple_projects(
     any_project_passed = False
     winning_project_id = None
     
+    # One plan lookup (a single version query) and one trail extraction for all projects
+    plans = get_project_filter_plans(project_ids)
+    row = extract_filter_row(trail_data, plans.values())
+    
     for project_id in project_ids:
-        result = validate_with_project_filters(trail_data, project_id, play_id)
+        result = validate_with_project_filters(
+            trail_data, project_id, play_id, plan=plans[project_id], row=row
+        )
         result['project_id'] = project_id
         all_project_results.append(result)
         
@@ -42,8 +42,9 @@ from typing import Any, Dict, List, Optional
 
 import duckdb
 import pyarrow as pa
+import pyarrow.compute as pc
 
-from core.database import get_postgres
+from core.database import postgres_arrow_table
 
 logger = logging.getLogger("pump_highfreq_cache")
 
@@ -212,165 +213,122 @@ def _set_watermark(con: duckdb.DuckDBPyConnection, table_name: str, max_id: int)
     """, [table_name, max_id, datetime.now(timezone.utc).replace(tzinfo=None)])
 
 
+def _insert_batch(con: duckdb.DuckDBPyConnection, table: str, source_name: str,
+                  tbl: pa.Table) -> int:
+    """INSERT OR REPLACE an Arrow table into a cache table; update its watermark."""
+    if tbl.num_rows == 0:
+        return 0
+    view = f"_{table}_arrow"
+    con.register(view, tbl)
+    con.execute(f"INSERT OR REPLACE INTO {table} SELECT * FROM {view}")
+    con.unregister(view)
+
+    _set_watermark(con, source_name, int(pc.max(tbl["id"]).as_py()))
+    return tbl.num_rows
+
+
+_OB_SCHEMA = pa.schema(
+    [("id", pa.int64()), ("ts", pa.timestamp("us"))]
+    + [(name, pa.float64()) for name in (
+        "mid_price", "spread_bps", "volume_imbalance",
+        "bid_liquidity", "ask_liquidity", "total_depth_10",
+        "microprice", "microprice_dev_bps",
+        "bid_vwap_10", "ask_vwap_10", "bid_slope", "ask_slope",
+        "bid_depth_bps_10", "ask_depth_bps_10",
+        "net_liquidity_change_1s", "depth_imbalance_ratio",
+    )]
+)
+
+_TRADES_SCHEMA = pa.schema([
+    ("id", pa.int64()),
+    ("trade_timestamp", pa.timestamp("us")),
+    ("direction", pa.string()),
+    ("price", pa.float64()),
+    ("sol_amount", pa.float64()),
+    ("stablecoin_amount", pa.float64()),
+])
+
+_WHALES_SCHEMA = pa.schema([
+    ("id", pa.int64()),
+    ("ts", pa.timestamp("us")),
+    ("sol_change", pa.float64()),
+    ("direction", pa.string()),
+    ("abs_change", pa.float64()),
+    ("whale_type", pa.string()),
+    ("percentage_moved", pa.float64()),
+])
+
+_PRICES_SCHEMA = pa.schema([
+    ("id", pa.int64()),
+    ("ts", pa.timestamp("us")),
+    ("price", pa.float64()),
+])
+
+
 def _sync_order_book(con: duckdb.DuckDBPyConnection, cutoff: datetime) -> int:
     """Sync order_book_features from PostgreSQL."""
     wm = _get_watermark(con, "order_book_features")
 
-    with get_postgres() as pg:
-        with pg.cursor() as cur:
-            cur.execute("""
-                SELECT id, timestamp, mid_price, spread_bps, volume_imbalance,
-                       bid_liquidity, ask_liquidity, total_depth_10,
-                       microprice, microprice_dev_bps,
-                       bid_vwap_10, ask_vwap_10, bid_slope, ask_slope,
-                       bid_depth_bps_10, ask_depth_bps_10,
-                       net_liquidity_change_1s, depth_imbalance_ratio
-                FROM order_book_features
-                WHERE id > %s AND timestamp >= %s
-                ORDER BY id
-                LIMIT 50000
-            """, [wm, cutoff])
-            rows = cur.fetchall()
-
-    if not rows:
-        return 0
+    tbl = postgres_arrow_table("""
+        SELECT id, timestamp AS ts, mid_price, spread_bps, volume_imbalance,
+               bid_liquidity, ask_liquidity, total_depth_10,
+               microprice, microprice_dev_bps,
+               bid_vwap_10, ask_vwap_10, bid_slope, ask_slope,
+               bid_depth_bps_10, ask_depth_bps_10,
+               net_liquidity_change_1s, depth_imbalance_ratio
+        FROM order_book_features
+        WHERE id > %s AND timestamp >= %s AND symbol = 'SOLUSDT'
+        ORDER BY id
+        LIMIT 50000
+    """, [wm, cutoff], schema=_OB_SCHEMA)
 
-    ids = pa.array([r["id"] for r in rows], type=pa.int64())
-    tbl = pa.table({
-        "id": ids,
-        "ts":                      pa.array([r["timestamp"] for r in rows], type=pa.timestamp("us")),
-        "mid_price":               pa.array([float(r["mid_price"]) if r["mid_price"] is not None else None for r in rows], type=pa.float64()),
-        "spread_bps":              pa.array([float(r["spread_bps"]) if r["spread_bps"] is not None else None for r in rows], type=pa.float64()),
-        "volume_imbalance":        pa.array([float(r["volume_imbalance"]) if r["volume_imbalance"] is not None else None for r in rows], type=pa.float64()),
-        "bid_liquidity":           pa.array([float(r["bid_liquidity"]) if r.get("bid_liquidity") is not None else None for r in rows], type=pa.float64()),
-        "ask_liquidity":           pa.array([float(r["ask_liquidity"]) if r.get("ask_liquidity") is not None else None for r in rows], type=pa.float64()),
-        "total_depth_10":          pa.array([float(r["total_depth_10"]) if r.get("total_depth_10") is not None else None for r in rows], type=pa.float64()),
-        "microprice":              pa.array([float(r["microprice"]) if r.get("microprice") is not None else None for r in rows], type=pa.float64()),
-        "microprice_dev_bps":      pa.array([float(r["microprice_dev_bps"]) if r.get("microprice_dev_bps") is not None else None for r in rows], type=pa.float64()),
-        "bid_vwap_10":             pa.array([float(r["bid_vwap_10"]) if r.get("bid_vwap_10") is not None else None for r in rows], type=pa.float64()),
-        "ask_vwap_10":             pa.array([float(r["ask_vwap_10"]) if r.get("ask_vwap_10") is not None else None for r in rows], type=pa.float64()),
-        "bid_slope":               pa.array([float(r["bid_slope"]) if r.get("bid_slope") is not None else None for r in rows], type=pa.float64()),
-        "ask_slope":               pa.array([float(r["ask_slope"]) if r.get("ask_slope") is not None else None for r in rows], type=pa.float64()),
-        "bid_depth_bps_10":        pa.array([float(r["bid_depth_bps_10"]) if r.get("bid_depth_bps_10") is not None else None for r in rows], type=pa.float64()),
-        "ask_depth_bps_10":        pa.array([float(r["ask_depth_bps_10"]) if r.get("ask_depth_bps_10") is not None else None for r in rows], type=pa.float64()),
-        "net_liquidity_change_1s": pa.array([float(r["net_liquidity_change_1s"]) if r.get("net_liquidity_change_1s") is not None else None for r in rows], type=pa.float64()),
-        "depth_imbalance_ratio":   pa.array([float(r.get("depth_imbalance_ratio") or r.get("depth_imbalance", 0)) if r.get("depth_imbalance_ratio") is not None or r.get("depth_imbalance") is not None else None for r in rows], type=pa.float64()),
-    })
-
-    con.register("_ob_arrow", tbl)
-    con.execute("INSERT OR REPLACE INTO cached_order_book SELECT * FROM _ob_arrow")
-    con.unregister("_ob_arrow")
-
-    max_id = int(rows[-1]["id"])
-    _set_watermark(con, "order_book_features", max_id)
-    return len(rows)
+    return _insert_batch(con, "cached_order_book", "order_book_features", tbl)
 
 
 def _sync_trades(con: duckdb.DuckDBPyConnection, cutoff: datetime) -> int:
     """Sync sol_stablecoin_trades from PostgreSQL."""
     wm = _get_watermark(con, "sol_stablecoin_trades")
 
-    with get_postgres() as pg:
-        with pg.cursor() as cur:
-            cur.execute("""
-                SELECT id, trade_timestamp, direction, price, sol_amount, stablecoin_amount
-                FROM sol_stablecoin_trades
-                WHERE id > %s AND trade_timestamp >= %s
-                ORDER BY id
-                LIMIT 100000
-            """, [wm, cutoff])
-            rows = cur.fetchall()
-
-    if not rows:
-        return 0
-
-    tbl = pa.table({
-        "id":                pa.array([r["id"] for r in rows], type=pa.int64()),
-        "trade_timestamp":   pa.array([r["trade_timestamp"] for r in rows], type=pa.timestamp("us")),
-        "direction":         pa.array([r["direction"] for r in rows], type=pa.string()),
-        "price":             pa.array([float(r["price"]) if r["price"] is not None else None for r in rows], type=pa.float64()),
-        "sol_amount":        pa.array([float(r["sol_amount"]) if r["sol_amount"] is not None else None for r in rows], type=pa.float64()),
-        "stablecoin_amount": pa.array([float(r["stablecoin_amount"]) if r["stablecoin_amount"] is not None else None for r in rows], type=pa.float64()),
-    })
-
-    con.register("_tr_arrow", tbl)
-    con.execute("INSERT OR REPLACE INTO cached_trades SELECT * FROM _tr_arrow")
-    con.unregister("_tr_arrow")
+    tbl = postgres_arrow_table("""
+        SELECT id, trade_timestamp, direction, price, sol_amount, stablecoin_amount
+        FROM sol_stablecoin_trades
+        WHERE id > %s AND trade_timestamp >= %s
+        ORDER BY id
+        LIMIT 100000
+    """, [wm, cutoff], schema=_TRADES_SCHEMA)
 
-    max_id = int(rows[-1]["id"])
-    _set_watermark(con, "sol_stablecoin_trades", max_id)
-    return len(rows)
+    return _insert_batch(con, "cached_trades", "sol_stablecoin_trades", tbl)
 
 
 def _sync_whales(con: duckdb.DuckDBPyConnection, cutoff: datetime) -> int:
     """Sync whale_movements from PostgreSQL."""
     wm = _get_watermark(con, "whale_movements")
 
-    with get_postgres() as pg:
-        with pg.cursor() as cur:
-            cur.execute("""
-                SELECT id, timestamp, sol_change, direction, abs_change,
-                       whale_type, percentage_moved
-                FROM whale_movements
-                WHERE id > %s AND timestamp >= %s
-                ORDER BY id
-                LIMIT 50000
-            """, [wm, cutoff])
-            rows = cur.fetchall()
-
-    if not rows:
-        return 0
-
-    tbl = pa.table({
-        "id":              pa.array([r["id"] for r in rows], type=pa.int64()),
-        "ts":              pa.array([r["timestamp"] for r in rows], type=pa.timestamp("us")),
-        "sol_change":      pa.array([float(r["sol_change"]) if r["sol_change"] is not None else None for r in rows], type=pa.float64()),
-        "direction":       pa.array([r["direction"] for r in rows], type=pa.string()),
-        "abs_change":      pa.array([float(r["abs_change"]) if r["abs_change"] is not None else None for r in rows], type=pa.float64()),
-        "whale_type":      pa.array([r["whale_type"] for r in rows], type=pa.string()),
-        "percentage_moved": pa.array([float(r["percentage_moved"]) if r["percentage_moved"] is not None else None for r in rows], type=pa.float64()),
-    })
-
-    con.register("_wh_arrow", tbl)
-    con.execute("INSERT OR REPLACE INTO cached_whales SELECT * FROM _wh_arrow")
-    con.unregister("_wh_arrow")
+    tbl = postgres_arrow_table("""
+        SELECT id, timestamp AS ts, sol_change, direction, abs_change,
+               whale_type, percentage_moved
+        FROM whale_movements
+        WHERE id > %s AND timestamp >= %s
+        ORDER BY id
+        LIMIT 50000
+    """, [wm, cutoff], schema=_WHALES_SCHEMA)
 
-    max_id = int(rows[-1]["id"])
-    _set_watermark(con, "whale_movements", max_id)
-    return len(rows)
+    return _insert_batch(con, "cached_whales", "whale_movements", tbl)
 
 
 def _sync_prices(con: duckdb.DuckDBPyConnection, cutoff: datetime) -> int:
     """Sync SOL prices from PostgreSQL."""
     wm = _get_watermark(con, "prices_sol")
 
-    with get_postgres() as pg:
-        with pg.cursor() as cur:
-            cur.execute("""
-                SELECT id, timestamp, price
-                FROM prices
-                WHERE id > %s AND timestamp >= %s AND token = 'SOL'
-                ORDER BY id
-                LIMIT 100000
-            """, [wm, cutoff])
-            rows = cur.fetchall()
-
-    if not rows:
-        return 0
-
-    tbl = pa.table({
-        "id":    pa.array([r["id"] for r in rows], type=pa.int64()),
-        "ts":    pa.array([r["timestamp"] for r in rows], type=pa.timestamp("us")),
-        "price": pa.array([float(r["price"]) for r in rows], type=pa.float64()),
-    })
-
-    con.register("_pr_arrow", tbl)
-    con.execute("INSERT OR REPLACE INTO cached_prices SELECT * FROM _pr_arrow")
-    con.unregister("_pr_arrow")
+    tbl = postgres_arrow_table("""
+        SELECT id, timestamp AS ts, price
+        FROM prices
+        WHERE id > %s AND timestamp >= %s AND token = 'SOL'
+        ORDER BY id
+        LIMIT 100000
+    """, [wm, cutoff], schema=_PRICES_SCHEMA)
 
-    max_id = int(rows[-1]["id"])
-    _set_watermark(con, "prices_sol", max_id)
-    return len(rows)
+    return _insert_batch(con, "cached_prices", "prices_sol", tbl)
 
 
 def _cleanup_old_data(con: duckdb.DuckDBPyConnection, cutoff: datetime) -> None:
@@ -45,14 +45,19 @@ import time
 from collections import deque
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional, Tuple
 
 import duckdb
 import numpy as np
 import pandas as pd
 import pyarrow as pa
+import pyarrow.compute as pc
 
 from core.database import get_postgres, postgres_execute, postgres_insert_many, postgres_query, postgres_query_one
+from core.feature_store import get_feature_store
+from core.forward_labels import forward_summary, group_forward_returns
+from core.price_service import get_price_service
 
 _PROJECT_ROOT = Path(__file__).resolve().parent.parent
 MODEL_CACHE_PATH = _PROJECT_ROOT / "tests" / "filter_simulation" / "results" / "pump_model_v2_cache.pkl"
@@ -182,13 +187,19 @@ _PM_CACHE_TTL: float = 4.0   # seconds — refresh slightly faster than the 5s c
 
 
 def _compute_price_momentum() -> Optional[Dict[str, float]]:
-    """Compute pm_price_change_* features from recent PostgreSQL price rows.
+    """Compute pm_price_change_* features from recent SOL prices.
 
     Returns dict with pm_price_change_30s, pm_price_change_1m, pm_price_change_5m,
     pm_velocity_30s — in % units, matching mega_simulator feature definitions.
-    Results are cached for _PM_CACHE_TTL seconds to avoid hammering the DB.
+    Served from the in-process price service; the PostgreSQL fallback is
+    cached for _PM_CACHE_TTL seconds to avoid hammering the DB.
     """
     global _pm_cache, _pm_cache_ts
+    service = get_price_service()
+    pm = service.momentum() if service else None
+    if pm is not None:
+        return pm
+
     now = time.time()
     if now - _pm_cache_ts < _PM_CACHE_TTL and _pm_cache:
         return _pm_cache
@@ -245,6 +256,7 @@ def _compute_price_momentum() -> Optional[Dict[str, float]]:
 # Keyed by play_id so each play maintains its own filtered rule set.
 _sim_rules: Dict[int, List[Dict[str, Any]]] = {}
 _sim_rules_loaded_at: Dict[int, float] = {}
+_sim_rules_version: int = 0  # bumped on every reload; invalidates the compiled rule book
 SIM_RULES_TTL: float = 300.0  # refresh every 5 min
 
 # Guard rails for per-play simulator filters. These keep DB play configs from
@@ -769,22 +781,9 @@ def _normalize_sim_filter(sim_filter: Optional[Dict[str, Any]]) -> Dict[str, Any
     }
 
 
-def check_sim_rules(
-    live_features: Dict[str, Any],
-    play_id: int = 3,
-    sim_filter: Optional[Dict[str, Any]] = None,
-) -> Optional[Dict[str, Any]]:
-    """Check live raw-cache features against best simulation_results rules.
-
-    Feature names in conditions_json use the same naming as
-    raw_data_cache.get_live_features() — no translation required.
-
-    Each play passes its own sim_filter thresholds so rules are filtered
-    differently per play (e.g. aggressive play uses lower win_rate_min).
-
-    Returns the first matching rule dict (highest daily_ev), or None.
-    """
-    global _sim_rules, _sim_rules_loaded_at
+def _play_sim_rules(play_id: int, sim_filter: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Play's cached simulator rules, reloaded from PostgreSQL every SIM_RULES_TTL."""
+    global _sim_rules_version
 
     now = time.time()
     play_last_loaded = _sim_rules_loaded_at.get(play_id, 0.0)
@@ -813,49 +812,140 @@ def check_sim_rules(
                 )
         _sim_rules[play_id] = rules
         _sim_rules_loaded_at[play_id] = now
+        _sim_rules_version += 1
         logger.debug(f"[sim_rules] play={play_id} loaded {len(rules)} rules")
 
-    rules = _sim_rules.get(play_id, [])
-    if not rules:
-        return None
-
-    for rule in rules:
-        conditions = rule.get('conditions_json') or []
-        if not conditions:
-            continue
+    return _sim_rules.get(play_id, [])
 
-        all_met = True
-        n_checked = 0
-        for cond in conditions:
-            feat      = cond.get('feature')
-            direction = cond.get('direction')   # '<' or '>'
-            threshold = cond.get('threshold')
 
-            if feat is None or direction is None or threshold is None:
-                continue
+class _SimRuleBook:
+    """
+    Every play's simulator rules flattened into condition arrays, so one
+    cycle's live features are checked against all plays in a single numpy
+    pass instead of a Python loop per play, rule and condition.
+
+    Matching follows the original per-rule loop: a condition without
+    feature / direction / threshold is skipped, a missing or non-numeric
+    live value fails it, '<' fails on val >= threshold and '>' on
+    val <= threshold; a rule matches when no condition failed and at least
+    two were checked, and each play takes its first matching rule.
+    """
 
+    __slots__ = ('features', 'cond_feature', 'cond_threshold', 'cond_lt', 'cond_gt',
+                 'cond_broken', 'cond_rule', 'rule_checked', 'rules', 'play_spans')
+
+    def __init__(self, play_rules: Dict[int, List[Dict[str, Any]]]):
+        feature_index: Dict[str, int] = {}
+        cond_feature, cond_threshold, cond_lt, cond_gt, cond_broken, cond_rule = [], [], [], [], [], []
+        rule_checked: List[int] = []
+        self.rules: List[Dict[str, Any]] = []
+        self.play_spans: Dict[int, Tuple[int, int]] = {}
+
+        for play_id, rules in play_rules.items():
+            first = len(self.rules)
+            for rule in rules:
+                rule_no = len(self.rules)
+                self.rules.append(rule)
+                checked = 0
+                for cond in rule.get('conditions_json') or []:
+                    feat = cond.get('feature')
+                    direction = cond.get('direction')
+                    threshold = cond.get('threshold')
+                    if feat is None or direction is None or threshold is None:
+                        continue
+                    try:
+                        thr = float(threshold)
+                        broken = False
+                    except (TypeError, ValueError):
+                        thr = np.nan
+                        broken = direction in ('<', '>')
+                    cond_feature.append(feature_index.setdefault(feat, len(feature_index)))
+                    cond_threshold.append(thr)
+                    cond_lt.append(direction == '<')
+                    cond_gt.append(direction == '>')
+                    cond_broken.append(broken)
+                    cond_rule.append(rule_no)
+                    checked += 1
+                rule_checked.append(checked)
+            self.play_spans[play_id] = (first, len(self.rules))
+
+        self.features = list(feature_index)
+        self.cond_feature = np.asarray(cond_feature, dtype=np.intp)
+        self.cond_threshold = np.asarray(cond_threshold, dtype=np.float64)
+        self.cond_lt = np.asarray(cond_lt, dtype=bool)
+        self.cond_gt = np.asarray(cond_gt, dtype=bool)
+        self.cond_broken = np.asarray(cond_broken, dtype=bool)
+        self.cond_rule = np.asarray(cond_rule, dtype=np.intp)
+        self.rule_checked = np.asarray(rule_checked, dtype=np.int64)
+
+    def match(self, live_features: Mapping[str, Any]) -> Dict[int, Optional[Dict[str, Any]]]:
+        """play_id -> first matching rule (or None) for one live feature dict."""
+        values = np.full(len(self.features), np.nan)
+        present = np.zeros(len(self.features), dtype=bool)
+        for i, feat in enumerate(self.features):
             val = live_features.get(feat)
             if val is None:
-                all_met = False
-                break
+                continue
             try:
-                val = float(val)
+                values[i] = float(val)
             except (TypeError, ValueError):
-                all_met = False
-                break
+                continue
+            present[i] = True
 
-            if direction == '<' and val >= threshold:
-                all_met = False
-                break
-            elif direction == '>' and val <= threshold:
-                all_met = False
-                break
-            n_checked += 1
+        x = values[self.cond_feature]
+        failed = (~present[self.cond_feature] | self.cond_broken
+                  | (self.cond_lt & (x >= self.cond_threshold))
+                  | (self.cond_gt & (x <= self.cond_threshold)))
+        rule_failed = np.bincount(self.cond_rule[failed], minlength=len(self.rules)) > 0
+        matched = ~rule_failed & (self.rule_checked >= 2)
 
-        if all_met and n_checked >= 2:
-            return rule  # first match (ordered by daily_ev DESC)
+        out: Dict[int, Optional[Dict[str, Any]]] = {}
+        for play_id, (first, last) in self.play_spans.items():
+            hits = np.flatnonzero(matched[first:last])
+            out[play_id] = self.rules[first + hits[0]] if len(hits) else None
+        return out
 
-    return None
+
+_sim_rule_book: Optional[_SimRuleBook] = None
+_sim_rule_book_key: Optional[Tuple[Any, ...]] = None
+
+
+def match_sim_rules(
+    live_features: Mapping[str, Any],
+    play_filters: Dict[int, Optional[Dict[str, Any]]],
+) -> Dict[int, Optional[Dict[str, Any]]]:
+    """Check live features against every play's simulator rules in one pass.
+
+    play_filters maps play_id -> that play's sim_filter. Returns
+    play_id -> first matching rule (ordered by daily_ev DESC) or None.
+    The compiled rule book is reused until a play's rules are reloaded.
+    """
+    global _sim_rule_book, _sim_rule_book_key
+
+    play_rules = {pid: _play_sim_rules(pid, sf) for pid, sf in play_filters.items()}
+    key = (tuple(play_rules), _sim_rules_version)
+    if _sim_rule_book is None or key != _sim_rule_book_key:
+        _sim_rule_book = _SimRuleBook(play_rules)
+        _sim_rule_book_key = key
+    return _sim_rule_book.match(live_features)
+
+
+def check_sim_rules(
+    live_features: Mapping[str, Any],
+    play_id: int = 3,
+    sim_filter: Optional[Dict[str, Any]] = None,
+) -> Optional[Dict[str, Any]]:
+    """Check live raw-cache features against best simulation_results rules.
+
+    Feature names in conditions_json use the same naming as
+    raw_data_cache.get_live_features() — no translation required.
+
+    Each play passes its own sim_filter thresholds so rules are filtered
+    differently per play (e.g. aggressive play uses lower win_rate_min).
+
+    Returns the first matching rule dict (highest daily_ev), or None.
+    """
+    return match_sim_rules(live_features, {play_id: sim_filter}).get(play_id)
 
 
 # =============================================================================
@@ -1030,34 +1120,11 @@ def _init_trail_cache(con: duckdb.DuckDBPyConnection) -> None:
     """)
 
 
-# Column list used in SELECT from PostgreSQL (must match cached_trail schema)
-_TRAIL_CACHE_COLUMNS: List[str] = []  # populated lazily
-
-
-def _trail_cache_columns() -> List[str]:
-    """Return the explicit column list to SELECT from buyin_trail_minutes."""
-    global _TRAIL_CACHE_COLUMNS
-    if _TRAIL_CACHE_COLUMNS:
-        return _TRAIL_CACHE_COLUMNS
-
-    # Open a throwaway DuckDB connection to read column names from schema
-    con = _get_trail_cache_conn()
-    try:
-        _init_trail_cache(con)
-        info = con.execute("PRAGMA table_info('cached_trail')").fetchall()
-        # info rows: (cid, name, type, notnull, dflt_value, pk)
-        cols = [row[1] for row in info if row[1] != 'followed_at']
-        _TRAIL_CACHE_COLUMNS = cols
-    finally:
-        con.close()
-    return _TRAIL_CACHE_COLUMNS
-
-
 _TRAIL_CACHE_MIN_RETENTION_HOURS = 24  # matches PostgreSQL 24h retention window
 
 
 def _sync_trail_cache(hours: int) -> duckdb.DuckDBPyConnection:
-    """Incrementally sync trail data from PostgreSQL into DuckDB.
+    """Incrementally sync trail data from the shared feature store into DuckDB.
 
     The DuckDB cache acts as the long-term data store since PostgreSQL
     archives data after 24 hours. Retention is at least
@@ -1091,77 +1158,45 @@ def _sync_trail_cache(hours: int) -> duckdb.DuckDBPyConnection:
         fetch_since = cutoff
         logger.info(f"  Full sync (last {hours}h)")
 
-    with get_postgres() as pg:
-        with pg.cursor() as cur:
-            cur.execute("""
-                SELECT id AS buyin_id, followed_at
-                FROM follow_the_goat_buyins
-                WHERE potential_gains IS NOT NULL
-                  AND followed_at > %s
-            """, [fetch_since])
-            new_buyins = cur.fetchall()
-
-    if not new_buyins:
+    # ── Pull new labeled buyins' trail rows from the shared feature store ──
+    schema_info = con.execute("PRAGMA table_info('cached_trail')").fetchall()
+    schema_cols = [row[1] for row in schema_info]  # ordered by position
+    feature_cols = [c for c in schema_cols if c not in ('buyin_id', 'minute', 'followed_at')]
+
+    store = get_feature_store()
+    store.sync()
+    store_rows = store.load_trail(
+        since=fetch_since, minutes=None, sub_minute=0,
+        columns=feature_cols, buyin_columns=['followed_at'],
+    )
+    if max_ts is not None and store_rows.num_rows:
+        store_rows = store_rows.filter(
+            pc.greater(store_rows['followed_at'], pa.scalar(max_ts, pa.timestamp('us'))))
+
+    if not store_rows.num_rows:
         cached_count = con.execute("SELECT COUNT(DISTINCT buyin_id) FROM cached_trail").fetchone()[0]
         logger.info(f"  No new buyins (cache has {cached_count:,} buyins)")
         return con
 
-    new_buyin_ids = [r['buyin_id'] for r in new_buyins]
-    followed_map = {r['buyin_id']: r['followed_at'] for r in new_buyins}
-    logger.info(f"  {len(new_buyin_ids):,} new buyins to sync")
-
-    # ── Fetch trail rows (only needed columns) ──────────────────────────
-    trail_cols = _trail_cache_columns()
-    col_list = ', '.join(trail_cols)
-
-    all_trail_rows = []
-    chunk_size = 500
-    for i in range(0, len(new_buyin_ids), chunk_size):
-        chunk = new_buyin_ids[i:i + chunk_size]
-        placeholders = ','.join(['%s'] * len(chunk))
-        with get_postgres() as pg:
-            with pg.cursor() as cur:
-                cur.execute(f"""
-                    SELECT {col_list}
-                    FROM buyin_trail_minutes
-                    WHERE buyin_id IN ({placeholders})
-                      AND (sub_minute = 0 OR sub_minute IS NULL)
-                """, chunk)
-                all_trail_rows.extend(cur.fetchall())
-
-    if not all_trail_rows:
-        logger.warning("  No trail rows for new buyins")
-        return con
-
-    # ── Build PyArrow table (avoids pandas type-inference entirely) ──────
-    # Get the DuckDB schema column order so Arrow table matches exactly
-    schema_info = con.execute("PRAGMA table_info('cached_trail')").fetchall()
-    schema_cols = [row[1] for row in schema_info]  # ordered by position
+    n_new_buyins = len(pc.unique(store_rows['buyin_id']))
+    logger.info(f"  {n_new_buyins:,} new buyins to sync")
 
-    pg_col_names = list(all_trail_rows[0].keys())  # from PostgreSQL result
+    # ── Build PyArrow table in cached_trail column order ─────────────────
+    n = store_rows.num_rows
     arrays = {}
-
     for cname in schema_cols:
         if cname == 'buyin_id':
-            arrays[cname] = pa.array(
-                [r['buyin_id'] for r in all_trail_rows], type=pa.int64())
+            arrays[cname] = store_rows['buyin_id'].cast(pa.int64())
         elif cname == 'minute':
-            arrays[cname] = pa.array(
-                [r['minute'] for r in all_trail_rows], type=pa.int32())
+            arrays[cname] = store_rows['minute'].cast(pa.int32())
         elif cname == 'followed_at':
-            arrays[cname] = pa.array(
-                [followed_map.get(r['buyin_id']) for r in all_trail_rows],
-                type=pa.timestamp('us'))
-        elif cname in pg_col_names:
-            # Feature column → float64 (handles None natively)
-            arrays[cname] = pa.array(
-                [float(r[cname]) if r[cname] is not None else None
-                 for r in all_trail_rows],
-                type=pa.float64())
+            arrays[cname] = store_rows['followed_at'].cast(pa.timestamp('us'))
+        elif cname in store_rows.column_names:
+            # Feature column → float64 (bool flags become 0/1)
+            arrays[cname] = store_rows[cname].cast(pa.float64())
         else:
-            # Column exists in DuckDB schema but not in PostgreSQL result → fill NULLs
-            arrays[cname] = pa.array(
-                [None] * len(all_trail_rows), type=pa.float64())
+            # Column exists in DuckDB schema but not in the trail → fill NULLs
+            arrays[cname] = pa.nulls(n, type=pa.float64())
 
     # Build table with columns in schema order
     trail_arrow = pa.table(
@@ -1175,8 +1210,7 @@ def _sync_trail_cache(hours: int) -> duckdb.DuckDBPyConnection:
     con.unregister('_trail_arrow')
 
     total = con.execute("SELECT COUNT(DISTINCT buyin_id) FROM cached_trail").fetchone()[0]
-    n_synced = len(all_trail_rows)
-    logger.info(f"  Synced {n_synced:,} trail rows ({len(new_buyin_ids):,} buyins) "
+    logger.info(f"  Synced {n:,} trail rows ({n_new_buyins:,} buyins) "
                 f"in {time.time()-t0:.1f}s  [cache total: {total:,} buyins]")
     return con
 
@@ -1191,7 +1225,7 @@ def _load_and_label_data(lookback_hours: Optional[int] = None) -> Optional[pd.Da
 
     Pipeline:
       1. Incremental sync from PostgreSQL → DuckDB cache
-      2. LEAD() window functions for forward returns (vectorised, ~2-5s)
+      2. Forward returns of the minute-0 rows (core.forward_labels, numpy)
       3. Path-aware labeling (clean_pump / no_pump / crash)
     """
     hours = lookback_hours if lookback_hours is not None else LOOKBACK_HOURS
@@ -1210,51 +1244,45 @@ def _load_and_label_data(lookback_hours: Optional[int] = None) -> Optional[pd.Da
             return None
         logger.info(f"  Cache: {n_rows:,} trail rows, {n_buyins:,} buyins")
 
-        # ── Step 2: Vectorised forward returns with LEAD() ───────────────
-        # Build LEAD expressions for 1..FORWARD_WINDOW minutes
-        lead_cols = []
-        for k in range(1, FORWARD_WINDOW + 1):
-            lead_cols.append(
-                f"(LEAD(pm_close_price, {k}) OVER w - pm_close_price) "
-                f"/ NULLIF(pm_close_price, 0) * 100 AS fwd_{k}m"
-            )
-        lead_sql = ",\n            ".join(lead_cols)
-
-        # Aggregate expressions
-        fwd_all = [f"fwd_{k}m" for k in range(1, FORWARD_WINDOW + 1)]
-        fwd_early = [f"fwd_{k}m" for k in range(1, EARLY_WINDOW + 1)]
-        fwd_imm = [f"fwd_{k}m" for k in range(1, min(3, FORWARD_WINDOW + 1))]
-
-        greatest_all = f"GREATEST({', '.join(fwd_all)})"
-        least_all = f"LEAST({', '.join(fwd_all)})"
-        greatest_early = f"GREATEST({', '.join(fwd_early)})"
-        least_imm = f"LEAST({', '.join(fwd_imm)})"
-        any_not_null = " OR ".join([f"{c} IS NOT NULL" for c in fwd_all])
-
-        # Time-to-peak CASE
-        ttp_cases = " ".join(
-            [f"WHEN fwd_{k}m >= {MIN_PUMP_PCT} THEN {k}" for k in range(1, FORWARD_WINDOW + 1)]
+        # ── Step 2: Forward returns per buyin (core.forward_labels) ──────
+        # fwd_{k}m = return k valid-price rows after minute 0 (SQL LEAD
+        # semantics); only the minute-0 anchors are labeled.
+        path = con.execute("""
+            SELECT buyin_id, minute, pm_close_price
+            FROM cached_trail
+            WHERE pm_close_price IS NOT NULL AND pm_close_price > 0
+            ORDER BY buyin_id, minute
+        """).fetchnumpy()
+        anchors = np.flatnonzero(np.asarray(path['minute']) == 0)
+        fwd = group_forward_returns(
+            np.asarray(path['buyin_id']), np.asarray(path['pm_close_price']),
+            FORWARD_WINDOW, rows=anchors,
         )
-        ttp_sql = f"CASE {ttp_cases} ELSE NULL END"
+        full = forward_summary(fwd, target_pct=MIN_PUMP_PCT)
+        has_fwd = ~np.isnan(full['max_pct'])
 
-        con.execute(f"""
+        def _column(values: np.ndarray) -> pa.Array:
+            return pa.array(values[has_fwd], type=pa.float64(), from_pandas=True)
+
+        ttp = full['hit_step'][has_fwd]
+        fwd_columns = {'buyin_id': pa.array(np.asarray(path['buyin_id'])[anchors][has_fwd])}
+        for k in range(1, FORWARD_WINDOW + 1):
+            fwd_columns[f'fwd_{k}m'] = _column(fwd[:, k - 1])
+        fwd_columns['max_fwd'] = _column(full['max_pct'])
+        fwd_columns['min_fwd'] = _column(full['min_pct'])
+        fwd_columns['max_fwd_early'] = _column(forward_summary(fwd[:, :EARLY_WINDOW])['max_pct'])
+        fwd_columns['min_fwd_imm'] = _column(forward_summary(fwd[:, :2])['min_pct'])
+        fwd_columns['time_to_peak'] = pa.array(
+            np.nan_to_num(ttp).astype(np.int32), mask=np.isnan(ttp))
+        con.register('_fwd_arrow', pa.table(fwd_columns))
+        con.execute("""
             CREATE OR REPLACE TEMP TABLE fwd_returns AS
-            WITH base AS (
-                SELECT *,
-                    {lead_sql}
-                FROM cached_trail
-                WHERE pm_close_price IS NOT NULL AND pm_close_price > 0
-                WINDOW w AS (PARTITION BY buyin_id ORDER BY minute)
-            )
-            SELECT *,
-                CASE WHEN {any_not_null} THEN {greatest_all} ELSE NULL END AS max_fwd,
-                CASE WHEN {any_not_null} THEN {least_all}    ELSE NULL END AS min_fwd,
-                CASE WHEN {any_not_null} THEN {greatest_early} ELSE NULL END AS max_fwd_early,
-                CASE WHEN {any_not_null} THEN {least_imm}    ELSE NULL END AS min_fwd_imm,
-                {ttp_sql} AS time_to_peak
-            FROM base
-            WHERE ({any_not_null})
+            SELECT c.*, f.* EXCLUDE (buyin_id)
+            FROM cached_trail c
+            JOIN _fwd_arrow f ON f.buyin_id = c.buyin_id
+            WHERE c.minute = 0
         """)
+        con.unregister('_fwd_arrow')
 
         # ── Step 3: Path-aware labeling with sustained move filter ─────────
         # CRITICAL: Filter to minute=0 only for training.
@@ -2633,39 +2661,87 @@ def _record_observation(buyin_id: int, market_price: float, trail_row: dict,
 
 
 # =============================================================================
-# BUYIN INSERTION (same API as V1)
+# CYCLE SNAPSHOT — play-independent state, built once per train_validator cycle
 # =============================================================================
 
-def check_and_fire_pump_signal(
-    play_config: Optional[Dict[str, Any]] = None,
-    buyin_id: Optional[int] = None,
-    market_price: float = 0.0,
-    price_cycle: Optional[int] = None,
-) -> bool:
-    global _last_entry_time, _last_entry_time_per_play
+class CycleSnapshot(NamedTuple):
+    """Market / feature state shared by every play in one 5s cycle (read-only)."""
+    taken_at: float
+    market_price: float
+    price_cycle: Optional[int]
+    live: Mapping[str, Any]
+    trail_row: Optional[Mapping[str, Any]]
+    blocked: Optional[str]                            # reason every play skips, or None
+    sim_matches: Mapping[int, Optional[Dict[str, Any]]]
+
+
+def _build_trail_row(live: Dict[str, Any]) -> Dict[str, Any]:
+    """Trail-shaped view of the live features (observation log / signal context)."""
+    # Use a timestamp-based signal key so context is retrievable without buyin_id
+    signal_key = int(time.time())
+    return {
+        'buyin_id':                  signal_key,
+        'minute':                    0,
+        'ob_volume_imbalance':        live.get('ob_avg_vol_imb'),
+        'ob_depth_imbalance_ratio':   live.get('ob_avg_depth_ratio'),
+        'ob_spread_bps':              live.get('ob_avg_spread_bps'),
+        'ob_net_flow_5m':             live.get('ob_net_liq_change'),
+        'ob_aggression_ratio':        live.get('ob_bid_ask_ratio'),
+        'ob_imbalance_shift_1m':      live.get('ob_imb_1m'),
+        'ob_imbalance_velocity_30s':  live.get('ob_imb_trend'),
+        'ob_depth_ratio_velocity':    live.get('ob_depth_trend'),
+        'ob_liquidity_score':         live.get('ob_liq_accel'),
+        'tx_buy_volume_pct':          live.get('tr_buy_ratio'),
+        'tx_whale_volume_pct':        live.get('tr_large_ratio'),
+        'tx_avg_trade_size':          live.get('tr_avg_size'),
+        'tx_aggressive_buy_ratio':    live.get('tr_buy_accel'),
+        'tx_trade_count':             live.get('tr_n'),
+        'tx_trade_intensity':         live.get('tr_n'),  # proxy
+        'wh_net_flow_sol':            live.get('wh_net_flow'),
+        'wh_accumulation_ratio':      live.get('wh_inflow_ratio'),
+        'wh_movement_count':          live.get('wh_n'),
+    }
 
-    # Resolve play config — support both new dict API and legacy env-var fallback
+
+def _play_settings(play_config: Optional[Dict[str, Any]]) -> Tuple[int, Dict[str, Any], float]:
+    """(play_id, normalized sim_filter, cooldown) — dict API or legacy env-var fallback."""
     if play_config is not None:
-        pump_play_id = int(play_config['play_id'])
         raw_sim_filter: Dict[str, Any] = play_config.get('sim_filter') or {}
-        sim_filter = _normalize_sim_filter(raw_sim_filter)
-        play_cooldown = float(raw_sim_filter.get('cooldown_seconds', COOLDOWN_SECONDS))
-    else:
-        pump_play_id = int(os.getenv("PUMP_SIGNAL_PLAY_ID", "3"))
-        sim_filter = _normalize_sim_filter({})
-        play_cooldown = COOLDOWN_SECONDS
+        return (int(play_config['play_id']),
+                _normalize_sim_filter(raw_sim_filter),
+                float(raw_sim_filter.get('cooldown_seconds', COOLDOWN_SECONDS)))
+    return int(os.getenv("PUMP_SIGNAL_PLAY_ID", "3")), _normalize_sim_filter({}), COOLDOWN_SECONDS
 
-    if not pump_play_id:
-        return False
+
+def build_cycle_snapshot(
+    market_price: float,
+    price_cycle: Optional[int] = None,
+    play_configs: Optional[List[Dict[str, Any]]] = None,
+) -> CycleSnapshot:
+    """Build the shared state for one cycle and match every play's sim rules.
+
+    Updates the price buffer, reads live features / price momentum, builds
+    the trail row and runs the global safety gates exactly once, then checks
+    the simulator rules of all `play_configs` in one vectorised pass. Hand
+    the result to check_and_fire_pump_signal(snapshot=...) for each play.
+    """
+    def _snapshot(live=None, trail_row=None, blocked=None, sim_matches=None) -> CycleSnapshot:
+        return CycleSnapshot(
+            taken_at=time.time(), market_price=market_price, price_cycle=price_cycle,
+            live=MappingProxyType(live or {}),
+            trail_row=MappingProxyType(trail_row) if trail_row is not None else None,
+            blocked=blocked, sim_matches=MappingProxyType(sim_matches or {}),
+        )
 
     _update_price_buffer(market_price)
 
     if _rules is None:
-        return False
+        return _snapshot(blocked='no_rules')
 
     # Get live features from raw Parquet cache (fresh, no pre-computation lag).
     # Raw cache is populated by binance_stream (OB) and webhook_server (trades/whales).
     # If cache is not yet warm enough, skip this cycle.
+    live = None
     trail_row = None
     try:
         from core.raw_data_cache import get_live_features
@@ -2682,67 +2758,90 @@ def check_and_fire_pump_signal(
                 logger.debug(f"Price momentum augment failed: {_pm_err}")
 
         if live and live.get('ob_n', 0) >= 3:
-            # Use a timestamp-based signal key so context is retrievable without buyin_id
-            signal_key = int(time.time())
-            trail_row = {
-                'buyin_id':                  signal_key,
-                'minute':                    0,
-                'ob_volume_imbalance':        live.get('ob_avg_vol_imb'),
-                'ob_depth_imbalance_ratio':   live.get('ob_avg_depth_ratio'),
-                'ob_spread_bps':              live.get('ob_avg_spread_bps'),
-                'ob_net_flow_5m':             live.get('ob_net_liq_change'),
-                'ob_aggression_ratio':        live.get('ob_bid_ask_ratio'),
-                'ob_imbalance_shift_1m':      live.get('ob_imb_1m'),
-                'ob_imbalance_velocity_30s':  live.get('ob_imb_trend'),
-                'ob_depth_ratio_velocity':    live.get('ob_depth_trend'),
-                'ob_liquidity_score':         live.get('ob_liq_accel'),
-                'tx_buy_volume_pct':          live.get('tr_buy_ratio'),
-                'tx_whale_volume_pct':        live.get('tr_large_ratio'),
-                'tx_avg_trade_size':          live.get('tr_avg_size'),
-                'tx_aggressive_buy_ratio':    live.get('tr_buy_accel'),
-                'tx_trade_count':             live.get('tr_n'),
-                'tx_trade_intensity':         live.get('tr_n'),  # proxy
-                'wh_net_flow_sol':            live.get('wh_net_flow'),
-                'wh_accumulation_ratio':      live.get('wh_inflow_ratio'),
-                'wh_movement_count':          live.get('wh_n'),
-            }
+            trail_row = _build_trail_row(live)
     except Exception as e:
         logger.debug(f"Raw cache features unavailable: {e}")
 
     if trail_row is None:
         logger.debug("V4: skipping cycle — raw cache not yet warm (ob_n < 3)")
-        return False
+        return _snapshot(live=live, blocked='cache_cold')
 
     # ── Global safety gates — apply to ALL signal paths (sim + fingerprint) ─────
     # Sim-rules previously bypassed these, firing even during circuit-breaker trips
-    # and live crash conditions.  Applied here once so both paths are protected.
+    # and live crash conditions.  Evaluated once per cycle for every play.
 
     # Gate A: Circuit breaker — pause when live win rate drops below threshold
     if _check_circuit_breaker():
         _gate_stats['circuit_breaker'] += 1
-        return False
+        return _snapshot(live, trail_row, blocked='circuit_breaker')
 
     # Gate B: Micro 30s crash — block during rapid sell-off
     crash_ok, _crash_desc = _is_not_crashing()
     if not crash_ok:
         _gate_stats['crash_gate_fail'] += 1
-        return False
+        return _snapshot(live, trail_row, blocked='crash_gate')
 
     # Gate C: 5-minute crash gate — don't enter a sustained downtrend
     pm_5m_live = live.get('pm_price_change_5m')
     if pm_5m_live is not None and float(pm_5m_live) < CRASH_GATE_5M:
         _gate_stats['crash_5m_fail'] += 1
+        return _snapshot(live, trail_row, blocked='crash_5m')
+
+    sim_matches: Dict[int, Optional[Dict[str, Any]]] = {}
+    if play_configs:
+        play_filters = {}
+        for play_config in play_configs:
+            play_id, sim_filter, _cooldown = _play_settings(play_config)
+            play_filters[play_id] = sim_filter
+        sim_matches = match_sim_rules(live, play_filters)
+    _log_gate_summary()
+
+    return _snapshot(live, trail_row, sim_matches=sim_matches)
+
+
+# =============================================================================
+# BUYIN INSERTION (same API as V1)
+# =============================================================================
+
+def check_and_fire_pump_signal(
+    play_config: Optional[Dict[str, Any]] = None,
+    buyin_id: Optional[int] = None,
+    market_price: float = 0.0,
+    price_cycle: Optional[int] = None,
+    snapshot: Optional[CycleSnapshot] = None,
+) -> bool:
+    """Fire a V4 buyin for one play if the cycle's live features match its rules.
+
+    Pass the cycle's `snapshot` (build_cycle_snapshot) when checking several
+    plays; without one, a snapshot is built for this play alone.
+    """
+    global _last_entry_time, _last_entry_time_per_play
+
+    pump_play_id, sim_filter, play_cooldown = _play_settings(play_config)
+    if not pump_play_id:
+        return False
+
+    if snapshot is None:
+        snapshot = build_cycle_snapshot(market_price, price_cycle)
+    market_price = snapshot.market_price
+    price_cycle = snapshot.price_cycle
+    if snapshot.blocked is not None:
         return False
+    live = snapshot.live
+    trail_row = snapshot.trail_row
 
     # ── Path A: Simulator rules — the ONLY signal source ─────────────────────
     # `live` is guaranteed non-None and ob_n >= 3 here (trail_row guard passed)
     # Fingerprint/combo fallback is permanently disabled: historical data shows
     # it fires on noise at ~30% win rate while sim rules achieve 70-76% OOS.
     # Silence (no match) is always better than a bad entry.
-    sim_match = check_sim_rules(live, play_id=pump_play_id, sim_filter=sim_filter)
+    if pump_play_id in snapshot.sim_matches:
+        sim_match = snapshot.sim_matches[pump_play_id]
+    else:
+        sim_match = check_sim_rules(live, play_id=pump_play_id, sim_filter=sim_filter)
+        _log_gate_summary()
     signal_fires_sim = sim_match is not None
     signal_fires_fp = False  # fingerprint path permanently off
-    _log_gate_summary()
 
     signal_fires = signal_fires_sim
 
@@ -2752,6 +2851,11 @@ def check_and_fire_pump_signal(
     if signal_fires and price_cycle and market_price and CYCLE_CHASE_GATE > 0:
         try:
             start_price = _cycle_start_cache.get(price_cycle)
+            if start_price is None:
+                service = get_price_service()
+                cycle = service.active_cycle(0.3) if service else None
+                if cycle and cycle['id'] == price_cycle and cycle.get('sequence_start_price'):
+                    start_price = cycle['sequence_start_price']
             if start_price is None:
                 row = postgres_query_one(
                     "SELECT sequence_start_price FROM cycle_tracker WHERE id = %s",
@@ -11,6 +11,19 @@ This module:
 - Records price checks to follow_the_goat_buyins_price_checks
 - Marks positions as 'sold' when tolerance is exceeded
 
+Position book (TRAILING_STOP_POSITION_BOOK=1, default):
+- Open positions are loaded once and kept in memory keyed by id; each tick
+  only picks up newly inserted buyins (id > last seen), and a light id-only
+  reconcile every TRAILING_STOP_RECONCILE_SECONDS drops positions closed
+  elsewhere and adopts any that were missed
+- Every position carries two price levels: its highest price (above it the
+  tick is a new high) and its stop trigger (at or below it a stop-loss or
+  trailing stop can fire). A tick compares the price against both arrays
+  and runs check_position only for the positions that can change
+- Price checks are sampled per position every few seconds, and inserted
+  (together with current_price / higest_price_reached updates) in one
+  batch per tick after any sells have executed
+
 Trailing Stop Logic (DUAL-CHECK, DECIMAL-BASED):
 - BOTH conditions are checked EVERY cycle:
   1. STOP-LOSS: If drop from ENTRY exceeds 'decreases' tolerance, sell immediately
@@ -44,7 +57,9 @@ from datetime import datetime, timezone
 from decimal import Decimal
 from logging.handlers import RotatingFileHandler
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
 
 import sys
 PROJECT_ROOT = Path(__file__).parent.parent
@@ -53,6 +68,7 @@ sys.path.insert(0, str(PROJECT_ROOT))
 sys.path.insert(0, str(MODULE_DIR))
 
 from core.database import get_postgres, postgres_execute
+from core.price_service import get_price_service
 
 # =============================================================================
 # CONFIGURATION
@@ -61,6 +77,19 @@ from core.database import get_postgres, postgres_execute
 DEFAULT_MONITOR_INTERVAL_SECONDS = float(
     os.getenv('TRAILING_STOP_INTERVAL_SECONDS', '0.5')
 )
+# In-memory position book (0 = reload and check every position each cycle)
+DEFAULT_POSITION_BOOK = os.getenv('TRAILING_STOP_POSITION_BOOK', '1') == '1'
+# Seconds between id-only reconciles of the book with follow_the_goat_buyins
+DEFAULT_RECONCILE_SECONDS = float(os.getenv('TRAILING_STOP_RECONCILE_SECONDS', '15.0'))
+# Relative slack on stop triggers so float rounding never hides a crossing
+STOP_TRIGGER_MARGIN = 1e-9
+
+PRICE_CHECK_COLUMNS = (
+    "buyin_id, checked_at, current_price, entry_price, highest_price, "
+    "reference_price, gain_from_entry, drop_from_high, drop_from_entry, "
+    "drop_from_reference, tolerance, basis, bucket, applied_rule, "
+    "should_sell, is_backfill"
+)
 
 # Fallback sell-logic tolerances — used only when a position has no play_id, or
 # when the DB sell_logic is missing/corrupt.  All active plays must have
@@ -129,6 +158,100 @@ def make_json_safe(value: Any) -> Any:
     return value
 
 
+# =============================================================================
+# POSITION BOOK
+# =============================================================================
+
+class PositionBook:
+    """
+    Open positions keyed by id, plus per-position price levels in flat arrays
+    so a tick can find the positions it affects with two vectorised compares:
+    - highest: price > highest is a new high (tracking + tolerance tier change)
+    - trigger: price <= trigger may fire a stop (sells happen strictly below
+      the exact level; trigger carries a little slack above it)
+    New positions start at (-inf, +inf), i.e. they are checked on the next tick.
+    """
+    
+    def __init__(self, capacity: int = 256):
+        self.positions: Dict[int, Dict[str, Any]] = {}
+        self.max_id = 0
+        self._slot: Dict[int, int] = {}
+        self._size = 0
+        self._ids = np.zeros(capacity, dtype=np.int64)
+        self._highest = np.zeros(capacity)
+        self._trigger = np.zeros(capacity)
+        self._next_sample = np.zeros(capacity)
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    def __contains__(self, position_id: int) -> bool:
+        return position_id in self._slot
+    
+    def ids(self) -> List[int]:
+        return self._ids[:self._size].tolist()
+    
+    def add(self, position: Dict[str, Any]) -> bool:
+        """Insert a position (existing ids only get their row replaced)."""
+        position_id = int(position['id'])
+        self.max_id = max(self.max_id, position_id)
+        self.positions[position_id] = position
+        if position_id in self._slot:
+            return False
+        if self._size == len(self._ids):
+            capacity = 2 * len(self._ids)
+            for name in ('_ids', '_highest', '_trigger', '_next_sample'):
+                grown = np.zeros(capacity, dtype=getattr(self, name).dtype)
+                grown[:self._size] = getattr(self, name)[:self._size]
+                setattr(self, name, grown)
+        i = self._size
+        self._ids[i] = position_id
+        self._highest[i] = -np.inf
+        self._trigger[i] = np.inf
+        self._next_sample[i] = 0.0
+        self._slot[position_id] = i
+        self._size += 1
+        return True
+    
+    def remove(self, position_id: int) -> Optional[Dict[str, Any]]:
+        i = self._slot.pop(position_id, None)
+        if i is None:
+            return None
+        last = self._size - 1
+        if i != last:
+            # Move the last slot into the hole
+            for arr in (self._ids, self._highest, self._trigger, self._next_sample):
+                arr[i] = arr[last]
+            self._slot[int(self._ids[i])] = i
+        self._size = last
+        return self.positions.pop(position_id, None)
+    
+    def set_levels(self, position_id: int, highest: float, trigger: float) -> None:
+        i = self._slot.get(position_id)
+        if i is not None:
+            self._highest[i] = highest
+            self._trigger[i] = trigger
+    
+    def schedule_sample(self, position_id: int, now: float, interval: float) -> None:
+        """Next price-check sample; the first one gets a per-id phase so
+        positions loaded together do not all come due on the same tick."""
+        i = self._slot.get(position_id)
+        if i is None:
+            return
+        phase = (position_id * 0.6180339887) % 1.0 if self._next_sample[i] == 0.0 else 0.0
+        self._next_sample[i] = now + interval * (1.0 + phase)
+    
+    def affected(self, price: float) -> List[int]:
+        """Ids whose state can change at this price (new high or stop in range)."""
+        n = self._size
+        hit = (price > self._highest[:n]) | (price <= self._trigger[:n])
+        return self._ids[:n][hit].tolist()
+    
+    def due_for_sample(self, now: float) -> List[int]:
+        n = self._size
+        return self._ids[:n][self._next_sample[:n] <= now].tolist()
+
+
 # =============================================================================
 # TRAILING STOP SELLER CLASS
 # =============================================================================
@@ -152,7 +275,9 @@ class TrailingStopSeller:
         self,
         live_trade: bool = False,
         monitor_live: Optional[bool] = None,
-        cache_ttl: int = 60
+        cache_ttl: int = 60,
+        use_position_book: bool = DEFAULT_POSITION_BOOK,
+        reconcile_seconds: float = DEFAULT_RECONCILE_SECONDS,
     ):
         """
         Initialize TrailingStopSeller
@@ -161,6 +286,9 @@ class TrailingStopSeller:
             live_trade: If True, this instance monitors live trades. If False, test mode.
             monitor_live: None = monitor both live and test, True = live only, False = test only
             cache_ttl: Cache time-to-live in seconds for sell_logic (default: 60)
+            use_position_book: Keep open positions in memory and only check the
+                ones a tick can affect (False = full reload and check per cycle)
+            reconcile_seconds: Seconds between id-only reconciles of the book
         """
         self.live_trade = live_trade
         self.monitor_live = monitor_live
@@ -180,6 +308,15 @@ class TrailingStopSeller:
         self._last_price_check: Dict[int, float] = {}
         self._price_check_lock = threading.Lock()
         
+        # Position book mode
+        self.use_position_book = use_position_book
+        self.reconcile_seconds = max(1.0, float(reconcile_seconds))
+        self.position_book: Optional[PositionBook] = None
+        self._last_reconcile = 0.0
+        # While set, check_position queues higest_price_reached writes here
+        # (flushed in one statement per tick) instead of one UPDATE each
+        self._pending_highest: Optional[Dict[int, float]] = None
+        
         # Statistics
         self.stats = {
             'positions_monitored': 0,
@@ -189,6 +326,7 @@ class TrailingStopSeller:
             'losing_trades': 0,
             'errors': 0,
             'cycles': 0,
+            'positions_evaluated': 0,
             'start_time': datetime.now(),
         }
         self.stats_lock = threading.Lock()
@@ -196,7 +334,12 @@ class TrailingStopSeller:
         logger.info(f"TrailingStopSeller initialized (live_trade={live_trade}, monitor_live={monitor_live})")
     
     def get_current_sol_price(self) -> Optional[float]:
-        """Get the latest SOL price from prices table using the connection pool."""
+        """Get the latest SOL price (in-process price service, prices table as fallback)."""
+        service = get_price_service()
+        # max_age=0: stop decisions need the newest row, not the last 1 s pull
+        price = service.latest_price(max_age=0) if service else None
+        if price is not None:
+            return price
         try:
             with get_postgres() as conn:
                 with conn.cursor() as cursor:
@@ -219,42 +362,84 @@ class TrailingStopSeller:
             logger.error(f"Error getting current SOL price: {e}", exc_info=True)
             return None
     
-    def get_open_positions(self) -> List[Dict[str, Any]]:
-        """Get all open positions that we're tracking using the connection pool."""
+    def _live_filter_sql(self) -> str:
+        if self.monitor_live is True:
+            return " AND live_trade = 1"
+        if self.monitor_live is False:
+            return " AND live_trade = 0"
+        return ""
+    
+    def get_open_positions(
+        self,
+        include_movements: bool = True,
+        min_id: Optional[int] = None,
+        ids: Optional[List[int]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Get all open positions that we're tracking using the connection pool.
+        
+        include_movements=False skips the (large, unused here) price_movements
+        column; min_id / ids restrict the result to newer or specific positions.
+        """
         try:
-            with get_postgres() as conn:
-                with conn.cursor() as cursor:
-                    base_sql = """
-                        SELECT
-                            id,
-                            play_id,
-                            wallet_address,
-                            original_trade_id,
-                            price as entry_price,
-                            quote_amount,
-                            base_amount,
-                            followed_at,
-                            our_entry_price,
-                            our_position_size,
-                            price_movements,
-                            live_trade,
-                            higest_price_reached,
-                            tolerance
-                        FROM follow_the_goat_buyins
-                        WHERE our_status = 'pending'
-                    """
-                    if self.monitor_live is True:
-                        base_sql += " AND live_trade = 1"
-                    elif self.monitor_live is False:
-                        base_sql += " AND live_trade = 0"
-                    base_sql += " ORDER BY followed_at ASC"
-                    cursor.execute(base_sql)
-                    result = cursor.fetchall()
-                    return [dict(row) for row in (result or [])]
+            return self._query_open_positions(include_movements, min_id, ids)
         except Exception as e:
             logger.error(f"Error getting open positions: {e}")
             return []
     
+    def _query_open_positions(
+        self,
+        include_movements: bool = True,
+        min_id: Optional[int] = None,
+        ids: Optional[List[int]] = None,
+    ) -> List[Dict[str, Any]]:
+        with get_postgres() as conn:
+            with conn.cursor() as cursor:
+                base_sql = f"""
+                    SELECT
+                        id,
+                        play_id,
+                        wallet_address,
+                        original_trade_id,
+                        price as entry_price,
+                        quote_amount,
+                        base_amount,
+                        followed_at,
+                        our_entry_price,
+                        our_position_size,
+                        {'price_movements,' if include_movements else ''}
+                        live_trade,
+                        higest_price_reached,
+                        tolerance
+                    FROM follow_the_goat_buyins
+                    WHERE our_status = 'pending'
+                """
+                params: List[Any] = []
+                if min_id is not None:
+                    base_sql += " AND id > %s"
+                    params.append(min_id)
+                if ids is not None:
+                    base_sql += " AND id = ANY(%s)"
+                    params.append(ids)
+                base_sql += self._live_filter_sql()
+                base_sql += " ORDER BY followed_at ASC"
+                cursor.execute(base_sql, params or None)
+                result = cursor.fetchall()
+                return [dict(row) for row in (result or [])]
+    
+    def get_open_position_ids(self) -> Optional[List[int]]:
+        """Ids of all open positions (None on error)."""
+        try:
+            with get_postgres() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(
+                        "SELECT id FROM follow_the_goat_buyins WHERE our_status = 'pending'"
+                        + self._live_filter_sql()
+                    )
+                    return [row['id'] for row in cursor.fetchall()]
+        except Exception as e:
+            logger.error(f"Error getting open position ids: {e}")
+            return None
+    
     def get_sell_logic_for_play(self, play_id: int) -> Dict[str, Any]:
         """Load and cache sell_logic JSON for a given play_id with TTL."""
         current_time = time.time()
@@ -373,6 +558,9 @@ class TrailingStopSeller:
         """
         Update the higest_price_reached column in PostgreSQL.
         """
+        if self._pending_highest is not None:
+            self._pending_highest[position_id] = highest_price
+            return True
         try:
             postgres_execute(
                 "UPDATE follow_the_goat_buyins SET higest_price_reached = %s WHERE id = %s",
@@ -721,6 +909,28 @@ class TrailingStopSeller:
             logger.error(f"PostgreSQL batch update error: {e}")
             return False
     
+    @staticmethod
+    def _price_check_row(position_id: int, movement_data: Dict[str, Any]) -> Tuple[Any, ...]:
+        """Values for one follow_the_goat_buyins_price_checks row (PRICE_CHECK_COLUMNS order)."""
+        return (
+            position_id,
+            movement_data.get('timestamp'),
+            movement_data.get('current_price'),
+            movement_data.get('entry_price'),
+            movement_data.get('highest_price'),
+            movement_data.get('reference_price'),
+            movement_data.get('gain_from_entry_decimal'),
+            movement_data.get('drop_from_high_decimal'),
+            movement_data.get('drop_from_entry_decimal'),
+            movement_data.get('drop_from_reference_decimal'),
+            movement_data.get('tolerance_decimal'),
+            movement_data.get('basis'),
+            movement_data.get('bucket'),
+            json.dumps(movement_data.get('applied_rule')) if movement_data.get('applied_rule') else None,
+            movement_data.get('should_sell', False),
+            movement_data.get('backfilled', False),
+        )
+    
     def save_price_movement(self, position_id: int, movement_data: Dict[str, Any], skip_price_update: bool = False) -> bool:
         """
         Save price movement data to PostgreSQL using the connection pool.
@@ -755,31 +965,10 @@ class TrailingStopSeller:
 
             # Insert price check
             try:
-                postgres_execute("""
-                    INSERT INTO follow_the_goat_buyins_price_checks (
-                        buyin_id, checked_at, current_price, entry_price, highest_price,
-                        reference_price, gain_from_entry, drop_from_high, drop_from_entry,
-                        drop_from_reference, tolerance, basis, bucket, applied_rule,
-                        should_sell, is_backfill
-                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """, [
-                    position_id,
-                    movement_data.get('timestamp'),
-                    current_price,
-                    movement_data.get('entry_price'),
-                    movement_data.get('highest_price'),
-                    movement_data.get('reference_price'),
-                    movement_data.get('gain_from_entry_decimal'),
-                    movement_data.get('drop_from_high_decimal'),
-                    movement_data.get('drop_from_entry_decimal'),
-                    movement_data.get('drop_from_reference_decimal'),
-                    movement_data.get('tolerance_decimal'),
-                    movement_data.get('basis'),
-                    movement_data.get('bucket'),
-                    json.dumps(movement_data.get('applied_rule')) if movement_data.get('applied_rule') else None,
-                    should_sell,
-                    is_backfill,
-                ])
+                postgres_execute(f"""
+                    INSERT INTO follow_the_goat_buyins_price_checks ({PRICE_CHECK_COLUMNS})
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                """, list(self._price_check_row(position_id, movement_data)))
                 if not is_backfill:
                     logger.debug(f"✓ Price check recorded for position {position_id}: ${current_price:.6f}")
             except Exception as e:
@@ -884,6 +1073,17 @@ class TrailingStopSeller:
             return False
     
     def monitor_positions(self) -> int:
+        """
+        Check open positions against the current price.
+        
+        Returns:
+            Number of open positions.
+        """
+        if self.use_position_book:
+            return self._monitor_position_book()
+        return self._monitor_all_positions()
+    
+    def _monitor_all_positions(self) -> int:
         """
         Check all open positions against current price.
         Uses batched database updates for performance.
@@ -977,6 +1177,269 @@ class TrailingStopSeller:
         
         return len(positions)
     
+    # =========================================================================
+    # POSITION BOOK MODE
+    # =========================================================================
+    
+    @staticmethod
+    def _rule_tolerance(rule: Optional[Dict[str, Any]], default: float) -> float:
+        """A rule's tolerance, or the default check_position falls back to."""
+        return float(rule.get('tolerance')) if rule and rule.get('tolerance') is not None else default
+    
+    def _stop_levels(self, position: Dict[str, Any]) -> Tuple[float, float]:
+        """
+        (highest price, stop trigger) for the position book.
+        
+        The trigger bounds check_position from above: stop-loss fires below
+        entry * (1 - tolerance) for whichever 'decreases' tolerance applies,
+        so the loosest-to-fire (smallest) one bounds it; the trailing stop
+        fires below highest * (1 - effective trailing tolerance), which only
+        moves when the highest price does. (-inf, inf) means check every tick.
+        """
+        with self.position_tracking_lock:
+            tracking = self.position_tracking.get(position['id'])
+            if tracking is None:
+                return -np.inf, np.inf
+            entry_price = tracking['entry_price']
+            highest_price = tracking['highest_price']
+            locked_tolerance = tracking.get('locked_tolerance', 1.0)
+        
+        if not entry_price or entry_price <= 0:
+            return highest_price, np.inf
+        
+        try:
+            play_id = position.get('play_id')
+            logic = self.get_sell_logic_for_play(play_id) if play_id is not None else None
+            tolerance_rules = (logic or {}).get('tolerance_rules', {})
+            
+            decreases_rules = tolerance_rules.get('decreases', [])
+            stop_loss_tolerances = [
+                self._rule_tolerance(rule, FALLBACK_STOP_LOSS_PCT) for rule in decreases_rules
+            ] or [FALLBACK_STOP_LOSS_PCT]
+            trigger = entry_price * (1.0 - min(stop_loss_tolerances))
+            
+            if highest_price > entry_price:
+                increases_rules = tolerance_rules.get('increases', [])
+                highest_gain_decimal = (highest_price - entry_price) / entry_price
+                trailing_rule = self._select_rule(highest_gain_decimal, increases_rules) if increases_rules else None
+                trailing_tolerance = self._rule_tolerance(trailing_rule, FALLBACK_TRAILING_PRE_TARGET_PCT)
+                trigger = max(trigger, highest_price * (1.0 - min(trailing_tolerance, locked_tolerance)))
+        except Exception as e:
+            logger.warning(f"Position {position['id']}: could not derive stop trigger ({e}) - checking every tick")
+            return highest_price, np.inf
+        
+        return highest_price, trigger + abs(trigger) * STOP_TRIGGER_MARGIN
+    
+    def _forget_position(self, position_id: int) -> None:
+        with self.position_tracking_lock:
+            self.position_tracking.pop(position_id, None)
+        with self._price_check_lock:
+            self._last_price_check.pop(position_id, None)
+    
+    def sync_position_book(self, now: float) -> bool:
+        """
+        Load the position book once, then add buyins inserted since (id above
+        the highest seen). Every reconcile_seconds an id-only query drops
+        positions closed elsewhere, adopts any missed by the id watermark,
+        and recomputes stop levels (sell_logic may have changed).
+        
+        Returns False if there is no usable book.
+        """
+        try:
+            book = self.position_book
+            if book is None:
+                book = PositionBook()
+                for row in self._query_open_positions(include_movements=False):
+                    book.add(row)
+                self.position_book = book
+                self._last_reconcile = now
+                logger.info(f"Position book loaded: {len(book)} open position(s)")
+                return True
+            
+            for row in self._query_open_positions(include_movements=False, min_id=book.max_id):
+                if book.add(row):
+                    logger.debug(f"Position book: added position {row['id']}")
+        except Exception as e:
+            logger.error(f"Error syncing position book: {e}")
+            return self.position_book is not None
+        
+        if now - self._last_reconcile >= self.reconcile_seconds:
+            self._last_reconcile = now
+            self.reconcile_position_book()
+        return True
+    
+    def reconcile_position_book(self) -> None:
+        book = self.position_book
+        open_ids = self.get_open_position_ids()
+        if book is None or open_ids is None:
+            return
+        open_set = set(open_ids)
+        for position_id in book.ids():
+            if position_id not in open_set:
+                book.remove(position_id)
+                self._forget_position(position_id)
+                logger.info(f"Position {position_id} is no longer pending - removed from book")
+        missing = [position_id for position_id in open_ids if position_id not in book]
+        if missing:
+            for row in self.get_open_positions(include_movements=False, ids=missing):
+                book.add(row)
+            logger.info(f"Position book: adopted {len(missing)} missed position(s)")
+        for position_id in book.ids():
+            book.set_levels(position_id, *self._stop_levels(book.positions[position_id]))
+    
+    def _check_book_position(self, position_id: int, current_price: float) -> Optional[Dict[str, Any]]:
+        book = self.position_book
+        position = book.positions[position_id]
+        try:
+            check_result = self.check_position(position, current_price)
+        except Exception as e:
+            logger.error(f"Error checking position {position_id}: {e}")
+            with self.stats_lock:
+                self.stats['errors'] += 1
+            return None
+        book.set_levels(position_id, *self._stop_levels(position))
+        return check_result
+    
+    def _monitor_position_book(self) -> int:
+        """
+        One tick against the in-memory book:
+        1. check the positions this price can affect (new high / stop in range)
+        2. execute their sells
+        3. check positions whose price-check sample is due
+        4. write price checks, current_price and new highs in one transaction
+        
+        Returns:
+            Number of open positions.
+        """
+        cycle_start = time.time()
+        
+        current_price = self.get_current_sol_price()
+        if current_price is None:
+            logger.warning("Could not get current price, skipping this check")
+            return 0
+        
+        if not self.sync_position_book(cycle_start):
+            return 0
+        book = self.position_book
+        open_positions = len(book)
+        if not open_positions:
+            return 0
+        
+        with self.stats_lock:
+            self.stats['positions_monitored'] = open_positions
+            self.stats['cycles'] += 1
+        
+        price_checks: List[Tuple[Any, ...]] = []
+        sampled_ids: List[int] = []
+        self._pending_highest = {}
+        try:
+            # Steps 1-2: positions this price can affect, sells first
+            results: Dict[int, Dict[str, Any]] = {}
+            for position_id in book.affected(current_price):
+                check_result = self._check_book_position(position_id, current_price)
+                if check_result is not None:
+                    results[position_id] = check_result
+            self._execute_book_sells(results, price_checks)
+            
+            # Step 3: downsampled price checks
+            now = time.time()
+            for position_id in book.due_for_sample(now):
+                check_result = results.get(position_id)
+                if check_result is None:
+                    check_result = self._check_book_position(position_id, current_price)
+                    if check_result is None:
+                        continue
+                    results[position_id] = check_result
+                    if check_result['should_sell']:
+                        self._execute_book_sells({position_id: check_result}, price_checks)
+                if check_result['should_sell']:
+                    continue  # recorded with the sell attempt
+                if check_result.get('backfill_data'):
+                    price_checks.append(self._price_check_row(position_id, check_result['backfill_data']))
+                price_checks.append(self._price_check_row(position_id, check_result['movement_data']))
+                sampled_ids.append(position_id)
+                book.schedule_sample(position_id, now, self._price_check_interval)
+        finally:
+            pending_highest, self._pending_highest = self._pending_highest, None
+        
+        # Step 4
+        self._write_book_updates(price_checks, sampled_ids, current_price, pending_highest)
+        
+        with self.stats_lock:
+            self.stats['positions_evaluated'] += len(results)
+        
+        cycle_duration = time.time() - cycle_start
+        if cycle_duration > 0.5:
+            logger.warning(f"Cycle took {cycle_duration:.2f}s (>0.5s target)")
+        else:
+            logger.debug(
+                f"Cycle completed in {cycle_duration:.3f}s: {len(results)}/{open_positions} position(s) evaluated"
+            )
+        
+        return open_positions
+    
+    def _execute_book_sells(
+        self,
+        results: Dict[int, Dict[str, Any]],
+        price_checks: List[Tuple[Any, ...]],
+    ) -> None:
+        """Sell every result flagged should_sell; sell-trigger price checks are always kept."""
+        book = self.position_book
+        for position_id, check_result in results.items():
+            if not check_result['should_sell'] or position_id not in book:
+                continue
+            position = book.positions[position_id]
+            if check_result.get('backfill_data'):
+                price_checks.append(self._price_check_row(position_id, check_result['backfill_data']))
+            price_checks.append(self._price_check_row(position_id, check_result['movement_data']))
+            try:
+                sold = self.execute_sell(position, check_result)
+            except Exception as e:
+                logger.error(f"Error executing sell for position {position_id}: {e}")
+                with self.stats_lock:
+                    self.stats['errors'] += 1
+                continue
+            if sold:
+                book.remove(position_id)
+                self._forget_position(position_id)
+    
+    def _write_book_updates(
+        self,
+        price_checks: List[Tuple[Any, ...]],
+        sampled_ids: List[int],
+        current_price: float,
+        highest_prices: Dict[int, float],
+    ) -> None:
+        """Batched writes for one book tick (single transaction)."""
+        if not (price_checks or sampled_ids or highest_prices):
+            return
+        from psycopg2.extras import execute_values
+        
+        try:
+            with get_postgres() as conn:
+                with conn.cursor() as cursor:
+                    if highest_prices:
+                        execute_values(cursor, """
+                            UPDATE follow_the_goat_buyins AS b
+                            SET higest_price_reached = v.price
+                            FROM (VALUES %s) AS v(id, price)
+                            WHERE b.id = v.id
+                        """, list(highest_prices.items()), page_size=len(highest_prices))
+                    if sampled_ids:
+                        cursor.execute(
+                            "UPDATE follow_the_goat_buyins SET current_price = %s WHERE id = ANY(%s)",
+                            [current_price, sampled_ids],
+                        )
+                    if price_checks:
+                        execute_values(
+                            cursor,
+                            f"INSERT INTO follow_the_goat_buyins_price_checks ({PRICE_CHECK_COLUMNS}) VALUES %s",
+                            price_checks,
+                            page_size=len(price_checks),
+                        )
+        except Exception as e:
+            logger.error(f"Error writing position book updates: {e}")
+    
     def print_status(self):
         """Print current status summary."""
         with self.stats_lock:
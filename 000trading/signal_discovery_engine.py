@@ -17,16 +17,19 @@ import argparse
 import itertools
 import json
 import logging
+import multiprocessing
 import os
 import sys
 import time
 import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
+import pyarrow as pa
 from scipy import stats
 
 warnings.filterwarnings("ignore", category=FutureWarning)
@@ -37,12 +40,20 @@ warnings.filterwarnings("ignore", category=FutureWarning)
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
 
-from core.database import get_postgres  # noqa: E402
+from core.database import get_postgres, postgres_arrow_batches  # noqa: E402
+from core.forward_labels import forward_windows, nearest_positions, take  # noqa: E402
+from core.raw_data_cache import (  # noqa: E402
+    OB_PARQUET, TRADE_PARQUET, WHALE_PARQUET, read_snapshot, snapshot_covers,
+)
 
 # ---------------------------------------------------------------------------
 # Constants
 # ---------------------------------------------------------------------------
 CHECKPOINT_FILE = "/tmp/sde_overnight_checkpoint.json"
+CHECKPOINT_INTERVAL_SEC = 5  # heartbeat checkpoint refresh (combo log is per combo)
+SWEEP_DIR = os.getenv("SDE_SWEEP_DIR", "/tmp/sde_sweep")  # snapshot + combo log
+SWEEP_WORKERS = int(os.getenv("SDE_WORKERS", "0"))  # 0 = all cores
+SWEEP_RESUME_MAX_AGE_SEC = float(os.getenv("SDE_RESUME_MAX_AGE_HOURS", "12")) * 3600
 TRADE_COST_PCT = 0.001  # 0.1% round-trip cost
 
 # Sweep grids
@@ -63,6 +74,76 @@ WF_SPLITS = [
     (0.00, 0.75, 0.75, 0.90),  # train first 75%, test 75-90%
 ]
 
+# Raw inputs of compute_features(): per source, the PostgreSQL table, its
+# timestamp column and row filter, and the only columns read (typed). The
+# optional snapshot is the raw-cache Parquet file and its projection onto the
+# same columns; whales share the trade writer, so trade coverage vouches for
+# them (whale events are too sparse to judge coverage on their own). "exprs"
+# replaces a column in the PostgreSQL SELECT.
+_RAW_TS = pa.timestamp("us", tz="UTC")
+# Whale direction as 'in'/'out' whatever the writer stored: the webhook
+# normalises, run_backfill_raw_cache and whale_movements keep the raw labels
+_WHALE_DIRECTION_SQL = ("CASE WHEN LOWER(direction) IN ('in', 'receiving', 'buy', 'inflow') "
+                        "THEN 'in' ELSE 'out' END")
+RAW_SOURCES: Dict[str, Dict[str, Any]] = {
+    "prices": {
+        "table": "prices", "ts": "timestamp",
+        "where": "token IN ('SOL', 'BTC', 'ETH')",
+        "columns": {"timestamp": _RAW_TS, "token": pa.string(), "price": pa.float64()},
+    },
+    "order_book": {
+        "table": "order_book_features", "ts": "timestamp",
+        "where": "symbol = 'SOLUSDT'",
+        "columns": {
+            "timestamp": _RAW_TS,
+            "volume_imbalance": pa.float64(),
+            "spread_bps": pa.float64(),
+            "microprice_dev_bps": pa.float64(),
+            "bid_liquidity": pa.float64(),
+            "ask_liquidity": pa.float64(),
+            "total_depth_10": pa.float64(),
+            "net_liquidity_change_1s": pa.float64(),
+        },
+        "snapshot": (OB_PARQUET,
+                     "ts AS timestamp, vol_imb AS volume_imbalance, spread_bps, "
+                     "microprice_dev AS microprice_dev_bps, bid_liq AS bid_liquidity, "
+                     "ask_liq AS ask_liquidity, bid_liq + ask_liq AS total_depth_10, "
+                     "net_liq_1s AS net_liquidity_change_1s"),
+    },
+    "trades": {
+        "table": "sol_stablecoin_trades", "ts": "trade_timestamp",
+        "columns": {
+            "trade_timestamp": _RAW_TS,
+            "sol_amount": pa.float64(),
+            "stablecoin_amount": pa.float64(),
+            "price": pa.float64(),
+            "direction": pa.string(),
+        },
+        "snapshot": (TRADE_PARQUET,
+                     "ts AS trade_timestamp, sol_amount, stable_amt AS stablecoin_amount, "
+                     "price, direction"),
+    },
+    "whales": {
+        "table": "whale_movements", "ts": "timestamp",
+        "columns": {
+            "timestamp": _RAW_TS,
+            "sol_change": pa.float64(),
+            "abs_change": pa.float64(),
+            "percentage_moved": pa.float64(),
+            "direction": pa.string(),
+        },
+        "exprs": {"direction": f"{_WHALE_DIRECTION_SQL} AS direction"},
+        "snapshot": (WHALE_PARQUET,
+                     "ts AS timestamp, "
+                     f"CASE WHEN {_WHALE_DIRECTION_SQL} = 'in' THEN sol_moved ELSE -sol_moved END "
+                     "AS sol_change, sol_moved AS abs_change, pct_moved AS percentage_moved, "
+                     f"{_WHALE_DIRECTION_SQL} AS direction"),
+        "covered_by": TRADE_PARQUET,
+    },
+}
+RAW_CHUNK_HOURS = float(os.getenv("SDE_RAW_CHUNK_HOURS", "6"))  # PostgreSQL read window
+RAW_USE_SNAPSHOTS = os.getenv("SDE_RAW_SNAPSHOTS", "1") == "1"   # 0 = always PostgreSQL
+
 logger = logging.getLogger("sde")
 
 
@@ -89,112 +170,82 @@ def setup_logging(log_path: str) -> None:
 # ===================================================================
 # 1. Data Loading
 # ===================================================================
+def _raw_chunks(since: datetime, until: datetime) -> List[Tuple[datetime, Optional[datetime]]]:
+    """[lo, hi) windows of RAW_CHUNK_HOURS covering since..; the last is open."""
+    step = timedelta(hours=RAW_CHUNK_HOURS)
+    edges = [since]
+    while edges[-1] + step < until:
+        edges.append(edges[-1] + step)
+    return list(zip(edges, edges[1:] + [None]))
+
+
+def _load_raw_source(spec: Dict[str, Any], since: datetime, until: datetime
+                     ) -> Tuple[pa.Table, str]:
+    """One raw source as a typed Arrow table, plus where it was read from.
+
+    since / until are naive UTC, like the raw tables' timestamp columns.
+    """
+    schema = pa.schema(list(spec["columns"].items()))
+    snapshot = spec.get("snapshot")
+    if RAW_USE_SNAPSHOTS and snapshot is not None:
+        path, select_sql = snapshot
+        since_utc = since.replace(tzinfo=timezone.utc)
+        if snapshot_covers(spec.get("covered_by", path), since_utc,
+                           until.replace(tzinfo=timezone.utc)):
+            tbl = read_snapshot(path, select_sql, since_utc)
+            return tbl.select(schema.names).cast(schema), "snapshot"
+
+    ts = spec["ts"]
+    exprs = spec.get("exprs", {})
+    select = (f"SELECT {', '.join(exprs.get(c, c) for c in schema.names)} FROM {spec['table']} "
+              f"WHERE {ts} >= %s")
+    if spec.get("where"):
+        select += f" AND {spec['where']}"
+    batches: List[pa.RecordBatch] = []
+    chunks = _raw_chunks(since, until)
+    for lo, hi in chunks:
+        sql, params = select, [lo]
+        if hi is not None:
+            sql += f" AND {ts} < %s"
+            params.append(hi)
+        batches.extend(postgres_arrow_batches(sql + f" ORDER BY {ts}", params, schema=schema))
+    return pa.Table.from_batches(batches, schema=schema), f"postgres, {len(chunks)} chunks"
+
+
 def load_raw_data(hours: int) -> Dict[str, pd.DataFrame]:
-    """Load raw data from PostgreSQL into DataFrames.
+    """Load the raw inputs of compute_features() into typed DataFrames.
+
+    Only the RAW_SOURCES columns are read. PostgreSQL tables are streamed
+    through COPY in RAW_CHUNK_HOURS windows; order book, trades and whales
+    come from the core.raw_data_cache Parquet snapshots instead when those
+    cover the whole window.
 
     Returns dict with keys: 'prices', 'order_book', 'trades', 'whales'.
     """
     logger.info(f"Loading raw data for last {hours} hours ...")
-    dfs: Dict[str, pd.DataFrame] = {}
-
+    t0 = time.time()
     with get_postgres() as conn:
         with conn.cursor() as cursor:
-            # --- prices (SOL, BTC, ETH) ---
-            cursor.execute(
-                """SELECT timestamp, token, price
-                   FROM prices
-                   WHERE timestamp >= NOW() - INTERVAL '%s hours'
-                   ORDER BY timestamp""",
-                [hours],
-            )
-            rows = cursor.fetchall()
-            dfs["prices"] = pd.DataFrame(rows) if rows else pd.DataFrame(
-                columns=["timestamp", "token", "price"]
-            )
-
-            # --- order_book_features ---
+            # Window bounds in the database's clock, as naive timestamps
             cursor.execute(
-                """SELECT *
-                   FROM order_book_features
-                   WHERE timestamp >= NOW() - INTERVAL '%s hours'
-                   ORDER BY timestamp""",
+                "SELECT (NOW() - INTERVAL '%s hours')::timestamp AS since, "
+                "NOW()::timestamp AS until",
                 [hours],
             )
-            rows = cursor.fetchall()
-            dfs["order_book"] = pd.DataFrame(rows) if rows else pd.DataFrame()
+            bounds = cursor.fetchone()
 
-            # --- sol_stablecoin_trades ---
-            cursor.execute(
-                """SELECT trade_timestamp, sol_amount, stablecoin_amount,
-                          price, direction, perp_direction
-                   FROM sol_stablecoin_trades
-                   WHERE trade_timestamp >= NOW() - INTERVAL '%s hours'
-                   ORDER BY trade_timestamp""",
-                [hours],
-            )
-            rows = cursor.fetchall()
-            dfs["trades"] = pd.DataFrame(rows) if rows else pd.DataFrame(
-                columns=["trade_timestamp", "sol_amount", "stablecoin_amount",
-                          "price", "direction", "perp_direction"]
-            )
-
-            # --- whale_movements ---
-            cursor.execute(
-                """SELECT timestamp, sol_change, abs_change,
-                          percentage_moved, direction, whale_type,
-                          movement_significance
-                   FROM whale_movements
-                   WHERE timestamp >= NOW() - INTERVAL '%s hours'
-                   ORDER BY timestamp""",
-                [hours],
-            )
-            rows = cursor.fetchall()
-            dfs["whales"] = pd.DataFrame(rows) if rows else pd.DataFrame(
-                columns=["timestamp", "sol_change", "abs_change",
-                          "percentage_moved", "direction", "whale_type",
-                          "movement_significance"]
-            )
-
-    # Ensure numeric types
-    for key, df in dfs.items():
-        if df.empty:
-            logger.warning(f"  {key}: 0 rows")
-            continue
-        logger.info(f"  {key}: {len(df):,} rows")
-
-    _coerce_timestamps(dfs)
-    _coerce_numerics(dfs)
+    dfs: Dict[str, pd.DataFrame] = {}
+    for key, spec in RAW_SOURCES.items():
+        tbl, source = _load_raw_source(spec, bounds["since"], bounds["until"])
+        dfs[key] = tbl.to_pandas()
+        if tbl.num_rows == 0:
+            logger.warning(f"  {key}: 0 rows ({source})")
+        else:
+            logger.info(f"  {key}: {tbl.num_rows:,} rows ({source})")
+    logger.info(f"  Raw data loaded in {time.time() - t0:.1f}s")
     return dfs
 
 
-def _coerce_timestamps(dfs: Dict[str, pd.DataFrame]) -> None:
-    """Ensure timestamp columns are tz-aware UTC datetimes."""
-    ts_map = {
-        "prices": "timestamp",
-        "order_book": "timestamp",
-        "trades": "trade_timestamp",
-        "whales": "timestamp",
-    }
-    for key, col in ts_map.items():
-        df = dfs[key]
-        if df.empty or col not in df.columns:
-            continue
-        df[col] = pd.to_datetime(df[col], utc=True)
-
-
-def _coerce_numerics(dfs: Dict[str, pd.DataFrame]) -> None:
-    """Convert Decimal / object columns to float64 where possible."""
-    for key, df in dfs.items():
-        if df.empty:
-            continue
-        for col in df.columns:
-            if df[col].dtype == object:
-                try:
-                    df[col] = pd.to_numeric(df[col], errors="ignore")
-                except Exception:
-                    pass
-
-
 # ===================================================================
 # 2. Feature Computation
 # ===================================================================
@@ -526,75 +577,12 @@ def compute_features(dfs: Dict[str, pd.DataFrame]) -> pd.DataFrame:
 # ===================================================================
 # 3. Labeling (path-aware)
 # ===================================================================
-def _forward_rolling_maxmin(arr: np.ndarray, window: int
-                            ) -> Tuple[np.ndarray, np.ndarray]:
-    """Compute forward rolling max and min over a price array.
-
-    For each index i, returns the max and min of arr[i+1 : i+1+window].
-    Uses the reverse-array trick: forward rolling = reversed backward rolling.
-
-    Returns (fwd_max, fwd_min) arrays of same length as arr.
-    """
-    n = len(arr)
-    fwd_max = np.full(n, np.nan)
-    fwd_min = np.full(n, np.nan)
-
-    if n < 2 or window < 1:
-        return fwd_max, fwd_min
-
-    # Reverse the array, then compute backward rolling max/min
-    # Forward window [i+1, i+window] on original =
-    #   Backward window on reversed array
-    rev = arr[::-1]
-
-    # Use pandas for efficient rolling on reversed array
-    rev_s = pd.Series(rev)
-    # rolling(window).max() gives max of last `window` values including current
-    # We need max of arr[i+1..i+window], so after reversing and rolling,
-    # we shift by 1 to exclude the current element.
-    rev_max = rev_s.rolling(window, min_periods=1).max().values
-    rev_min = rev_s.rolling(window, min_periods=1).min().values
-
-    # Reverse back
-    bwd_max = rev_max[::-1]
-    bwd_min = rev_min[::-1]
-
-    # bwd_max[i] = max of arr[i..i+window-1] (includes i)
-    # We need max of arr[i+1..i+window], so shift forward by 1
-    # Also need to recompute for the edge: at position i, the window
-    # should be [i+1, min(i+window, n-1)]
-    # Shifting: fwd_max[i] = bwd_max[i+1] but that only covers window-1 elements
-    # So we need rolling of window size, then shift by 1
-    # Actually, let's compute on shifted array directly:
-    # We want max(arr[i+1], ..., arr[i+window]) for each i
-    # = max of arr[1:] with rolling window of size `window`, aligned to the left
-    if n <= 1:
-        return fwd_max, fwd_min
-
-    shifted = arr[1:]  # arr starting from index 1
-    s_shifted = pd.Series(shifted)
-
-    # Forward rolling max on shifted = for each j in shifted, max(shifted[j-window+1..j])
-    # = max(arr[j-window+2..j+1])
-    # We want: for original index i, max(arr[i+1..i+window])
-    # That's shifted index j where j starts at i: max(shifted[i..i+window-1])
-    # = rolling(window) aligned "right" starting from position window-1
-    # Use the reverse trick for proper forward-looking window:
-    s_rev = s_shifted[::-1].reset_index(drop=True)
-    r_max = s_rev.rolling(window, min_periods=1).max().values[::-1]
-    r_min = s_rev.rolling(window, min_periods=1).min().values[::-1]
-
-    fwd_max[:n - 1] = r_max
-    fwd_min[:n - 1] = r_min
-
-    return fwd_max, fwd_min
-
-
 def precompute_forward_windows(sol_1s: pd.Series, window_secs: List[int]
                                ) -> Dict[int, Tuple[pd.Series, pd.Series]]:
     """Pre-compute forward max/min returns (%) for multiple window sizes.
 
-    Uses vectorized reverse-rolling approach for performance.
+    The window after second i is sol_1s[i+1 : i+1+window_sec] (see
+    core.forward_labels.forward_windows).
 
     Returns dict: window_sec -> (fwd_max_pct, fwd_min_pct).
     """
@@ -602,28 +590,12 @@ def precompute_forward_windows(sol_1s: pd.Series, window_secs: List[int]
         empty = pd.Series(dtype="float64")
         return {w: (empty, empty) for w in window_secs}
 
-    arr = sol_1s.values.astype(np.float64)
-    n = len(arr)
     idx = sol_1s.index
-    results = {}
-
-    # Base price array for computing returns (avoid division by zero)
-    base = arr.copy()
-    base[base <= 0] = np.nan
-
-    for wsec in sorted(set(window_secs)):
-        fwd_abs_max, fwd_abs_min = _forward_rolling_maxmin(arr, wsec)
-
-        # Convert to percent return relative to base price
-        fwd_max_pct = (fwd_abs_max / base - 1) * 100
-        fwd_min_pct = (fwd_abs_min / base - 1) * 100
-
-        results[wsec] = (
-            pd.Series(fwd_max_pct, index=idx),
-            pd.Series(fwd_min_pct, index=idx),
-        )
-
-    return results
+    return {
+        wsec: (pd.Series(fwd_max_pct, index=idx), pd.Series(fwd_min_pct, index=idx))
+        for wsec, (fwd_max_pct, fwd_min_pct)
+        in forward_windows(sol_1s.to_numpy(dtype=np.float64), window_secs).items()
+    }
 
 
 def label_samples(
@@ -643,26 +615,19 @@ def label_samples(
 
     Returns DataFrame with columns: timestamp, label, actual_gain, actual_loss.
     """
-    # Get the early-window forward max (for climb check)
-    early_max_pct, _ = fwd_windows.get(early_window_sec,
-                                        (pd.Series(dtype="float64"),
-                                         pd.Series(dtype="float64")))
-    # Get the full forward-window min (for dip check)
-    _, full_min_pct = fwd_windows.get(forward_window_sec,
-                                       (pd.Series(dtype="float64"),
-                                        pd.Series(dtype="float64")))
-    # Also get the full forward-window max for actual_gain
-    full_max_pct, _ = fwd_windows.get(forward_window_sec,
-                                       (pd.Series(dtype="float64"),
-                                        pd.Series(dtype="float64")))
-
-    # Align to grid
-    early_max_at_grid = early_max_pct.reindex(grid, method="nearest",
-                                               tolerance=pd.Timedelta("2s"))
-    full_min_at_grid = full_min_pct.reindex(grid, method="nearest",
-                                             tolerance=pd.Timedelta("2s"))
-    full_max_at_grid = full_max_pct.reindex(grid, method="nearest",
-                                             tolerance=pd.Timedelta("2s"))
+    empty = pd.Series(dtype="float64")
+    # Early-window forward max (climb check); full-window max/min (dip check,
+    # actual gain/loss)
+    early_max_pct, _ = fwd_windows.get(early_window_sec, (empty, empty))
+    full_max_pct, full_min_pct = fwd_windows.get(forward_window_sec, (empty, empty))
+
+    # Align to grid: nearest 1s point within 2s
+    early_pos = nearest_positions(early_max_pct.index, grid, pd.Timedelta("2s"))
+    full_pos = (early_pos if full_max_pct.index is early_max_pct.index
+                else nearest_positions(full_max_pct.index, grid, pd.Timedelta("2s")))
+    early_max_at_grid = take(early_max_pct.to_numpy(), early_pos)
+    full_min_at_grid = take(full_min_pct.to_numpy(), full_pos)
+    full_max_at_grid = take(full_max_pct.to_numpy(), full_pos)
 
     # Label: climb if reaches target AND doesn't dip too much
     reached_target = early_max_at_grid >= min_climb_pct
@@ -673,8 +638,8 @@ def label_samples(
     result = pd.DataFrame({
         "timestamp": grid,
         "label": labels,
-        "actual_gain": full_max_at_grid.values,
-        "actual_loss": full_min_at_grid.values,
+        "actual_gain": full_max_at_grid,
+        "actual_loss": full_min_at_grid,
     })
     # Drop samples where we don't have enough forward data
     result = result.dropna(subset=["actual_gain", "actual_loss"])
@@ -1219,14 +1184,29 @@ def walk_forward_filters(
 # ===================================================================
 # 9. Sweep Orchestrator
 # ===================================================================
-def _write_checkpoint(progress: str, elapsed_sec: float,
-                      n_results: int, results: List[Dict]) -> None:
-    """Write checkpoint file for heartbeat monitoring."""
+# Combos run on a process pool. The feature matrix and the forward windows
+# are written once to a snapshot directory as .npy files that every worker
+# memory-maps (the OS shares the pages), and each finished combo is appended
+# as one line to combos.jsonl. A killed sweep resumes from that log: a new
+# run with the same settings reuses the snapshot and skips logged combos.
+
+# Module settings a sweep depends on: shipped to workers, and a changed value
+# makes an unfinished snapshot non-resumable.
+_SWEEP_SETTING_NAMES = (
+    "MIN_CLIMB_PCTS", "MAX_DIP_PCTS", "EARLY_WINDOW_SECS", "FORWARD_WINDOW_SECS",
+    "MIN_CLIMBS", "TRADE_COST_PCT", "TOP_FEATURES_COHENS", "TOP_FEATURES_COMBOS",
+    "GBM_THRESHOLDS", "WF_SPLITS",
+)
+
+_snapshot: Optional[Tuple[pd.DataFrame, pd.Series, Dict[int, Tuple[pd.Series, pd.Series]]]] = None
+
+
+def _write_checkpoint(progress: str, elapsed_sec: float, n_results: int) -> None:
+    """Write checkpoint file for heartbeat monitoring (results live in combos.jsonl)."""
     checkpoint = {
         "progress": progress,
         "elapsed_sec": round(elapsed_sec, 1),
         "n_results": n_results,
-        "results": results[-50:] if len(results) > 50 else results,
     }
     try:
         tmp = CHECKPOINT_FILE + ".tmp"
@@ -1237,171 +1217,339 @@ def _write_checkpoint(progress: str, elapsed_sec: float,
         logger.warning(f"Failed to write checkpoint: {e}")
 
 
-def run_sweep(hours: int, output_path: str) -> List[Dict[str, Any]]:
-    """Main sweep: iterate over parameter combos, discover signals.
-    Returns list of all profitable results."""
-    t_start = time.time()
+def _sweep_settings(hours: int) -> Dict[str, Any]:
+    settings = {name: globals()[name] for name in _SWEEP_SETTING_NAMES}
+    settings["hours"] = hours
+    return json.loads(json.dumps(settings))  # tuples -> lists, as stored
 
-    # --- Step 1: Load raw data ---
-    dfs = load_raw_data(hours)
-    sol_prices = dfs["prices"]
-    if sol_prices.empty:
-        logger.error("No price data available. Aborting.")
-        return []
 
-    # --- Step 2: Compute features (one-time) ---
-    feature_df = compute_features(dfs)
-    if feature_df.empty:
-        logger.error("Feature computation returned empty. Aborting.")
-        return []
+def _json_default(value: Any) -> Any:
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
 
-    grid = feature_df.index
 
-    # --- Step 3: Pre-compute 1-second SOL price series for labeling ---
-    sol_1s = _resample_prices_1s(dfs["prices"], "SOL")
-    if sol_1s.empty:
-        logger.error("No SOL 1-second price data. Aborting.")
-        return []
+def _save_index(run_dir: Path, name: str, index: pd.DatetimeIndex) -> Dict[str, Any]:
+    values = index.tz_convert(None) if index.tz is not None else index
+    np.save(run_dir / f"{name}.npy", values.values)
+    return {"tz": str(index.tz) if index.tz is not None else None, "name": index.name}
 
-    # Pre-compute forward windows for all needed sizes
-    all_windows = sorted(set(EARLY_WINDOW_SECS + FORWARD_WINDOW_SECS))
-    logger.info(f"Pre-computing forward price windows for: {all_windows} ...")
-    t_fwd = time.time()
-    fwd_windows = precompute_forward_windows(sol_1s, all_windows)
-    logger.info(f"  Forward windows computed in {time.time() - t_fwd:.1f}s")
 
-    # --- Step 4: Build combo grid ---
-    combos = list(itertools.product(
-        MIN_CLIMB_PCTS, MAX_DIP_PCTS, EARLY_WINDOW_SECS, FORWARD_WINDOW_SECS
-    ))
-    total_combos = len(combos)
-    logger.info(f"Total parameter combos: {total_combos}")
+def _load_index(run_dir: Path, name: str, meta: Dict[str, Any]) -> pd.DatetimeIndex:
+    index = pd.DatetimeIndex(np.load(run_dir / f"{name}.npy"), name=meta["name"])
+    return index.tz_localize(meta["tz"]) if meta["tz"] else index
 
-    all_results: List[Dict[str, Any]] = []
-    combos_skipped = 0
-    errors = 0
-
-    # --- Step 5: Iterate combos ---
-    for idx, (min_climb, max_dip, early_w, fwd_w) in enumerate(combos):
-        combo_t0 = time.time()
-        combo_num = idx + 1
-        elapsed = time.time() - t_start
-
-        # Skip if early_window > forward_window (nonsensical)
-        if early_w > fwd_w:
-            combos_skipped += 1
-            _write_checkpoint(
-                f"{combo_num}/{total_combos}", elapsed,
-                len(all_results), all_results
-            )
-            continue
 
-        logger.info(
-            f"[{combo_num}/{total_combos}] climb={min_climb}% dip={max_dip}% "
-            f"early={early_w}s fwd={fwd_w}s"
+def _write_snapshot(
+    run_dir: Path,
+    settings: Dict[str, Any],
+    feature_df: pd.DataFrame,
+    sol_1s: pd.Series,
+    fwd_windows: Dict[int, Tuple[pd.Series, pd.Series]],
+) -> None:
+    """Write the sweep inputs as memory-mappable arrays plus a manifest."""
+    run_dir.mkdir(parents=True, exist_ok=True)
+    for stale in ("manifest.json", "combos.jsonl"):
+        (run_dir / stale).unlink(missing_ok=True)
+
+    np.save(run_dir / "features.npy",
+            np.ascontiguousarray(feature_df.to_numpy(dtype=np.float64)))
+    grid_meta = _save_index(run_dir, "grid", feature_df.index)
+    sol_meta = _save_index(run_dir, "sol_index", sol_1s.index)
+    np.save(run_dir / "sol_1s.npy", sol_1s.to_numpy(dtype=np.float64))
+    for wsec, (fwd_max, fwd_min) in fwd_windows.items():
+        np.save(run_dir / f"fwd_{wsec}_max.npy", fwd_max.to_numpy(dtype=np.float64))
+        np.save(run_dir / f"fwd_{wsec}_min.npy", fwd_min.to_numpy(dtype=np.float64))
+
+    manifest = {
+        "settings": settings,
+        "columns": list(feature_df.columns),
+        "grid": grid_meta,
+        "sol_index": sol_meta,
+        "windows": sorted(fwd_windows),
+        "created_at": time.time(),
+        "completed": False,
+    }
+    tmp = run_dir / "manifest.json.tmp"
+    tmp.write_text(json.dumps(manifest))
+    os.replace(tmp, run_dir / "manifest.json")
+
+
+def _load_snapshot(run_dir: Path):
+    """(feature_df, sol_1s, fwd_windows) backed by read-only memory maps."""
+    manifest = json.loads((run_dir / "manifest.json").read_text())
+    grid = _load_index(run_dir, "grid", manifest["grid"])
+    sol_index = _load_index(run_dir, "sol_index", manifest["sol_index"])
+
+    features = np.load(run_dir / "features.npy", mmap_mode="r")
+    feature_df = pd.DataFrame(features, index=grid, columns=manifest["columns"], copy=False)
+    sol_1s = pd.Series(np.load(run_dir / "sol_1s.npy", mmap_mode="r"), index=sol_index, copy=False)
+    fwd_windows = {
+        wsec: (
+            pd.Series(np.load(run_dir / f"fwd_{wsec}_max.npy", mmap_mode="r"), index=sol_index, copy=False),
+            pd.Series(np.load(run_dir / f"fwd_{wsec}_min.npy", mmap_mode="r"), index=sol_index, copy=False),
+        )
+        for wsec in manifest["windows"]
+    }
+    return feature_df, sol_1s, fwd_windows
+
+
+def _resumable_manifest(run_dir: Path, settings: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Manifest of an unfinished sweep with the same settings, if recent enough."""
+    try:
+        manifest = json.loads((run_dir / "manifest.json").read_text())
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if manifest.get("completed") or manifest.get("settings") != settings:
+        return None
+    if time.time() - manifest.get("created_at", 0) > SWEEP_RESUME_MAX_AGE_SEC:
+        return None
+    return manifest
+
+
+def _read_combo_log(run_dir: Path) -> Dict[int, Dict[str, Any]]:
+    """Finished combos by index (a line cut short by a kill is ignored)."""
+    records: Dict[int, Dict[str, Any]] = {}
+    try:
+        with open(run_dir / "combos.jsonl") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                records[record["idx"]] = record
+    except FileNotFoundError:
+        pass
+    return records
+
+
+def _init_sweep_worker(run_dir: str, settings: Dict[str, Any]) -> None:
+    """Process-pool initializer: apply the sweep settings and map the snapshot."""
+    global _snapshot
+    for name in _SWEEP_SETTING_NAMES:
+        value = settings[name]
+        globals()[name] = [tuple(v) for v in value] if name == "WF_SPLITS" else value
+    _snapshot = _load_snapshot(Path(run_dir))
+
+
+def _run_combo(idx: int, combo: Tuple[float, float, int, int]) -> Dict[str, Any]:
+    """Label one parameter combo and run both discovery methods on it.
+
+    Runs in a worker against the memory-mapped snapshot. Returns the combo's
+    log record: status, label counts, results and notes for the parent log.
+    """
+    combo_t0 = time.time()
+    min_climb, max_dip, early_w, fwd_w = combo
+    feature_df, sol_1s, fwd_windows = _snapshot
+    record: Dict[str, Any] = {
+        "idx": idx, "status": "done", "results": [], "errors": 0, "notes": [],
+    }
+    notes = record["notes"]
+
+    try:
+        # Label samples
+        label_df = label_samples(
+            sol_1s, feature_df.index, min_climb, max_dip, early_w, fwd_w, fwd_windows
         )
 
+        n_climbs = int((label_df["label"] == 1).sum())
+        n_total = len(label_df)
+
+        if n_climbs < MIN_CLIMBS:
+            notes.append(f"Skipping: only {n_climbs} climbs (need {MIN_CLIMBS})")
+            record["status"] = "skipped"
+            return record
+
+        notes.append(f"Labels: {n_climbs} climbs / {n_total} total "
+                     f"({n_climbs/n_total*100:.1f}%)")
+
+        # Align features with labels (use index intersection for tz safety)
+        label_idx = pd.DatetimeIndex(label_df["timestamp"])
+        common_idx = feature_df.index.intersection(label_idx)
+        if len(common_idx) < MIN_CLIMBS:
+            notes.append(f"Skipping: only {len(common_idx)} aligned samples")
+            record["status"] = "skipped"
+            return record
+
+        feat_aligned = feature_df.loc[common_idx]
+        label_aligned = label_df.set_index("timestamp").loc[common_idx]
+        labels_arr = label_aligned["label"].values
+        gains_arr = label_aligned["actual_gain"].values
+        losses_arr = label_aligned["actual_loss"].values
+
+        combo_info = {
+            "climb_params": {
+                "min_climb_pct": min_climb,
+                "max_dip_pct": max_dip,
+                "early_window_sec": early_w,
+                "forward_window_sec": fwd_w,
+            },
+            "n_climbs": n_climbs,
+            "n_non_climbs": n_total - n_climbs,
+            "n_events": n_total,
+        }
+
+        # --- Method 1: Filter rules with walk-forward ---
         try:
-            # Label samples
-            label_df = label_samples(
-                sol_1s, grid, min_climb, max_dip, early_w, fwd_w, fwd_windows
+            filter_results = walk_forward_filters(
+                feat_aligned, labels_arr, gains_arr, losses_arr
             )
+            for fr in filter_results:
+                fr.update(combo_info)
+            record["results"].extend(filter_results)
+            if filter_results:
+                notes.append(f"Filters: {len(filter_results)} profitable configs")
+        except Exception as e:
+            notes.append(f"Filter discovery error: {e}")
+            record["errors"] += 1
 
-            n_climbs = int((label_df["label"] == 1).sum())
-            n_total = len(label_df)
+        # --- Method 2: GBM with walk-forward ---
+        try:
+            gbm_results = discover_gbm(
+                feat_aligned, labels_arr, gains_arr, losses_arr
+            )
+            for gr in gbm_results:
+                gr.update(combo_info)
+            record["results"].extend(gbm_results)
+            if gbm_results:
+                notes.append(f"GBM: {len(gbm_results)} profitable configs")
+        except Exception as e:
+            notes.append(f"GBM discovery error: {e}")
+            record["errors"] += 1
 
-            if n_climbs < MIN_CLIMBS:
-                logger.info(f"  Skipping: only {n_climbs} climbs (need {MIN_CLIMBS})")
-                combos_skipped += 1
-                _write_checkpoint(
-                    f"{combo_num}/{total_combos}", elapsed,
-                    len(all_results), all_results
-                )
-                continue
+    except Exception as e:
+        notes.append(f"Combo error: {e}")
+        record["status"] = "error"
+        record["errors"] += 1
+    finally:
+        record["elapsed_sec"] = round(time.time() - combo_t0, 2)
 
-            logger.info(f"  Labels: {n_climbs} climbs / {n_total} total "
-                        f"({n_climbs/n_total*100:.1f}%)")
-
-            # Align features with labels (use index intersection for tz safety)
-            label_idx = pd.DatetimeIndex(label_df["timestamp"])
-            common_idx = feature_df.index.intersection(label_idx)
-            if len(common_idx) < MIN_CLIMBS:
-                logger.info(f"  Skipping: only {len(common_idx)} aligned samples")
-                combos_skipped += 1
-                _write_checkpoint(
-                    f"{combo_num}/{total_combos}", elapsed,
-                    len(all_results), all_results
-                )
-                continue
+    return record
 
-            feat_aligned = feature_df.loc[common_idx]
-            label_aligned = label_df.set_index("timestamp").loc[common_idx]
-            labels_arr = label_aligned["label"].values
-            gains_arr = label_aligned["actual_gain"].values
-            losses_arr = label_aligned["actual_loss"].values
 
-            combo_results = []
+def run_sweep(hours: int, output_path: str, workers: Optional[int] = None,
+              resume: bool = True) -> List[Dict[str, Any]]:
+    """Main sweep: evaluate every parameter combo on a process pool.
 
-            # --- Method 1: Filter rules with walk-forward ---
-            try:
-                filter_results = walk_forward_filters(
-                    feat_aligned, labels_arr, gains_arr, losses_arr
-                )
-                for fr in filter_results:
-                    fr["climb_params"] = {
-                        "min_climb_pct": min_climb,
-                        "max_dip_pct": max_dip,
-                        "early_window_sec": early_w,
-                        "forward_window_sec": fwd_w,
-                    }
-                    fr["n_climbs"] = n_climbs
-                    fr["n_non_climbs"] = n_total - n_climbs
-                    fr["n_events"] = n_total
-                    combo_results.extend(filter_results)
-                if filter_results:
-                    logger.info(f"  Filters: {len(filter_results)} profitable configs")
-            except Exception as e:
-                logger.warning(f"  Filter discovery error: {e}")
-                errors += 1
+    workers: pool size (default SWEEP_WORKERS, 0 = all cores; 1 runs inline).
+    resume: continue an unfinished sweep with the same settings from its
+            snapshot and combo log instead of starting over.
 
-            # --- Method 2: GBM with walk-forward ---
-            try:
-                gbm_results = discover_gbm(
-                    feat_aligned, labels_arr, gains_arr, losses_arr
-                )
-                for gr in gbm_results:
-                    gr["climb_params"] = {
-                        "min_climb_pct": min_climb,
-                        "max_dip_pct": max_dip,
-                        "early_window_sec": early_w,
-                        "forward_window_sec": fwd_w,
-                    }
-                    gr["n_climbs"] = n_climbs
-                    gr["n_non_climbs"] = n_total - n_climbs
-                    gr["n_events"] = n_total
-                    combo_results.extend(gbm_results)
-                if gbm_results:
-                    logger.info(f"  GBM: {len(gbm_results)} profitable configs")
-            except Exception as e:
-                logger.warning(f"  GBM discovery error: {e}")
-                errors += 1
+    Returns list of all profitable results."""
+    t_start = time.time()
+    run_dir = Path(SWEEP_DIR)
+    settings = _sweep_settings(hours)
 
-            all_results.extend(combo_results)
-            combo_elapsed = time.time() - combo_t0
-            logger.info(f"  Combo done in {combo_elapsed:.1f}s "
-                        f"({len(combo_results)} results, "
-                        f"{len(all_results)} total)")
+    manifest = _resumable_manifest(run_dir, settings) if resume else None
+    if manifest is not None:
+        logger.info(f"Resuming sweep from {run_dir} "
+                    f"(snapshot from {datetime.fromtimestamp(manifest['created_at']):%Y-%m-%d %H:%M})")
+    else:
+        # --- Step 1: Load raw data ---
+        dfs = load_raw_data(hours)
+        sol_prices = dfs["prices"]
+        if sol_prices.empty:
+            logger.error("No price data available. Aborting.")
+            return []
+
+        # --- Step 2: Compute features (one-time) ---
+        feature_df = compute_features(dfs)
+        if feature_df.empty:
+            logger.error("Feature computation returned empty. Aborting.")
+            return []
+
+        # --- Step 3: Pre-compute 1-second SOL price series for labeling ---
+        sol_1s = _resample_prices_1s(dfs["prices"], "SOL")
+        if sol_1s.empty:
+            logger.error("No SOL 1-second price data. Aborting.")
+            return []
+        del dfs, sol_prices
+
+        # Pre-compute forward windows for all needed sizes
+        all_windows = sorted(set(EARLY_WINDOW_SECS + FORWARD_WINDOW_SECS))
+        logger.info(f"Pre-computing forward price windows for: {all_windows} ...")
+        t_fwd = time.time()
+        fwd_windows = precompute_forward_windows(sol_1s, all_windows)
+        logger.info(f"  Forward windows computed in {time.time() - t_fwd:.1f}s")
+
+        _write_snapshot(run_dir, settings, feature_df, sol_1s, fwd_windows)
+        del feature_df, sol_1s, fwd_windows
+        logger.info(f"Snapshot written to {run_dir}")
 
-        except Exception as e:
-            logger.error(f"  Combo error: {e}", exc_info=True)
-            errors += 1
-
-        # Update checkpoint
-        elapsed = time.time() - t_start
-        _write_checkpoint(
-            f"{combo_num}/{total_combos}", elapsed,
-            len(all_results), all_results
+    # --- Step 4: Build combo grid ---
+    combos = list(itertools.product(
+        MIN_CLIMB_PCTS, MAX_DIP_PCTS, EARLY_WINDOW_SECS, FORWARD_WINDOW_SECS
+    ))
+    total_combos = len(combos)
+    logger.info(f"Total parameter combos: {total_combos}")
+
+    records = _read_combo_log(run_dir)
+    # Skip if early_window > forward_window (nonsensical)
+    pending = [(idx, combo) for idx, combo in enumerate(combos)
+               if idx not in records and combo[2] <= combo[3]]
+    invalid = sum(1 for combo in combos if combo[2] > combo[3])
+    if records:
+        logger.info(f"  {len(records)} combos already done, {len(pending)} to go")
+
+    n_results = sum(len(r["results"]) for r in records.values())
+    done = len(records) + invalid
+    last_checkpoint = 0.0
+
+    def _record_done(record: Dict[str, Any], log_file) -> None:
+        nonlocal n_results, done, last_checkpoint
+        records[record["idx"]] = record
+        log_file.write(json.dumps(record, default=_json_default) + "\n")
+        log_file.flush()
+        n_results += len(record["results"])
+        done += 1
+
+        min_climb, max_dip, early_w, fwd_w = combos[record["idx"]]
+        logger.info(
+            f"[{done}/{total_combos}] climb={min_climb}% dip={max_dip}% "
+            f"early={early_w}s fwd={fwd_w}s: {record['status']} in "
+            f"{record['elapsed_sec']:.1f}s ({len(record['results'])} results, "
+            f"{n_results} total)"
         )
+        for note in record["notes"]:
+            logger.info(f"  {note}")
+
+        now = time.time()
+        if now - last_checkpoint >= CHECKPOINT_INTERVAL_SEC or done == total_combos:
+            _write_checkpoint(f"{done}/{total_combos}", now - t_start, n_results)
+            last_checkpoint = now
+
+    # --- Step 5: Evaluate combos ---
+    workers = SWEEP_WORKERS if workers is None else workers
+    workers = min(workers or os.cpu_count() or 1, max(len(pending), 1))
+    logger.info(f"Evaluating {len(pending)} combos on {workers} worker(s) ...")
+
+    with open(run_dir / "combos.jsonl", "a") as log_file:
+        if workers == 1:
+            _init_sweep_worker(str(run_dir), settings)
+            for idx, combo in pending:
+                _record_done(_run_combo(idx, combo), log_file)
+        else:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_sweep_worker,
+                initargs=(str(run_dir), settings),
+            ) as pool:
+                futures = [pool.submit(_run_combo, idx, combo) for idx, combo in pending]
+                for future in as_completed(futures):
+                    _record_done(future.result(), log_file)
+
+    _write_checkpoint(f"{done}/{total_combos}", time.time() - t_start, n_results)
+    manifest = json.loads((run_dir / "manifest.json").read_text())
+    manifest["completed"] = True
+    (run_dir / "manifest.json").write_text(json.dumps(manifest))
+
+    # Results in combo order, as a serial sweep produces them
+    all_results: List[Dict[str, Any]] = []
+    for idx in sorted(records):
+        all_results.extend(records[idx]["results"])
+    combos_skipped = invalid + sum(1 for r in records.values() if r["status"] == "skipped")
+    errors = sum(r["errors"] for r in records.values())
 
     # --- Step 6: Write final output ---
     elapsed = time.time() - t_start
@@ -1722,6 +1870,14 @@ def main():
         "--output", type=str, default=None,
         help="Path for JSON output file"
     )
+    parser.add_argument(
+        "--workers", type=int, default=None,
+        help="Worker processes for the sweep (default: SDE_WORKERS or all cores)"
+    )
+    parser.add_argument(
+        "--no-resume", action="store_true",
+        help="Start a fresh sweep even if an unfinished one can be resumed"
+    )
     parser.add_argument(
         "--apply", action="store_true",
         help="Auto-apply best filters to pump_continuation_rules if better than current"
@@ -1743,9 +1899,11 @@ def main():
     logger.info(f"  Apply: {args.apply}")
     logger.info(f"  Log: {log_path}")
     logger.info(f"  Checkpoint: {CHECKPOINT_FILE}")
+    logger.info(f"  Sweep dir: {SWEEP_DIR}")
 
     if args.sweep:
-        results = run_sweep(args.hours, args.output)
+        results = run_sweep(args.hours, args.output, workers=args.workers,
+                            resume=not args.no_resume)
 
         if args.apply and results:
             logger.info("")
@@ -6,14 +6,18 @@ Module for storing 15-minute trail data in a structured table format.
 This module handles:
 - Table creation for DuckDB and MySQL
 - Flattening trail payloads into database rows
-- Dual-write insertion (15 rows per buyin)
+- Bulk insertion (30 rows per buyin + normalized filter values), one
+  transaction per flush, deduplicated by unique index (ON CONFLICT DO NOTHING)
 - Query functions to retrieve trail data
 
 Usage:
-    from trail_data import insert_trail_data, get_trail_for_buyin
+    from trail_data import insert_trail_data, insert_trail_data_batch, get_trail_for_buyin
     
     # Insert trail data for a buyin
     insert_trail_data(buyin_id=123, trail_payload=payload)
+
+    # Coalesce several buyins into one flush
+    insert_trail_data_batch([(123, payload_a), (124, payload_b)])
     
     # Retrieve trail data
     rows = get_trail_for_buyin(buyin_id=123)
@@ -25,7 +29,7 @@ import logging
 from datetime import datetime
 from decimal import Decimal
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 import sys
 PROJECT_ROOT = Path(__file__).parent.parent
@@ -503,9 +507,57 @@ def ensure_trail_table_exists_mysql() -> None:
     pass
 
 
+_tables_ensured = False
+# False when idx_trail_unique could not be created: ON CONFLICT would then
+# dedup nothing, so writers fall back to a per-buyin existence check.
+_trail_unique_index = False
+# trade_filter_values dedup key. The original idx_tfv_unique (buyin_id, minute,
+# filter_name) cannot hold both halves of a minute, so it is replaced by
+# idx_tfv_unique_sub; while that is missing, sub_minute rows are not written.
+_TFV_KEY = "(buyin_id, minute, sub_minute, filter_name)"
+_TFV_LEGACY_KEY = "(buyin_id, minute, filter_name)"
+_tfv_sub_minute_index = False
+
+
 def ensure_trail_tables_exist() -> None:
-    """Ensure the buyin_trail_minutes table exists in PostgreSQL."""
+    """Ensure the buyin_trail_minutes table (and its dedup index) exists in PostgreSQL.
+
+    Runs once per process -- insert_trail_data() is on the buy-decision path.
+    """
+    global _tables_ensured, _trail_unique_index, _tfv_sub_minute_index
+    if _tables_ensured:
+        return
     ensure_trail_table_exists_duckdb()  # Name kept for compatibility, but uses PostgreSQL
+    try:
+        with get_postgres() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    "CREATE UNIQUE INDEX IF NOT EXISTS idx_trail_unique "
+                    "ON buyin_trail_minutes(buyin_id, minute, sub_minute)"
+                )
+        _trail_unique_index = True
+    except Exception as e:
+        # e.g. legacy duplicate rows -- dedup falls back to existence checks
+        logger.error(
+            f"Could not create idx_trail_unique on buyin_trail_minutes, "
+            f"falling back to per-buyin existence checks: {e}"
+        )
+        _trail_unique_index = False
+    try:
+        with get_postgres() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    f"CREATE UNIQUE INDEX IF NOT EXISTS idx_tfv_unique_sub ON trade_filter_values{_TFV_KEY}"
+                )
+                cursor.execute("DROP INDEX IF EXISTS idx_tfv_unique")
+        _tfv_sub_minute_index = True
+    except Exception as e:
+        logger.error(
+            f"Could not create idx_tfv_unique_sub on trade_filter_values, "
+            f"sub_minute filter values will not be stored: {e}"
+        )
+        _tfv_sub_minute_index = False
+    _tables_ensured = True
 
 
 # =============================================================================
@@ -1003,6 +1055,49 @@ def _get_all_columns() -> List[str]:
     return columns
 
 
+def _native(val: Any) -> Any:
+    """Convert numpy scalars to Python scalars for psycopg2."""
+    if val is not None and hasattr(val, 'item'):
+        return val.item()
+    return val
+
+
+def _trail_row_tuples(rows: List[Dict[str, Any]], columns: List[str]) -> List[Tuple[Any, ...]]:
+    return [tuple(_native(row.get(col)) for col in columns) for row in rows]
+
+
+def _existing_trail_buyins(cursor, buyin_ids: Sequence[int]) -> set:
+    """buyin_ids that already have rows in buyin_trail_minutes."""
+    if not buyin_ids:
+        return set()
+    cursor.execute(
+        "SELECT DISTINCT buyin_id FROM buyin_trail_minutes WHERE buyin_id = ANY(%s)",
+        [list(buyin_ids)]
+    )
+    return {row['buyin_id'] for row in cursor.fetchall()}
+
+
+def _write_trail_rows(cursor, row_tuples: List[Tuple[Any, ...]], columns: List[str]) -> int:
+    """Multi-row insert into buyin_trail_minutes.
+
+    With idx_trail_unique in place already-present rows are skipped; without
+    it the caller must have filtered out existing buyins (see
+    _existing_trail_buyins) and a plain INSERT is used.
+    """
+    from psycopg2.extras import execute_values
+
+    if not row_tuples:
+        return 0
+    conflict = " ON CONFLICT (buyin_id, minute, sub_minute) DO NOTHING" if _trail_unique_index else ""
+    execute_values(
+        cursor,
+        f"INSERT INTO buyin_trail_minutes ({', '.join(columns)}) VALUES %s{conflict}",
+        row_tuples,
+        page_size=len(row_tuples),
+    )
+    return cursor.rowcount
+
+
 def insert_trail_rows_duckdb(buyin_id: int, rows: List[Dict[str, Any]]) -> bool:
     """Insert trail rows into PostgreSQL.
     
@@ -1016,54 +1111,18 @@ def insert_trail_rows_duckdb(buyin_id: int, rows: List[Dict[str, Any]]) -> bool:
     if not rows:
         return False
     
+    ensure_trail_tables_exist()
     columns = _get_all_columns()
-    col_list = ", ".join(columns)
-    placeholders = ", ".join(["%s" for _ in columns])
     
     try:
         with get_postgres() as conn:
             with conn.cursor() as cursor:
-                # Check if data already exists first
-                cursor.execute(
-                    "SELECT COUNT(*) as count FROM buyin_trail_minutes WHERE buyin_id = %s",
-                    [buyin_id]
-                )
-                existing = cursor.fetchone()
-                existing_count = existing['count'] if existing else 0
-                
-                if existing_count > 0:
+                if not _trail_unique_index and _existing_trail_buyins(cursor, [buyin_id]):
                     logger.debug(f"Trail data already exists for buyin_id={buyin_id}, skipping")
                     return True
-                
-                # Insert all rows
-                inserted_count = 0
-                for row in rows:
-                    # Convert numpy types to Python native types
-                    values = []
-                    for col in columns:
-                        val = row.get(col)
-                        # Convert numpy types to Python native types
-                        if val is not None and hasattr(val, 'item'):
-                            val = val.item()  # Convert numpy scalar to Python scalar
-                        values.append(val)
-                    
-                    cursor.execute(
-                        f"INSERT INTO buyin_trail_minutes ({col_list}) VALUES ({placeholders})",
-                        values
-                    )
-                    inserted_count += 1
-                
-                conn.commit()
-                
-                # Verify
-                cursor.execute(
-                    "SELECT COUNT(*) as count FROM buyin_trail_minutes WHERE buyin_id = %s",
-                    [buyin_id]
-                )
-                verify = cursor.fetchone()
-                verify_count = verify['count'] if verify else 0
+                inserted_count = _write_trail_rows(cursor, _trail_row_tuples(rows, columns), columns)
         
-        logger.info(f"✅ PERSISTED to PostgreSQL: {inserted_count} trail rows for buyin_id={buyin_id}, verified: {verify_count}")
+        logger.info(f"✅ PERSISTED to PostgreSQL: {inserted_count} trail rows for buyin_id={buyin_id}")
         return True
             
     except Exception as e:
@@ -1102,30 +1161,67 @@ def insert_trail_data(buyin_id: int, trail_payload: Dict[str, Any]) -> bool:
     Returns:
         True if PostgreSQL insert succeeded, False otherwise
     """
+    return insert_trail_data_batch([(buyin_id, trail_payload)])
+
+
+def insert_trail_data_batch(items: Sequence[Tuple[int, Dict[str, Any]]]) -> bool:
+    """Insert trail rows and filter values for several buyins in one transaction.
+    
+    All wide rows go out as one multi-row INSERT into buyin_trail_minutes and
+    all normalized rows as one into trade_filter_values. Both dedup on their
+    unique indexes (ON CONFLICT on the index columns) instead of existence
+    checks, so a re-delivered buyin is a no-op. If idx_trail_unique is
+    missing, buyins that already have trail rows are filtered out first.
+    
+    Args:
+        items: (buyin_id, trail_payload) pairs
+        
+    Returns:
+        True if the flush committed, False otherwise (nothing is written)
+    """
     # Ensure tables exist
     ensure_trail_tables_exist()
     
-    # Flatten the trail payload into rows
-    rows = flatten_trail_to_rows(buyin_id, trail_payload)
+    columns = _get_all_columns()
+    per_buyin: Dict[int, Tuple[List[Tuple[Any, ...]], List[Tuple[Any, ...]]]] = {}
+    
+    for buyin_id, trail_payload in items:
+        # Flatten the trail payload into rows
+        rows = flatten_trail_to_rows(buyin_id, trail_payload)
+        if not rows:
+            logger.warning(f"No rows generated for buyin_id={buyin_id}")
+            continue
+        per_buyin[buyin_id] = (
+            _trail_row_tuples(rows, columns),
+            _filter_value_tuples(buyin_id, rows, trail_payload),
+        )
     
-    if not rows:
-        logger.warning(f"No rows generated for buyin_id={buyin_id}")
+    if not per_buyin:
         return False
+    buyin_ids = list(per_buyin)
     
-    # Insert into PostgreSQL (primary and only database)
-    postgres_success = insert_trail_rows_duckdb(buyin_id, rows)
-    
-    if postgres_success:
-        logger.info(f"✓ Inserted {len(rows)} trail rows for buyin_id={buyin_id}")
-    else:
-        logger.error(f"✗ Failed to insert trail rows for buyin_id={buyin_id}")
-    
-    # Also insert normalized filter values for filter analysis
-    filter_success = insert_filter_values(buyin_id, rows, trail_payload)
-    if filter_success:
-        logger.debug(f"✓ Inserted filter values for buyin_id={buyin_id}")
+    try:
+        with get_postgres() as conn:
+            with conn.cursor() as cursor:
+                if not _trail_unique_index:
+                    for existing_id in _existing_trail_buyins(cursor, buyin_ids):
+                        logger.debug(f"Trail data already exists for buyin_id={existing_id}, skipping")
+                        del per_buyin[existing_id]
+                trail_tuples = [t for trail, _ in per_buyin.values() for t in trail]
+                filter_tuples = [t for _, values in per_buyin.values() for t in values]
+                trail_count = _write_trail_rows(cursor, trail_tuples, columns)
+                filter_count = _write_filter_values(cursor, filter_tuples)
+    except Exception as e:
+        logger.error(f"✗ Failed to insert trail data for buyin_ids={buyin_ids}: {e}")
+        import traceback
+        logger.error(f"Traceback: {traceback.format_exc()}")
+        return False
     
-    return postgres_success
+    logger.info(
+        f"✓ Inserted {trail_count} trail rows and {filter_count} filter values "
+        f"for buyin_ids={buyin_ids}"
+    )
+    return True
 
 
 # =============================================================================
@@ -1284,6 +1380,74 @@ def _build_is_ratio_map(trail_payload: Optional[Dict[str, Any]]) -> Dict[str, in
     return is_ratio_map
 
 
+def _filter_value_tuples(
+    buyin_id: int,
+    wide_rows: List[Dict[str, Any]],
+    trail_payload: Optional[Dict[str, Any]],
+) -> List[Tuple[Any, ...]]:
+    """Long-format (buyin_id, minute, sub_minute, filter_name, value, is_ratio, section) rows."""
+    filterable_columns = _get_filterable_columns()
+    is_ratio_map = _build_is_ratio_map(trail_payload)
+    out: List[Tuple[Any, ...]] = []
+    
+    for row in wide_rows:
+        minute = row.get("minute", 0)
+        sub_minute = row.get("sub_minute", 0)
+        if sub_minute and not _tfv_sub_minute_index:
+            # Would collide with the minute's own row under idx_tfv_unique
+            continue
+        
+        for col_name in filterable_columns:
+            value = row.get(col_name)
+            
+            # Skip null and non-numeric values to save space
+            if value is None or not isinstance(value, (int, float)):
+                continue
+            
+            out.append((
+                buyin_id,
+                minute,
+                sub_minute,
+                col_name,
+                float(value),
+                is_ratio_map.get(col_name, _is_ratio_by_name(col_name)),
+                _get_section_for_column(col_name),
+            ))
+    return out
+
+
+def _write_filter_values(cursor, value_tuples: List[Tuple[Any, ...]]) -> int:
+    """Multi-row insert into trade_filter_values.
+
+    Only rows already present under the dedup key (buyin_id, minute,
+    sub_minute, filter_name) are skipped; any other constraint violation
+    raises. The id is assigned by the BIGSERIAL default.
+    """
+    from psycopg2.extras import execute_values
+
+    if not value_tuples:
+        return 0
+    execute_values(
+        cursor,
+        f"""
+        INSERT INTO trade_filter_values
+        (buyin_id, minute, sub_minute, filter_name, filter_value, is_ratio, section)
+        VALUES %s
+        ON CONFLICT {_TFV_KEY if _tfv_sub_minute_index else _TFV_LEGACY_KEY} DO NOTHING
+        """,
+        value_tuples,
+        page_size=len(value_tuples),
+    )
+    inserted = cursor.rowcount
+    if inserted < len(value_tuples):
+        # Re-delivered buyins
+        logger.warning(
+            f"trade_filter_values: skipped {len(value_tuples) - inserted} of "
+            f"{len(value_tuples)} rows already stored"
+        )
+    return inserted
+
+
 def insert_filter_values(
     buyin_id: int,
     wide_rows: List[Dict[str, Any]],
@@ -1304,72 +1468,12 @@ def insert_filter_values(
     if not wide_rows:
         return False
     
-    filterable_columns = _get_filterable_columns()
-    is_ratio_map = _build_is_ratio_map(trail_payload)
-    
+    ensure_trail_tables_exist()
     try:
-        # Check if data already exists
+        value_tuples = _filter_value_tuples(buyin_id, wide_rows, trail_payload)
         with get_postgres() as conn:
             with conn.cursor() as cursor:
-                cursor.execute(
-                    "SELECT COUNT(*) as count FROM trade_filter_values WHERE buyin_id = %s",
-                    [buyin_id]
-                )
-                existing = cursor.fetchone()
-                existing_count = existing['count'] if existing else 0
-                
-                if existing_count > 0:
-                    logger.debug(f"Filter values already exist for buyin_id={buyin_id}, skipping")
-                    return True
-        
-        # Generate unique IDs using timestamp
-        import time
-        base_id = int(time.time() * 1000000)  # Microsecond precision
-        id_counter = 0
-        
-        # Convert each wide row to multiple normalized rows
-        inserted_count = 0
-        
-        with get_postgres() as conn:
-            with conn.cursor() as cursor:
-                for row in wide_rows:
-                    minute = row.get("minute", 0)
-                    sub_minute = row.get("sub_minute", 0)
-                    
-                    for col_name in filterable_columns:
-                        value = row.get(col_name)
-                        
-                        # Skip null values to save space
-                        if value is None:
-                            continue
-                        
-                        # Skip non-numeric values
-                        if not isinstance(value, (int, float)):
-                            continue
-                        
-                        section = _get_section_for_column(col_name)
-                        
-                        # Insert the normalized row
-                        is_ratio = is_ratio_map.get(col_name, _is_ratio_by_name(col_name))
-                        
-                        cursor.execute("""
-                            INSERT INTO trade_filter_values 
-                            (id, buyin_id, minute, sub_minute, filter_name, filter_value, is_ratio, section)
-                            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                        """, [
-                            base_id + id_counter,
-                            buyin_id,
-                            minute,
-                            sub_minute,
-                            col_name,
-                            float(value),
-                            is_ratio,
-                            section,
-                        ])
-                        id_counter += 1
-                        inserted_count += 1
-                
-                conn.commit()
+                inserted_count = _write_filter_values(cursor, value_tuples)
         
         logger.info(f"✓ Inserted {inserted_count} filter values for buyin_id={buyin_id}")
         return True
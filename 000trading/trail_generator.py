@@ -13,6 +13,9 @@ Enhanced Features:
 - Time-series derivatives and acceleration metrics
 - Cross-market correlation analysis
 
+Recent windows are served from an in-process sliding-window cache
+(market_window_cache) shared by all buy-ins; older windows query PostgreSQL.
+
 Trail data is stored in the `buyin_trail_minutes` table (one row per minute,
 15 rows per buyin) for efficient querying and pattern validation.
 
@@ -32,10 +35,13 @@ import json
 import logging
 import math
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, date
 from decimal import Decimal
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
@@ -48,6 +54,7 @@ sys.path.insert(0, str(PROJECT_ROOT))
 from core.database import get_postgres
 from core.webhook_client import WebhookClient
 from trail_data import insert_trail_data
+from market_window_cache import OB_SYMBOL, get_market_window_cache, get_market_cache_stats
 
 logger = logging.getLogger(__name__)
 
@@ -118,6 +125,11 @@ DEFAULT_SYMBOL = os.getenv("DEFAULT_SYMBOL", "SOLUSDT")
 DEFAULT_LOOKBACK_MINUTES = int(os.getenv("TRAIL_LOOKBACK_MINUTES", "15"))
 TRAIL_COLUMN_NAME = "fifteen_min_trail"
 
+# Source fetches run concurrently on a shared, bounded pool. Each worker holds
+# one pooled PostgreSQL connection (pool max is 10), so keep this small.
+PARALLEL_FETCH = os.getenv("TRAIL_PARALLEL_FETCH", "1") != "0"
+FETCH_WORKERS = int(os.getenv("TRAIL_FETCH_WORKERS", "4"))
+
 
 # =============================================================================
 # FIELD TYPE SCHEMA - RATIO VS VALUE TRACKING
@@ -354,7 +366,14 @@ def fetch_order_book_signals(
     
     Uses timestamp-based JOINs so Xm changes are accurate even with gaps.
     Missing lookback periods return NULL (not zero).
+
+    Served from the in-process market window cache when it covers the window.
     """
+    cache = get_market_window_cache()
+    cached = cache.order_book_signals(start_time, end_time) if cache and symbol == OB_SYMBOL else None
+    if cached is not None:
+        return cached
+
     # PostgreSQL query for order book data with minute aggregation
     query = """
         WITH minute_aggregates AS (
@@ -381,6 +400,7 @@ def fetch_order_book_signals(
             FROM order_book_features
             WHERE timestamp >= ?
                 AND timestamp <= ?
+                AND symbol = ?
             GROUP BY DATE_TRUNC('minute', timestamp)
         )
         SELECT 
@@ -425,7 +445,7 @@ def fetch_order_book_signals(
         ORDER BY m0.minute_timestamp DESC
         LIMIT 15
         """
-    return _execute_query(query, [start_time, end_time])
+    return _execute_query(query, [start_time, end_time, symbol])
 
 
 def fetch_transactions(
@@ -438,6 +458,14 @@ def fetch_transactions(
     
     Note: All timestamps are in UTC (server time).
     """
+    cache = get_market_window_cache()
+    minute_agg = cache.trade_minutes(start_time, end_time) if cache else None
+    if minute_agg is not None:
+        if minute_agg.empty:
+            logger.warning("No trades found in time range %s to %s", start_time, end_time)
+            return []
+        return _transaction_minute_rows(minute_agg)
+
     # Query sol_stablecoin_trades from PostgreSQL
     query = """
         SELECT 
@@ -511,6 +539,11 @@ def fetch_transactions(
         close_price=('price', 'last'),
     ).reset_index()
     
+    return _transaction_minute_rows(minute_agg)
+
+
+def _transaction_minute_rows(minute_agg: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Derive per-minute transaction metrics from the minute aggregates."""
     # Calculate VWAP
     minute_agg['vwap'] = minute_agg['total_usd_volume'] / minute_agg['total_sol_volume'].replace(0, np.nan)
     
@@ -576,6 +609,14 @@ def fetch_whale_activity(
     
     Note: All timestamps are in UTC (server time).
     """
+    cache = get_market_window_cache()
+    minute_agg = cache.whale_minutes(start_time, end_time) if cache else None
+    if minute_agg is not None:
+        if minute_agg.empty:
+            logger.warning("No whale movements found in time range %s to %s", start_time, end_time)
+            return []
+        return _whale_minute_rows(minute_agg)
+
     # Query whale_movements from PostgreSQL
     query = """
         SELECT 
@@ -682,6 +723,11 @@ def fetch_whale_activity(
     
     minute_agg = df.groupby('minute_timestamp').apply(agg_by_minute, include_groups=False).reset_index()
     
+    return _whale_minute_rows(minute_agg)
+
+
+def _whale_minute_rows(minute_agg: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Derive per-minute whale flow metrics from the minute aggregates."""
     # Sort by minute and add row numbers
     minute_agg = minute_agg.sort_values('minute_timestamp').reset_index(drop=True)
     minute_agg['row_num'] = range(1, len(minute_agg) + 1)
@@ -786,6 +832,11 @@ def fetch_price_movements(
         token: Token symbol (SOL, BTC, ETH)
         coin_id: Coin ID for legacy price_points fallback (1=BTC, 2=ETH, 5=SOL)
     """
+    cache = get_market_window_cache()
+    cached = cache.price_movements(start_time, end_time, token) if cache else None
+    if cached:
+        return cached
+
     # Query for prices table (modern format: timestamp, token, price)
     query_prices = """
         WITH minute_aggregates AS (
@@ -944,6 +995,11 @@ def fetch_second_prices(
     
     Uses _execute_query which handles HTTP API fallback for standalone execution.
     """
+    cache = get_market_window_cache()
+    cached = cache.second_prices(start_time, end_time) if cache else None
+    if cached is not None and not cached.empty:
+        return cached
+
     # First try the prices table (via _execute_query which handles HTTP API)
     query = """
         SELECT timestamp AS ts, price AS price
@@ -2177,6 +2233,11 @@ def fetch_30_second_data(
     Fetch and aggregate data at 30-second intervals for the full 15-minute window.
     Returns 30 buckets (one per 30-second interval).
     """
+    cache = get_market_window_cache()
+    cached = cache.thirty_second_data(start_time, end_time, token) if cache else None
+    if cached is not None:
+        return cached
+
     # Query raw second-level data and bucket into 30-second intervals
     query = """
         WITH thirty_sec_buckets AS (
@@ -3521,12 +3582,57 @@ def persist_trail_json_legacy(buyin_id: int, payload: Dict[str, Any]) -> None:
 # MAIN ENTRY POINT
 # =============================================================================
 
+_fetch_executor: Optional[ThreadPoolExecutor] = None
+_fetch_executor_lock = threading.Lock()
+
+
+def _get_fetch_executor() -> ThreadPoolExecutor:
+    """Process-wide fetch pool, shared by concurrent trail generations."""
+    global _fetch_executor
+    if _fetch_executor is None:
+        with _fetch_executor_lock:
+            if _fetch_executor is None:
+                _fetch_executor = ThreadPoolExecutor(
+                    max_workers=FETCH_WORKERS, thread_name_prefix="trail_fetch"
+                )
+    return _fetch_executor
+
+
+def _timed_call(fn: Callable, *args: Any) -> Tuple[Any, float]:
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - started) * 1000.0
+
+
+def _fetch_sources(
+    jobs: Dict[str, Tuple[Callable, tuple]],
+    parallel: bool,
+    timings: Dict[str, float],
+) -> Dict[str, Any]:
+    """Run independent source fetches, serially or on the fetch pool.
+
+    Records each fetch's own duration as timings["fetch_<name>"]. Errors are
+    re-raised from the join, exactly as the serial path would raise them.
+    """
+    results: Dict[str, Any] = {}
+    if parallel and len(jobs) > 1:
+        executor = _get_fetch_executor()
+        futures = {name: executor.submit(_timed_call, fn, *args) for name, (fn, args) in jobs.items()}
+        for name, future in futures.items():
+            results[name], timings[f"fetch_{name}"] = future.result()
+    else:
+        for name, (fn, args) in jobs.items():
+            results[name], timings[f"fetch_{name}"] = _timed_call(fn, *args)
+    return results
+
+
 def generate_trail_payload(
     buyin_id: int,
     symbol: Optional[str] = None,
     lookback_minutes: Optional[int] = None,
     persist: bool = True,
     include_30_second: bool = True,
+    parallel_fetch: Optional[bool] = None,
 ) -> Dict[str, Any]:
     """Generate the 15-minute trail payload for a buy-in with enhanced micro-pattern detection.
 
@@ -3542,17 +3648,31 @@ def generate_trail_payload(
         lookback_minutes: Window size in minutes (default: 15).
         persist: If True (default), store data in buyin_trail_minutes table.
         include_30_second: If True (default), include 30-second interval data.
+        parallel_fetch: Fetch the independent sources concurrently on the shared
+            fetch pool (default: TRAIL_PARALLEL_FETCH, on).
 
     Returns:
         JSON-serializable dictionary containing all analytics and pattern detection.
+        Per-stage wall times (ms) are reported under "stage_timings_ms".
     """
+    started = time.perf_counter()
+    timings: Dict[str, float] = {}
+
+    def _mark(stage: str, since: float) -> float:
+        now = time.perf_counter()
+        timings[stage] = (now - since) * 1000.0
+        return now
+
     symbol_to_use = symbol or DEFAULT_SYMBOL
+    parallel = PARALLEL_FETCH if parallel_fetch is None else parallel_fetch
     minutes = lookback_minutes or DEFAULT_LOOKBACK_MINUTES
     if minutes <= 0:
         raise ValueError("lookback_minutes must be greater than zero")
 
     try:
+        stage = time.perf_counter()
         buyin = fetch_buyin(buyin_id)
+        stage = _mark("fetch_buyin", stage)
 
         followed_at = buyin.get("followed_at")
         if not isinstance(followed_at, datetime):
@@ -3566,18 +3686,32 @@ def generate_trail_payload(
         logger.info(f"Generating trail for buyin_id={buyin_id}, window: {window_start} to {window_end}")
 
         # === FETCH ALL DATA SOURCES ===
-        order_book_rows = fetch_order_book_signals(symbol_to_use, window_start, window_end)
-        transaction_rows = fetch_transactions(window_start, window_end)
-        whale_rows = fetch_whale_activity(window_start, window_end)
-        
-        # Fetch SOL price movements (primary)
-        price_rows = fetch_price_movements(window_start, window_end, token="SOL", coin_id=5)
-        
-        # Fetch BTC and ETH price movements for cross-market analysis
-        btc_price_rows = fetch_price_movements(window_start, window_end, token="BTC", coin_id=6)
-        eth_price_rows = fetch_price_movements(window_start, window_end, token="ETH", coin_id=7)
-        
-        second_prices = fetch_second_prices(window_start, window_end)
+        # Independent of each other — one join point, then the CPU-bound stages.
+        # BTC and ETH price movements feed the cross-market analysis.
+        fetch_jobs: Dict[str, Tuple[Callable, tuple]] = {
+            "order_book": (fetch_order_book_signals, (symbol_to_use, window_start, window_end)),
+            "transactions": (fetch_transactions, (window_start, window_end)),
+            "whales": (fetch_whale_activity, (window_start, window_end)),
+            "sol_prices": (fetch_price_movements, (window_start, window_end, "SOL", 5)),
+            "btc_prices": (fetch_price_movements, (window_start, window_end, "BTC", 6)),
+            "eth_prices": (fetch_price_movements, (window_start, window_end, "ETH", 7)),
+            "second_prices": (fetch_second_prices, (window_start, window_end)),
+        }
+        if include_30_second:
+            fetch_jobs["thirty_second"] = (fetch_30_second_data, (window_start, window_end, "SOL"))
+        fetched = _fetch_sources(fetch_jobs, parallel, timings)
+        stage = _mark("fetch", stage)
+
+        order_book_rows = fetched["order_book"]
+        transaction_rows = fetched["transactions"]
+        whale_rows = fetched["whales"]
+        price_rows = fetched["sol_prices"]
+        btc_price_rows = fetched["btc_prices"]
+        eth_price_rows = fetched["eth_prices"]
+        second_prices = fetched["second_prices"]
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Market window cache: {get_market_cache_stats()}")
 
         # === ADD FIELD TYPE METADATA ===
         order_book_rows = annotate_field_types(order_book_rows, "order_book_signals")
@@ -3586,6 +3720,7 @@ def generate_trail_payload(
         price_rows = annotate_field_types(price_rows, "price_movements")
         btc_price_rows = annotate_field_types(btc_price_rows, "price_movements")
         eth_price_rows = annotate_field_types(eth_price_rows, "price_movements")
+        stage = _mark("annotate", stage)
 
         # === RUN PATTERN DETECTION ===
         # Traditional patterns (legacy - reduced weight)
@@ -3631,17 +3766,19 @@ def generate_trail_payload(
         micro_patterns["microstructure_shift"] = micro_shift
         if micro_shift.get("detected"):
             logger.info(f"✓ Microstructure shift detected (confidence: {micro_shift.get('confidence'):.2f})")
+        stage = _mark("patterns", stage)
 
-        # === NEW: FETCH 30-SECOND DATA ===
+        # === NEW: 30-SECOND METRICS ===
         thirty_second_rows = []
         thirty_second_metrics = {}
         if include_30_second:
-            thirty_second_rows = fetch_30_second_data(window_start, window_end, "SOL")
+            thirty_second_rows = fetched["thirty_second"]
             thirty_second_metrics = calculate_30_second_metrics(
                 thirty_second_rows, transaction_rows, order_book_rows
             )
             if thirty_second_metrics:
                 logger.debug(f"30-second data: {len(thirty_second_rows)} rows")
+        stage = _mark("thirty_second", stage)
 
         # === NEW: CALCULATE VELOCITY METRICS ===
         ob_velocity_metrics = calculate_order_book_velocities(order_book_rows)
@@ -3662,6 +3799,7 @@ def generate_trail_payload(
         velocity_metrics["order_flow_toxicity"] = calculate_order_flow_toxicity(transaction_rows, order_book_rows)
         
         logger.debug(f"Velocity metrics calculated: {len(velocity_metrics)} fields")
+        stage = _mark("velocity", stage)
 
         # === NEW: CALCULATE CROSS-ASSET METRICS ===
         cross_asset_metrics = calculate_cross_asset_metrics(
@@ -3702,6 +3840,7 @@ def generate_trail_payload(
             f"Overall breakout probability: {breakout_analysis.get('overall_score'):.2f} "
             f"({breakout_analysis.get('confidence_level')})"
         )
+        stage = _mark("scoring", stage)
 
         # Annotate rows with minute spans
         annotate_minute_spans(order_book_rows, window_end)
@@ -3750,9 +3889,19 @@ def generate_trail_payload(
         if buyin.get("existing_trail") is not None:
             payload["existing_trail"] = buyin["existing_trail"]
 
+        stage = _mark("build", stage)
+
         if persist:
             success = persist_trail(buyin_id, payload)
             payload["persisted"] = success
+            stage = _mark("persist", stage)
+
+        timings["total"] = (time.perf_counter() - started) * 1000.0
+        payload["stage_timings_ms"] = {k: round(v, 1) for k, v in timings.items()}
+        logger.info(
+            f"Trail timings buyin_id={buyin_id} ({'parallel' if parallel else 'serial'} fetch): "
+            + " ".join(f"{k}={v:.1f}ms" for k, v in timings.items() if not k.startswith("fetch_"))
+        )
 
         return make_json_serializable(payload)
 
@@ -8,7 +8,9 @@ Each cycle:
   2. Fetches current SOL market price and cycle
   3. Refreshes fingerprint rules if stale (every 5 min)
   4. Refreshes pump play configs from follow_the_goat_plays (every 5 min)
-  5. For each active pump play, fires a signal if live features match any approved rule
+  5. Builds one shared feature snapshot (live features, price momentum, safety gates)
+     and checks every play's approved rules against it in one vectorised pass
+  6. For each active pump play, fires a signal if one of its rules matched
 
 Multiple plays run simultaneously, each with independent signal thresholds, cooldowns
 and exit configs. This allows A/B testing of different trading strategies in parallel:
@@ -43,6 +45,7 @@ sys.path.insert(0, str(PROJECT_ROOT))
 sys.path.insert(0, str(MODULE_DIR))
 
 from core.database import get_postgres
+from core.price_service import get_price_service
 
 # Configuration
 TRAINING_INTERVAL_SECONDS = int(os.getenv("TRAIN_VALIDATOR_INTERVAL", "5"))
@@ -115,7 +118,11 @@ def check_data_readiness() -> tuple[bool, str]:
 # =============================================================================
 
 def get_current_market_price() -> Optional[float]:
-    """Get current SOL price from PostgreSQL prices table."""
+    """Get current SOL price (in-process price service, prices table as fallback)."""
+    service = get_price_service()
+    price = service.latest_price() if service else None
+    if price is not None:
+        return price
     try:
         with get_postgres() as conn:
             with conn.cursor() as cursor:
@@ -131,6 +138,10 @@ def get_current_market_price() -> Optional[float]:
 
 def get_current_price_cycle() -> Optional[int]:
     """Get the active cycle_tracker ID (threshold=0.3, no end time)."""
+    service = get_price_service()
+    cycle_id = service.active_cycle_id(0.3) if service else None
+    if cycle_id is not None:
+        return cycle_id
     try:
         with get_postgres() as conn:
             with conn.cursor() as cursor:
@@ -303,7 +314,8 @@ def run_training_cycle() -> bool:
       2. Refresh play configs if stale
       3. Get market price + active cycle
       4. Refresh fingerprint rules if stale
-      5. For each active play, fire pump signal if live features match
+      5. Build one feature snapshot and match every play's rules against it
+      6. For each active play, fire pump signal if its rules matched
 
     Returns True if cycle completed (regardless of signals fired).
     """
@@ -332,23 +344,29 @@ def run_training_cycle() -> bool:
 
     price_cycle = get_current_price_cycle()
 
-    # 5. Pump signal checks — one per active play
+    # 5. Pump signal checks — one shared snapshot, then one check per play
     play_tags: List[str] = []
     if _pump_play_configs:
         try:
             from pump_signal_logic import (
                 maybe_refresh_rules,
+                build_cycle_snapshot,
                 check_and_fire_pump_signal,
                 PUMP_OBSERVATION_MODE,
             )
             maybe_refresh_rules()
 
+            # Live features, gates and every play's sim rules evaluated once;
+            # the per-play loop below only handles cooldowns and inserts.
+            snapshot = build_cycle_snapshot(market_price, price_cycle, _pump_play_configs)
+
             for play_config in _pump_play_configs:
                 try:
                     fired = check_and_fire_pump_signal(
                         play_config=play_config,
                         market_price=market_price,
                         price_cycle=price_cycle,
+                        snapshot=snapshot,
                     )
                     if fired:
                         pid = play_config['play_id']
@@ -369,7 +387,7 @@ def run_training_cycle() -> bool:
         # Play configs not yet loaded — will retry next cycle
         logger.debug("Pump play configs not loaded yet — skipping signal check")
 
-    # 6. Fast-path readiness (skip normal wait if something is happening)
+    # 7. Fast-path readiness (skip normal wait if something is happening)
     readiness_triggered = False
     try:
         from pump_signal_logic import should_trigger_fast_path
@@ -412,13 +430,15 @@ def run_continuous_training(interval_seconds: Optional[int] = None) -> None:
     maybe_refresh_play_configs()
 
     while True:
+        cycle_start = time.time()
         try:
             run_training_cycle()
 
             if _stats.cycles % 60 == 0:
                 _stats.log_summary()
 
-            time.sleep(interval)
+            # Fixed cadence: the cycle's own run time counts against the interval
+            time.sleep(max(0.0, interval - (time.time() - cycle_start)))
 
         except KeyboardInterrupt:
             logger.info("Keyboard interrupt — shutting down")
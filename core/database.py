@@ -11,14 +11,18 @@ Connection Strategy:
 """
 
 import psycopg2
+import psycopg2.extensions
 import psycopg2.extras
 import psycopg2.pool
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import io
 import threading
 import logging
 import os
 from pathlib import Path
 from contextlib import contextmanager
-from typing import Optional, Dict, Any, List, Tuple
+from typing import Optional, Dict, Any, Iterator, List, Tuple
 from datetime import datetime, timedelta
 
 from core.config import settings
@@ -519,6 +523,206 @@ def cleanup_all_hot_tables(hours: int = 24) -> int:
     return total_deleted
 
 
+# =============================================================================
+# Arrow Bulk Reads
+# =============================================================================
+# COPY (query) TO STDOUT streams the result as CSV through a pipe into Arrow's
+# C++ CSV reader, typed from the query's own column OIDs. No Python object is
+# created per row or per value, and only one block is in memory at a time.
+
+ARROW_BLOCK_BYTES = 4 << 20
+
+# PostgreSQL type OID -> Arrow type. JSON/JSONB, arrays and unknown types are
+# kept as their PostgreSQL text; NUMERIC without declared precision as float64.
+_PG_ARROW_TYPES = {
+    16: pa.bool_(),
+    20: pa.int64(),
+    21: pa.int16(),
+    23: pa.int32(),
+    700: pa.float32(),
+    701: pa.float64(),
+    1082: pa.date32(),
+    1114: pa.timestamp('us'),
+    1184: pa.timestamp('us', tz='UTC'),
+}
+_PG_NUMERIC_OID = 1700
+
+
+def pg_arrow_schema(description) -> pa.Schema:
+    """Arrow schema for a cursor.description."""
+    fields = []
+    for column in description:
+        if column.type_code == _PG_NUMERIC_OID:
+            if column.precision and 0 < column.precision <= 38 and column.scale is not None:
+                arrow_type = pa.decimal128(column.precision, column.scale)
+            else:
+                arrow_type = pa.float64()
+        else:
+            arrow_type = _PG_ARROW_TYPES.get(column.type_code, pa.string())
+        fields.append(pa.field(column.name, arrow_type))
+    return pa.schema(fields)
+
+
+def _conform(batch: pa.RecordBatch, schema: pa.Schema) -> pa.RecordBatch:
+    """Select and cast a batch to the caller's schema (columns matched by name)."""
+    return pa.RecordBatch.from_arrays(
+        [batch.column(field.name).cast(field.type) for field in schema],
+        schema=schema,
+    )
+
+
+def _copy_reader(
+    cursor,
+    sql: str,
+    params: List[Any] = None,
+    schema: Optional[pa.Schema] = None,
+    block_bytes: int = ARROW_BLOCK_BYTES,
+) -> Tuple[pa.Schema, Iterator[pa.RecordBatch]]:
+    """(schema, batches) for a SELECT run through COPY on an open cursor."""
+    query = cursor.mogrify(sql, params or []).decode()
+    cursor.execute("SET LOCAL DateStyle = 'ISO'")
+    cursor.execute(f"SELECT * FROM ({query}) AS _arrow_q LIMIT 0")
+    source_schema = pg_arrow_schema(cursor.description)
+    target = schema or source_schema
+
+    def batches() -> Iterator[pa.RecordBatch]:
+        read_fd, write_fd = os.pipe()
+        errors: List[BaseException] = []
+
+        def produce():
+            try:
+                with os.fdopen(write_fd, 'wb') as sink:
+                    cursor.copy_expert(f"COPY ({query}) TO STDOUT WITH (FORMAT csv)", sink)
+            except BaseException as e:
+                errors.append(e)
+
+        producer = threading.Thread(target=produce, name="pg-copy-arrow", daemon=True)
+        producer.start()
+        finished = False
+        try:
+            with os.fdopen(read_fd, 'rb') as source:
+                reader = None
+                if source.peek(1):
+                    reader = pa_csv.open_csv(
+                        source,
+                        read_options=pa_csv.ReadOptions(
+                            column_names=source_schema.names, block_size=block_bytes,
+                        ),
+                        parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+                        convert_options=pa_csv.ConvertOptions(
+                            column_types=source_schema,
+                            null_values=[''],
+                            strings_can_be_null=True,
+                            quoted_strings_can_be_null=False,
+                            true_values=['t'],
+                            false_values=['f'],
+                        ),
+                    )
+                for batch in reader or ():
+                    yield batch if schema is None else _conform(batch, schema)
+                finished = True
+        finally:
+            if not finished:
+                # Early exit or parse error: stop the COPY and leave the connection usable
+                cursor.connection.cancel()
+            producer.join()
+            if not finished:
+                cursor.connection.rollback()
+        if errors:
+            raise errors[0]
+
+    return target, batches()
+
+
+def postgres_arrow_batches(
+    sql: str,
+    params: List[Any] = None,
+    schema: Optional[pa.Schema] = None,
+    block_bytes: int = ARROW_BLOCK_BYTES,
+) -> Iterator[pa.RecordBatch]:
+    """
+    Stream a SELECT from PostgreSQL as Arrow record batches.
+
+    Column types follow the query's PostgreSQL types (see _PG_ARROW_TYPES).
+    Pass `schema` to get batches in a fixed layout instead: its columns are
+    picked from the result by name and cast (e.g. NUMERIC -> float64,
+    TIMESTAMPTZ -> naive UTC timestamp).
+
+    The pooled connection is held until the iterator is exhausted or closed.
+
+    Example:
+        for batch in postgres_arrow_batches(
+            "SELECT * FROM prices WHERE timestamp < %s ORDER BY timestamp", [cutoff]
+        ):
+            writer.write_batch(batch)
+    """
+    with get_postgres() as conn:
+        with conn.cursor(cursor_factory=psycopg2.extensions.cursor) as cursor:
+            _, batches = _copy_reader(cursor, sql, params, schema, block_bytes)
+            yield from batches
+
+
+def postgres_arrow_table(
+    sql: str,
+    params: List[Any] = None,
+    schema: Optional[pa.Schema] = None,
+) -> pa.Table:
+    """
+    Run a SELECT on PostgreSQL and return the result as one Arrow table
+    (empty, with the result's columns, when no rows match).
+
+    Example:
+        tbl = postgres_arrow_table(
+            "SELECT id, timestamp AS ts, price FROM prices WHERE id > %s", [watermark]
+        )
+        duck.register("new_prices", tbl)
+    """
+    with get_postgres() as conn:
+        with conn.cursor(cursor_factory=psycopg2.extensions.cursor) as cursor:
+            target, batches = _copy_reader(cursor, sql, params, schema)
+            return pa.Table.from_batches(list(batches), schema=target)
+
+
+def postgres_copy_arrow(table: str, data: pa.Table, on_conflict: Optional[str] = "DO NOTHING") -> int:
+    """
+    Bulk-insert an Arrow table with COPY ... FROM STDIN.
+
+    Columns are matched by name. With `on_conflict` (the clause after
+    ON CONFLICT, default "DO NOTHING") the rows are copied into a temporary
+    table first and moved with one INSERT ... SELECT, so duplicates are
+    handled like postgres_insert_many; pass None for a plain COPY.
+
+    Returns:
+        Number of rows inserted
+
+    Example:
+        inserted = postgres_copy_arrow("wallet_profiles", profiles)
+    """
+    if data.num_rows == 0:
+        return 0
+
+    buffer = io.BytesIO()
+    pa_csv.write_csv(data, buffer, pa_csv.WriteOptions(include_header=False))
+    buffer.seek(0)
+    columns_str = ", ".join(data.column_names)
+
+    with get_postgres() as conn:
+        with conn.cursor() as cursor:
+            if on_conflict is None:
+                cursor.copy_expert(f"COPY {table} ({columns_str}) FROM STDIN WITH (FORMAT csv)", buffer)
+                return cursor.rowcount
+            cursor.execute(
+                f"CREATE TEMP TABLE _copy_arrow ON COMMIT DROP AS "
+                f"SELECT {columns_str} FROM {table} WITH NO DATA"
+            )
+            cursor.copy_expert("COPY _copy_arrow FROM STDIN WITH (FORMAT csv)", buffer)
+            cursor.execute(
+                f"INSERT INTO {table} ({columns_str}) SELECT {columns_str} FROM _copy_arrow "
+                f"ON CONFLICT {on_conflict}"
+            )
+            return cursor.rowcount
+
+
 # =============================================================================
 # Database Initialization
 # =============================================================================
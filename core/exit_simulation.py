@@ -0,0 +1,258 @@
+"""
+Vectorised Trailing-Stop Exit Simulation
+========================================
+Array kernels that replay tiered trailing stops over many trades — and, for
+forward price series, many parameter sets — at once. Shared by
+scripts/mega_simulator.py and scripts/mega_simulator_go_get_out.py.
+
+Price paths are stacked into a padded (trades × steps) matrix. Everything that
+does not depend on the exit parameters is computed once per path set:
+running high (cumulative max), gain from entry, drop from high, steps since
+the last new high. Each parameter set then only needs its tier lookup on the
+running gain, the tolerance ratchet (cumulative min over the tier
+tolerances), run lengths for "N consecutive breaches", and a first-hit search
+(argmax over the boolean "exit fires" matrix).
+
+Both kernels reproduce the scalar loops they replace exactly:
+  - ForwardPaths.simulate()  ==  go_get_out.simulate_exit() per trade
+  - hilo_tiered_exits()      ==  mega_simulator._sim_exit_batch() loop
+
+Usage:
+    from core.exit_simulation import ForwardPaths
+
+    paths = ForwardPaths(entries, series_list)
+    exit_pct = paths.simulate(params)   # (n_param_sets, n_trades), % gain
+"""
+
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+# Parameter columns accepted by ForwardPaths.simulate()
+EXIT_PARAM_NAMES = (
+    'stop_loss', 't1_tol', 't1_bnd', 't2_tol', 't2_bnd', 't3_tol',
+    'min_hold_steps', 'consec_drops', 'grace_steps',
+)
+
+# Step-block sizing for ForwardPaths.simulate(): each block covers about
+# _BLOCK_ELEMENTS (open pairs × steps), at least _MIN_BLOCK steps
+_MIN_BLOCK = 16
+_MAX_BLOCK = 512
+_BLOCK_ELEMENTS = 200_000
+
+
+def _pad_rows(rows: Sequence[Sequence[float]], dtype) -> Tuple[np.ndarray, np.ndarray]:
+    """Stack ragged rows into a matrix padded with each row's last value."""
+    lengths = np.array([len(r) for r in rows], dtype=np.int64)
+    width = int(lengths.max()) if len(rows) else 0
+    out = np.zeros((len(rows), max(width, 1)), dtype=dtype)
+    for i, r in enumerate(rows):
+        n = len(r)
+        if n:
+            out[i, :n] = r
+            out[i, n:] = r[-1]
+    return out, lengths
+
+
+def _last_index(flags: np.ndarray, steps: np.ndarray, fill: int = -1) -> np.ndarray:
+    """Index of the most recent True at or before each step (fill if none)."""
+    return np.maximum.accumulate(np.where(flags, steps, fill), axis=-1)
+
+
+def _first_true(fires: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(any, first index) along the last axis."""
+    return fires.any(axis=-1), fires.argmax(axis=-1)
+
+
+# =============================================================================
+# FORWARD PRICE SERIES (go_get_out semantics)
+# =============================================================================
+
+class ForwardPaths:
+    """Forward price series of a set of trades, ready for batch exit replay.
+
+    Semantics per trade (one price per step, see go_get_out.simulate_exit):
+      - tier tolerance from the HIGHEST gain so far, ratcheted (only tightens)
+      - grace_steps: tolerance doubled for N steps after each new high
+      - min_hold_steps: no sells before that step
+      - stop-loss on drop from entry, trailing stop on drop from the high
+        (only once any gain was made); each needs consec_drops consecutive
+        breaches, counters reset on a new high or a non-breaching step
+      - exit at the firing step's price, else at the last price
+      - entry <= 0 or no prices -> 0.0 ("no_data")
+
+    Most (parameter set, trade) pairs exit within the first few dozen steps,
+    so simulate() walks the step axis in short blocks (wider as pairs close)
+    and only carries the still-open pairs (with their ratchet / breach-count state)
+    into the next block.
+    """
+
+    def __init__(self, entries: Sequence[float], series: Sequence[Sequence[float]]):
+        entries = np.asarray(entries, dtype=np.float64)
+        prices, lengths = _pad_rows(series, np.float64)
+        self.n_trades = len(entries)
+        self.n_steps = prices.shape[1]
+        self.lengths = lengths
+        self.has_data = (entries > 0) & (lengths > 0)
+        e = np.where(self.has_data, entries, 1.0)[:, None]
+
+        running = np.maximum.accumulate(np.concatenate([e, prices], axis=1), axis=1)
+        highest = running[:, 1:]
+        self.new_high = prices > running[:, :-1]
+
+        self.highest_gain = (highest - e) / e
+        self.exit_pct = (prices - e) / e * 100
+        # Drops are +inf where no check can breach: past the series end, and
+        # (trailing only) before any gain was made
+        valid = np.arange(self.n_steps)[None, :] < lengths[:, None]
+        self.drop_from_entry = np.where(valid, (prices - e) / e, np.inf)
+        self.drop_from_high = np.where(valid & (self.highest_gain > 0),
+                                       (prices - highest) / highest, np.inf)
+
+        steps = np.arange(self.n_steps)
+        last_high = _last_index(self.new_high, steps)
+        # steps_since_new_high starts at 999 and counts up until the first new high
+        self.since_high = np.where(last_high >= 0, steps - last_high, 1000 + steps)
+
+        last = np.maximum(lengths - 1, 0)
+        self.final_pct = np.where(self.has_data, self.exit_pct[np.arange(self.n_trades), last], 0.0)
+
+    def simulate(self, params: Sequence) -> np.ndarray:
+        """Exit % per (parameter set, trade).
+
+        params: sequence of dicts keyed by EXIT_PARAM_NAMES, or an
+        (n_sets, 9) array in that column order. Integer params are used as-is
+        (round them before calling, as _decode() does).
+        """
+        table = self._param_table(params)
+        out = np.empty((len(table), self.n_trades), dtype=np.float64)
+        out[:] = self.final_pct                 # timeout / no_data unless an exit fires
+
+        set_idx, trade_idx = np.nonzero(np.broadcast_to(self.has_data, out.shape))
+        locked = np.ones(len(set_idx))
+        sl_run = np.zeros(len(set_idx), dtype=np.int64)
+        tr_run = np.zeros(len(set_idx), dtype=np.int64)
+
+        start = 0
+        while len(set_idx) and start < self.n_steps:
+            width = min(_MAX_BLOCK, max(_MIN_BLOCK, _BLOCK_ELEMENTS // len(set_idx)))
+            stop = min(start + width, self.n_steps)
+            cols = slice(start, stop)
+            local = np.arange(stop - start)
+            p = table[set_idx]
+            stop_loss, t1_tol, t1_bnd, t2_tol, t2_bnd, t3_tol, min_hold, consec, grace_n = (
+                p[:, i:i + 1] for i in range(len(EXIT_PARAM_NAMES))
+            )
+            hg = self.highest_gain[trade_idx, cols]
+
+            # Tier tolerance from the highest gain, ratcheted tighter (starts at 1.0)
+            tier_tol = np.where(hg < t1_bnd, t1_tol, np.where(hg < t2_bnd, t2_tol, t3_tol))
+            tol = np.minimum(np.minimum.accumulate(tier_tol, axis=1), locked[:, None])
+            # Grace period doubles the tolerance (x1.0 / x2.0 is exact)
+            grace = (grace_n > 0) & (self.since_high[trade_idx, cols] < grace_n)
+            effective = tol * (1.0 + grace)
+
+            checked = (start + local) >= min_hold
+            sl_breach = checked & (self.drop_from_entry[trade_idx, cols] < -stop_loss)
+            tr_breach = checked & (self.drop_from_high[trade_idx, cols] < -effective)
+
+            new_high = self.new_high[trade_idx, cols]
+            sl_len = _run_length(sl_breach, new_high, sl_run, local)
+            tr_len = _run_length(tr_breach, new_high, tr_run, local)
+            fires = (sl_breach & (sl_len >= consec)) | (tr_breach & (tr_len >= consec))
+
+            fired, first = _first_true(fires)
+            out[set_idx[fired], trade_idx[fired]] = self.exit_pct[trade_idx[fired], start + first[fired]]
+
+            keep = ~fired & (self.lengths[trade_idx] > stop)
+            set_idx, trade_idx = set_idx[keep], trade_idx[keep]
+            locked = tol[keep, -1]
+            sl_run, tr_run = sl_len[keep, -1], tr_len[keep, -1]
+            start = stop
+        return out
+
+    @staticmethod
+    def _param_table(params: Sequence) -> np.ndarray:
+        if isinstance(params, np.ndarray):
+            return np.atleast_2d(params).astype(np.float64)
+        return np.array(
+            [[float(p[name]) for name in EXIT_PARAM_NAMES] for p in params],
+            dtype=np.float64,
+        ).reshape(-1, len(EXIT_PARAM_NAMES))
+
+
+def _run_length(
+    breach: np.ndarray, new_high: np.ndarray, carry: np.ndarray, local: np.ndarray,
+) -> np.ndarray:
+    """Consecutive-breach count per step of a block (0 where not breaching).
+
+    A non-breaching step resets the count to 0; a new high resets it before
+    the step's own check; `carry` is the count at the end of the previous block.
+    """
+    resets = np.where(~breach, local, np.where(new_high, local - 1, (-1 - carry)[:, None]))
+    return local - np.maximum.accumulate(resets, axis=1)
+
+
+# =============================================================================
+# HIGH / LOW BUCKET PATHS (mega_simulator semantics)
+# =============================================================================
+
+def hilo_tiered_exits(
+    entries: np.ndarray,
+    highs: Sequence[np.ndarray],
+    lows: Sequence[np.ndarray],
+    tiers: List[Tuple[float, float, float]],
+    stop_loss: float,
+    min_hold_buckets: int,
+) -> np.ndarray:
+    """Exit returns (fraction) for bucketed high/low paths.
+
+    Semantics per trade (see mega_simulator._sim_exit_batch):
+      - tolerance = first tier (lo <= highest_gain < hi), else the last tier's,
+        ratcheted tighter from 1.0
+      - from bucket min_hold_buckets on: low below entry by > stop_loss exits
+        at -stop_loss; otherwise, once in profit, low below the high by
+        > tolerance exits at high × (1 - tolerance)
+      - else exit at the last bucket's high; entry == 0 / no data -> -stop_loss
+
+    Arithmetic follows the original's dtypes: when the high comes from the
+    (float32) price path the trailing check and exit price are float32.
+    """
+    entries = np.asarray(entries, dtype=np.float64)
+    n = len(entries)
+    if n == 0:
+        return np.zeros(0, dtype=np.float64)
+    dtype = np.result_type(*[np.asarray(h).dtype for h in highs]) if len(highs) else np.float64
+    hi, lengths = _pad_rows(highs, dtype)
+    lo, _ = _pad_rows(lows, dtype)
+
+    has_data = (entries != 0) & (lengths > 0)
+    e = np.where(has_data, entries, 1.0)[:, None]
+    steps = np.arange(hi.shape[1])
+    valid = steps[None, :] < lengths[:, None]
+
+    run_max = np.maximum.accumulate(hi, axis=1)
+    zero_rows = np.errstate(divide='ignore', invalid='ignore')   # padded no-data rows
+    from_path = run_max.astype(np.float64) > e
+    highest = np.where(from_path, run_max, e)
+    hg = (highest - e) / e
+
+    tol = np.full(hg.shape, float(tiers[-1][2]))
+    for t_lo, t_hi, t_tol in reversed(tiers):
+        tol = np.where((t_lo <= hg) & (hg < t_hi), float(t_tol), tol)
+    locked = np.minimum(np.minimum.accumulate(tol, axis=1), 1.0)
+
+    checked = valid & (steps[None, :] >= min_hold_buckets)
+    sl_fire = checked & ((lo - e) / e < -stop_loss)
+    # Trailing needs a gain, i.e. a high taken from the path (path dtype math)
+    with zero_rows:
+        drop_from_high = (lo - run_max) / run_max
+    tr_fire = checked & (hg > 0) & (drop_from_high < (-locked).astype(dtype))
+    trail_exit = (run_max * (1 - locked).astype(dtype) - e) / e
+
+    fired, first = _first_true(sl_fire | tr_fire)
+    rows = np.arange(n)
+    stop_first = sl_fire[rows, first]
+    final = (hi[rows, np.maximum(lengths - 1, 0)] - e[:, 0]) / e[:, 0]
+    exits = np.where(fired, np.where(stop_first, -stop_loss, trail_exit[rows, first]), final)
+    return np.where(has_data, exits, -stop_loss)
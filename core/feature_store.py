@@ -0,0 +1,542 @@
+"""
+core/feature_store.py
+=====================
+Local columnar store of buyins x trail features, shared by the rule-mining
+jobs (pump_continuation recalculation, create_new_patterns, the pump model in
+pump_signal_logic and the tests/filter_simulation analytics).
+
+Instead of every job pulling follow_the_goat_buyins joined to
+buyin_trail_minutes out of PostgreSQL (often through a fresh
+ATTACH ... (TYPE POSTGRES)) and re-pivoting it, the store is synced
+incrementally and every job reads memory-mapped Parquet.
+
+Layout (cache/feature_store/)
+-----------------------------
+    manifest.json                      watermarks + part list (atomic replace)
+    buyins.parquet                     one row per buyin: ids, timestamps, labels
+    trail/interval=NN/part-*.parquet   wide buyin_trail_minutes rows,
+                                       NN = minute * 2 + sub_minute
+    derived/<name>/part-*.parquet      per-buyin feature sets computed by a job
+
+Sync
+----
+- buyins: new ids past the watermark, plus a refresh of every stored buyin
+  that has no potential_gains yet (labels arrive after the trade).
+- trail: rows of buyins past the trail watermark, but only up to buyins that
+  were followed at least TRAIL_SETTLE_SECONDS ago, so a trail that is still
+  being written is not skipped.
+- rows older than RETENTION_HOURS are dropped; each partition is compacted
+  into a single part once it has COMPACT_PARTS parts.
+
+One process syncs at a time (file lock); readers never lock: part files are
+written under a temporary name and only become visible through the manifest.
+Replaced parts are deleted only after the new manifest is in place, so a
+failed sync leaves the previous manifest valid; part files no manifest
+lists (left by such a failure) are removed by the next sync.
+
+Usage
+-----
+    from core.feature_store import get_feature_store
+
+    store = get_feature_store()
+    store.sync()                                       # cheap when up to date
+
+    df  = store.load_minute(0, since=cutoff)           # minute-0 rows + labels
+    tbl = store.load_trail(since=cutoff, minutes=None, sub_minute=0,
+                           columns=["pm_close_price"], buyin_columns=["followed_at"])
+
+    store.sync_derived("gateway_raw_5m", compute)      # compute(buyins) -> rows
+    tbl = store.load_derived("gateway_raw_5m", since=cutoff)
+"""
+
+from __future__ import annotations
+
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from core.database import postgres_arrow_table
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+STORE_DIR = Path(os.getenv(
+    "FEATURE_STORE_DIR", str(Path(__file__).parent.parent / "cache" / "feature_store")
+))
+RETENTION_HOURS = int(os.getenv("FEATURE_STORE_RETENTION_HOURS", "168"))
+# Trails are written right after the buyin; don't pass buyins younger than this
+TRAIL_SETTLE_SECONDS = int(os.getenv("FEATURE_STORE_TRAIL_SETTLE_SECONDS", "120"))
+# Merge a partition's parts into one once it has this many
+COMPACT_PARTS = 24
+
+BUYIN_COLUMNS = [
+    'buyin_id', 'play_id', 'wallet_address', 'followed_at',
+    'our_entry_price', 'potential_gains', 'our_status', 'price_cycle',
+]
+TRAIL_INTERVALS = 30
+
+# Schema of a store that has never synced
+_EMPTY_BUYINS = pa.schema([
+    ('buyin_id', pa.int64()),
+    ('play_id', pa.int64()),
+    ('wallet_address', pa.string()),
+    ('followed_at', pa.timestamp('us')),
+    ('our_entry_price', pa.float64()),
+    ('potential_gains', pa.float64()),
+    ('our_status', pa.string()),
+    ('price_cycle', pa.int64()),
+])
+
+_MANIFEST_VERSION = 1
+
+
+# =============================================================================
+# HELPERS
+# =============================================================================
+
+def _fetch_arrow(sql: str, params: Sequence[Any]) -> Optional[pa.Table]:
+    """Query result as an Arrow table (COPY -> Arrow), None when no rows match."""
+    table = postgres_arrow_table(sql, list(params))
+    return table if table.num_rows else None
+
+
+def _naive_utc(ts: Optional[datetime]) -> Optional[datetime]:
+    """Buyin timestamps are stored as naive UTC."""
+    if ts is not None and ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
+
+
+def _utcnow() -> datetime:
+    return _naive_utc(datetime.now(timezone.utc))
+
+
+def _concat(tables: List[pa.Table]) -> pa.Table:
+    """Concatenate parts whose schemas drifted (new / retyped columns)."""
+    if len(tables) == 1:
+        return tables[0]
+    return pa.concat_tables(tables, promote_options="permissive")
+
+
+def _interval_keys(minutes: Union[None, int, Iterable[int]], sub_minute: Optional[int]) -> List[int]:
+    if minutes is None:
+        minutes = range(TRAIL_INTERVALS // 2)
+    elif isinstance(minutes, int):
+        minutes = [minutes]
+    subs = (0, 1) if sub_minute is None else (sub_minute,)
+    return sorted(m * 2 + s for m in minutes for s in subs)
+
+
+def _write_parquet(table: pa.Table, path: Path) -> None:
+    """Write atomically (readers only ever see complete files)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    pq.write_table(table, tmp)
+    os.replace(tmp, path)
+
+
+# =============================================================================
+# FEATURE STORE
+# =============================================================================
+
+class FeatureStore:
+    """Incrementally synced Parquet store of buyins and their trail rows."""
+
+    def __init__(self, root: Path = STORE_DIR, retention_hours: int = RETENTION_HOURS):
+        self.root = Path(root)
+        self.retention_hours = retention_hours
+        self._sync_lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Manifest
+    # ------------------------------------------------------------------
+
+    @property
+    def _manifest_path(self) -> Path:
+        return self.root / "manifest.json"
+
+    def _read_manifest(self) -> Dict[str, Any]:
+        try:
+            with open(self._manifest_path) as f:
+                manifest = json.load(f)
+            if manifest.get('version') == _MANIFEST_VERSION:
+                return manifest
+            logger.warning("Feature store manifest version changed; rebuilding the store")
+        except FileNotFoundError:
+            pass
+        except ValueError as e:
+            logger.warning(f"Unreadable feature store manifest ({e}); rebuilding the store")
+        return {
+            'version': _MANIFEST_VERSION,
+            'seq': 0,
+            'buyins_watermark': 0,
+            'trail_watermark': 0,
+            'derived_watermarks': {},
+            'parts': {},
+            'synced_at': None,
+        }
+
+    def _write_manifest(self, manifest: Dict[str, Any]) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self._manifest_path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump(manifest, f, indent=1)
+        os.replace(tmp, self._manifest_path)
+
+    def _commit(self, manifest: Dict[str, Any]) -> None:
+        """Publish the manifest, then delete every part file it no longer lists.
+
+        Pruned and compacted parts stay on disk until here, so a sync that
+        fails earlier leaves the old manifest pointing at intact files; the
+        sweep also removes parts orphaned by such a failure.
+        """
+        self._write_manifest(manifest)
+        listed = {(key, p['file']) for key, parts in manifest['parts'].items() for p in parts}
+        for pattern in ("trail/*/part-*", "derived/*/part-*"):
+            for path in self.root.glob(pattern):
+                key = path.parent.relative_to(self.root).as_posix()
+                if (key, path.name) not in listed:
+                    path.unlink(missing_ok=True)
+
+    @contextmanager
+    def _exclusive(self) -> Iterator[None]:
+        """One syncing process (and thread) at a time."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        with self._sync_lock, open(self.root / ".lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    # ------------------------------------------------------------------
+    # Sync
+    # ------------------------------------------------------------------
+
+    def sync(self) -> Dict[str, int]:
+        """Pull new buyins, label updates and new trail rows from PostgreSQL."""
+        t0 = time.time()
+        with self._exclusive():
+            manifest = self._read_manifest()
+            buyins = self._read_buyins()
+            buyins, stats = self._sync_buyins(manifest, buyins)
+            min_id = self._prune(manifest, buyins)
+            stats['trail_rows'] = self._sync_trail(manifest, buyins)
+            self._compact(manifest, min_id)
+            manifest['synced_at'] = datetime.now(timezone.utc).isoformat()
+            self._commit(manifest)
+        stats['buyins'] = buyins.num_rows
+        logger.info(
+            f"Feature store synced in {time.time() - t0:.2f}s: {stats['new_buyins']} new buyins, "
+            f"{stats['labels_updated']} labels, {stats['trail_rows']} trail rows "
+            f"({stats['buyins']} buyins stored)"
+        )
+        return stats
+
+    def _read_buyins(self) -> pa.Table:
+        path = self.root / "buyins.parquet"
+        if path.exists():
+            return pq.read_table(path)
+        return _EMPTY_BUYINS.empty_table()
+
+    def _sync_buyins(self, manifest: Dict[str, Any], buyins: pa.Table):
+        watermark = manifest['buyins_watermark']
+        cutoff = _utcnow() - timedelta(hours=self.retention_hours)
+        pending = pc.filter(buyins['buyin_id'], pc.is_null(buyins['potential_gains'])).to_pylist()
+
+        fetched = _fetch_arrow(f"""
+            SELECT id AS buyin_id, {', '.join(BUYIN_COLUMNS[1:])}
+            FROM follow_the_goat_buyins
+            WHERE (id > %s AND followed_at >= %s) OR id = ANY(%s)
+            ORDER BY id
+        """, [watermark, cutoff, pending])
+
+        stats = {'new_buyins': 0, 'labels_updated': 0}
+        if fetched is None:
+            return buyins, stats
+
+        ids = fetched['buyin_id']
+        stats['new_buyins'] = pc.sum(pc.greater(ids, watermark)).as_py() or 0
+        stats['labels_updated'] = pc.sum(pc.and_(
+            pc.less_equal(ids, watermark), pc.is_valid(fetched['potential_gains'])
+        )).as_py() or 0
+
+        kept = buyins.filter(pc.invert(pc.is_in(buyins['buyin_id'], value_set=ids)))
+        buyins = _concat([kept, fetched]) if kept.num_rows else fetched
+        buyins = buyins.sort_by('buyin_id')
+        manifest['buyins_watermark'] = max(watermark, pc.max(ids).as_py())
+        return buyins, stats
+
+    def _prune(self, manifest: Dict[str, Any], buyins: pa.Table) -> int:
+        """Drop buyins past retention (and whole parts below them); returns the lowest kept id."""
+        cutoff = _utcnow() - timedelta(hours=self.retention_hours)
+        buyins = buyins.filter(pc.greater_equal(buyins['followed_at'], pa.scalar(cutoff, pa.timestamp('us'))))
+        _write_parquet(buyins, self.root / "buyins.parquet")
+
+        min_id = pc.min(buyins['buyin_id']).as_py() if buyins.num_rows else manifest['buyins_watermark'] + 1
+        # Expired part files are deleted by _commit once the manifest drops them
+        for key, parts in manifest['parts'].items():
+            manifest['parts'][key] = [p for p in parts if p['last'] >= min_id]
+        return min_id
+
+    def _settled_upper(self, buyins: pa.Table) -> int:
+        """Highest buyin id followed at least TRAIL_SETTLE_SECONDS ago."""
+        settled = _utcnow() - timedelta(seconds=TRAIL_SETTLE_SECONDS)
+        ids = pc.filter(buyins['buyin_id'],
+                        pc.less_equal(buyins['followed_at'], pa.scalar(settled, pa.timestamp('us'))))
+        return pc.max(ids).as_py() if len(ids) else 0
+
+    def _sync_trail(self, manifest: Dict[str, Any], buyins: pa.Table) -> int:
+        watermark = manifest['trail_watermark']
+        upper = self._settled_upper(buyins)
+        if upper <= watermark:
+            return 0
+
+        trail = _fetch_arrow("""
+            SELECT * FROM buyin_trail_minutes
+            WHERE buyin_id > %s AND buyin_id <= %s
+            ORDER BY buyin_id, minute, sub_minute
+        """, [watermark, upper])
+        manifest['trail_watermark'] = upper
+        if trail is None:
+            return 0
+
+        sub = pc.fill_null(trail['sub_minute'], 0) if 'sub_minute' in trail.column_names else 0
+        interval = pc.add(pc.multiply(trail['minute'].cast(pa.int32()), 2), sub)
+        for key in range(TRAIL_INTERVALS):
+            part = trail.filter(pc.equal(interval, key))
+            if part.num_rows:
+                self._add_part(manifest, f"trail/interval={key:02d}", part)
+        return trail.num_rows
+
+    def _add_part(self, manifest: Dict[str, Any], key: str, table: pa.Table) -> None:
+        manifest['seq'] += 1
+        name = f"part-{manifest['seq']:08d}.parquet"
+        _write_parquet(table, self.root / key / name)
+        ids = table['buyin_id']
+        manifest['parts'].setdefault(key, []).append({
+            'file': name,
+            'first': pc.min(ids).as_py(),
+            'last': pc.max(ids).as_py(),
+            'rows': table.num_rows,
+        })
+
+    def _compact(self, manifest: Dict[str, Any], min_id: int) -> None:
+        for key, parts in list(manifest['parts'].items()):
+            if len(parts) < COMPACT_PARTS:
+                continue
+            tables = [pq.read_table(self.root / key / p['file']) for p in parts]
+            merged = _concat(tables)
+            merged = merged.filter(pc.greater_equal(merged['buyin_id'], min_id))
+            manifest['parts'][key] = []
+            if merged.num_rows:
+                self._add_part(manifest, key, merged)
+
+    # ------------------------------------------------------------------
+    # Derived feature sets
+    # ------------------------------------------------------------------
+
+    def sync_derived(
+        self,
+        name: str,
+        compute: Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]],
+        settle_seconds: int = TRAIL_SETTLE_SECONDS,
+    ) -> int:
+        """
+        Extend a per-buyin feature set computed by the caller.
+
+        `compute` gets the buyins (buyin_id, followed_at) past the set's
+        watermark that are at least `settle_seconds` old, in id order, and
+        returns one dict per buyin it produced features for (each with
+        'buyin_id'). Buyins it returns nothing for are not retried.
+        Returns the number of rows added.
+        """
+        key = f"derived/{name}"
+        with self._exclusive():
+            manifest = self._read_manifest()
+            buyins = self._read_buyins()
+            watermark = manifest['derived_watermarks'].get(name, 0)
+            settled = _utcnow() - timedelta(seconds=settle_seconds)
+            todo = buyins.filter(pc.and_(
+                pc.greater(buyins['buyin_id'], watermark),
+                pc.less_equal(buyins['followed_at'], pa.scalar(settled, pa.timestamp('us'))),
+            )).select(['buyin_id', 'followed_at']).sort_by('buyin_id')
+            if not todo.num_rows:
+                return 0
+
+            rows = compute(todo.to_pylist())
+            if rows:
+                self._add_part(manifest, key, pa.Table.from_pylist(rows))
+            manifest['derived_watermarks'][name] = pc.max(todo['buyin_id']).as_py()
+            min_id = pc.min(buyins['buyin_id']).as_py() if buyins.num_rows else 0
+            self._compact(manifest, min_id)
+            self._commit(manifest)
+        logger.info(f"Feature store: {len(rows or [])} '{name}' rows for {todo.num_rows} buyins")
+        return len(rows or [])
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def load_buyins(
+        self,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        labeled: bool = True,
+        columns: Optional[Sequence[str]] = None,
+    ) -> pa.Table:
+        """Stored buyins (followed_at in [since, until)), ordered by followed_at."""
+        path = self.root / "buyins.parquet"
+        buyins = pq.read_table(path, memory_map=True) if path.exists() else _EMPTY_BUYINS.empty_table()
+        mask = None
+        since, until = _naive_utc(since), _naive_utc(until)
+        if since is not None and since < _utcnow() - timedelta(hours=self.retention_hours):
+            logger.warning(f"Feature store keeps {self.retention_hours}h; rows before that are not available "
+                           f"(set FEATURE_STORE_RETENTION_HOURS to keep more)")
+        if since is not None:
+            mask = pc.greater_equal(buyins['followed_at'], pa.scalar(since, pa.timestamp('us')))
+        if until is not None:
+            m = pc.less(buyins['followed_at'], pa.scalar(until, pa.timestamp('us')))
+            mask = m if mask is None else pc.and_(mask, m)
+        if labeled:
+            m = pc.is_valid(buyins['potential_gains'])
+            mask = m if mask is None else pc.and_(mask, m)
+        if mask is not None:
+            buyins = buyins.filter(mask)
+        buyins = buyins.sort_by([('followed_at', 'ascending'), ('buyin_id', 'ascending')])
+        if columns is not None:
+            buyins = buyins.select(list(columns))
+        return buyins
+
+    def _read_parts(self, manifest: Dict[str, Any], key: str, min_id: int,
+                    columns: Optional[Sequence[str]]) -> List[pa.Table]:
+        tables = []
+        for part in manifest['parts'].get(key, []):
+            if part['last'] < min_id:
+                continue
+            path = self.root / key / part['file']
+            if columns is not None:
+                names = set(pq.read_schema(path).names)
+                cols = [c for c in columns if c in names]
+            else:
+                cols = None
+            tables.append(pq.read_table(path, columns=cols, memory_map=True))
+        return tables
+
+    def _load_joined(self, keys: List[str], buyins: pa.Table, columns: Optional[Sequence[str]],
+                     buyin_columns: Sequence[str], order: List[str]) -> pa.Table:
+        if columns is not None:
+            columns = ['buyin_id'] + [c for c in columns if c != 'buyin_id']
+        min_id = pc.min(buyins['buyin_id']).as_py() if buyins.num_rows else None
+
+        tables: List[pa.Table] = []
+        if min_id is not None:
+            for attempt in range(2):
+                manifest = self._read_manifest()
+                try:
+                    tables = [t for key in keys for t in self._read_parts(manifest, key, min_id, columns)]
+                    break
+                except FileNotFoundError:
+                    # A sync compacted the parts we listed; the new manifest has the merged part
+                    if attempt:
+                        raise
+
+        head = buyins.select(['buyin_id'] + [c for c in buyin_columns if c != 'buyin_id'])
+        if not tables:
+            return head.slice(0, 0)
+        rows = _concat(tables)
+        rows = rows.filter(pc.is_in(rows['buyin_id'], value_set=buyins['buyin_id']))
+        joined = head.join(rows, 'buyin_id', join_type='inner')
+        order = [c for c in order if c in joined.column_names]
+        return joined.sort_by([(c, 'ascending') for c in order])
+
+    def load_trail(
+        self,
+        since: Optional[datetime] = None,
+        minutes: Union[None, int, Iterable[int]] = None,
+        sub_minute: Optional[int] = 0,
+        columns: Optional[Sequence[str]] = None,
+        buyin_columns: Sequence[str] = tuple(BUYIN_COLUMNS),
+        labeled: bool = True,
+        until: Optional[datetime] = None,
+    ) -> pa.Table:
+        """
+        Wide trail rows joined to their buyin.
+
+        minutes: one minute, several, or None for all 15; sub_minute: 0, 1 or
+        None for both. columns: trail columns to read (None = all).
+        buyin_columns come first, then the trail columns; rows are ordered
+        by followed_at, buyin_id, minute, sub_minute. labeled=True keeps
+        buyins with potential_gains only.
+        """
+        buyins = self.load_buyins(since, until, labeled)
+        keys = [f"trail/interval={k:02d}" for k in _interval_keys(minutes, sub_minute)]
+        if columns is not None:
+            columns = list(columns) + [c for c in ('minute', 'sub_minute') if c not in columns]
+        return self._load_joined(keys, buyins, columns, buyin_columns,
+                                 ['followed_at', 'buyin_id', 'minute', 'sub_minute'])
+
+    def load_minute(
+        self,
+        minute: int,
+        since: Optional[datetime] = None,
+        sub_minute: int = 0,
+        columns: Optional[Sequence[str]] = None,
+        labeled: bool = True,
+    ) -> "pd.DataFrame":
+        """Minute-m wide rows for buyins since `since`, with labels, as a DataFrame.
+
+        Decimal columns come back as float64.
+        """
+        table = self.load_trail(since, minute, sub_minute, columns, labeled=labeled)
+        return _to_pandas(table)
+
+    def load_derived(
+        self,
+        name: str,
+        since: Optional[datetime] = None,
+        buyin_columns: Sequence[str] = tuple(BUYIN_COLUMNS),
+        labeled: bool = True,
+    ) -> pa.Table:
+        """A derived feature set joined to its buyins, ordered by followed_at."""
+        buyins = self.load_buyins(since, None, labeled)
+        return self._load_joined([f"derived/{name}"], buyins, None, buyin_columns,
+                                 ['followed_at', 'buyin_id'])
+
+
+def _to_pandas(table: pa.Table) -> "pd.DataFrame":
+    decimals = [i for i, f in enumerate(table.schema) if pa.types.is_decimal(f.type)]
+    for i in decimals:
+        table = table.set_column(i, table.schema.field(i).name, table.column(i).cast(pa.float64()))
+    return table.to_pandas()
+
+
+_store: Optional[FeatureStore] = None
+_store_lock = threading.Lock()
+
+
+def get_feature_store() -> FeatureStore:
+    """Process-wide FeatureStore."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = FeatureStore()
+        return _store
@@ -0,0 +1,297 @@
+"""
+Compiled Project Filter Plans
+=============================
+Shared evaluation engine for pattern_config_filters, used by live validation
+(000trading/pattern_validator.py) and by the filter simulators.
+
+A project's filter set is compiled once into a FilterPlan:
+
+- every filter is resolved to a (section, minute, field, column) slot of a
+  FilterLayout, so a trail is read into one flat value vector instead of being
+  searched filter by filter;
+- the bounds become float arrays (missing bound = +/-inf), include_null a
+  boolean array;
+- evaluating a plan is one vectorised comparison over the vector, or over a
+  (buyins x slots) matrix for backtests.
+
+Each slot value carries a state next to it (STATE_VALUE, STATE_NULL,
+STATE_NO_DATA, STATE_INVALID, STATE_UNKNOWN), which reproduces the rules of
+the original per-filter validator loop:
+
+    numeric value             -> from_value <= value <= to_value
+    None / no minute data     -> include_null
+    non-numeric value         -> fail
+    unresolvable section      -> fail
+
+Usage:
+    from core.filter_plan import (
+        FilterLayout, compile_filter_plan, evaluate_plans, frame_matrix,
+    )
+
+    layout = FilterLayout()
+    plan = compile_filter_plan(project_id, filter_rows, resolve, layout, version)
+    values, states = layout.empty_row()          # fill the plan's slots
+    passed = plan.evaluate(values, states)       # bool per filter
+    go = plan.decide(passed)                     # every filter passed
+
+    values, states = frame_matrix(layout, df)    # one wide row per buyin
+    go_matrix = evaluate_plans(plans, values, states)   # buyins x projects
+"""
+
+import math
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Slot states (ordered: everything <= STATE_NO_DATA falls back to include_null)
+STATE_VALUE = 0
+STATE_NULL = 1
+STATE_NO_DATA = 2
+STATE_INVALID = 3
+STATE_UNKNOWN = 4
+
+# (section, minute, lookup field, flat column); section None = unresolvable
+SlotKey = Tuple[Optional[str], int, Optional[str], Optional[str]]
+# filter row -> (section or None, minute, lookup field, flat column)
+Resolver = Callable[[Mapping[str, Any]], SlotKey]
+
+_UNKNOWN_SLOT: SlotKey = (None, 0, None, None)
+
+
+def _bound(value: Any, default: float) -> float:
+    """Filter bound as a float (missing or unparseable bounds don't constrain)."""
+    if value is None:
+        return default
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return default
+
+
+def _reported(value: Any) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return None
+
+
+# =============================================================================
+# LAYOUT
+# =============================================================================
+
+class FilterLayout:
+    """
+    Registry of value slots shared by every plan compiled against it.
+
+    Slot 0 is reserved for filters whose section cannot be resolved; it is
+    always in STATE_UNKNOWN. Slots are only ever appended, so plans compiled
+    earlier stay valid while the layout grows.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._index: Dict[SlotKey, int] = {_UNKNOWN_SLOT: 0}
+        self.keys: List[SlotKey] = [_UNKNOWN_SLOT]
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def slot(self, key: SlotKey) -> int:
+        if key[0] is None:
+            return 0
+        index = self._index.get(key)
+        if index is None:
+            with self._lock:
+                index = self._index.get(key)
+                if index is None:
+                    index = len(self.keys)
+                    self.keys.append(key)
+                    self._index[key] = index
+        return index
+
+    def empty_row(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(values, states) for one trail; every slot starts as no data."""
+        n = len(self.keys)
+        states = np.full(n, STATE_NO_DATA, dtype=np.int8)
+        states[0] = STATE_UNKNOWN
+        return np.full(n, np.nan), states
+
+    def empty_matrix(self, rows: int) -> Tuple[np.ndarray, np.ndarray]:
+        n = len(self.keys)
+        states = np.full((rows, n), STATE_NO_DATA, dtype=np.int8)
+        states[:, 0] = STATE_UNKNOWN
+        return np.full((rows, n), np.nan), states
+
+
+def set_slot(values: np.ndarray, states: np.ndarray, index: int, value: Any) -> None:
+    """Store one raw trail value (None -> null, non-numeric -> invalid)."""
+    if value is None:
+        states[..., index] = STATE_NULL
+        return
+    try:
+        values[..., index] = float(value)
+    except (ValueError, TypeError):
+        states[..., index] = STATE_INVALID
+        return
+    states[..., index] = STATE_VALUE
+
+
+def frame_matrix(
+    layout: FilterLayout,
+    frame: Any,
+    slots: Optional[Iterable[int]] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (values, states) matrix from a wide frame: one row per buyin, one column
+    per flat field (a DataFrame, or a dict of equal-length arrays).
+
+    Each slot reads its flat column; the slot's minute is not applied, so pass
+    the rows of the minute being evaluated. NaN counts as null (that is how a
+    frame stores NULL); absent columns are no data.
+    """
+    columns = list(frame.keys())
+    rows = len(frame[columns[0]]) if columns else 0
+    values, states = layout.empty_matrix(rows)
+    available = set(columns)
+    for index in (range(1, len(layout)) if slots is None else slots):
+        column = layout.keys[index][3]
+        if index == 0 or column not in available:
+            continue
+        raw = np.asarray(frame[column])
+        try:
+            col = raw.astype(np.float64)
+        except (ValueError, TypeError):
+            for row, value in enumerate(raw):
+                if isinstance(value, float) and math.isnan(value):
+                    value = None
+                set_slot(values[row], states[row], index, value)
+            continue
+        null = np.isnan(col)
+        values[:, index] = col
+        states[:, index] = np.where(null, STATE_NULL, STATE_VALUE)
+    return values, states
+
+
+# =============================================================================
+# PLANS
+# =============================================================================
+
+class FilterPlan:
+    """One project's active filters, compiled against a FilterLayout."""
+
+    __slots__ = ('project_id', 'version', 'layout', 'slots', 'lower', 'upper',
+                 'include_null', 'templates')
+
+    def __init__(self, project_id: int, version: Optional[str], layout: FilterLayout,
+                 slots: np.ndarray, lower: np.ndarray, upper: np.ndarray,
+                 include_null: np.ndarray, templates: List[Dict[str, Any]]):
+        self.project_id = project_id
+        self.version = version
+        self.layout = layout
+        self.slots = slots
+        self.lower = lower
+        self.upper = upper
+        self.include_null = include_null
+        self.templates = templates
+
+    def __len__(self) -> int:
+        return len(self.templates)
+
+    def evaluate(self, values: np.ndarray, states: np.ndarray) -> np.ndarray:
+        """
+        Pass flags per filter: shape (filters,) for a row vector, or
+        (rows, filters) for a matrix.
+        """
+        v = values[..., self.slots]
+        s = states[..., self.slots]
+        inside = ~((v < self.lower) | (v > self.upper))
+        return np.where(s == STATE_VALUE, inside, (s <= STATE_NO_DATA) & self.include_null)
+
+    def decide(self, passed: np.ndarray) -> np.ndarray:
+        """GO when the plan has filters and every one of them passed."""
+        if not self.templates:
+            return np.zeros(passed.shape[:-1], dtype=bool)
+        return passed.all(axis=-1)
+
+    def results(self, values: np.ndarray, states: np.ndarray, passed: np.ndarray) -> List[Dict[str, Any]]:
+        """Per-filter result dicts for one row (the trade_filter_results shape)."""
+        out = []
+        for template, slot, ok in zip(self.templates, self.slots.tolist(), passed.tolist()):
+            state = states[slot]
+            result = dict(template)
+            result['actual_value'] = float(values[slot]) if state == STATE_VALUE else None
+            result['passed'] = ok
+            if state == STATE_UNKNOWN:
+                result['error'] = 'unknown_section'
+            elif state == STATE_NO_DATA:
+                result['error'] = 'no_minute_data'
+            out.append(result)
+        return out
+
+
+def compile_filter_plan(
+    project_id: int,
+    filters: Sequence[Mapping[str, Any]],
+    resolve: Resolver,
+    layout: FilterLayout,
+    version: Optional[str] = None,
+) -> FilterPlan:
+    """
+    Compile pattern_config_filters rows (in evaluation order) into a plan.
+
+    `resolve` maps a row to its slot key; a key whose section is None marks
+    the filter as unresolvable (it always fails with 'unknown_section').
+    """
+    slots, lower, upper, include_null, templates = [], [], [], [], []
+    for row in filters:
+        key = resolve(row)
+        section, minute, column = key[0], key[1], key[3]
+        field = column if column is not None else (row.get('field_column', '') or row.get('field_name', ''))
+        slots.append(layout.slot(key))
+        lower.append(_bound(row.get('from_value'), -math.inf))
+        upper.append(_bound(row.get('to_value'), math.inf))
+        include_null.append(bool(row.get('include_null', 0)))
+
+        template = {
+            'filter_id': row.get('id'),
+            'filter_name': row.get('name', ''),
+            'field': field,
+        }
+        if section is not None:
+            template['section'] = section
+        template['minute'] = minute
+        template['from_value'] = _reported(row.get('from_value'))
+        template['to_value'] = _reported(row.get('to_value'))
+        templates.append(template)
+
+    return FilterPlan(
+        project_id, version, layout,
+        np.asarray(slots, dtype=np.intp),
+        np.asarray(lower, dtype=np.float64),
+        np.asarray(upper, dtype=np.float64),
+        np.asarray(include_null, dtype=bool),
+        templates,
+    )
+
+
+def plan_slots(plans: Iterable[FilterPlan]) -> List[int]:
+    """Distinct layout slots read by any of `plans`."""
+    slots = set()
+    for plan in plans:
+        slots.update(plan.slots.tolist())
+    return sorted(slots)
+
+
+def evaluate_plans(plans: Sequence[FilterPlan], values: np.ndarray, states: np.ndarray) -> np.ndarray:
+    """
+    GO flags for many buyins against many projects: (rows, plans) for a
+    (rows, slots) matrix, or (plans,) for a single row vector.
+    """
+    shape = values.shape[:-1] + (len(plans),)
+    go = np.zeros(shape, dtype=bool)
+    for i, plan in enumerate(plans):
+        go[..., i] = plan.decide(plan.evaluate(values, states))
+    return go
@@ -0,0 +1,333 @@
+"""
+Bitset Filter Combination Search
+================================
+Shared search engine for the combinatorial filter searches in
+create_new_paterns.py and tests/filter_simulation/overnight_sweep.py.
+
+Both score "does a trade pass every filter in the combo" against good/bad
+labels on a train and a test split. Instead of AND-ing boolean arrays combo by
+combo, this module:
+
+- packs each filter's pass mask (and the good-trade mask) into uint64 bitsets,
+  64 trades per word;
+- walks combinations depth-first in lexicographic order, so every prefix
+  intersection is computed once and shared by all of its extensions; the
+  children of a prefix are intersected and popcounted as one matrix;
+- prunes a prefix when no extension can pass: good/total counts only shrink
+  as filters are added, so once a prefix keeps too few good trades (train),
+  too few trades overall, or no good trade on test, its subtree is skipped;
+- optionally fans the root branches out over a process pool.
+
+Results and metric dicts are identical to AND-ing the boolean masks combo by
+combo, in the same (size, itertools.combinations) order.
+
+Usage:
+    from core.filter_search import ComboSearch
+
+    search = ComboSearch(
+        columns=[r['column'] for r in ranked],
+        masks_train=masks_train, is_good_train=is_good_train,
+        masks_test=masks_test, is_good_test=is_good_test,
+        min_passing=5, min_good_kept_pct=3,
+    )
+    for cols, train_m, test_m in search.search([(2, 30), (3, 20), (4, 15)]):
+        ...
+    hit = search.evaluate(("ob_spread_bps", "tx_buy_sell_pressure"))
+"""
+
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Slack for the vectorised pre-checks; the exact (rounded) checks run after.
+_ROUND_SLACK = 0.01
+
+ComboResult = Tuple[Tuple[str, ...], Dict[str, float], Dict[str, float]]
+
+
+# =============================================================================
+# BITSETS
+# =============================================================================
+
+def pack_mask(mask: np.ndarray) -> np.ndarray:
+    """Pack a boolean mask into uint64 words (bit i = row i, zero padded)."""
+    packed = np.packbits(np.asarray(mask, dtype=bool), bitorder="little")
+    pad = (-packed.size) % 8
+    if pad:
+        packed = np.concatenate([packed, np.zeros(pad, dtype=np.uint8)])
+    return packed.view(np.uint64)
+
+
+if hasattr(np, "bitwise_count"):
+    def popcount_rows(bits: np.ndarray) -> np.ndarray:
+        """Set bits per row of a (rows, words) uint64 matrix."""
+        return np.bitwise_count(bits).sum(axis=-1, dtype=np.int64)
+else:  # numpy < 2.0
+    _POPCOUNT8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def popcount_rows(bits: np.ndarray) -> np.ndarray:
+        """Set bits per row of a (rows, words) uint64 matrix."""
+        flat = np.ascontiguousarray(bits).view(np.uint8)
+        return _POPCOUNT8[flat].sum(axis=-1, dtype=np.int64)
+
+
+# =============================================================================
+# METRICS
+# =============================================================================
+
+def combo_metrics(
+    good_after: int,
+    bad_after: int,
+    good_before: int,
+    bad_before: int,
+    n_total: int,
+    min_passing: int,
+) -> Optional[Dict[str, float]]:
+    """Metrics of one combo (precision / good kept / bad removed / pass rate, 2 dp)."""
+    total_after = good_after + bad_after
+    if total_after < min_passing:
+        return None
+
+    precision = good_after / total_after * 100 if total_after else 0
+    good_kept_pct = good_after / good_before * 100 if good_before else 0
+    bad_removed_pct = (bad_before - bad_after) / bad_before * 100 if bad_before else 0
+    pass_rate = total_after / n_total * 100
+
+    return {
+        'precision': round(precision, 2),
+        'good_kept_pct': round(good_kept_pct, 2),
+        'bad_removed_pct': round(bad_removed_pct, 2),
+        'pass_rate': round(pass_rate, 2),
+        'good_after': good_after,
+        'bad_after': bad_after,
+    }
+
+
+class _Split:
+    """Packed masks and label counts of one data split (train or test)."""
+
+    def __init__(self, masks: Sequence[np.ndarray], is_good: np.ndarray) -> None:
+        is_good = np.asarray(is_good, dtype=bool)
+        self.n_total = int(is_good.size)
+        self.good_before = int(is_good.sum())
+        self.bad_before = self.n_total - self.good_before
+        self.good = pack_mask(is_good)
+        self.masks = (np.vstack([pack_mask(m) for m in masks]) if len(masks)
+                      else np.empty((0, self.good.size), dtype=np.uint64))
+
+    def counts(self, bits: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(good_after, total_after) per row of intersected bitsets."""
+        return popcount_rows(bits & self.good), popcount_rows(bits)
+
+
+# =============================================================================
+# SEARCH ENGINE
+# =============================================================================
+
+class ComboSearch:
+    """Depth-first bitset search over filter combinations.
+
+    A combo is kept when, as in the original test_combo() closures:
+      - train passes >= min_passing and train precision > baseline_train
+      - train good_kept_pct >= min_good_kept_pct
+      - test passes >= min_passing and test precision > baseline_test
+    Baselines default to the good-trade rate of each split.
+    """
+
+    def __init__(
+        self,
+        columns: Sequence[str],
+        masks_train: Dict[str, np.ndarray],
+        is_good_train: np.ndarray,
+        masks_test: Dict[str, np.ndarray],
+        is_good_test: np.ndarray,
+        min_passing: int = 5,
+        min_good_kept_pct: float = 3.0,
+        baseline_train: Optional[float] = None,
+        baseline_test: Optional[float] = None,
+    ) -> None:
+        self.columns = list(columns)
+        # Columns missing from either split can't be scored — never part of a combo
+        self.usable = np.array(
+            [c in masks_train and c in masks_test for c in self.columns], dtype=bool
+        )
+        placeholder_train = np.zeros(len(is_good_train), dtype=bool)
+        placeholder_test = np.zeros(len(is_good_test), dtype=bool)
+        self.train = _Split([masks_train.get(c, placeholder_train) for c in self.columns], is_good_train)
+        self.test = _Split([masks_test.get(c, placeholder_test) for c in self.columns], is_good_test)
+        self.min_passing = min_passing
+        self.min_good_kept_pct = min_good_kept_pct
+        self.baseline_train = (baseline_train if baseline_train is not None else
+                               self.train.good_before / self.train.n_total * 100 if self.train.n_total else 0)
+        self.baseline_test = (baseline_test if baseline_test is not None else
+                              self.test.good_before / self.test.n_total * 100 if self.test.n_total else 0)
+        self._index = {c: i for i, c in enumerate(self.columns)}
+        self.nodes_visited = 0
+
+    # -------------------------------------------------------------------------
+    # Scoring
+    # -------------------------------------------------------------------------
+
+    def _accept(
+        self, good_t: int, total_t: int, good_s: int, total_s: int
+    ) -> Optional[Tuple[Dict[str, float], Dict[str, float]]]:
+        tr, ts = self.train, self.test
+        train_m = combo_metrics(good_t, total_t - good_t, tr.good_before, tr.bad_before,
+                                tr.n_total, self.min_passing)
+        if train_m is None or train_m['precision'] <= self.baseline_train:
+            return None
+        if train_m['good_kept_pct'] < self.min_good_kept_pct:
+            return None
+        test_m = combo_metrics(good_s, total_s - good_s, ts.good_before, ts.bad_before,
+                               ts.n_total, self.min_passing)
+        if test_m is None or test_m['precision'] <= self.baseline_test:
+            return None
+        return train_m, test_m
+
+    def evaluate(self, cols: Sequence[str]) -> Optional[Tuple[Dict[str, float], Dict[str, float]]]:
+        """Score one combo; (train_metrics, test_metrics) if it passes, else None."""
+        idx = [self._index.get(c) for c in cols]
+        if not idx or any(i is None or not self.usable[i] for i in idx):
+            return None
+        bits_t = np.bitwise_and.reduce(self.train.masks[idx], axis=0)
+        bits_s = np.bitwise_and.reduce(self.test.masks[idx], axis=0)
+        good_t, total_t = self.train.counts(bits_t[None, :])
+        good_s, total_s = self.test.counts(bits_s[None, :])
+        return self._accept(int(good_t[0]), int(total_t[0]), int(good_s[0]), int(total_s[0]))
+
+    # -------------------------------------------------------------------------
+    # Depth-first search
+    # -------------------------------------------------------------------------
+
+    def _plan(self, levels: Sequence[Tuple[int, int]]) -> Tuple[Dict[int, int], List[int], int]:
+        """Per combo size: emit limit (top-N) and child limit (max top-N at this size or deeper)."""
+        n = len(self.columns)
+        emit = {int(size): min(int(top_n), n) for size, top_n in levels if size >= 1}
+        max_size = max(emit) if emit else 0
+        limits = [0] * (max_size + 2)
+        for size in range(max_size, 0, -1):
+            limits[size] = max(emit.get(size, 0), limits[size + 1])
+        return emit, limits, max_size
+
+    def _expand(
+        self,
+        prefix: Tuple[int, ...],
+        bits_t: np.ndarray,
+        bits_s: np.ndarray,
+        emit: Dict[int, int],
+        limits: List[int],
+        max_size: int,
+        out: List[Tuple[Tuple[int, ...], int, int, int, int]],
+    ) -> None:
+        size = len(prefix) + 1
+        start = prefix[-1] + 1 if prefix else 0
+        js = np.flatnonzero(self.usable[start:limits[size]]) + start
+        if js.size == 0:
+            return
+        self.nodes_visited += int(js.size)
+
+        child_t = bits_t & self.train.masks[js]
+        child_s = bits_s & self.test.masks[js]
+        good_t, total_t = self.train.counts(child_t)
+        good_s, total_s = self.test.counts(child_s)
+
+        # Counts only shrink as filters are added: these bounds hold for the
+        # whole subtree as well as for the child itself.
+        viable = (total_t >= self.min_passing) & (total_s >= self.min_passing) & (good_s > 0)
+        if self.train.good_before:
+            viable &= good_t * 100.0 / self.train.good_before >= self.min_good_kept_pct - _ROUND_SLACK
+
+        if size in emit:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                maybe = (viable & (js < emit[size])
+                         & (good_t * 100.0 / total_t > self.baseline_train - _ROUND_SLACK)
+                         & (good_s * 100.0 / total_s > self.baseline_test - _ROUND_SLACK))
+            for k in np.flatnonzero(maybe):
+                if self._accept(int(good_t[k]), int(total_t[k]), int(good_s[k]), int(total_s[k])):
+                    out.append((prefix + (int(js[k]),), int(good_t[k]), int(total_t[k]),
+                                int(good_s[k]), int(total_s[k])))
+
+        if size < max_size:
+            for k in np.flatnonzero(viable & (js + 1 < limits[size + 1])):
+                self._expand(prefix + (int(js[k]),), child_t[k], child_s[k],
+                             emit, limits, max_size, out)
+
+    def _search_root(self, root: int, levels: Sequence[Tuple[int, int]]):
+        """Search every combo whose first (highest-ranked) column is `root`."""
+        emit, limits, max_size = self._plan(levels)
+        out: List[Tuple[Tuple[int, ...], int, int, int, int]] = []
+        prefix = (root,)
+        bits_t, bits_s = self.train.masks[root], self.test.masks[root]
+        good_t, total_t = self.train.counts(bits_t[None, :])
+        good_s, total_s = self.test.counts(bits_s[None, :])
+        g_t, t_t, g_s, t_s = int(good_t[0]), int(total_t[0]), int(good_s[0]), int(total_s[0])
+        if 1 in emit and root < emit[1] and self._accept(g_t, t_t, g_s, t_s):
+            out.append((prefix, g_t, t_t, g_s, t_s))
+        if max_size > 1 and t_t >= self.min_passing and t_s >= self.min_passing and g_s > 0:
+            self._expand(prefix, bits_t, bits_s, emit, limits, max_size, out)
+        return out
+
+    def search(self, levels: Sequence[Tuple[int, int]], workers: int = 1) -> List[ComboResult]:
+        """Every passing combo of each (size, top_n) level.
+
+        `levels` = [(2, 30), (3, 20), (4, 15)] means all pairs from the top 30
+        columns, all triples from the top 20 and all quads from the top 15.
+        With workers > 1 the root branches run on a process pool.
+        """
+        emit, limits, max_size = self._plan(levels)
+        if max_size == 0:
+            return []
+        roots = [int(i) for i in np.flatnonzero(self.usable[:limits[1]])]
+
+        if workers > 1 and len(roots) > 1:
+            raw = []
+            with ProcessPoolExecutor(
+                max_workers=min(workers, len(roots)),
+                mp_context=_pool_context(),
+                initializer=_init_worker,
+                initargs=(self,),
+            ) as pool:
+                for part in pool.map(_worker_search_root, roots, [list(levels)] * len(roots)):
+                    raw.extend(part)
+        else:
+            raw = []
+            for root in roots:
+                raw.extend(self._search_root(root, levels))
+
+        # Same order as looping itertools.combinations level by level
+        raw.sort(key=lambda r: (len(r[0]), r[0]))
+        results: List[ComboResult] = []
+        for idx, g_t, t_t, g_s, t_s in raw:
+            train_m, test_m = self._accept(g_t, t_t, g_s, t_s)
+            results.append((tuple(self.columns[i] for i in idx), train_m, test_m))
+        return results
+
+
+# =============================================================================
+# PROCESS POOL
+# =============================================================================
+
+_worker_search: Optional[ComboSearch] = None
+
+
+def _pool_context():
+    # forkserver keeps workers clean when the caller is a threaded scheduler
+    # process (DB pools, APScheduler threads); fall back to the platform default.
+    try:
+        return multiprocessing.get_context("forkserver")
+    except ValueError:
+        return multiprocessing.get_context()
+
+
+def _init_worker(search: ComboSearch) -> None:
+    global _worker_search
+    _worker_search = search
+
+
+def _worker_search_root(root: int, levels: List[Tuple[int, int]]):
+    return _worker_search._search_root(root, levels)
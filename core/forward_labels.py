@@ -0,0 +1,301 @@
+"""
+Forward-Path Labels
+===================
+Shared forward-looking label kernels: the "what happens next" side of every
+sweep, trainer and simulator, computed the same way everywhere.
+
+Two shapes of price data are covered:
+
+- a regular series (SOL 1-second prices): forward_windows() / forward_labels()
+  return, for every point and any number of horizons, the forward max and min
+  return and the steps to the first hit of a target / first breach of a stop;
+- a trail panel (rows grouped per buyin, one row per minute):
+  group_forward_returns() returns the (rows x horizon) matrix of forward
+  returns that the LEAD / self-join SQL used to build, and forward_summary()
+  reduces it.
+
+The window after point i is values[i+1 : i+1+horizon], clipped at the end of
+the series; NaN prices are ignored, and a window without any price is NaN.
+Returns are percent of the price at i, (future - base) / base * 100, with
+base <= 0 treated as missing.
+
+Kernels (all numpy, no Python loop over points):
+  - forward max / min per horizon: van Herk / Gil-Werman block scan — a
+    prefix and a suffix running max over blocks of `horizon` points, so each
+    window is max(suffix, prefix) of at most two blocks, O(n) per horizon
+    whatever its length;
+  - first hit / breach: a sparse table of power-of-two window max / min is
+    built once per call (up to the longest horizon) and every point walks it
+    with binary lifting, O(n log horizon) for all horizons together;
+  - alignment to a sample grid: searchsorted on epoch nanoseconds instead of
+    pandas reindex(method="nearest").
+
+Usage:
+    from core.forward_labels import forward_labels, nearest_positions, take
+
+    labels = forward_labels(prices, [60, 300], target_pct=0.3, stop_pct=-0.2)
+    max_pct = labels[300]['max_pct']                # per 1s point
+    pos = nearest_positions(series_index, grid, tolerance=pd.Timedelta("2s"))
+    max_at_grid = take(max_pct, pos)                # NaN where unmatched
+"""
+
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+def _as_float(values: Any) -> np.ndarray:
+    return np.asarray(values, dtype=np.float64)
+
+
+def _pct(future: np.ndarray, base: np.ndarray) -> np.ndarray:
+    """Percent return of `future` over `base` (NaN where base <= 0)."""
+    base = np.where(base > 0, base, np.nan)
+    with np.errstate(invalid='ignore'):
+        return (future - base) / base * 100
+
+
+# =============================================================================
+# REGULAR SERIES
+# =============================================================================
+
+def forward_extrema(values: Any, horizon: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Max and min of values[i+1 : i+1+horizon] for every i (NaN if empty)."""
+    arr = _as_float(values)
+    n = len(arr)
+    fwd_max = np.full(n, np.nan)
+    fwd_min = np.full(n, np.nan)
+    if n < 2 or horizon < 1:
+        return fwd_max, fwd_min
+
+    # Window of i starts at x[i]; pad so every window lies inside whole blocks
+    x = arr[1:]
+    blocks = -(-(len(x) + horizon - 1) // horizon)
+    padded = np.full(blocks * horizon, np.nan)
+    padded[:len(x)] = x
+    grid = padded.reshape(blocks, horizon)
+
+    start = np.arange(len(x))
+    end = start + horizon - 1
+    for out, ufunc in ((fwd_max, np.fmax), (fwd_min, np.fmin)):
+        prefix = ufunc.accumulate(grid, axis=1).ravel()
+        suffix = ufunc.accumulate(grid[:, ::-1], axis=1)[:, ::-1].ravel()
+        out[:n - 1] = ufunc(suffix[start], prefix[end])
+    return fwd_max, fwd_min
+
+
+def forward_windows(values: Any, horizons: Iterable[int]
+                    ) -> Dict[int, Tuple[np.ndarray, np.ndarray]]:
+    """horizon -> (forward max %, forward min %) for every point."""
+    arr = _as_float(values)
+    out = {}
+    for horizon in sorted(set(horizons)):
+        fwd_max, fwd_min = forward_extrema(arr, horizon)
+        out[horizon] = (_pct(fwd_max, arr), _pct(fwd_min, arr))
+    return out
+
+
+class _SparseTable:
+    """Power-of-two window reductions of x: level l holds ufunc(x[j : j+2**l])."""
+
+    def __init__(self, x: np.ndarray, ufunc: np.ufunc, longest: int):
+        self.levels = [x]
+        width = 1
+        while width * 2 <= longest:
+            prev = self.levels[-1]
+            nxt = prev.copy()
+            m = max(len(x) - width, 0)
+            nxt[:m] = ufunc(prev[:m], prev[width:width + m])
+            self.levels.append(nxt)
+            width *= 2
+
+
+def _first_crossing(x: np.ndarray, base: np.ndarray, table: _SparseTable,
+                    horizon: int, pct: float, above: bool) -> np.ndarray:
+    """
+    Steps (1..horizon) from each point to the first forward price whose return
+    is >= pct (above) or <= pct (below); NaN when it doesn't happen in time.
+    """
+    n = len(x)
+    if n == 0:
+        return np.full(len(base), np.nan)
+
+    def crossed(level: np.ndarray, pos: np.ndarray) -> np.ndarray:
+        ret = _pct(level[np.minimum(pos, n - 1)], base_x)
+        hit = ret >= pct if above else ret <= pct
+        return hit & (pos < n)
+
+    base_x = base[:n]
+    pos = np.arange(n)                         # next unchecked index into x
+    taken = np.zeros(n, dtype=np.int64)
+    for level_no in range(len(table.levels) - 1, -1, -1):
+        width = 1 << level_no
+        if width > horizon:
+            continue
+        level = table.levels[level_no]
+        # Skip a whole block when it stays inside the horizon and never crosses
+        skip = (taken + width <= horizon) & ~crossed(level, pos)
+        pos = np.where(skip, pos + width, pos)
+        taken = np.where(skip, taken + width, taken)
+
+    found = (taken < horizon) & crossed(x, pos)
+    out = np.full(len(base), np.nan)
+    out[:n] = np.where(found, taken + 1, np.nan)
+    return out
+
+
+def forward_labels(
+    values: Any,
+    horizons: Iterable[int],
+    target_pct: Optional[float] = None,
+    stop_pct: Optional[float] = None,
+) -> Dict[int, Dict[str, np.ndarray]]:
+    """
+    Forward labels for every point of a regular series and every horizon.
+
+    horizon -> {
+        'max_pct':     forward max return (%),
+        'min_pct':     forward min return (%),
+        'hit_step':    steps to the first return >= target_pct (if given),
+        'breach_step': steps to the first return <= stop_pct (if given),
+    }
+    Steps are 1-based (1 = the next point); NaN = not within the horizon.
+    stop_pct is signed, e.g. -0.2 for a 0.2% stop.
+    """
+    arr = _as_float(values)
+    horizons = sorted(set(horizons))
+    out = {h: {'max_pct': mx, 'min_pct': mn}
+           for h, (mx, mn) in forward_windows(arr, horizons).items()}
+    if not horizons or (target_pct is None and stop_pct is None):
+        return out
+
+    x = arr[1:]
+    longest = horizons[-1]
+    for key, pct, ufunc, above in (('hit_step', target_pct, np.fmax, True),
+                                   ('breach_step', stop_pct, np.fmin, False)):
+        if pct is None:
+            continue
+        table = _SparseTable(x, ufunc, longest)
+        for horizon in horizons:
+            out[horizon][key] = _first_crossing(x, arr, table, horizon, pct, above)
+    return out
+
+
+# =============================================================================
+# TRAIL PANELS (one row per buyin and step)
+# =============================================================================
+
+def group_forward_returns(
+    groups: Any,
+    values: Any,
+    horizon: int,
+    steps: Any = None,
+    rows: Any = None,
+) -> np.ndarray:
+    """
+    Forward returns (%) inside each group, shape (len(rows), horizon):
+    column k-1 holds the return k steps after the row.
+
+    Rows must be sorted by group, then by step. With steps=None, "k steps
+    after" is the k-th next row of the same group (SQL LEAD); with integer
+    steps it is the row whose step equals step + k (a self-join on
+    minute = minute + k). Missing rows and NaN prices give NaN.
+    rows selects the anchor rows (default: all).
+    """
+    groups = np.asarray(groups)
+    vals = _as_float(values)
+    n = len(vals)
+    anchors = np.arange(n) if rows is None else np.asarray(rows, dtype=np.int64)
+    out = np.full((len(anchors), horizon), np.nan)
+    if n == 0 or len(anchors) == 0:
+        return out
+
+    base = vals[anchors]
+    if steps is None:
+        for k in range(1, horizon + 1):
+            target = anchors + k
+            ok = target < n
+            ok[ok] = groups[target[ok]] == groups[anchors[ok]]
+            out[ok, k - 1] = _pct(vals[target[ok]], base[ok])
+        return out
+
+    steps = np.asarray(steps, dtype=np.int64)
+    group_no = np.concatenate(([0], np.cumsum(groups[1:] != groups[:-1])))
+    stride = int(steps.max() - steps.min()) + horizon + 1
+    keys = group_no * stride + (steps - steps.min())
+    anchor_keys = keys[anchors]
+    for k in range(1, horizon + 1):
+        target = np.minimum(np.searchsorted(keys, anchor_keys + k), n - 1)
+        ok = keys[target] == anchor_keys + k
+        out[ok, k - 1] = _pct(vals[target[ok]], base[ok])
+    return out
+
+
+def forward_summary(
+    returns: np.ndarray,
+    target_pct: Optional[float] = None,
+    stop_pct: Optional[float] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Reduce a (rows x horizon) forward-return matrix: 'max_pct', 'min_pct'
+    (NaN-ignoring, NaN if the row has no return), and the 1-based
+    'hit_step' / 'breach_step' of the first return >= target_pct /
+    <= stop_pct (NaN if none).
+    """
+    out = {
+        'max_pct': np.fmax.reduce(returns, axis=1, initial=-np.inf),
+        'min_pct': np.fmin.reduce(returns, axis=1, initial=np.inf),
+    }
+    empty = np.isnan(returns).all(axis=1)
+    out['max_pct'][empty] = np.nan
+    out['min_pct'][empty] = np.nan
+    with np.errstate(invalid='ignore'):
+        for key, crossed in (('hit_step', None if target_pct is None else returns >= target_pct),
+                             ('breach_step', None if stop_pct is None else returns <= stop_pct)):
+            if crossed is not None:
+                out[key] = np.where(crossed.any(axis=1), crossed.argmax(axis=1) + 1.0, np.nan)
+    return out
+
+
+# =============================================================================
+# ALIGNMENT
+# =============================================================================
+
+def _epoch_ns(times: Any) -> np.ndarray:
+    return pd.DatetimeIndex(times).as_unit('ns').asi8
+
+
+def nearest_positions(index: Any, targets: Any, tolerance: Any = None) -> np.ndarray:
+    """
+    Position in the sorted time `index` nearest to each target time, -1 when
+    the nearest point is further than `tolerance` (a Timedelta, or seconds).
+    Ties go to the later point, as with pandas reindex(method="nearest").
+    """
+    idx = _epoch_ns(index)
+    tgt = _epoch_ns(targets)
+    if len(idx) == 0:
+        return np.full(len(tgt), -1, dtype=np.int64)
+
+    right = np.searchsorted(idx, tgt, side='left')
+    left = np.maximum(right - 1, 0)
+    right = np.minimum(right, len(idx) - 1)
+    left_dist = np.abs(tgt - idx[left])
+    right_dist = np.abs(idx[right] - tgt)
+    pos = np.where(left_dist < right_dist, left, right)
+    if tolerance is not None:
+        if isinstance(tolerance, (int, float)):
+            tolerance = pd.Timedelta(seconds=tolerance)
+        far = np.minimum(left_dist, right_dist) > pd.Timedelta(tolerance).value
+        pos = np.where(far, -1, pos)
+    return pos.astype(np.int64)
+
+
+def take(values: Any, positions: np.ndarray) -> np.ndarray:
+    """values[positions] as float, NaN where the position is -1."""
+    vals = _as_float(values)
+    out = np.full(len(positions), np.nan)
+    ok = positions >= 0
+    out[ok] = vals[positions[ok]]
+    return out
+
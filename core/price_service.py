@@ -0,0 +1,409 @@
+"""
+Price Service
+=============
+In-process view of the latest SOL prices and the active price cycle per
+threshold, shared by the trading hot path (pump signal momentum, buy-time
+cycle lookup, trailing-stop price checks) so they stop querying the
+`prices` and `cycle_tracker` tables for every evaluation.
+
+- prices: a fixed-size ring buffer of the most recent SOL ticks (1-second
+  feed), stored twice over in one array so the last `size` rows are always
+  a contiguous, timestamp-sorted numpy view;
+- cycles: the open cycle_tracker row (cycle_end_time IS NULL) per threshold.
+
+PostgreSQL remains the source of truth. The service refreshes lazily and
+only what is asked for: new prices are pulled past an id watermark (same
+scheme as market_window_cache) at most once per REFRESH_INTERVAL_SECONDS,
+or sooner when a caller passes a shorter max_age (latest()); the open
+cycles are reloaded with one DISTINCT ON query by active_cycle(), at most
+once per CYCLE_REFRESH_SECONDS. Lookups after that are array slices and
+binary searches.
+
+A lookup the service cannot answer (disabled, refresh error, empty buffer,
+window older than the buffer) returns None and the caller falls back to
+its SQL query.
+
+Usage:
+    from core.price_service import get_price_service
+
+    service = get_price_service()
+    price = service.latest_price() if service else None
+    if price is None:
+        price = ...  # SQL path
+
+    service.latest_price(max_age=0) # newest row in `prices`, pulled on this call
+    service.momentum()              # pm_price_change_30s / 1m / 5m, pm_velocity_30s
+    service.return_pct(60)          # % change over the last 60 seconds
+    service.active_cycle(0.3)       # {'id', 'threshold', 'cycle_start_time', 'sequence_start_price'}
+"""
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from core.database import get_postgres
+
+logger = logging.getLogger(__name__)
+
+SERVICE_ENABLED = os.getenv("PRICE_SERVICE", "1") != "0"
+# Ring size in rows; the SOL feed writes about one row per second
+RING_SIZE = int(os.getenv("PRICE_SERVICE_RING_SIZE", "1800"))
+REFRESH_INTERVAL_SECONDS = float(os.getenv("PRICE_SERVICE_REFRESH_SECONDS", "1.0"))
+CYCLE_REFRESH_SECONDS = float(os.getenv("PRICE_SERVICE_CYCLE_REFRESH_SECONDS", "1.0"))
+
+TOKEN = "SOL"
+
+_LOAD_BATCH = 10000
+_US = 1_000_000
+_EPOCH = datetime(1970, 1, 1)
+
+# Momentum features, as defined by mega_simulator (pm_* columns)
+MOMENTUM_LOOKBACK_SECONDS = 360
+MOMENTUM_MATCH_SECONDS = 3
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _to_us(dt: datetime) -> int:
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return (dt - _EPOCH) // timedelta(microseconds=1)
+
+
+def _from_us(us: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=int(us))
+
+
+def _threshold_key(threshold: Any) -> float:
+    return round(float(threshold), 4)
+
+
+# =============================================================================
+# RING BUFFER
+# =============================================================================
+
+class PriceRing:
+    """
+    Last `size` (timestamp, price) rows in arrival order.
+
+    Every row is written at slot i and i + size of a 2*size array, so
+    view() is always one contiguous slice — no copy, no wrap-around.
+    Rows older than the newest one are dropped (the feed writes in time
+    order; a late row would break the binary searches).
+    """
+
+    __slots__ = ("size", "_ts", "_price", "_count", "late_rows")
+
+    def __init__(self, size: int = RING_SIZE) -> None:
+        self.size = max(int(size), 2)
+        self._ts = np.zeros(2 * self.size, dtype=np.int64)
+        self._price = np.zeros(2 * self.size, dtype=np.float64)
+        self._count = 0
+        self.late_rows = 0
+
+    def __len__(self) -> int:
+        return min(self._count, self.size)
+
+    def append(self, ts_us: np.ndarray, prices: np.ndarray) -> None:
+        if len(ts_us) == 0:
+            return
+        # Keep only rows that advance the clock (vs. the newest stored row and each other)
+        last = self._ts[(self._count - 1) % self.size] if self._count else np.iinfo(np.int64).min
+        keep = ts_us >= np.maximum.accumulate(np.concatenate(([last], ts_us)))[:-1]
+        self.late_rows += int((~keep).sum())
+        ts_us, prices = ts_us[keep][-self.size:], prices[keep][-self.size:]
+
+        slots = (self._count + np.arange(len(ts_us))) % self.size
+        for offset in (0, self.size):
+            self._ts[slots + offset] = ts_us
+            self._price[slots + offset] = prices
+        self._count += len(ts_us)
+
+    def view(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(ts_us, price) of the stored rows, oldest first (read-only views)."""
+        n = len(self)
+        start = self._count % self.size if self._count >= self.size else 0
+        ts, price = self._ts[start:start + n], self._price[start:start + n]
+        ts.flags.writeable = False
+        price.flags.writeable = False
+        return ts, price
+
+
+def _window_mean(ts: np.ndarray, price: np.ndarray, lo_us: int, hi_us: int) -> Optional[float]:
+    """Average price of rows with lo <= ts <= hi (None if there are none)."""
+    i = int(np.searchsorted(ts, lo_us, side="left"))
+    j = int(np.searchsorted(ts, hi_us, side="right"))
+    return float(price[i:j].mean()) if j > i else None
+
+
+# =============================================================================
+# SERVICE
+# =============================================================================
+
+class PriceService:
+    """Latest SOL prices and open price cycles, shared by everything in this process."""
+
+    def __init__(self, size: int = RING_SIZE,
+                 refresh_interval: float = REFRESH_INTERVAL_SECONDS,
+                 cycle_refresh_interval: float = CYCLE_REFRESH_SECONDS) -> None:
+        self.size = size
+        self.refresh_interval = refresh_interval
+        self.cycle_refresh_interval = cycle_refresh_interval
+        self._lock = threading.RLock()
+        self._stats = {"hits": 0, "misses": 0, "refreshes": 0,
+                       "rows_loaded": 0, "refresh_errors": 0}
+        self._reset()
+
+    def _reset(self) -> None:
+        self._ring = PriceRing(self.size)
+        self._watermark = 0
+        self._floor_us: Optional[int] = None     # no complete data before this
+        self._cycles: Dict[float, Dict[str, Any]] = {}
+        self._cycles_loaded_at: Optional[float] = None
+        self._last_refresh = 0.0
+        self._ready = False
+
+    # -------------------------------------------------------------------------
+    # Refresh
+    # -------------------------------------------------------------------------
+
+    def _load_prices(self, cursor) -> int:
+        """Append SOL rows past the id watermark (the first load backfills one ring)."""
+        cutoff = _utcnow() - timedelta(seconds=self.size)
+        if self._floor_us is None:
+            self._floor_us = _to_us(cutoff)
+        loaded = 0
+        while True:
+            cursor.execute(f"""
+                SELECT id, timestamp AS ts, price
+                FROM prices
+                WHERE id > %s AND token = %s AND timestamp >= %s
+                ORDER BY id
+                LIMIT {_LOAD_BATCH}
+            """, [self._watermark, TOKEN, cutoff])
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            self._watermark = int(rows[-1]["id"])
+            self._ring.append(
+                np.array([r["ts"] for r in rows], dtype="datetime64[us]").astype(np.int64),
+                np.array([r["price"] for r in rows], dtype=np.float64),
+            )
+            loaded += len(rows)
+            if len(rows) < _LOAD_BATCH:
+                break
+        return loaded
+
+    def _load_cycles(self, cursor) -> None:
+        cursor.execute("""
+            SELECT DISTINCT ON (threshold)
+                   id, threshold, cycle_start_time, sequence_start_price
+            FROM cycle_tracker
+            WHERE cycle_end_time IS NULL
+            ORDER BY threshold, id DESC
+        """)
+        cycles = {}
+        for row in cursor.fetchall():
+            cycle = dict(row)
+            cycle["threshold"] = float(cycle["threshold"])
+            if cycle.get("sequence_start_price") is not None:
+                cycle["sequence_start_price"] = float(cycle["sequence_start_price"])
+            cycles[_threshold_key(cycle["threshold"])] = cycle
+        self._cycles = cycles
+        self._cycles_loaded_at = time.monotonic()
+
+    def _refresh(self) -> None:
+        with get_postgres() as conn:
+            with conn.cursor() as cursor:
+                loaded = self._load_prices(cursor)
+        self._last_refresh = time.monotonic()
+        self._ready = True
+        self._stats["refreshes"] += 1
+        self._stats["rows_loaded"] += loaded
+
+    def _fresh(self, max_age: Optional[float] = None) -> bool:
+        """Pull new prices if older than max_age (default: refresh_interval);
+        False when the service cannot answer right now."""
+        max_age = self.refresh_interval if max_age is None else max_age
+        if time.monotonic() - self._last_refresh >= max_age or not self._ready:
+            try:
+                self._refresh()
+            except Exception as e:
+                logger.warning(f"Price service refresh failed, using SQL: {e}")
+                self._stats["refresh_errors"] += 1
+                self._reset()
+                return False
+        return True
+
+    def _fresh_cycles(self) -> bool:
+        """Reload the open cycles if older than cycle_refresh_interval.
+
+        Independent of new ticks: create_price_cycles closes a cycle after its
+        tick is already in `prices`, so a quiet feed proves nothing.
+        """
+        loaded_at = self._cycles_loaded_at
+        if loaded_at is None or time.monotonic() - loaded_at >= self.cycle_refresh_interval:
+            try:
+                with get_postgres() as conn:
+                    with conn.cursor() as cursor:
+                        self._load_cycles(cursor)
+            except Exception as e:
+                logger.warning(f"Price service cycle refresh failed, using SQL: {e}")
+                self._stats["refresh_errors"] += 1
+                self._cycles, self._cycles_loaded_at = {}, None
+                return False
+        return True
+
+    def _prices(self, max_age: Optional[float] = None) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        if not self._fresh(max_age) or len(self._ring) == 0:
+            self._stats["misses"] += 1
+            return None
+        self._stats["hits"] += 1
+        return self._ring.view()
+
+    def _covered_from(self, ts: np.ndarray) -> int:
+        """Oldest timestamp from which the buffer holds every row."""
+        floor = self._floor_us if self._floor_us is not None else int(ts[0])
+        return max(floor, int(ts[0])) if len(self._ring) == self._ring.size else floor
+
+    def _price_ago(self, ts: np.ndarray, price: np.ndarray, seconds: float,
+                   match_seconds: float) -> Optional[float]:
+        target = int(ts[-1] - seconds * _US)
+        lo, hi = int(target - match_seconds * _US), int(target + match_seconds * _US)
+        if lo < self._covered_from(ts):
+            return None
+        return _window_mean(ts, price, lo, hi)
+
+    # -------------------------------------------------------------------------
+    # Lookups
+    # -------------------------------------------------------------------------
+
+    def latest(self, max_age: Optional[float] = None) -> Optional[Tuple[datetime, float]]:
+        """(timestamp, price) of the newest SOL tick.
+
+        max_age: seconds since the last pull from `prices` the caller accepts
+        (default refresh_interval); 0 fetches past the watermark on every call.
+        """
+        with self._lock:
+            data = self._prices(max_age)
+            if data is None:
+                return None
+            ts, price = data
+            return _from_us(ts[-1]), float(price[-1])
+
+    def latest_price(self, max_age: Optional[float] = None) -> Optional[float]:
+        latest = self.latest(max_age)
+        return latest[1] if latest else None
+
+    def price_ago(self, seconds: float,
+                  match_seconds: float = MOMENTUM_MATCH_SECONDS) -> Optional[float]:
+        """
+        Average price within +/- match_seconds of `seconds` before the newest
+        tick; None when no tick falls in that window (or it predates the ring).
+        """
+        with self._lock:
+            data = self._prices()
+            if data is None:
+                return None
+            return self._price_ago(data[0], data[1], seconds, match_seconds)
+
+    def return_pct(self, seconds: float,
+                   match_seconds: float = MOMENTUM_MATCH_SECONDS) -> Optional[float]:
+        """% change from the price `seconds` ago (see price_ago) to the newest tick."""
+        with self._lock:
+            data = self._prices()
+            if data is None:
+                return None
+            ts, price = data
+            past = self._price_ago(ts, price, seconds, match_seconds)
+            if not past:
+                return None
+            return (float(price[-1]) - past) / past * 100
+
+    def momentum(self) -> Optional[Dict[str, float]]:
+        """
+        pm_price_change_30s / _1m / _5m and pm_velocity_30s (% units), as
+        pump_signal_logic computes them from the last 6 minutes of prices:
+        a horizon without a matching tick counts as 0.0; None when fewer
+        than two ticks arrived in the last 6 minutes.
+        """
+        with self._lock:
+            data = self._prices()
+            if data is None:
+                return None
+            ts, price = data
+            first = int(np.searchsorted(ts, _to_us(_utcnow()) - MOMENTUM_LOOKBACK_SECONDS * _US))
+            ts, price = ts[first:], price[first:]
+            if len(ts) < 2:
+                return None
+
+            p_now = float(price[-1])
+            changes = {}
+            for seconds in (30, 60, 300):
+                target = int(ts[-1] - seconds * _US)
+                past = _window_mean(ts, price, target - MOMENTUM_MATCH_SECONDS * _US,
+                                    target + MOMENTUM_MATCH_SECONDS * _US)
+                changes[seconds] = (p_now - past) / past * 100 if past else 0.0
+            return {
+                'pm_price_change_30s': changes[30],
+                'pm_price_change_1m':  changes[60],
+                'pm_price_change_5m':  changes[300],
+                'pm_velocity_30s':     changes[60] - changes[300],
+            }
+
+    def active_cycle(self, threshold: float = 0.3) -> Optional[Dict[str, Any]]:
+        """Open cycle_tracker row for `threshold` (a copy), or None."""
+        with self._lock:
+            if not self._fresh_cycles():
+                self._stats["misses"] += 1
+                return None
+            cycle = self._cycles.get(_threshold_key(threshold))
+            self._stats["hits" if cycle else "misses"] += 1
+            return dict(cycle) if cycle else None
+
+    def active_cycle_id(self, threshold: float = 0.3) -> Optional[int]:
+        cycle = self.active_cycle(threshold)
+        return int(cycle["id"]) if cycle else None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out = dict(self._stats)
+            lookups = out["hits"] + out["misses"]
+            out["hit_rate"] = round(out["hits"] / lookups, 4) if lookups else 0.0
+            out["rows_cached"] = len(self._ring)
+            out["late_rows"] = self._ring.late_rows
+            out["open_cycles"] = sorted(self._cycles)
+            return out
+
+
+# =============================================================================
+# SINGLETON
+# =============================================================================
+
+_service: Optional[PriceService] = None
+_service_lock = threading.Lock()
+
+
+def get_price_service() -> Optional[PriceService]:
+    """Process-wide service, or None when disabled via PRICE_SERVICE=0."""
+    global _service
+    if not SERVICE_ENABLED:
+        return None
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = PriceService()
+    return _service
+
+
+def get_price_service_stats() -> Dict[str, Any]:
+    """Hit/miss counters of the process-wide service (empty when disabled)."""
+    service = get_price_service()
+    return service.stats() if service else {}
@@ -29,6 +29,7 @@ Writer side (call from the process that owns the file):
     ob.append(ts, mid_price, spread_bps, ...)   # non-blocking, auto-flushes
     trade.append_trade(ts, sol_amount, ...)
     trade.append_whale(ts, sol_moved, ...)
+    trade.append_trades([{...}, ...])           # whole webhook batch, one flush
 
 Reader side (fingerprint, train_validator):
 
@@ -38,10 +39,21 @@ Reader side (fingerprint, train_validator):
     df  = con.execute("SELECT ... FROM ob.ob_snapshots WHERE ...").df()
     con.close()
 
+Window reads for research jobs (signal_discovery_engine):
+
+    from core.raw_data_cache import OB_PARQUET, snapshot_covers, read_snapshot
+
+    if snapshot_covers(OB_PARQUET, since, until):
+        tbl = read_snapshot(OB_PARQUET, "ts AS timestamp, spread_bps", since)
+
 Feature helper (used in check_pump_signal every 5 s):
 
     from core.raw_data_cache import get_live_features
     feats = get_live_features(window_min=5)   # returns dict or None
+
+get_live_features() is served by a process-wide LiveFeatureEngine that keeps
+only the last few minutes of rows in memory and tails the Parquet snapshots
+incrementally, instead of reloading all 96 h on every call.
 """
 
 from __future__ import annotations
@@ -54,6 +66,7 @@ from pathlib import Path
 from typing import Any, Dict, List, Optional
 
 import duckdb
+import numpy as np
 import pyarrow as pa
 
 logger = logging.getLogger(__name__)
@@ -77,6 +90,9 @@ RETENTION_HOURS = 96
 _FLUSH_ROWS    = 10     # flush after this many buffered rows
 _FLUSH_SECS    = 10.0   # flush after this many seconds even if buffer not full
 _PARQUET_SECS  = 15.0   # re-export Parquet snapshot every N seconds
+# Small row groups let readers that filter on ts (LiveFeatureEngine) skip
+# everything but the newest groups via Parquet min/max statistics.
+_PARQUET_ROW_GROUP = 16384
 
 
 # =============================================================================
@@ -170,7 +186,8 @@ class _BaseCache:
 
             # Step 1: export fresh DuckDB rows
             self._con.execute(
-                f"COPY (SELECT * FROM {table} WHERE ts >= ?) TO '{new_tmp}' (FORMAT PARQUET)",
+                f"COPY (SELECT * FROM {table} WHERE ts >= ? ORDER BY ts) TO '{new_tmp}' "
+                f"(FORMAT PARQUET, ROW_GROUP_SIZE {_PARQUET_ROW_GROUP})",
                 [cutoff]
             )
 
@@ -200,7 +217,8 @@ class _BaseCache:
                             import pyarrow.compute as pc
                             order = pc.sort_indices(merged, sort_keys=[('ts', 'ascending')])
                             merged = merged.take(order)
-                            pq.write_table(merged, str(tmp), compression='snappy')
+                            pq.write_table(merged, str(tmp), compression='snappy',
+                                           row_group_size=_PARQUET_ROW_GROUP)
                             if new_tmp.exists():
                                 new_tmp.unlink(missing_ok=True)
                             tmp.replace(parquet_path)
@@ -366,11 +384,18 @@ class TradeCache(_BaseCache):
         direction:  str,
         is_perp:    bool = False,
     ) -> None:
-        row = dict(ts=ts, sol_amount=float(sol_amount), stable_amt=float(stable_amt),
-                   price=float(price), direction=direction, is_perp=is_perp)
+        self.append_trades([dict(ts=ts, sol_amount=sol_amount, stable_amt=stable_amt,
+                                 price=price, direction=direction, is_perp=is_perp)])
+
+    def append_trades(self, rows: List[dict]) -> None:
+        """Append a batch of trades (keys as append_trade) under one lock / flush."""
+        rows = [dict(ts=r['ts'], sol_amount=float(r['sol_amount']),
+                     stable_amt=float(r['stable_amt']), price=float(r['price']),
+                     direction=r['direction'], is_perp=r.get('is_perp', False))
+                for r in rows]
         now = time.monotonic()
         with self._lock:
-            self._buffer.append(row)
+            self._buffer.extend(rows)
             should_flush = (
                 len(self._buffer) >= _FLUSH_ROWS
                 or (now - self._last_flush) >= _FLUSH_SECS
@@ -393,11 +418,17 @@ class TradeCache(_BaseCache):
         significance: Optional[float] = None,
         pct_moved:    Optional[float] = None,
     ) -> None:
-        row = dict(ts=ts, sol_moved=float(sol_moved), direction=direction,
-                   significance=significance, pct_moved=pct_moved)
+        self.append_whales([dict(ts=ts, sol_moved=sol_moved, direction=direction,
+                                 significance=significance, pct_moved=pct_moved)])
+
+    def append_whales(self, rows: List[dict]) -> None:
+        """Append a batch of whale events (keys as append_whale) under one lock / flush."""
+        rows = [dict(ts=r['ts'], sol_moved=float(r['sol_moved']), direction=r['direction'],
+                     significance=r.get('significance'), pct_moved=r.get('pct_moved'))
+                for r in rows]
         now = time.monotonic()
         with self._lock:
-            self._whale_buffer.append(row)
+            self._whale_buffer.extend(rows)
             should_flush = (
                 len(self._whale_buffer) >= _FLUSH_ROWS
                 or (now - self._whale_last_flush) >= _FLUSH_SECS
@@ -466,6 +497,65 @@ def open_reader() -> duckdb.DuckDBPyConnection:
     return con
 
 
+def snapshot_span(parquet_path: Path) -> Optional[tuple]:
+    """(min ts, max ts) of a Parquet snapshot, from its row-group statistics;
+    None when the file is missing, empty or unreadable."""
+    if not parquet_path.exists():
+        return None
+    con = duckdb.connect(":memory:")
+    try:
+        row = con.execute(
+            f"SELECT epoch_us(MIN(ts)), epoch_us(MAX(ts)) FROM '{parquet_path}'"
+        ).fetchone()
+    except duckdb.Error as e:
+        logger.debug(f"[raw_cache] snapshot span {parquet_path.name}: {e}")
+        return None
+    finally:
+        con.close()
+    if not row or row[0] is None:
+        return None
+    return tuple(datetime.fromtimestamp(us / 1e6, tz=timezone.utc) for us in row)
+
+
+def snapshot_covers(
+    parquet_path: Path,
+    since: datetime,
+    until: datetime,
+    slack: timedelta = timedelta(minutes=2),
+) -> bool:
+    """
+    True when the snapshot holds rows from `since` up to `until` (tz-aware),
+    give or take `slack` at both ends (writer start-up, export interval).
+    """
+    span = snapshot_span(parquet_path)
+    return span is not None and span[0] <= since + slack and span[1] >= until - slack
+
+
+def read_snapshot(
+    parquet_path: Path,
+    select_sql: str,
+    since: datetime,
+    until: Optional[datetime] = None,
+) -> pa.Table:
+    """
+    Rows of a Parquet snapshot with since <= ts (< until), ordered by ts.
+
+    `select_sql` is the projection (e.g. "ts AS timestamp, vol_imb AS
+    volume_imbalance"); only the columns it names are read, and row groups
+    outside the window are skipped via their ts statistics.
+    """
+    sql = f"SELECT {select_sql} FROM '{parquet_path}' WHERE ts >= ?"
+    params: List[Any] = [since]
+    if until is not None:
+        sql += " AND ts < ?"
+        params.append(until)
+    con = duckdb.connect(":memory:")
+    try:
+        return con.execute(sql + " ORDER BY ts", params).fetch_arrow_table()
+    finally:
+        con.close()
+
+
 # =============================================================================
 # LIVE FEATURE COMPUTATION  (used by check_pump_signal every 5 s)
 # =============================================================================
@@ -473,13 +563,30 @@ def open_reader() -> duckdb.DuckDBPyConnection:
 # Lock for get_live_features (called every 5 s from train_validator)
 _reader_lock = threading.Lock()
 
+# Column order returned by get_live_features() (both the engine and SQL paths)
+_LIVE_FEATURE_COLS = [
+    'ob_n',
+    'ob_avg_vol_imb', 'ob_avg_depth_ratio',
+    'ob_avg_spread_bps', 'ob_net_liq_change', 'ob_bid_ask_ratio',
+    'ob_imb_1m', 'ob_depth_1m', 'ob_bid_ask_1m',
+    'ob_imb_trend', 'ob_depth_trend', 'ob_liq_accel',
+    'ob_slope_ratio', 'ob_depth_5bps_ratio', 'ob_microprice_dev',
+    'tr_n', 'tr_total_sol', 'tr_buy_ratio',
+    'tr_large_ratio', 'tr_avg_size', 'tr_buy_accel',
+    'wh_n', 'wh_net_flow', 'wh_inflow_ratio', 'wh_large_count',
+    'wh_avg_pct_moved', 'wh_urgency_ratio',
+    # Price momentum — must match mega_simulator FEATURES list exactly
+    'pm_price_change_30s', 'pm_price_change_1m',
+    'pm_price_change_5m', 'pm_velocity_30s',
+]
+
 
 def _get_fresh_reader() -> duckdb.DuckDBPyConnection:
     """Open a fresh in-memory connection from Parquet snapshots.
 
-    Parquet files are updated every ~15 s by the writer processes.
-    Opening a fresh in-memory DuckDB each call takes ~2 ms for 24h of data
-    — well within the 5-second budget for train_validator.
+    Only used by the SQL reference path (_get_live_features_sql); the live
+    path reads through LiveFeatureEngine instead of copying all 96 h of
+    snapshots into DuckDB on every call.
     """
     return open_reader()
 
@@ -491,13 +598,36 @@ def get_live_features(window_min: int = 5) -> Optional[Dict[str, Any]]:
 
     Returns a dict of float features, or None if insufficient data.
     Called every 5 seconds by train_validator / check_pump_signal.
+
+    Served by a process-wide LiveFeatureEngine that tails the Parquet
+    snapshots incrementally; results match _get_live_features_sql().
     """
+    try:
+        with _reader_lock:
+            return get_live_feature_engine(window_min).compute(window_min)
+    except Exception as e:
+        logger.error(f"[raw_cache] get_live_features error: {e}")
+        return None
+
+
+def _get_live_features_sql(
+    window_min: int = 5,
+    now: Optional[datetime] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Reference implementation of get_live_features(): loads the full Parquet
+    snapshots into DuckDB and runs one CTE query. Kept for parity checks
+    (scripts/check_live_feature_parity.py) — too slow for the 5 s loop.
+    """
+    if now is None:
+        now = datetime.now(timezone.utc)
+    con = None
     try:
         with _reader_lock:
             con = _get_fresh_reader()
             win_sec = window_min * 60
             row = con.execute(f"""
-                WITH now AS (SELECT NOW() AS t),
+                WITH now AS (SELECT ?::TIMESTAMPTZ AS t),
 
                 ob_feats AS (
                     SELECT
@@ -610,38 +740,456 @@ def get_live_features(window_min: int = 5) -> Optional[Dict[str, Any]]:
                             - (pnow.p - p5m.p) / p5m.p * 100 ELSE 0 END      AS pm_velocity_30s
                 FROM ob_feats o, trade_feats t, whale_feats w,
                      price_now pnow, price_30s p30s, price_1m p1m, price_5m p5m
-            """).fetchone()
+            """, [now]).fetchone()
 
         con.close()
         if row is None or row[0] < 3:  # need at least 3 OB snapshots
             return None
 
-        cols = [
-            'ob_n',
-            'ob_avg_vol_imb', 'ob_avg_depth_ratio',
-            'ob_avg_spread_bps', 'ob_net_liq_change', 'ob_bid_ask_ratio',
-            'ob_imb_1m', 'ob_depth_1m', 'ob_bid_ask_1m',
-            'ob_imb_trend', 'ob_depth_trend', 'ob_liq_accel',
-            'ob_slope_ratio', 'ob_depth_5bps_ratio', 'ob_microprice_dev',
-            'tr_n', 'tr_total_sol', 'tr_buy_ratio',
-            'tr_large_ratio', 'tr_avg_size', 'tr_buy_accel',
-            'wh_n', 'wh_net_flow', 'wh_inflow_ratio', 'wh_large_count',
-            'wh_avg_pct_moved', 'wh_urgency_ratio',
-            # Price momentum — must match mega_simulator FEATURES list exactly
-            'pm_price_change_30s', 'pm_price_change_1m',
-            'pm_price_change_5m', 'pm_velocity_30s',
-        ]
-        return dict(zip(cols, row))
+        return dict(zip(_LIVE_FEATURE_COLS, row))
 
     except Exception as e:
-        logger.error(f"[raw_cache] get_live_features error: {e}")
+        logger.error(f"[raw_cache] _get_live_features_sql error: {e}")
         try:
-            con.close()
+            if con is not None:
+                con.close()
         except Exception:
             pass
         return None
 
 
+# =============================================================================
+# INCREMENTAL LIVE FEATURE ENGINE
+# =============================================================================
+#
+# get_live_features() used to copy all 96 h of Parquet snapshots into a fresh
+# DuckDB on every call. The engine below keeps only the last few minutes of
+# rows in memory, tails each Parquet file by max ts when its mtime changes,
+# and keeps prefix sums per derived column so every window aggregate is two
+# array lookups. Window predicates reproduce the SQL's
+# EPOCH(now) - EPOCH(ts) comparisons exactly (same float64 arithmetic).
+
+_ENGINE_BUFFER_MIN  = 10      # minutes of rows kept in memory (≥ window + price lookback)
+_ENGINE_LATE_SECS   = 60.0    # re-read this much overlap per tail (late / out-of-order rows)
+_ENGINE_RESYNC_SECS = 300.0   # full re-read of the buffer span every N seconds
+_PM_LOOKBACK_SECS   = 305     # oldest pm_* price window (295–305 s)
+
+_OB_ENGINE_COLS = [
+    'ts', 'mid_price', 'spread_bps', 'bid_liq', 'ask_liq', 'vol_imb',
+    'depth_ratio', 'microprice_dev', 'net_liq_1s', 'bid_slope', 'ask_slope',
+    'bid_dep_5bps', 'ask_dep_5bps',
+]
+_TRADE_ENGINE_COLS = ['ts', 'sol_amount', 'direction']
+_WHALE_ENGINE_COLS = ['ts', 'sol_moved', 'direction', 'significance', 'pct_moved']
+
+
+def _np_col(tbl: pa.Table, name: str) -> tuple:
+    """Return (values, valid) NumPy arrays; nulls and non-finite values → invalid."""
+    import pyarrow.compute as pc
+    col = tbl.column(name)
+    vals = np.array(pc.fill_null(col, 0.0).to_numpy(), dtype='float64')
+    valid = np.array(col.is_valid().to_numpy(), dtype=bool) & np.isfinite(vals)
+    vals[~valid] = 0.0
+    return vals, valid
+
+
+def _np_in(tbl: pa.Table, name: str, values: List[str]) -> np.ndarray:
+    """Boolean mask of `name IN (values)`; NULL → False (SQL CASE semantics)."""
+    import pyarrow.compute as pc
+    mask = pc.is_in(tbl.column(name), value_set=pa.array(values))
+    return np.array(pc.fill_null(mask, False).to_numpy(), dtype=bool)
+
+
+def _safe_div(num, den, num_ok, den_ok):
+    """SQL `num / NULLIF(den, 0)` on arrays → (values, valid)."""
+    valid = num_ok & den_ok & (den != 0)
+    out = np.zeros(len(num), dtype='float64')
+    np.divide(num, den, out=out, where=valid)
+    return out, valid
+
+
+def _derive_ob(tbl: pa.Table) -> Dict[str, tuple]:
+    """Per-row quantities aggregated by the ob_* / pm_* features."""
+    c = {name: _np_col(tbl, name) for name in _OB_ENGINE_COLS[1:]}
+    n = tbl.num_rows
+    bid_slope, bid_slope_ok = c['bid_slope']
+    ask_slope, ask_slope_ok = c['ask_slope']
+    return {
+        'n':              (np.ones(n), np.ones(n, dtype=bool)),
+        'vol_imb':        c['vol_imb'],
+        'depth_ratio':    c['depth_ratio'],
+        'spread_bps':     c['spread_bps'],
+        'net_liq_1s':     c['net_liq_1s'],
+        'microprice_dev': c['microprice_dev'],
+        'mid_price':      c['mid_price'],
+        'bid_ask':        _safe_div(c['bid_liq'][0], c['ask_liq'][0],
+                                    c['bid_liq'][1], c['ask_liq'][1]),
+        'slope_ratio':    _safe_div(bid_slope, np.abs(ask_slope), bid_slope_ok, ask_slope_ok),
+        'dep_5bps':       _safe_div(c['bid_dep_5bps'][0], c['ask_dep_5bps'][0],
+                                    c['bid_dep_5bps'][1], c['ask_dep_5bps'][1]),
+    }
+
+
+def _derive_trades(tbl: pa.Table) -> Dict[str, tuple]:
+    """Per-row quantities aggregated by the tr_* features."""
+    sol, sol_ok = _np_col(tbl, 'sol_amount')
+    is_buy = _np_in(tbl, 'direction', ['buy'])
+    n = tbl.num_rows
+    ones = np.ones(n, dtype=bool)
+    large = sol_ok & (sol > 50)
+    return {
+        'n':     (np.ones(n), ones),
+        'sol':   (sol, sol_ok),
+        # CASE WHEN direction='buy' THEN sol_amount ELSE 0 END
+        'buy':   (np.where(is_buy, sol, 0.0), ~is_buy | sol_ok),
+        # CASE WHEN sol_amount > 50 THEN sol_amount ELSE 0 END (NULL → ELSE)
+        'large': (np.where(large, sol, 0.0), ones),
+    }
+
+
+def _derive_whales(tbl: pa.Table) -> Dict[str, tuple]:
+    """Per-row quantities aggregated by the wh_* features."""
+    moved, moved_ok = _np_col(tbl, 'sol_moved')
+    sig, sig_ok = _np_col(tbl, 'significance')
+    pct, pct_ok = _np_col(tbl, 'pct_moved')
+    is_in = _np_in(tbl, 'direction', ['in', 'receiving'])
+    is_out = _np_in(tbl, 'direction', ['out', 'sending'])
+    n = tbl.num_rows
+    ones = np.ones(n, dtype=bool)
+    moved = np.abs(moved)
+    return {
+        'n':      (np.ones(n), ones),
+        'abs':    (moved, moved_ok),
+        'in':     (np.where(is_in, moved, 0.0), ~is_in | moved_ok),
+        'out':    (np.where(is_out, moved, 0.0), ~is_out | moved_ok),
+        'large':  ((sig_ok & (sig > 0.5)).astype('float64'), ones),
+        'pct':    (pct, pct_ok),
+        'urgent': ((pct_ok & (pct > 50)).astype('float64'), ones),
+    }
+
+
+class _PrefixBuffer:
+    """
+    Time-ordered column buffer with running prefix sums.
+
+    Rows are appended in ts order; for every derived column we keep the raw
+    values, a validity flag, and cumulative sums of both, so SUM / COUNT over
+    any contiguous index range is O(1). Appends cost O(new rows). Rows older
+    than the retention span are dropped by compaction when capacity runs out
+    (which also re-bases the prefix sums, so float error never accumulates).
+    """
+
+    def __init__(self, names: List[str], capacity: int = 4096) -> None:
+        self._names = names
+        self._cap   = capacity
+        self.n      = 0
+        self.head   = 0
+        self.ts_us  = np.zeros(capacity, dtype='int64')
+        self.ts_s   = np.zeros(capacity, dtype='float64')
+        self._vals  = {k: np.zeros(capacity) for k in names}
+        self._ok    = {k: np.zeros(capacity, dtype=bool) for k in names}
+        self._csum  = {k: np.zeros(capacity + 1) for k in names}
+        self._ccnt  = {k: np.zeros(capacity + 1, dtype='int64') for k in names}
+
+    @property
+    def max_ts_us(self) -> Optional[int]:
+        return int(self.ts_us[self.n - 1]) if self.n > self.head else None
+
+    def clear(self) -> None:
+        self.n = self.head = 0
+
+    def truncate_from(self, ts_us: int) -> None:
+        """Drop every row with ts >= ts_us (prefix sums below stay valid)."""
+        i = int(np.searchsorted(self.ts_us[self.head:self.n], ts_us, side='left'))
+        self.n = self.head + i
+
+    def evict_before(self, ts_us: int) -> None:
+        """Mark rows older than ts_us as expired (reclaimed on next compaction)."""
+        self.head += int(np.searchsorted(self.ts_us[self.head:self.n], ts_us, side='left'))
+
+    def append(self, ts_us, cols: Dict[str, tuple]) -> None:
+        """Append ts-sorted rows; `cols` maps name → (values, valid)."""
+        m = len(ts_us)
+        if m == 0:
+            return
+        if self.n + m > self._cap:
+            self._compact(m)
+        a, b = self.n, self.n + m
+        self.ts_us[a:b] = ts_us
+        # DuckDB EPOCH(TIMESTAMPTZ) = micros / 1e6 as DOUBLE
+        self.ts_s[a:b] = ts_us / 1e6
+        for k in self._names:
+            vals, ok = cols[k]
+            self._vals[k][a:b] = vals
+            self._ok[k][a:b] = ok
+            self._csum[k][a + 1:b + 1] = self._csum[k][a] + np.cumsum(vals)
+            self._ccnt[k][a + 1:b + 1] = self._ccnt[k][a] + np.cumsum(ok)
+        self.n = b
+
+    def _compact(self, incoming: int) -> None:
+        """Drop expired rows, grow if still at least half full, re-base sums."""
+        keep = self.n - self.head
+        cap = self._cap
+        while keep + incoming > cap // 2:
+            cap *= 2
+        src = slice(self.head, self.n)
+
+        ts_us = np.zeros(cap, dtype='int64')
+        ts_us[:keep] = self.ts_us[src]
+        ts_s = np.zeros(cap, dtype='float64')
+        ts_s[:keep] = self.ts_s[src]
+        self.ts_us, self.ts_s = ts_us, ts_s
+        for k in self._names:
+            vals = np.zeros(cap)
+            vals[:keep] = self._vals[k][src]
+            ok = np.zeros(cap, dtype=bool)
+            ok[:keep] = self._ok[k][src]
+            csum = np.zeros(cap + 1)
+            csum[1:keep + 1] = np.cumsum(vals[:keep])
+            ccnt = np.zeros(cap + 1, dtype='int64')
+            ccnt[1:keep + 1] = np.cumsum(ok[:keep])
+            self._vals[k], self._ok[k], self._csum[k], self._ccnt[k] = vals, ok, csum, ccnt
+        self._cap, self.head, self.n = cap, 0, keep
+
+    def index(self, now_s: float, age: float, strict: bool) -> int:
+        """First row index where `now_s - ts_s < age` (strict) or `<= age`."""
+        ts = self.ts_s[self.head:self.n]
+        i = int(np.searchsorted(ts, now_s - age, side='right' if strict else 'left'))
+        # searchsorted works on `ts >= now - age`; nudge to the exact float
+        # predicate the SQL evaluates (`EPOCH(now) - EPOCH(ts) <= age`).
+        ok = (lambda d: d < age) if strict else (lambda d: d <= age)
+        while i > 0 and ok(now_s - ts[i - 1]):
+            i -= 1
+        while i < len(ts) and not ok(now_s - ts[i]):
+            i += 1
+        return self.head + i
+
+    def window(self, now_s: float, max_age: float, min_age: float = 0.0):
+        """Index range of rows with min_age <= now - ts <= max_age."""
+        lo = self.index(now_s, max_age, strict=False)
+        hi = self.index(now_s, min_age, strict=True)
+        return lo, max(lo, hi)
+
+    def total(self, name: str, lo: int, hi: int):
+        """(SUM of valid values, COUNT of valid values) over rows [lo, hi)."""
+        return (float(self._csum[name][hi] - self._csum[name][lo]),
+                int(self._ccnt[name][hi] - self._ccnt[name][lo]))
+
+    def sql_sum(self, name: str, lo: int, hi: int) -> Optional[float]:
+        s, c = self.total(name, lo, hi)
+        return s if c else None
+
+    def sql_avg(self, name: str, lo: int, hi: int) -> Optional[float]:
+        s, c = self.total(name, lo, hi)
+        return s / c if c else None
+
+
+class _ParquetTail:
+    """Tails one Parquet snapshot into a _PrefixBuffer by max ts."""
+
+    def __init__(self, path: Path, columns: List[str], derive, names: List[str]) -> None:
+        self.path     = path
+        self.columns  = columns
+        self.derive   = derive
+        self.buf      = _PrefixBuffer(names)
+        self._mtime   = None
+        self._resync  = 0.0
+
+    def refresh(self, now_us: int, span_us: int, force: bool = False) -> int:
+        """Read rows newer than the watermark if the snapshot changed. Returns rows read."""
+        import pyarrow.parquet as pq
+        import pyarrow.compute as pc
+        try:
+            mtime = self.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return 0
+        mono = time.monotonic()
+        full = force or mono >= self._resync
+        if mtime == self._mtime and not full:
+            return 0
+
+        floor_us = now_us - span_us
+        wm = self.buf.max_ts_us
+        if full or wm is None:
+            since_us = floor_us
+            self._resync = mono + _ENGINE_RESYNC_SECS
+        else:
+            since_us = max(floor_us, wm - int(_ENGINE_LATE_SECS * 1e6))
+
+        since = datetime.fromtimestamp(since_us / 1e6, tz=timezone.utc)
+        tbl = pq.read_table(str(self.path), columns=self.columns,
+                            filters=[('ts', '>=', since)])
+        self._mtime = mtime
+        if tbl.num_rows:
+            tbl = tbl.sort_by('ts')
+        ts_us = pc.cast(tbl.column('ts'), pa.int64()).to_numpy() if tbl.num_rows else []
+        if full:
+            self.buf.clear()
+        else:
+            self.buf.truncate_from(since_us)
+        # pyarrow filters on the tz-aware datetime (µs precision) — drop any
+        # rows below since_us so the overlap never duplicates buffered rows
+        if tbl.num_rows:
+            keep = ts_us >= since_us
+            if not keep.all():
+                tbl, ts_us = tbl.filter(pa.array(keep)), ts_us[keep]
+        self.buf.append(ts_us, self.derive(tbl))
+        self.buf.evict_before(floor_us)
+        return tbl.num_rows
+
+
+class LiveFeatureEngine:
+    """
+    Long-lived replacement for the per-call DuckDB query in get_live_features().
+
+    Keeps the last `buffer_min` minutes of OB / trade / whale rows in memory,
+    tails the Parquet snapshots incrementally (by max ts, only when the file
+    changed), and answers every ob_* / tr_* / wh_* / pm_* feature from prefix
+    sums — a call costs microseconds instead of a 96 h table scan.
+
+    Usage:
+        engine = LiveFeatureEngine()
+        feats  = engine.compute(window_min=5)     # same dict as get_live_features()
+    """
+
+    def __init__(
+        self,
+        buffer_min:    int  = _ENGINE_BUFFER_MIN,
+        ob_path:       Path = OB_PARQUET,
+        trade_path:    Path = TRADE_PARQUET,
+        whale_path:    Path = WHALE_PARQUET,
+    ) -> None:
+        self.buffer_min = buffer_min
+        self._span_us = int(max(buffer_min * 60, _PM_LOOKBACK_SECS) * 1e6
+                            + _ENGINE_LATE_SECS * 1e6)
+        self._ob    = _ParquetTail(ob_path, _OB_ENGINE_COLS, _derive_ob,
+                                   ['n', 'vol_imb', 'depth_ratio', 'spread_bps',
+                                    'net_liq_1s', 'microprice_dev', 'mid_price',
+                                    'bid_ask', 'slope_ratio', 'dep_5bps'])
+        self._trade = _ParquetTail(trade_path, _TRADE_ENGINE_COLS, _derive_trades,
+                                   ['n', 'sol', 'buy', 'large'])
+        self._whale = _ParquetTail(whale_path, _WHALE_ENGINE_COLS, _derive_whales,
+                                   ['n', 'abs', 'in', 'out', 'large', 'pct', 'urgent'])
+
+    def refresh(self, now: Optional[datetime] = None, force: bool = False) -> int:
+        """Pull new rows from all three snapshots. Returns total rows read."""
+        now_us = _to_us(now or datetime.now(timezone.utc))
+        return sum(src.refresh(now_us, self._span_us, force)
+                   for src in (self._ob, self._trade, self._whale))
+
+    def compute(
+        self,
+        window_min: int = 5,
+        now: Optional[datetime] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Return the get_live_features() dict for `window_min` minutes ending
+        at `now` (default: current time), or None if < 3 OB snapshots.
+        """
+        if window_min > self.buffer_min:
+            raise ValueError(f"window_min={window_min} exceeds buffer_min={self.buffer_min}")
+        now_us = _to_us(now or datetime.now(timezone.utc))
+        self.refresh(datetime.fromtimestamp(now_us / 1e6, tz=timezone.utc))
+        now_s = now_us / 1e6
+        win = float(window_min * 60)
+
+        ob, tr, wh = self._ob.buf, self._trade.buf, self._whale.buf
+
+        # ── order book ───────────────────────────────────────────────────────
+        lo, hi = ob.window(now_s, win)
+        ob_n = hi - lo
+        if ob_n < 3:  # need at least 3 OB snapshots
+            return None
+        lo1 = max(lo, ob.index(now_s, 60.0, strict=True))
+        f: Dict[str, Any] = {'ob_n': ob_n}
+        f['ob_avg_vol_imb']      = ob.sql_avg('vol_imb', lo, hi)
+        f['ob_avg_depth_ratio']  = ob.sql_avg('depth_ratio', lo, hi)
+        f['ob_avg_spread_bps']   = ob.sql_avg('spread_bps', lo, hi)
+        f['ob_net_liq_change']   = ob.sql_avg('net_liq_1s', lo, hi)
+        f['ob_bid_ask_ratio']    = ob.sql_avg('bid_ask', lo, hi)
+        f['ob_imb_1m']           = ob.sql_avg('vol_imb', lo1, hi)
+        f['ob_depth_1m']         = ob.sql_avg('depth_ratio', lo1, hi)
+        f['ob_bid_ask_1m']       = ob.sql_avg('bid_ask', lo1, hi)
+        f['ob_imb_trend']        = _sub(f['ob_imb_1m'], f['ob_avg_vol_imb'])
+        f['ob_depth_trend']      = _sub(f['ob_depth_1m'], f['ob_avg_depth_ratio'])
+        f['ob_liq_accel']        = _sub(f['ob_bid_ask_1m'], f['ob_bid_ask_ratio'])
+        f['ob_slope_ratio']      = ob.sql_avg('slope_ratio', lo, hi)
+        f['ob_depth_5bps_ratio'] = ob.sql_avg('dep_5bps', lo, hi)
+        f['ob_microprice_dev']   = ob.sql_avg('microprice_dev', lo, hi)
+
+        # ── trades ───────────────────────────────────────────────────────────
+        lo, hi = tr.window(now_s, win)
+        lo1 = max(lo, tr.index(now_s, 60.0, strict=True))
+        total = tr.sql_sum('sol', lo, hi)
+        f['tr_n']           = hi - lo
+        f['tr_total_sol']   = total
+        f['tr_buy_ratio']   = _div(tr.sql_sum('buy', lo, hi), total)
+        f['tr_large_ratio'] = _div(tr.sql_sum('large', lo, hi), total)
+        f['tr_avg_size']    = tr.sql_avg('sol', lo, hi)
+        f['tr_buy_accel']   = _div(tr.sql_avg('buy', lo1, hi), tr.sql_avg('buy', lo, hi))
+
+        # ── whales ───────────────────────────────────────────────────────────
+        lo, hi = wh.window(now_s, win)
+        wh_n = hi - lo
+        inflow = wh.sql_sum('in', lo, hi)
+        f['wh_n']             = wh_n
+        f['wh_net_flow']      = _sub(inflow, wh.sql_sum('out', lo, hi))
+        f['wh_inflow_ratio']  = _div(inflow, wh.sql_sum('abs', lo, hi))
+        f['wh_large_count']   = int(wh.total('large', lo, hi)[0])
+        f['wh_avg_pct_moved'] = wh.sql_avg('pct', lo, hi)
+        f['wh_urgency_ratio'] = (wh.total('urgent', lo, hi)[0] * 1.0 / wh_n) if wh_n else None
+
+        # ── price momentum (OB mid_price) ────────────────────────────────────
+        p_now = ob.sql_avg('mid_price', *ob.window(now_s, 10, 0))
+        p_30s = ob.sql_avg('mid_price', *ob.window(now_s, 35, 25))
+        p_1m  = ob.sql_avg('mid_price', *ob.window(now_s, 65, 55))
+        p_5m  = ob.sql_avg('mid_price', *ob.window(now_s, 305, 295))
+        f['pm_price_change_30s'] = _pct_change(p_now, p_30s)
+        f['pm_price_change_1m']  = _pct_change(p_now, p_1m)
+        f['pm_price_change_5m']  = _pct_change(p_now, p_5m)
+        if p_1m is not None and p_1m > 0 and p_5m is not None and p_5m > 0:
+            f['pm_velocity_30s'] = (None if p_now is None else
+                                    (p_now - p_1m) / p_1m * 100 - (p_now - p_5m) / p_5m * 100)
+        else:
+            f['pm_velocity_30s'] = 0.0
+
+        return {k: f[k] for k in _LIVE_FEATURE_COLS}
+
+
+def _to_us(dt: datetime) -> int:
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    delta = dt - datetime(1970, 1, 1, tzinfo=timezone.utc)
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def _sub(a: Optional[float], b: Optional[float]) -> Optional[float]:
+    return None if a is None or b is None else a - b
+
+
+def _div(num: Optional[float], den: Optional[float]) -> Optional[float]:
+    """SQL `num / NULLIF(den, 0)`."""
+    return None if num is None or den is None or den == 0 else num / den
+
+
+def _pct_change(p_now: Optional[float], p_then: Optional[float]) -> Optional[float]:
+    """SQL `CASE WHEN then > 0 THEN (now - then) / then * 100 ELSE 0 END`."""
+    if p_then is None or not p_then > 0:
+        return 0.0
+    return None if p_now is None else (p_now - p_then) / p_then * 100
+
+
+_engine: Optional[LiveFeatureEngine] = None
+
+
+def get_live_feature_engine(window_min: int = 5) -> LiveFeatureEngine:
+    """Return the process-wide LiveFeatureEngine, sized for `window_min`."""
+    global _engine
+    if _engine is None or _engine.buffer_min < window_min:
+        _engine = LiveFeatureEngine(buffer_min=max(_ENGINE_BUFFER_MIN, window_min))
+    return _engine
+
+
 # =============================================================================
 # TRAINING DATA LOADER  (used by pump_fingerprint.py)
 # =============================================================================
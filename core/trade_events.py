@@ -0,0 +1,220 @@
+"""
+Trade Events (PostgreSQL LISTEN/NOTIFY)
+=======================================
+Push notifications for new sol_stablecoin_trades buys, so trading components
+running in other processes react as soon as the webhook commits a payload
+instead of polling the table.
+
+Publisher (webhook ingest, inside the insert transaction; PostgreSQL delivers
+the notifications on commit, and drops them on rollback):
+    from core.trade_events import notify_buy_trades
+    notify_buy_trades(cursor, rows)      # rows: RETURNING dicts from the insert
+
+Consumer:
+    from core.trade_events import TradeEventListener
+
+    listener = TradeEventListener(handler, application_name="ftg_follow_the_goat")
+    listener.start()       # handler(List[TradeEvent]) runs on the listener thread
+    listener.connected     # False while (re)connecting
+    listener.stop()
+
+Delivery is best effort: anything committed while a listener is disconnected
+is never replayed, so consumers keep a (slower) polling catch-up path.
+"""
+
+import json
+import logging
+import select
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from core.database import get_postgres_dedicated_connection
+
+logger = logging.getLogger(__name__)
+
+TRADES_CHANNEL = "ftg_buy_trades"
+
+# NOTIFY payloads must stay below 8000 bytes
+NOTIFY_PAYLOAD_LIMIT = 7800
+# select() timeout on the LISTEN socket (bounds how long stop() waits)
+LISTEN_POLL_SECONDS = 1.0
+RECONNECT_BACKOFF_MAX_SECONDS = 30.0
+
+
+class TradeEvent(NamedTuple):
+    """One committed buy trade, as carried in a notification."""
+    id: int
+    wallet_address: str
+    trade_timestamp: datetime
+    perp_direction: Optional[str]
+
+
+# =============================================================================
+# PUBLISHER
+# =============================================================================
+
+def _encode_chunks(entries: List[list]) -> List[str]:
+    """Pack entries into JSON arrays that each fit in one NOTIFY payload."""
+    payloads: List[str] = []
+    current: List[str] = []
+    size = 2
+    for entry in entries:
+        item = json.dumps(entry, separators=(',', ':'))
+        if current and size + len(item) + 1 > NOTIFY_PAYLOAD_LIMIT:
+            payloads.append('[' + ','.join(current) + ']')
+            current, size = [], 2
+        current.append(item)
+        size += len(item) + 1
+    if current:
+        payloads.append('[' + ','.join(current) + ']')
+    return payloads
+
+
+def notify_buy_trades(cursor, rows: Iterable[Dict[str, Any]]) -> int:
+    """
+    Queue a notification for every buy in `rows` on TRADES_CHANNEL.
+
+    Rows need id, wallet_address, trade_timestamp, direction and
+    perp_direction. Call inside the transaction that wrote them.
+    Returns the number of trades published.
+    """
+    entries = []
+    for r in rows:
+        if r.get('direction') != 'buy' or r.get('id') is None:
+            continue
+        ts = r['trade_timestamp']
+        if ts.tzinfo is None:
+            ts = ts.replace(tzinfo=timezone.utc)
+        entries.append([int(r['id']), r['wallet_address'], round(ts.timestamp() * 1000),
+                        r.get('perp_direction')])
+    if not entries:
+        return 0
+    cursor.execute(
+        "SELECT pg_notify(%s, payload) FROM unnest(%s::text[]) AS payload",
+        [TRADES_CHANNEL, _encode_chunks(entries)],
+    )
+    return len(entries)
+
+
+def parse_payload(payload: str) -> List[TradeEvent]:
+    """Decode one notification payload (malformed entries are skipped)."""
+    events = []
+    try:
+        entries = json.loads(payload)
+    except ValueError:
+        logger.warning(f"Ignoring malformed trade notification: {payload[:200]}")
+        return events
+    for entry in entries:
+        try:
+            trade_id, wallet, ts_ms, perp = entry
+            events.append(TradeEvent(
+                int(trade_id), wallet,
+                datetime.fromtimestamp(ts_ms / 1000.0, tz=timezone.utc), perp,
+            ))
+        except (TypeError, ValueError):
+            continue
+    return events
+
+
+# =============================================================================
+# LISTENER
+# =============================================================================
+
+class TradeEventListener:
+    """
+    Background thread holding a dedicated LISTEN connection on TRADES_CHANNEL.
+
+    Every batch of notifications read off the socket is handed to
+    `handler(events)` on this thread. Reconnects with exponential backoff;
+    `on_connect` (optional) runs after each (re)connect so the consumer can
+    catch up on anything it missed while disconnected.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[List[TradeEvent]], None],
+        application_name: str = "ftg_trade_events",
+        on_connect: Optional[Callable[[], None]] = None,
+    ):
+        self.handler = handler
+        self.application_name = application_name
+        self.on_connect = on_connect
+        self.connected = False
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {
+            'notifications': 0,
+            'events': 0,
+            'handler_errors': 0,
+            'reconnects': 0,
+            'last_event_at': None,
+        }
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="TradeEventListener", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def is_alive(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self) -> None:
+        backoff = 1.0
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = get_postgres_dedicated_connection(application_name=self.application_name)
+                conn.autocommit = True
+                with conn.cursor() as cursor:
+                    cursor.execute(f"LISTEN {TRADES_CHANNEL}")
+                self.connected = True
+                backoff = 1.0
+                logger.info(f"Listening for trade notifications on {TRADES_CHANNEL}")
+                if self.on_connect:
+                    self.on_connect()
+                self._listen(conn)
+            except Exception as e:
+                if not self._stop.is_set():
+                    logger.warning(f"Trade notification listener error (reconnecting in {backoff:.0f}s): {e}")
+            finally:
+                self.connected = False
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+            if self._stop.wait(backoff):
+                break
+            self.stats['reconnects'] += 1
+            backoff = min(RECONNECT_BACKOFF_MAX_SECONDS, backoff * 2)
+
+    def _listen(self, conn) -> None:
+        while not self._stop.is_set():
+            if select.select([conn], [], [], LISTEN_POLL_SECONDS) == ([], [], []):
+                continue
+            conn.poll()
+            events: List[TradeEvent] = []
+            while conn.notifies:
+                note = conn.notifies.pop(0)
+                self.stats['notifications'] += 1
+                events.extend(parse_payload(note.payload))
+            if not events:
+                continue
+            self.stats['events'] += len(events)
+            self.stats['last_event_at'] = time.time()
+            try:
+                self.handler(events)
+            except Exception as e:
+                self.stats['handler_errors'] += 1
+                logger.error(f"Trade event handler error: {e}", exc_info=True)
@@ -104,6 +104,7 @@ def _fetch_order_book() -> dict:
                     microprice, vwap,
                     timestamp
                 FROM order_book_features
+                WHERE symbol = 'SOLUSDT'
                 ORDER BY timestamp DESC
                 LIMIT 1
             """)
@@ -118,7 +119,7 @@ def _fetch_order_book() -> dict:
                     AVG(depth_imbalance_ratio)   AS avg_depth_imbalance,
                     AVG(CASE WHEN ask_liquidity > 0 THEN bid_liquidity / ask_liquidity ELSE NULL END) AS avg_bid_ask_ratio
                 FROM order_book_features
-                WHERE timestamp >= NOW() - INTERVAL '1 hour'
+                WHERE timestamp >= NOW() - INTERVAL '1 hour' AND symbol = 'SOLUSDT'
             """)
             avg = cursor.fetchone() or {}
             latest['hourly_avg'] = avg
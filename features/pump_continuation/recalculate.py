@@ -12,6 +12,7 @@ import sys
 import time
 import logging
 import warnings
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from itertools import combinations
 from typing import Dict, List, Any, Optional, Tuple
@@ -65,14 +66,6 @@ ABSOLUTE_PRICE_COLUMNS = frozenset([
 ])
 
 
-# ── PostgreSQL connection ─────────────────────────────────────────────
-
-def _get_pg_connection_string() -> str:
-    from core.config import settings
-    pg = settings.postgres
-    return f"host={pg.host} port={pg.port} dbname={pg.database} user={pg.user} password={pg.password}"
-
-
 # ── Helpers ───────────────────────────────────────────────────────────
 
 def _get_section(col: str) -> str:
@@ -103,40 +96,21 @@ def _get_filterable_columns(df: pd.DataFrame) -> List[str]:
 # ── Core Analysis Functions ───────────────────────────────────────────
 
 def _load_data(con: duckdb.DuckDBPyConnection, hours: int) -> int:
-    """Load buyins + trail into DuckDB. Returns merged row count."""
-    pg_conn = _get_pg_connection_string()
-    con.execute("INSTALL postgres")
-    con.execute("LOAD postgres")
-    con.execute(f"ATTACH '{pg_conn}' AS pg (TYPE POSTGRES, READ_ONLY)")
-
-    con.execute(f"""
-        CREATE TABLE buyins AS
-        SELECT id AS buyin_id, followed_at, our_entry_price, potential_gains, our_status, price_cycle
-        FROM pg.follow_the_goat_buyins
-        WHERE potential_gains IS NOT NULL AND our_entry_price > 0
-          AND followed_at >= (NOW()::TIMESTAMP - INTERVAL '{hours} hours')
-        ORDER BY followed_at
-    """)
-
-    con.execute("""
-        CREATE TABLE trail AS
-        SELECT * FROM pg.buyin_trail_minutes
-        WHERE buyin_id IN (SELECT buyin_id FROM buyins)
-          AND minute = 0 AND COALESCE(sub_minute, 0) = 0
-    """)
-
-    # Exclude t.buyin_id to avoid DuckDB renaming it to buyin_id_1
-    trail_cols = con.execute("SELECT column_name FROM information_schema.columns WHERE table_name='trail'").fetchall()
-    t_cols = ", ".join(f"t.{r[0]}" for r in trail_cols if r[0] != 'buyin_id')
-    con.execute(f"""
-        CREATE TABLE merged AS
-        SELECT b.buyin_id, b.followed_at, b.our_entry_price, b.potential_gains, b.our_status, b.price_cycle, {t_cols}
-        FROM buyins b INNER JOIN trail t ON t.buyin_id = b.buyin_id
-    """)
-
-    n_merged = con.execute("SELECT COUNT(*) FROM merged").fetchone()[0]
-    con.execute("DETACH pg")
-    return n_merged
+    """Load minute-0 buyins + trail from the feature store into DuckDB. Returns merged row count."""
+    from core.feature_store import get_feature_store
+
+    store = get_feature_store()
+    store.sync()
+    since = datetime.now(timezone.utc) - timedelta(hours=hours)
+    store_rows = store.load_trail(
+        since=since, minutes=0, sub_minute=0,
+        buyin_columns=['followed_at', 'our_entry_price', 'potential_gains', 'our_status', 'price_cycle'],
+    )
+    con.register('store_rows', store_rows)
+    con.execute("CREATE TABLE merged AS SELECT * FROM store_rows WHERE our_entry_price > 0")
+    con.unregister('store_rows')
+
+    return con.execute("SELECT COUNT(*) FROM merged").fetchone()[0]
 
 
 def _label(con: duckdb.DuckDBPyConnection, min_gain_pct: float) -> pd.DataFrame:
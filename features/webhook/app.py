@@ -5,7 +5,11 @@ Designed to be tolerant of varying payload shapes. Any missing fields will
 be skipped, but the endpoint will still return 200 to avoid QuickNode
 retries failing the pipeline.
 
-Architecture: PostgreSQL-only (no in-memory caching)
+Architecture: PostgreSQL is the source of truth; each payload is written
+with one multi-row upsert (IDs from the table's BIGSERIAL sequence) on a
+worker thread, then appended to the DuckDB raw cache as a single batch.
+Buy trades are also published on the trade NOTIFY channel
+(core.trade_events) so follow_the_goat picks them up without polling.
 """
 
 from datetime import datetime, timezone
@@ -14,11 +18,14 @@ import logging
 from pathlib import Path
 from logging.handlers import RotatingFileHandler
 import json
+import threading
 
 from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse
 
 from core.database import get_postgres, postgres_insert
+from core.trade_events import notify_buy_trades
 from features.webhook.parser import parse_timestamp
 from features.webhook.models import TradePayload, WhalePayload
 
@@ -62,176 +69,268 @@ def _check_db():
         raise HTTPException(status_code=503, detail="PostgreSQL not available")
 
 
-def _next_id(table: str) -> int:
-    """Get next available ID for a table."""
-    try:
-        with get_postgres() as conn:
-            with conn.cursor() as cursor:
-                cursor.execute(f"SELECT COALESCE(MAX(id), 0) + 1 AS next_id FROM {table}")
-                result = cursor.fetchone()
-                return int(result['next_id']) if result else 1
-    except Exception as e:
-        logger.error(f"Failed to get next ID for {table}: {e}")
-        return 1
+# Cached id sequence per table (synced to MAX(id) once per process)
+_id_sequences: Dict[str, Optional[str]] = {}
+_id_seq_lock = threading.Lock()
+
+
+def _id_sequence(cursor, table: str) -> Optional[str]:
+    """
+    Return the BIGSERIAL sequence backing `table.id`, synced past MAX(id).
+
+    IDs used to come from SELECT MAX(id)+1 per row; the sequence may lag
+    behind those rows, so it is moved forward once per process before the
+    first nextval(). Returns None if the table has no serial sequence.
+    """
+    with _id_seq_lock:
+        if table in _id_sequences:
+            return _id_sequences[table]
+        cursor.execute("SELECT pg_get_serial_sequence(%s, 'id') AS seq", [table])
+        row = cursor.fetchone()
+        seq = row['seq'] if row else None
+        if seq:
+            cursor.execute(
+                f"SELECT setval(%s, GREATEST((SELECT COALESCE(MAX(id), 0) FROM {table}), "
+                f"(SELECT last_value FROM {seq})))",
+                [seq],
+            )
+        _id_sequences[table] = seq
+        return seq
+
+
+def _bulk_upsert(cursor, table: str, columns: List[str], rows: List[list], update_cols: List[str],
+                 returning: Optional[List[str]] = None) -> List[Any]:
+    """
+    Upsert rows (first column = id, may be None) with one multi-row INSERT.
 
+    Missing IDs are drawn from the table's sequence inside the statement; if
+    there is no sequence, one block is reserved from MAX(id). Explicit IDs
+    push the sequence forward so later nextval() calls never collide.
+    Returns the ids written (or the `returning` columns as dicts).
+    """
+    from psycopg2.extras import execute_values
+
+    # Duplicate explicit IDs in one statement would make ON CONFLICT DO UPDATE
+    # touch a row twice — keep the last one, like sequential upserts did.
+    by_id: Dict[int, list] = {}
+    anonymous: List[list] = []
+    for row in rows:
+        if row[0] is None:
+            anonymous.append(row)
+        else:
+            by_id[row[0]] = row
+    rows = list(by_id.values()) + anonymous
+
+    seq = _id_sequence(cursor, table)
+    placeholders = ", ".join(["%s"] * (len(columns) - 1))
+    if seq:
+        template = f"(COALESCE(%s::bigint, nextval('{seq}')), {placeholders})"
+    else:
+        cursor.execute(f"SELECT COALESCE(MAX(id), 0) + 1 AS next_id FROM {table}")
+        next_id = max([int(cursor.fetchone()['next_id'])] + [i + 1 for i in by_id])
+        for offset, row in enumerate(anonymous):
+            row[0] = next_id + offset
+        template = None
+
+    set_sql = ", ".join(f"{c} = EXCLUDED.{c}" for c in update_cols)
+    written = execute_values(
+        cursor,
+        f"""
+        INSERT INTO {table} ({", ".join(columns)})
+        VALUES %s
+        ON CONFLICT (id) DO UPDATE SET {set_sql}
+        RETURNING {", ".join(returning or ["id"])}
+        """,
+        rows,
+        template=template,
+        page_size=max(len(rows), 1),
+        fetch=True,
+    )
+    if seq and by_id:
+        cursor.execute(
+            f"SELECT setval(%s, GREATEST(%s, (SELECT last_value FROM {seq})))",
+            [seq, max(by_id)],
+        )
+    if returning:
+        return written
+    return [r['id'] for r in written]
+
+
+_TRADE_COLUMNS = [
+    "id", "wallet_address", "signature", "trade_timestamp",
+    "stablecoin_amount", "sol_amount", "price", "direction",
+    "perp_direction", "created_at",
+]
+_TRADE_UPDATE_COLUMNS = _TRADE_COLUMNS[1:-1]
+_TRADE_NOTIFY_COLUMNS = ["id", "wallet_address", "trade_timestamp", "direction", "perp_direction"]
+
+_WHALE_COLUMNS = [
+    "id", "signature", "wallet_address", "whale_type", "current_balance",
+    "sol_change", "abs_change", "percentage_moved", "direction", "action",
+    "movement_significance", "previous_balance", "fee_paid", "block_time",
+    "timestamp", "received_at", "slot", "has_perp_position", "perp_platform",
+    "perp_direction", "perp_size", "perp_leverage", "perp_entry_price",
+    "raw_data_json", "created_at",
+]
+_WHALE_UPDATE_COLUMNS = [
+    "signature", "wallet_address", "whale_type", "current_balance",
+    "sol_change", "abs_change", "percentage_moved", "direction", "action",
+    "movement_significance",
+]
+
+# Whale labels → raw-cache values
+_SIG_MAP = {'major': 1.0, 'significant': 0.7, 'minor': 0.3}
+_DIR_NORM = {'receiving': 'in', 'buy': 'in', 'inflow': 'in',
+             'sending': 'out', 'sell': 'out', 'outflow': 'out'}
+
+
+def _whale_cache_row(payload: WhalePayload, ts: datetime) -> Dict[str, Any]:
+    """Map a whale payload to a TradeCache whale_events row."""
+    # Convert string significance label to a 0-1 float score
+    sig_raw = payload.movement_significance
+    if sig_raw is None:
+        sig = None
+    elif isinstance(sig_raw, (int, float)):
+        sig = float(sig_raw)
+    else:
+        sig = _SIG_MAP.get(str(sig_raw).lower(), 0.5)
+
+    # sol_change is signed (negative for sends); use absolute value — direction is tracked separately
+    sol_moved = abs(float(payload.sol_change or payload.abs_change or 0))
+
+    # Normalize QuickNode direction labels → canonical 'in' / 'out'
+    dir_raw = str(payload.direction or 'out').lower()
+    return dict(
+        ts           = ts,
+        sol_moved    = sol_moved,
+        direction    = _DIR_NORM.get(dir_raw, 'out'),
+        significance = sig,
+        pct_moved    = float(payload.percentage_moved or 0),
+    )
+
+
+def _ingest_trades(payloads: List[TradePayload]) -> int:
+    """
+    Bulk-insert trades into PostgreSQL (one statement) and append them to the
+    raw cache as one batch. Blocking — call from a worker thread.
 
-def _upsert_trade(payload: TradePayload) -> int:
-    """Insert trade into PostgreSQL."""
-    trade_id = payload.id or _next_id("sol_stablecoin_trades")
-    ts = parse_timestamp(payload.trade_timestamp) or datetime.now(timezone.utc)
+    If the batch statement fails, falls back to one row at a time so a single
+    bad trade doesn't drop the rest of the payload.
+    """
+    if not payloads:
+        return 0
     created_at = datetime.now(timezone.utc)
-    
-    # Write directly to PostgreSQL
-    try:
+    rows = []
+    cache_rows = []
+    for p in payloads:
+        ts = parse_timestamp(p.trade_timestamp) or datetime.now(timezone.utc)
+        rows.append([
+            p.id, p.wallet_address, p.signature, ts,
+            p.stablecoin_amount, p.sol_amount, p.price, p.direction,
+            p.perp_direction, created_at,
+        ])
+        cache_rows.append(dict(
+            ts         = ts,
+            sol_amount = float(p.sol_amount or 0),
+            stable_amt = float(p.stablecoin_amount or 0),
+            price      = float(p.price or 0),
+            direction  = str(p.direction or 'buy'),
+            is_perp    = p.perp_direction is not None,
+        ))
+
+    def _write(batch: List[list]) -> int:
         with get_postgres() as conn:
             with conn.cursor() as cursor:
-                cursor.execute(
-                    """
-                    INSERT INTO sol_stablecoin_trades
-                    (id, wallet_address, signature, trade_timestamp,
-                     stablecoin_amount, sol_amount, price, direction,
-                     perp_direction, created_at)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    ON CONFLICT (id) DO UPDATE SET
-                        wallet_address = EXCLUDED.wallet_address,
-                        signature = EXCLUDED.signature,
-                        trade_timestamp = EXCLUDED.trade_timestamp,
-                        stablecoin_amount = EXCLUDED.stablecoin_amount,
-                        sol_amount = EXCLUDED.sol_amount,
-                        price = EXCLUDED.price,
-                        direction = EXCLUDED.direction,
-                        perp_direction = EXCLUDED.perp_direction
-                    """,
-                    [
-                        trade_id,
-                        payload.wallet_address,
-                        payload.signature,
-                        ts,
-                        payload.stablecoin_amount,
-                        payload.sol_amount,
-                        payload.price,
-                        payload.direction,
-                        payload.perp_direction,
-                        created_at,
-                    ],
-                )
+                written = _bulk_upsert(cursor, "sol_stablecoin_trades", _TRADE_COLUMNS,
+                                       batch, _TRADE_UPDATE_COLUMNS, returning=_TRADE_NOTIFY_COLUMNS)
+                # Wake follow_the_goat (delivered on commit); a failed notify
+                # must not take the insert down with it
+                cursor.execute("SAVEPOINT trade_notify")
+                try:
+                    notify_buy_trades(cursor, written)
+                except Exception as ne:
+                    cursor.execute("ROLLBACK TO SAVEPOINT trade_notify")
+                    logger.warning(f"Trade notification skipped: {ne}")
+                return len(written)
+
+    try:
+        inserted = _write(rows)
     except Exception as e:
-        logger.error(f"Trade upsert failed for trade {trade_id}: {e}")
-        raise
+        if len(rows) == 1:
+            logger.error(f"Trade upsert failed for trade {payloads[0].id}: {e}")
+            raise
+        logger.error(f"Bulk trade upsert failed ({len(rows)} rows), retrying per row: {e}")
+        inserted = 0
+        ok_rows = []
+        for p, row, cache_row in zip(payloads, rows, cache_rows):
+            try:
+                inserted += _write([row])
+                ok_rows.append(cache_row)
+            except Exception as row_err:
+                logger.error(f"Trade upsert failed: {row_err}; payload={p}")
+        cache_rows = ok_rows
 
     # Dual-write to DuckDB raw cache (non-blocking)
     try:
-        _get_trade_cache().append_trade(
-            ts         = ts,
-            sol_amount = float(payload.sol_amount or 0),
-            stable_amt = float(payload.stablecoin_amount or 0),
-            price      = float(payload.price or 0),
-            direction  = str(payload.direction or 'buy'),
-            is_perp    = payload.perp_direction is not None,
-        )
+        if cache_rows:
+            _get_trade_cache().append_trades(cache_rows)
     except Exception as de:
         logger.debug(f"DuckDB trade write skipped: {de}")
 
-    return trade_id
+    return inserted
 
 
-def _upsert_whale(payload: WhalePayload) -> int:
-    """Insert whale movement into PostgreSQL."""
-    whale_id = payload.id or _next_id("whale_movements")
-    ts = parse_timestamp(payload.timestamp) or datetime.now(timezone.utc)
-    received_at = parse_timestamp(payload.received_at) or datetime.now(timezone.utc)
+def _ingest_whales(payloads: List[WhalePayload]) -> int:
+    """Bulk-insert whale movements + raw-cache batch. Blocking — run in a worker thread."""
+    if not payloads:
+        return 0
     created_at = datetime.now(timezone.utc)
-    
-    # Write directly to PostgreSQL
-    try:
+    rows = []
+    cache_rows = []
+    for p in payloads:
+        ts = parse_timestamp(p.timestamp) or datetime.now(timezone.utc)
+        received_at = parse_timestamp(p.received_at) or datetime.now(timezone.utc)
+        rows.append([
+            p.id, p.signature, p.wallet_address, p.whale_type, p.current_balance,
+            p.sol_change, p.abs_change, p.percentage_moved, p.direction, p.action,
+            p.movement_significance, p.previous_balance, p.fee_paid, p.block_time,
+            ts, received_at, p.slot, p.has_perp_position, p.perp_platform,
+            p.perp_direction, p.perp_size, p.perp_leverage, p.perp_entry_price,
+            p.raw_data_json, created_at,
+        ])
+        cache_rows.append((p, ts))
+
+    def _write(batch: List[list]) -> int:
         with get_postgres() as conn:
             with conn.cursor() as cursor:
-                cursor.execute(
-                    """
-                    INSERT INTO whale_movements
-                    (id, signature, wallet_address, whale_type, current_balance,
-                     sol_change, abs_change, percentage_moved, direction, action,
-                     movement_significance, previous_balance, fee_paid, block_time,
-                     timestamp, received_at, slot, has_perp_position, perp_platform,
-                     perp_direction, perp_size, perp_leverage, perp_entry_price,
-                     raw_data_json, created_at)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    ON CONFLICT (id) DO UPDATE SET
-                        signature = EXCLUDED.signature,
-                        wallet_address = EXCLUDED.wallet_address,
-                        whale_type = EXCLUDED.whale_type,
-                        current_balance = EXCLUDED.current_balance,
-                        sol_change = EXCLUDED.sol_change,
-                        abs_change = EXCLUDED.abs_change,
-                        percentage_moved = EXCLUDED.percentage_moved,
-                        direction = EXCLUDED.direction,
-                        action = EXCLUDED.action,
-                        movement_significance = EXCLUDED.movement_significance
-                    """,
-                    [
-                        whale_id,
-                        payload.signature,
-                        payload.wallet_address,
-                        payload.whale_type,
-                        payload.current_balance,
-                        payload.sol_change,
-                        payload.abs_change,
-                        payload.percentage_moved,
-                        payload.direction,
-                        payload.action,
-                        payload.movement_significance,
-                        payload.previous_balance,
-                        payload.fee_paid,
-                        payload.block_time,
-                        ts,
-                        received_at,
-                        payload.slot,
-                        payload.has_perp_position,
-                        payload.perp_platform,
-                        payload.perp_direction,
-                        payload.perp_size,
-                        payload.perp_leverage,
-                        payload.perp_entry_price,
-                        payload.raw_data_json,
-                        created_at,
-                    ],
-                )
+                return len(_bulk_upsert(cursor, "whale_movements", _WHALE_COLUMNS,
+                                        batch, _WHALE_UPDATE_COLUMNS))
+
+    try:
+        inserted = _write(rows)
     except Exception as e:
-        logger.error(f"Whale upsert failed for whale {whale_id}: {e}")
-        raise
+        if len(rows) == 1:
+            logger.error(f"Whale upsert failed for whale {payloads[0].id}: {e}")
+            raise
+        logger.error(f"Bulk whale upsert failed ({len(rows)} rows), retrying per row: {e}")
+        inserted = 0
+        ok_rows = []
+        for row, cache_row in zip(rows, cache_rows):
+            try:
+                inserted += _write([row])
+                ok_rows.append(cache_row)
+            except Exception as row_err:
+                logger.error(f"Whale upsert failed: {row_err}; payload={cache_row[0]}")
+        cache_rows = ok_rows
 
     # Dual-write to DuckDB raw cache (non-blocking)
     try:
-        # Convert string significance label to a 0-1 float score
-        _SIG_MAP = {'major': 1.0, 'significant': 0.7, 'minor': 0.3}
-        sig_raw = payload.movement_significance
-        if sig_raw is None:
-            sig = None
-        elif isinstance(sig_raw, (int, float)):
-            sig = float(sig_raw)
-        else:
-            sig = _SIG_MAP.get(str(sig_raw).lower(), 0.5)
-
-        # sol_change is signed (negative for sends); use absolute value — direction is tracked separately
-        sol_moved = abs(float(payload.sol_change or payload.abs_change or 0))
-
-        # Normalize QuickNode direction labels → canonical 'in' / 'out'
-        _DIR_NORM = {'receiving': 'in', 'buy': 'in', 'inflow': 'in',
-                     'sending': 'out', 'sell': 'out', 'outflow': 'out'}
-        dir_raw   = str(payload.direction or 'out').lower()
-        direction = _DIR_NORM.get(dir_raw, 'out')
-
-        _get_trade_cache().append_whale(
-            ts           = ts,
-            sol_moved    = sol_moved,
-            direction    = direction,
-            significance = sig,
-            pct_moved    = float(payload.percentage_moved or 0),
-        )
+        if cache_rows:
+            _get_trade_cache().append_whales([_whale_cache_row(p, ts) for p, ts in cache_rows])
     except Exception as de:
         logger.warning(f"DuckDB whale write failed: {de}")
 
-    return whale_id
+    return inserted
 
 
 def _normalize_trade_dict(d: Dict[str, Any]) -> Optional[TradePayload]:
@@ -328,13 +427,13 @@ async def webhook_trades(payload: Union[Dict[str, Any], List[Dict[str, Any]]]):
     
     Note: Accepts /, /webhook, and /webhook/ to match .NET behavior
     """
-    # DEBUG: Log the raw payload to see what QuickNode is actually sending
-    try:
-        import json
-        payload_str = json.dumps(payload, default=str)
-        logger.info(f"[DEBUG] Raw payload received: {payload_str[:2000]}")
-    except Exception as e:
-        logger.warning(f"[DEBUG] Could not serialize payload: {e}")
+    # Raw payload dump is only rendered when debug logging is on — json.dumps of
+    # a full QuickNode batch on every request is measurable on the hot path.
+    if logger.isEnabledFor(logging.DEBUG):
+        try:
+            logger.debug(f"Raw payload received: {json.dumps(payload, default=str)[:2000]}")
+        except Exception as e:
+            logger.debug(f"Could not serialize payload: {e}")
     
     raw_items = _ensure_list(payload)
     items: List[Dict[str, Any]] = []
@@ -343,39 +442,42 @@ async def webhook_trades(payload: Union[Dict[str, Any], List[Dict[str, Any]]]):
     for item in raw_items:
         if isinstance(item, dict):
             # Log the keys to see what fields are present
-            logger.info(f"[DEBUG] Payload keys: {list(item.keys())}")
+            logger.debug(f"Payload keys: {list(item.keys())}")
             
             txs = item.get("matchedTransactions") or item.get("transactions") or []
-            logger.info(f"[DEBUG] Found matchedTransactions: {len(txs) if isinstance(txs, list) else 'not a list'}")
+            logger.debug(f"Found matchedTransactions: {len(txs) if isinstance(txs, list) else 'not a list'}")
             
             if isinstance(txs, list) and txs:
                 items.extend(txs)
-                logger.info(f"[DEBUG] Added {len(txs)} transactions to items")
+                logger.debug(f"Added {len(txs)} transactions to items")
             # If there are no matchedTransactions but the dict looks like an actual trade
             # (has wallet_address), then treat it as a trade
             elif item.get("wallet_address") or item.get("signature"):
                 items.append(item)
-                logger.info(f"[DEBUG] Added item as direct trade (has wallet_address/signature)")
+                logger.debug("Added item as direct trade (has wallet_address/signature)")
     
-    logger.info(f"[DEBUG] Total items to process: {len(items)}")
+    logger.debug(f"Total items to process: {len(items)}")
     
     # If no transactions found, return early (this is normal when QuickNode
     # sends metadata-only payloads with matchedTransactions: [])
     if not items:
         return {"success": True, "inserted": 0, "received": 0}
     
-    # Process transactions
-    inserted = 0
+    # Process transactions — one bulk upsert per payload, off the event loop
+    trades: List[TradePayload] = []
     for item in items:
         tp = _normalize_trade_dict(item)
         if not tp:
             logger.warning(f"Trade payload skipped (no wallet_address): {item}")
             continue
-        try:
-            _upsert_trade(tp)
-            inserted += 1
-        except Exception as e:
-            logger.error(f"Trade upsert failed: {e}; payload={item}")
+        trades.append(tp)
+    inserted = 0
+    try:
+        inserted = await run_in_threadpool(_ingest_trades, trades)
+    except Exception as e:
+        first = trades[0] if trades else None
+        logger.error(f"Trade upsert failed: {e}; {len(trades)} trades, first "
+                     f"id={first and first.id} signature={first and first.signature}")
     
     logger.info(f"/webhook received={len(items)} inserted={inserted}")
     return {"success": True, "inserted": inserted, "received": len(items)}
@@ -396,17 +498,20 @@ async def webhook_whale(payload: Union[Dict[str, Any], List[Dict[str, Any]]]):
                 items.append(item)
     if not items:
         items = raw_items
-    inserted = 0
+    whales: List[WhalePayload] = []
     for item in items:
         wp = _normalize_whale_dict(item)
         if not wp:
             logger.warning(f"Whale payload skipped (no wallet): {item}")
             continue
-        try:
-            _upsert_whale(wp)
-            inserted += 1
-        except Exception as e:
-            logger.error(f"Whale upsert failed: {e}; payload={item}")
+        whales.append(wp)
+    inserted = 0
+    try:
+        inserted = await run_in_threadpool(_ingest_whales, whales)
+    except Exception as e:
+        first = whales[0] if whales else None
+        logger.error(f"Whale upsert failed: {e}; {len(whales)} movements, first "
+                     f"id={first and first.id} signature={first and first.signature}")
     logger.info(f"/webhook/whale-activity received={len(items)} inserted={inserted}")
     return {"success": True, "inserted": inserted, "received": len(items)}
 
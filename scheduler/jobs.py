@@ -659,7 +659,7 @@ def run_backfill_raw_cache():
         from core.raw_data_cache import OB_PARQUET, TRADE_PARQUET, WHALE_PARQUET, _CACHE_DIR
         import pyarrow as pa
         import pyarrow.parquet as pq
-        from core.database import get_postgres
+        from core.database import postgres_arrow_batches
 
         hours = 24
         cutoff = datetime.now(timezone.utc) - timedelta(hours=hours)
@@ -667,89 +667,71 @@ def run_backfill_raw_cache():
 
         logger.info(f"[backfill] Starting raw cache backfill (last {hours}h)...")
 
-        def _f(rows, key):
-            return pa.array([float(r[key]) if r[key] is not None else None for r in rows],
-                            type=pa.float64())
+        def _write(sql, schema, target, tmp_name):
+            """Stream COPY -> Arrow batches into a Parquet file; swap it in if non-empty."""
+            tmp = _CACHE_DIR / tmp_name
+            n = 0
+            with pq.ParquetWriter(str(tmp), schema, compression='snappy') as writer:
+                for batch in postgres_arrow_batches(sql, [cutoff], schema=schema):
+                    writer.write_batch(batch)
+                    n += batch.num_rows
+            if n:
+                tmp.replace(target)
+            else:
+                tmp.unlink(missing_ok=True)
+            return n
+
+        ts_field = ('ts', pa.timestamp('us', tz='UTC'))
 
         # OB snapshots
-        with get_postgres() as pg:
-            with pg.cursor() as cur:
-                cur.execute("""
-                    SELECT timestamp, mid_price, spread_bps,
-                           bid_liquidity AS bid_liq, ask_liquidity AS ask_liq,
-                           volume_imbalance AS vol_imb, depth_imbalance_ratio AS depth_ratio,
-                           microprice, microprice_dev_bps AS microprice_dev,
-                           net_liquidity_change_1s AS net_liq_1s,
-                           bid_slope, ask_slope,
-                           bid_depth_bps_5 AS bid_dep_5bps, ask_depth_bps_5 AS ask_dep_5bps
-                    FROM order_book_features WHERE timestamp >= %s ORDER BY timestamp
-                """, [cutoff])
-                ob_rows = cur.fetchall()
-        if ob_rows:
-            tbl = pa.table({
-                'ts': pa.array([r['timestamp'] for r in ob_rows], type=pa.timestamp('us', tz='UTC')),
-                'mid_price': _f(ob_rows, 'mid_price'), 'spread_bps': _f(ob_rows, 'spread_bps'),
-                'bid_liq': _f(ob_rows, 'bid_liq'), 'ask_liq': _f(ob_rows, 'ask_liq'),
-                'vol_imb': _f(ob_rows, 'vol_imb'), 'depth_ratio': _f(ob_rows, 'depth_ratio'),
-                'microprice': _f(ob_rows, 'microprice'), 'microprice_dev': _f(ob_rows, 'microprice_dev'),
-                'net_liq_1s': _f(ob_rows, 'net_liq_1s'), 'bid_slope': _f(ob_rows, 'bid_slope'),
-                'ask_slope': _f(ob_rows, 'ask_slope'),
-                'bid_dep_5bps': _f(ob_rows, 'bid_dep_5bps'), 'ask_dep_5bps': _f(ob_rows, 'ask_dep_5bps'),
-            })
-            tmp = _CACHE_DIR / "ob_latest.bfill.parquet"
-            pq.write_table(tbl, str(tmp), compression='snappy')
-            tmp.replace(OB_PARQUET)
+        n_ob = _write("""
+            SELECT timestamp AS ts, mid_price, spread_bps,
+                   bid_liquidity AS bid_liq, ask_liquidity AS ask_liq,
+                   volume_imbalance AS vol_imb, depth_imbalance_ratio AS depth_ratio,
+                   microprice, microprice_dev_bps AS microprice_dev,
+                   net_liquidity_change_1s AS net_liq_1s,
+                   bid_slope, ask_slope,
+                   bid_depth_bps_5 AS bid_dep_5bps, ask_depth_bps_5 AS ask_dep_5bps
+            FROM order_book_features WHERE timestamp >= %s AND symbol = 'SOLUSDT' ORDER BY timestamp
+        """, pa.schema([ts_field] + [(c, pa.float64()) for c in (
+            'mid_price', 'spread_bps', 'bid_liq', 'ask_liq', 'vol_imb', 'depth_ratio',
+            'microprice', 'microprice_dev', 'net_liq_1s', 'bid_slope', 'ask_slope',
+            'bid_dep_5bps', 'ask_dep_5bps',
+        )]), OB_PARQUET, "ob_latest.bfill.parquet")
 
         # Trades
-        with get_postgres() as pg:
-            with pg.cursor() as cur:
-                cur.execute("""
-                    SELECT trade_timestamp, sol_amount, stablecoin_amount, price,
-                           direction, (perp_direction IS NOT NULL) AS is_perp
-                    FROM sol_stablecoin_trades WHERE trade_timestamp >= %s ORDER BY trade_timestamp
-                """, [cutoff])
-                tr_rows = cur.fetchall()
-        if tr_rows:
-            tbl = pa.table({
-                'ts': pa.array([r['trade_timestamp'] for r in tr_rows], type=pa.timestamp('us', tz='UTC')),
-                'sol_amount': pa.array([float(r['sol_amount'] or 0) for r in tr_rows], type=pa.float64()),
-                'stable_amt': pa.array([float(r['stablecoin_amount'] or 0) for r in tr_rows], type=pa.float64()),
-                'price': pa.array([float(r['price'] or 0) for r in tr_rows], type=pa.float64()),
-                'direction': pa.array([str(r['direction'] or 'buy') for r in tr_rows], type=pa.string()),
-                'is_perp': pa.array([bool(r['is_perp']) for r in tr_rows], type=pa.bool_()),
-            })
-            tmp = _CACHE_DIR / "trade_latest.bfill.parquet"
-            pq.write_table(tbl, str(tmp), compression='snappy')
-            tmp.replace(TRADE_PARQUET)
+        n_tr = _write("""
+            SELECT trade_timestamp AS ts,
+                   COALESCE(sol_amount, 0) AS sol_amount,
+                   COALESCE(stablecoin_amount, 0) AS stable_amt,
+                   COALESCE(price, 0) AS price,
+                   COALESCE(NULLIF(direction, ''), 'buy') AS direction,
+                   (perp_direction IS NOT NULL) AS is_perp
+            FROM sol_stablecoin_trades WHERE trade_timestamp >= %s ORDER BY trade_timestamp
+        """, pa.schema([
+            ts_field,
+            ('sol_amount', pa.float64()), ('stable_amt', pa.float64()), ('price', pa.float64()),
+            ('direction', pa.string()), ('is_perp', pa.bool_()),
+        ]), TRADE_PARQUET, "trade_latest.bfill.parquet")
 
         # Whales
-        with get_postgres() as pg:
-            with pg.cursor() as cur:
-                cur.execute("""
-                    SELECT timestamp,
-                           abs_change AS sol_moved, direction,
-                           CASE WHEN movement_significance ~ '^[0-9.]+$'
-                                THEN movement_significance::DOUBLE PRECISION
-                                ELSE NULL END AS significance,
-                           percentage_moved
-                    FROM whale_movements WHERE timestamp >= %s ORDER BY timestamp
-                """, [cutoff])
-                wh_rows = cur.fetchall()
-        if wh_rows:
-            tbl = pa.table({
-                'ts': pa.array([r['timestamp'] for r in wh_rows], type=pa.timestamp('us', tz='UTC')),
-                'sol_moved': pa.array([float(r['sol_moved'] or 0) for r in wh_rows], type=pa.float64()),
-                'direction': pa.array([str(r['direction'] or 'out') for r in wh_rows], type=pa.string()),
-                'significance': pa.array([float(r['significance']) if r['significance'] is not None else None
-                                           for r in wh_rows], type=pa.float64()),
-                'pct_moved': pa.array([float(r['percentage_moved'] or 0) for r in wh_rows], type=pa.float64()),
-            })
-            tmp = _CACHE_DIR / "whale_latest.bfill.parquet"
-            pq.write_table(tbl, str(tmp), compression='snappy')
-            tmp.replace(WHALE_PARQUET)
+        n_wh = _write("""
+            SELECT timestamp AS ts,
+                   COALESCE(abs_change, 0) AS sol_moved,
+                   COALESCE(NULLIF(direction, ''), 'out') AS direction,
+                   CASE WHEN movement_significance ~ '^[0-9.]+$'
+                        THEN movement_significance::DOUBLE PRECISION
+                        ELSE NULL END AS significance,
+                   COALESCE(percentage_moved, 0) AS pct_moved
+            FROM whale_movements WHERE timestamp >= %s ORDER BY timestamp
+        """, pa.schema([
+            ts_field,
+            ('sol_moved', pa.float64()), ('direction', pa.string()),
+            ('significance', pa.float64()), ('pct_moved', pa.float64()),
+        ]), WHALE_PARQUET, "whale_latest.bfill.parquet")
 
         logger.info(
-            f"[backfill] Complete — OB={len(ob_rows):,} trades={len(tr_rows):,} whales={len(wh_rows):,}"
+            f"[backfill] Complete — OB={n_ob:,} trades={n_tr:,} whales={n_wh:,}"
         )
     except Exception as e:
         logger.error(f"Backfill raw cache error: {e}", exc_info=True)
@@ -2700,12 +2700,13 @@ def get_order_book_features():
     """Get order book features with PHP-compatible column names."""
     try:
         limit = min(int(request.args.get('limit', 100)), 5000)
+        symbol = request.args.get('symbol', 'SOLUSDT').upper()
         with get_postgres() as conn:
             with conn.cursor() as cursor:
                 cursor.execute("""
                     SELECT 
                         id,
-                        'SOLUSDT' AS symbol,
+                        symbol,
                         timestamp AS ts,
                         CAST((bids_json::json->0->>0) AS DOUBLE PRECISION) AS best_bid,
                         CAST((asks_json::json->0->>0) AS DOUBLE PRECISION) AS best_ask,
@@ -2728,9 +2729,10 @@ def get_order_book_features():
                         microprice_dev_bps,
                         source
                     FROM order_book_features
+                    WHERE symbol = %s
                     ORDER BY timestamp DESC
                     LIMIT %s
-                """, [limit])
+                """, [symbol, limit])
                 results = cursor.fetchall()
         return jsonify({
             'results': results,
@@ -22,158 +22,121 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 import pyarrow as pa
 import pyarrow.parquet as pq
 
-from core.database import get_postgres
+from core.database import postgres_arrow_batches
 from core.raw_data_cache import OB_PARQUET, TRADE_PARQUET, WHALE_PARQUET, _CACHE_DIR
 
 
-def backfill_ob(cutoff: datetime) -> int:
-    print("  Fetching order_book_features...", flush=True)
+def _write_parquet(sql: str, cutoff: datetime, schema: pa.Schema, target: Path, tmp_name: str) -> int:
+    """Stream a query into a Parquet file (COPY -> Arrow batches), then swap it in."""
     t0 = time.time()
-    with get_postgres() as pg:
-        with pg.cursor() as cur:
-            cur.execute("""
-                SELECT timestamp, mid_price, spread_bps,
-                       bid_liquidity      AS bid_liq,
-                       ask_liquidity      AS ask_liq,
-                       volume_imbalance   AS vol_imb,
-                       depth_imbalance_ratio AS depth_ratio,
-                       microprice,
-                       microprice_dev_bps AS microprice_dev,
-                       net_liquidity_change_1s AS net_liq_1s,
-                       bid_slope,
-                       ask_slope,
-                       bid_depth_bps_5    AS bid_dep_5bps,
-                       ask_depth_bps_5    AS ask_dep_5bps
-                FROM order_book_features
-                WHERE timestamp >= %s
-                ORDER BY timestamp
-            """, [cutoff])
-            rows = cur.fetchall()
-
-    n = len(rows)
+    tmp = _CACHE_DIR / tmp_name
+    n = 0
+    with pq.ParquetWriter(str(tmp), schema, compression='snappy') as writer:
+        for batch in postgres_arrow_batches(sql, [cutoff], schema=schema):
+            writer.write_batch(batch)
+            n += batch.num_rows
+
     print(f"    {n:,} rows in {time.time()-t0:.1f}s", flush=True)
     if not n:
+        tmp.unlink(missing_ok=True)
         return 0
 
-    def _f(rows, key):
-        return pa.array([float(r[key]) if r[key] is not None else None for r in rows],
-                        type=pa.float64())
-
-    tbl = pa.table({
-        'ts':             pa.array([r['timestamp'] for r in rows],
-                                   type=pa.timestamp('us', tz='UTC')),
-        'mid_price':      _f(rows, 'mid_price'),
-        'spread_bps':     _f(rows, 'spread_bps'),
-        'bid_liq':        _f(rows, 'bid_liq'),
-        'ask_liq':        _f(rows, 'ask_liq'),
-        'vol_imb':        _f(rows, 'vol_imb'),
-        'depth_ratio':    _f(rows, 'depth_ratio'),
-        'microprice':     _f(rows, 'microprice'),
-        'microprice_dev': _f(rows, 'microprice_dev'),
-        'net_liq_1s':     _f(rows, 'net_liq_1s'),
-        'bid_slope':      _f(rows, 'bid_slope'),
-        'ask_slope':      _f(rows, 'ask_slope'),
-        'bid_dep_5bps':   _f(rows, 'bid_dep_5bps'),
-        'ask_dep_5bps':   _f(rows, 'ask_dep_5bps'),
-    })
-
-    tmp = _CACHE_DIR / "ob_latest.bfill.parquet"
-    pq.write_table(tbl, str(tmp), compression='snappy')
-    tmp.replace(OB_PARQUET)
-    print(f"    → {OB_PARQUET.name}  ({OB_PARQUET.stat().st_size / 1024:.0f} KB)", flush=True)
+    tmp.replace(target)
+    print(f"    → {target.name}  ({target.stat().st_size / 1024:.0f} KB)", flush=True)
     return n
 
 
+_OB_SCHEMA = pa.schema(
+    [('ts', pa.timestamp('us', tz='UTC'))]
+    + [(name, pa.float64()) for name in (
+        'mid_price', 'spread_bps', 'bid_liq', 'ask_liq', 'vol_imb', 'depth_ratio',
+        'microprice', 'microprice_dev', 'net_liq_1s', 'bid_slope', 'ask_slope',
+        'bid_dep_5bps', 'ask_dep_5bps',
+    )]
+)
+
+_TRADES_SCHEMA = pa.schema([
+    ('ts',         pa.timestamp('us', tz='UTC')),
+    ('sol_amount', pa.float64()),
+    ('stable_amt', pa.float64()),
+    ('price',      pa.float64()),
+    ('direction',  pa.string()),
+    ('is_perp',    pa.bool_()),
+])
+
+_WHALES_SCHEMA = pa.schema([
+    ('ts',           pa.timestamp('us', tz='UTC')),
+    ('sol_moved',    pa.float64()),
+    ('direction',    pa.string()),
+    ('significance', pa.float64()),
+    ('pct_moved',    pa.float64()),
+])
+
+
+def backfill_ob(cutoff: datetime) -> int:
+    print("  Fetching order_book_features...", flush=True)
+    return _write_parquet("""
+        SELECT timestamp          AS ts,
+               mid_price, spread_bps,
+               bid_liquidity      AS bid_liq,
+               ask_liquidity      AS ask_liq,
+               volume_imbalance   AS vol_imb,
+               depth_imbalance_ratio AS depth_ratio,
+               microprice,
+               microprice_dev_bps AS microprice_dev,
+               net_liquidity_change_1s AS net_liq_1s,
+               bid_slope,
+               ask_slope,
+               bid_depth_bps_5    AS bid_dep_5bps,
+               ask_depth_bps_5    AS ask_dep_5bps
+        FROM order_book_features
+        WHERE timestamp >= %s AND symbol = 'SOLUSDT'
+        ORDER BY timestamp
+    """, cutoff, _OB_SCHEMA, OB_PARQUET, "ob_latest.bfill.parquet")
+
+
 def backfill_trades(cutoff: datetime) -> int:
     print("  Fetching sol_stablecoin_trades...", flush=True)
-    t0 = time.time()
-    with get_postgres() as pg:
-        with pg.cursor() as cur:
-            cur.execute("""
-                SELECT trade_timestamp,
-                       sol_amount, stablecoin_amount, price,
-                       direction,
-                       (perp_direction IS NOT NULL) AS is_perp
-                FROM sol_stablecoin_trades
-                WHERE trade_timestamp >= %s
-                ORDER BY trade_timestamp
-            """, [cutoff])
-            rows = cur.fetchall()
-
-    n = len(rows)
-    print(f"    {n:,} rows in {time.time()-t0:.1f}s", flush=True)
-    if not n:
-        return 0
-
-    tbl = pa.table({
-        'ts':         pa.array([r['trade_timestamp'] for r in rows],
-                               type=pa.timestamp('us', tz='UTC')),
-        'sol_amount': pa.array([float(r['sol_amount'] or 0) for r in rows], type=pa.float64()),
-        'stable_amt': pa.array([float(r['stablecoin_amount'] or 0) for r in rows], type=pa.float64()),
-        'price':      pa.array([float(r['price'] or 0) for r in rows], type=pa.float64()),
-        'direction':  pa.array([str(r['direction'] or 'buy') for r in rows], type=pa.string()),
-        'is_perp':    pa.array([bool(r['is_perp']) for r in rows], type=pa.bool_()),
-    })
-
-    tmp = _CACHE_DIR / "trade_latest.bfill.parquet"
-    pq.write_table(tbl, str(tmp), compression='snappy')
-    tmp.replace(TRADE_PARQUET)
-    print(f"    → {TRADE_PARQUET.name}  ({TRADE_PARQUET.stat().st_size / 1024:.0f} KB)", flush=True)
-    return n
+    return _write_parquet("""
+        SELECT trade_timestamp                     AS ts,
+               COALESCE(sol_amount, 0)             AS sol_amount,
+               COALESCE(stablecoin_amount, 0)      AS stable_amt,
+               COALESCE(price, 0)                  AS price,
+               COALESCE(NULLIF(direction, ''), 'buy') AS direction,
+               (perp_direction IS NOT NULL)        AS is_perp
+        FROM sol_stablecoin_trades
+        WHERE trade_timestamp >= %s
+        ORDER BY trade_timestamp
+    """, cutoff, _TRADES_SCHEMA, TRADE_PARQUET, "trade_latest.bfill.parquet")
 
 
 def backfill_whales(cutoff: datetime) -> int:
     print("  Fetching whale_movements...", flush=True)
-    t0 = time.time()
-    with get_postgres() as pg:
-        with pg.cursor() as cur:
-            cur.execute("""
-                SELECT COALESCE(timestamp, created_at) AS ts,
-                       ABS(COALESCE(sol_change, abs_change, 0)) AS sol_moved,
-                       CASE LOWER(direction)
-                           WHEN 'receiving' THEN 'in'
-                           WHEN 'buy'       THEN 'in'
-                           WHEN 'inflow'    THEN 'in'
-                           WHEN 'sending'   THEN 'out'
-                           WHEN 'sell'      THEN 'out'
-                           WHEN 'outflow'   THEN 'out'
-                           ELSE 'out'
-                       END AS direction,
-                       CASE
-                           WHEN movement_significance ~ '^[0-9.]+$'
-                               THEN movement_significance::DOUBLE PRECISION
-                           WHEN UPPER(movement_significance) = 'MAJOR'       THEN 1.0
-                           WHEN UPPER(movement_significance) = 'SIGNIFICANT' THEN 0.7
-                           WHEN UPPER(movement_significance) = 'MINOR'       THEN 0.3
-                           ELSE 0.5
-                       END AS significance,
-                       percentage_moved
-                FROM whale_movements
-                WHERE COALESCE(timestamp, created_at) >= %s
-                ORDER BY COALESCE(timestamp, created_at)
-            """, [cutoff])
-            rows = cur.fetchall()
-
-    n = len(rows)
-    print(f"    {n:,} rows in {time.time()-t0:.1f}s", flush=True)
-    if not n:
-        return 0
-
-    tbl = pa.table({
-        'ts':           pa.array([r['ts'] for r in rows],
-                                 type=pa.timestamp('us', tz='UTC')),
-        'sol_moved':    pa.array([float(r['sol_moved'] or 0) for r in rows], type=pa.float64()),
-        'direction':    pa.array([str(r['direction'] or 'out') for r in rows], type=pa.string()),
-        'significance': pa.array([float(r['significance']) if r['significance'] is not None else None
-                                  for r in rows], type=pa.float64()),
-        'pct_moved':    pa.array([float(r['percentage_moved'] or 0) for r in rows], type=pa.float64()),
-    })
-
-    tmp = _CACHE_DIR / "whale_latest.bfill.parquet"
-    pq.write_table(tbl, str(tmp), compression='snappy')
-    tmp.replace(WHALE_PARQUET)
-    print(f"    → {WHALE_PARQUET.name}  ({WHALE_PARQUET.stat().st_size / 1024:.0f} KB)", flush=True)
-    return n
+    return _write_parquet("""
+        SELECT COALESCE(timestamp, created_at) AS ts,
+               ABS(COALESCE(sol_change, abs_change, 0)) AS sol_moved,
+               CASE LOWER(direction)
+                   WHEN 'receiving' THEN 'in'
+                   WHEN 'buy'       THEN 'in'
+                   WHEN 'inflow'    THEN 'in'
+                   WHEN 'sending'   THEN 'out'
+                   WHEN 'sell'      THEN 'out'
+                   WHEN 'outflow'   THEN 'out'
+                   ELSE 'out'
+               END AS direction,
+               CASE
+                   WHEN movement_significance ~ '^[0-9.]+$'
+                       THEN movement_significance::DOUBLE PRECISION
+                   WHEN UPPER(movement_significance) = 'MAJOR'       THEN 1.0
+                   WHEN UPPER(movement_significance) = 'SIGNIFICANT' THEN 0.7
+                   WHEN UPPER(movement_significance) = 'MINOR'       THEN 0.3
+                   ELSE 0.5
+               END AS significance,
+               COALESCE(percentage_moved, 0) AS pct_moved
+        FROM whale_movements
+        WHERE COALESCE(timestamp, created_at) >= %s
+        ORDER BY COALESCE(timestamp, created_at)
+    """, cutoff, _WHALES_SCHEMA, WHALE_PARQUET, "whale_latest.bfill.parquet")
 
 
 def verify():
@@ -0,0 +1,233 @@
+"""
+Benchmark the order_book_features kernel against the previous per-snapshot code.
+
+Generates synthetic depth20 snapshots (100 ms apart, random-walk mid, ragged
+books mixed in), then times:
+- legacy: the original pure-Python calculate_features() + 1000-row history scan
+- kernel: OrderBookFeatureKernel.compute() over writer batches of several sizes
+  (batch=1 is the per-snapshot cost); batches below SCALAR_MAX_BATCH take the
+  scalar path
+- vector: the same with the scalar path disabled, to place SCALAR_MAX_BATCH
+  at the crossover
+Every row is compared with the legacy output (must be identical) before timing.
+
+Usage examples:
+  python scripts/benchmark_order_book_features.py
+  python scripts/benchmark_order_book_features.py --snapshots 50000 --batch 1 15 --symbols 3
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "000data_feeds" / "3_binance_order_book_data"))
+
+from order_book_kernel import OrderBookFeatureKernel  # noqa: E402
+
+
+# =============================================================================
+# Legacy implementation (stream_binance_order_book_data before the kernel)
+# =============================================================================
+
+def _legacy_microprice(best_bid: float, bid_size: float, best_ask: float, ask_size: float) -> float:
+    denom = bid_size + ask_size
+    if denom <= 0:
+        return (best_bid + best_ask) / 2.0
+    return (best_bid * ask_size + best_ask * bid_size) / denom
+
+
+def _legacy_depth_within_bps(levels: List[List[float]], mid: float, bps: float, is_bids: bool) -> float:
+    if mid <= 0:
+        return 0.0
+    limit = mid * (1.0 - bps / 10000.0) if is_bids else mid * (1.0 + bps / 10000.0)
+    total = 0.0
+    for price, size in levels:
+        if (price >= limit) if is_bids else (price <= limit):
+            total += float(size)
+        else:
+            break
+    return float(total)
+
+
+def _legacy_slope(levels: List[List[float]]) -> float:
+    if len(levels) < 2:
+        return 0.0
+    prices = [lvl[0] for lvl in levels]
+    sizes = [lvl[1] for lvl in levels]
+    n = len(prices)
+    sum_x = sum(prices)
+    sum_y = sum(sizes)
+    sum_xy = sum(x * y for x, y in zip(prices, sizes))
+    sum_x2 = sum(x * x for x in prices)
+    denom = (n * sum_x2 - sum_x * sum_x)
+    if denom == 0:
+        return 0.0
+    return float((n * sum_xy - sum_x * sum_y) / denom)
+
+
+def legacy_features(ob: Dict, history: deque) -> Optional[Dict]:
+    bids, asks = ob['bids'], ob['asks']
+    if not bids or not asks:
+        return None
+    best_bid, best_ask = bids[0][0], asks[0][0]
+    mid = (best_bid + best_ask) / 2
+    spread_bps = (max(0.0, best_ask - best_bid) / mid * 10000) if mid > 0 else 0.0
+    bid_depth = float(sum(b[1] for b in bids[:10]))
+    ask_depth = float(sum(a[1] for a in asks[:10]))
+    total = bid_depth + ask_depth
+    bid_vwap = float(sum(b[0] * b[1] for b in bids[:10]) / bid_depth) if bid_depth > 0 else 0.0
+    ask_vwap = float(sum(a[0] * a[1] for a in asks[:10]) / ask_depth) if ask_depth > 0 else 0.0
+    micro = _legacy_microprice(best_bid, float(bids[0][1]), best_ask, float(asks[0][1]))
+    bands = {
+        (side, bps): _legacy_depth_within_bps(levels, mid, bps, side == 'bid')
+        for side, levels in (('bid', bids), ('ask', asks)) for bps in (5.0, 10.0, 25.0)
+    }
+    b10, a10 = bands[('bid', 10.0)], bands[('ask', 10.0)]
+
+    net_liq = None
+    cutoff = ob['timestamp'] - timedelta(seconds=1)
+    for f in reversed(history):
+        if f['timestamp'] <= cutoff:
+            net_liq = float(total - float(f['total_depth_10']))
+            break
+
+    row = {
+        'timestamp': ob['timestamp'],
+        'symbol': ob['symbol'],
+        'mid_price': mid,
+        'spread_bps': spread_bps,
+        'bid_liquidity': bid_depth,
+        'ask_liquidity': ask_depth,
+        'volume_imbalance': (bid_depth - ask_depth) / total if total > 0 else 0.0,
+        'depth_imbalance_ratio': (b10 - a10) / (b10 + a10) if (b10 + a10) > 0 else 0.0,
+        'microprice': micro,
+        'vwap': (bid_vwap * bid_depth + ask_vwap * ask_depth) / total if total > 0 else 0.0,
+        'total_depth_10': total,
+        'bid_vwap_10': bid_vwap,
+        'ask_vwap_10': ask_vwap,
+        'bid_slope': _legacy_slope(bids[:5]) if len(bids) >= 5 else 0.0,
+        'ask_slope': _legacy_slope(asks[:5]) if len(asks) >= 5 else 0.0,
+        'microprice_dev_bps': ((micro - mid) / mid * 10000) if mid > 0 else 0.0,
+        'bid_depth_bps_5': bands[('bid', 5.0)],
+        'ask_depth_bps_5': bands[('ask', 5.0)],
+        'bid_depth_bps_10': b10,
+        'ask_depth_bps_10': a10,
+        'bid_depth_bps_25': bands[('bid', 25.0)],
+        'ask_depth_bps_25': bands[('ask', 25.0)],
+        'net_liquidity_change_1s': net_liq,
+        'bids_json': json.dumps(bids[:20]),
+        'asks_json': json.dumps(asks[:20]),
+        'source': ob['source'],
+    }
+    history.append(row)
+    return row
+
+
+def run_legacy(snapshots: List[Dict]) -> List[Optional[Dict]]:
+    histories: Dict[str, deque] = {}
+    return [
+        legacy_features(s, histories.setdefault(s['symbol'], deque(maxlen=1000)))
+        for s in snapshots
+    ]
+
+
+def run_kernel(snapshots: List[Dict], batch: int, vector_only: bool = False) -> List[Optional[Dict]]:
+    kernel = OrderBookFeatureKernel(scalar_max_batch=0) if vector_only else OrderBookFeatureKernel()
+    rows: List[Optional[Dict]] = []
+    for i in range(0, len(snapshots), batch):
+        rows.extend(kernel.compute(snapshots[i:i + batch]))
+    return rows
+
+
+# =============================================================================
+# Synthetic data
+# =============================================================================
+
+def make_snapshots(n: int, symbols: List[str], depth: int, seed: int) -> List[Dict]:
+    rng = random.Random(seed)
+    mids = {s: 100.0 + 50.0 * i for i, s in enumerate(symbols)}
+    ts = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    out = []
+    for i in range(n):
+        sym = symbols[i % len(symbols)]
+        mids[sym] = max(1.0, mids[sym] + rng.gauss(0, 0.02))
+        best_bid = round(mids[sym] - 0.01 * rng.randint(0, 3), 2)
+        best_ask = round(best_bid + 0.01 * rng.randint(1, 4), 2)
+        # ~2% ragged books (fewer than 5 / 10 levels), rare empty side
+        levels = depth if rng.random() > 0.02 else rng.randint(0, 8)
+        bids = [[round(best_bid - 0.01 * k, 2), round(rng.uniform(0.0, 400.0), 3)] for k in range(levels)]
+        asks = [[round(best_ask + 0.01 * k, 2), round(rng.uniform(0.0, 400.0), 3)] for k in range(depth)]
+        # Jittered ~100 ms spacing per symbol, occasionally a stalled update
+        ts += timedelta(microseconds=int(100_000 / len(symbols) * rng.choice((1, 1, 1, 0.5, 3))))
+        out.append({'timestamp': ts, 'symbol': sym, 'bids': bids, 'asks': asks, 'source': 'WEBSOCKET'})
+    return out
+
+
+# =============================================================================
+# Main
+# =============================================================================
+
+def _time_call(fn: Callable[[], object], iterations: int) -> List[float]:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="order_book_features kernel benchmark")
+    parser.add_argument("--snapshots", type=int, default=20000)
+    parser.add_argument("--symbols", type=int, default=1, help="number of interleaved symbols")
+    parser.add_argument("--depth", type=int, default=20)
+    parser.add_argument("--batch", type=int, nargs="+", default=[1, 5, 15, 50],
+                        help="writer batch sizes to time the kernel at")
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    symbols = ["SOLUSDT", "BTCUSDT", "ETHUSDT", "BNBUSDT"][:max(1, args.symbols)]
+    snapshots = make_snapshots(args.snapshots, symbols, args.depth, args.seed)
+    print(f"{len(snapshots):,} snapshots, {len(symbols)} symbol(s), depth {args.depth}")
+
+    expected = run_legacy(snapshots)
+    for batch in args.batch:
+        for vector_only in (False, True):
+            rows = run_kernel(snapshots, batch, vector_only)
+            mismatches = sum(a != b for a, b in zip(expected, rows))
+            print(f"parity {'vector' if vector_only else 'kernel'} batch={batch}: "
+                  f"{mismatches} mismatching rows")
+            if mismatches:
+                raise SystemExit(1)
+
+    # bids_json / asks_json encoding is the same code on both paths
+    json_cost = min(_time_call(
+        lambda: [(json.dumps(s['bids'][:20]), json.dumps(s['asks'][:20])) for s in snapshots],
+        args.iterations,
+    ))
+
+    print(f"\n=== Benchmark Summary (us per snapshot, best of {args.iterations}) ===")
+    print(f"{'':>16} {'total':>8} {'ex-JSON':>8}  speedup (total / ex-JSON)")
+    legacy = None
+    runs = [("legacy", lambda: run_legacy(snapshots))] + [
+        (f"{'vector' if vector_only else 'kernel'} batch={batch}",
+         lambda batch=batch, vector_only=vector_only: run_kernel(snapshots, batch, vector_only))
+        for batch in args.batch for vector_only in (False, True)
+    ]
+    for label, fn in runs:
+        total = min(_time_call(fn, args.iterations))
+        per = (total / len(snapshots) * 1e6, (total - json_cost) / len(snapshots) * 1e6)
+        legacy = legacy or per
+        print(f"{label:>16} {per[0]:8.1f} {per[1]:8.1f}  "
+              f"x{legacy[0] / per[0]:.2f} / x{legacy[1] / per[1]:.2f}")
+
+if __name__ == "__main__":
+    main()
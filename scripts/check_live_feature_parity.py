@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Parity check: LiveFeatureEngine vs the reference DuckDB query.
+
+get_live_features() is served by core.raw_data_cache.LiveFeatureEngine
+(incremental Parquet tail + prefix sums). This script replays the engine
+against _get_live_features_sql() — the original CTE query over the full
+Parquet snapshots — and fails if any feature differs beyond float rounding.
+
+Two modes:
+  --synthetic (default)  Generate OB / trade / whale snapshots in a temp dir,
+                         rewrite them every few seconds like the writers do
+                         (including late and NULL rows) and compare at each step.
+  --live                 Compare both paths on the real cache/*.parquet files.
+
+Usage:
+    python3 scripts/check_live_feature_parity.py
+    python3 scripts/check_live_feature_parity.py --steps 500 --seed 7
+    python3 scripts/check_live_feature_parity.py --live
+"""
+
+import argparse
+import math
+import os
+import sys
+import tempfile
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import core.raw_data_cache as rdc
+
+REL_TOL = 1e-9
+ABS_TOL = 1e-9
+
+
+def _diff(engine: dict, sql: dict) -> list:
+    """Return [(feature, engine_value, sql_value)] for every mismatch."""
+    bad = []
+    if (engine is None) != (sql is None):
+        return [('<result>', engine, sql)]
+    if engine is None:
+        return bad
+    for k in rdc._LIVE_FEATURE_COLS:
+        a, b = engine.get(k), sql.get(k)
+        if a is None or b is None:
+            if a is not b:
+                bad.append((k, a, b))
+        elif not math.isclose(float(a), float(b), rel_tol=REL_TOL, abs_tol=ABS_TOL):
+            bad.append((k, a, b))
+    return bad
+
+
+# =============================================================================
+# SYNTHETIC REPLAY
+# =============================================================================
+
+def _maybe_null(rng, values, p):
+    return [None if rng.random() < p else float(v) for v in values]
+
+
+def _gen_rows(rng, start: datetime, seconds: int):
+    """Generate OB (≈1/s), trade (bursty) and whale (sparse) rows."""
+    ob_ts = np.cumsum(rng.uniform(0.6, 1.4, int(seconds * 1.05)))
+    ob_ts = ob_ts[ob_ts < seconds]
+    n = len(ob_ts)
+    mid = 150 + np.cumsum(rng.normal(0, 0.02, n))
+    ob = {
+        'ts':             [start + timedelta(seconds=float(s)) for s in ob_ts],
+        'mid_price':      _maybe_null(rng, mid, 0.01),
+        'spread_bps':     _maybe_null(rng, rng.uniform(0.5, 3, n), 0.01),
+        'bid_liq':        _maybe_null(rng, rng.uniform(0, 1e5, n), 0.01),
+        'ask_liq':        _maybe_null(rng, np.where(rng.random(n) < 0.02, 0, rng.uniform(0, 1e5, n)), 0.01),
+        'vol_imb':        _maybe_null(rng, rng.uniform(-1, 1, n), 0.02),
+        'depth_ratio':    _maybe_null(rng, rng.uniform(0, 3, n), 0.01),
+        'microprice':     _maybe_null(rng, mid, 0.01),
+        'microprice_dev': _maybe_null(rng, rng.normal(0, 1, n), 0.01),
+        'net_liq_1s':     _maybe_null(rng, rng.normal(0, 500, n), 0.05),
+        'bid_slope':      _maybe_null(rng, rng.normal(0, 10, n), 0.01),
+        'ask_slope':      _maybe_null(rng, np.where(rng.random(n) < 0.02, 0, rng.normal(0, 10, n)), 0.01),
+        'bid_dep_5bps':   _maybe_null(rng, rng.uniform(0, 1e4, n), 0.01),
+        'ask_dep_5bps':   _maybe_null(rng, rng.uniform(0, 1e4, n), 0.01),
+    }
+
+    m = int(seconds * 2)
+    tr_ts = np.sort(rng.uniform(0, seconds, m))
+    tr = {
+        'ts':         [start + timedelta(seconds=float(s)) for s in tr_ts],
+        'sol_amount': _maybe_null(rng, rng.lognormal(2, 1.5, m), 0.01),
+        'stable_amt': [float(v) for v in rng.uniform(1, 1e4, m)],
+        'price':      [150.0] * m,
+        'direction':  list(rng.choice(['buy', 'sell', None], m, p=[0.5, 0.48, 0.02])),
+        'is_perp':    [False] * m,
+    }
+
+    w = int(seconds / 8)
+    wh_ts = np.sort(rng.uniform(0, seconds, w))
+    wh = {
+        'ts':           [start + timedelta(seconds=float(s)) for s in wh_ts],
+        'sol_moved':    _maybe_null(rng, rng.normal(0, 500, w), 0.02),
+        'direction':    list(rng.choice(['in', 'out', 'receiving', 'sending', None], w)),
+        'significance': _maybe_null(rng, rng.uniform(0, 1, w), 0.05),
+        'pct_moved':    _maybe_null(rng, rng.uniform(0, 100, w), 0.05),
+    }
+    return ob, tr, wh
+
+
+def _write_snapshot(path: Path, schema: pa.Schema, cols: dict, visible, stamp: int) -> None:
+    """Write the rows flagged in `visible` the way _export_parquet() does (atomic replace)."""
+    idx = np.flatnonzero(visible)
+    tbl = pa.table({f.name: pa.array([cols[f.name][i] for i in idx], type=f.type)
+                    for f in schema}, schema=schema)
+    tmp = path.with_suffix('.tmp.parquet')
+    pq.write_table(tbl, str(tmp), row_group_size=rdc._PARQUET_ROW_GROUP)
+    tmp.replace(path)
+    os.utime(path, ns=(stamp, stamp))
+
+
+def run_synthetic(steps: int, seed: int) -> int:
+    rng = np.random.default_rng(seed)
+    seconds = 20 * 60 + steps * 4
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    ob, tr, wh = _gen_rows(rng, start, seconds)
+
+    # Rows become visible after a writer delay; some trades arrive up to 40 s late.
+    def _arrival(ts, max_late):
+        late = rng.uniform(0, max_late, len(ts))
+        return np.array([(t - start).total_seconds() for t in ts]) + late
+
+    ob_arr = _arrival(ob['ts'], 2)
+    tr_arr = _arrival(tr['ts'], 40)
+    wh_arr = _arrival(wh['ts'], 10)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        rdc.OB_PARQUET    = tmp / 'ob_latest.parquet'
+        rdc.TRADE_PARQUET = tmp / 'trade_latest.parquet'
+        rdc.WHALE_PARQUET = tmp / 'whale_latest.parquet'
+        engine = rdc.LiveFeatureEngine(ob_path=rdc.OB_PARQUET,
+                                       trade_path=rdc.TRADE_PARQUET,
+                                       whale_path=rdc.WHALE_PARQUET)
+        failures = 0
+        compared = 0
+        t = 60.0
+        for step in range(steps):
+            t += rng.uniform(1, 8)
+            now = start + timedelta(seconds=t)
+            # Writers re-export roughly every 15 s; in between the snapshot is stale.
+            if step % 3 == 0:
+                stamp = 10 ** 18 + step
+                _write_snapshot(rdc.OB_PARQUET, rdc._OB_SCHEMA, ob, ob_arr <= t, stamp)
+                _write_snapshot(rdc.TRADE_PARQUET, rdc._TRADE_SCHEMA, tr, tr_arr <= t, stamp)
+                _write_snapshot(rdc.WHALE_PARQUET, rdc._WHALE_SCHEMA, wh, wh_arr <= t, stamp)
+            window_min = int(rng.choice([1, 3, 5]))
+            got = engine.compute(window_min, now=now)
+            want = rdc._get_live_features_sql(window_min, now=now)
+            compared += want is not None
+            bad = _diff(got, want)
+            if bad:
+                failures += 1
+                print(f"  ✗ step {step} now={now.isoformat()} window={window_min}m")
+                for k, a, b in bad[:10]:
+                    print(f"      {k:<22} engine={a!r:<24} sql={b!r}")
+        print(f"Synthetic replay: {steps} steps, {compared} non-empty, {failures} mismatching")
+        return failures
+
+
+# =============================================================================
+# LIVE SNAPSHOTS
+# =============================================================================
+
+def run_live(window_min: int) -> int:
+    now = datetime.now(timezone.utc)
+    got = rdc.LiveFeatureEngine().compute(window_min, now=now)
+    want = rdc._get_live_features_sql(window_min, now=now)
+    if want is None:
+        print("Live snapshots: not enough OB rows in window — nothing to compare")
+        return 0 if got is None else 1
+    bad = _diff(got, want)
+    for k, a, b in bad:
+        print(f"  ✗ {k:<22} engine={a!r:<24} sql={b!r}")
+    print(f"Live snapshots: {len(rdc._LIVE_FEATURE_COLS)} features, {len(bad)} mismatching")
+    return len(bad)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="LiveFeatureEngine vs SQL parity check")
+    parser.add_argument('--live', action='store_true', help='compare on cache/*.parquet')
+    parser.add_argument('--steps', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--window', type=int, default=5, help='window_min for --live')
+    args = parser.parse_args()
+
+    failures = run_live(args.window) if args.live else run_synthetic(args.steps, args.seed)
+    print("RESULT:", "✅ parity" if failures == 0 else "❌ mismatch")
+    return 0 if failures == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -50,10 +50,9 @@ import os
 import random
 import sys
 import time
-from copy import deepcopy
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 import numpy as np
 
@@ -62,6 +61,8 @@ sys.path.insert(0, str(PROJECT_ROOT))
 sys.path.insert(0, str(PROJECT_ROOT / "000trading"))
 
 from core.database import get_postgres, postgres_execute
+from core.exit_simulation import hilo_tiered_exits
+from core.filter_search import pack_mask, popcount_rows
 
 # ── logging ───────────────────────────────────────────────────────────────────
 logging.basicConfig(
@@ -541,54 +542,12 @@ def _sim_exit_batch(
     Returns an array of exit returns (fraction, not %) for each entry in mask.
     """
     indices = np.where(mask)[0]
-    exits   = np.zeros(len(indices), dtype=np.float64)
-
-    for j, idx in enumerate(indices):
-        entry  = entry_prices[idx]
-        hi_arr = price_highs[idx]
-        lo_arr = price_lows[idx]
-
-        if entry == 0 or len(hi_arr) == 0:
-            exits[j] = -stop_loss
-            continue
-
-        highest     = entry
-        locked_tol  = 1.0
-
-        for k, (hi, lo) in enumerate(zip(hi_arr, lo_arr)):
-            if hi > highest:
-                highest = hi
-
-            hg = (highest - entry) / entry
-
-            # pick tolerance tier
-            tol = tiers[-1][2]
-            for lo_t, hi_t, t in tiers:
-                if lo_t <= hg < hi_t:
-                    tol = t
-                    break
-
-            if tol < locked_tol:
-                locked_tol = tol
-
-            if k < min_hold_buckets:
-                continue
-
-            # stop-loss check
-            if (lo - entry) / entry < -stop_loss:
-                exits[j] = -stop_loss
-                break
-
-            # trailing stop check
-            if hg > 0 and (lo - highest) / highest < -locked_tol:
-                exits[j] = (highest * (1 - locked_tol) - entry) / entry
-                break
-        else:
-            # held to end of window
-            final = hi_arr[-1] if len(hi_arr) else entry
-            exits[j] = (final - entry) / entry
-
-    return exits
+    return hilo_tiered_exits(
+        entry_prices[indices],
+        [price_highs[i] for i in indices],
+        [price_lows[i] for i in indices],
+        tiers, stop_loss, min_hold_buckets,
+    )
 
 
 def simulate_exits(
@@ -648,10 +607,14 @@ class Individual:
     """
     __slots__ = ("conditions", "fitness_val")
 
-    def __init__(self, conditions: List[Tuple[int, int, float]]):
-        self.conditions  = conditions
+    def __init__(self, conditions: Sequence[Tuple[int, int, float]]):
+        # Immutable tuple: clones share it, and it keys the fitness/mask caches
+        self.conditions  = tuple(conditions)
         self.fitness_val = -np.inf
 
+    def clone(self) -> "Individual":
+        return Individual(self.conditions)
+
     def apply(self, features: np.ndarray) -> np.ndarray:
         """Return boolean mask (N,) where all entry conditions are satisfied."""
         mask = np.ones(len(features), dtype=bool)
@@ -678,7 +641,62 @@ class Individual:
         return " AND ".join(parts)
 
 
-def _random_individual(features: np.ndarray, use_importance: bool = False) -> Individual:
+class _FeatureStats:
+    """Per-feature column statistics the GA operators sample from.
+
+    Computed once per feature per run instead of on every call: the sorted
+    finite values (threshold percentiles) and the mutation std / 5th-95th
+    percentile clip range.
+    """
+
+    def __init__(self, features: np.ndarray):
+        self.features = features
+        self._sorted: Dict[int, np.ndarray] = {}
+        self._perturb: Dict[int, Tuple[float, float, float]] = {}
+
+    def finite_sorted(self, fi: int) -> np.ndarray:
+        vals = self._sorted.get(fi)
+        if vals is None:
+            col  = self.features[:, fi]
+            vals = np.sort(col[np.isfinite(col)])
+            self._sorted[fi] = vals
+        return vals
+
+    def percentile(self, fi: int, pct: float, finite_only: bool = True) -> float:
+        """np.percentile (linear) of the column, read off the pre-sorted values."""
+        vals = self.finite_sorted(fi)
+        if not finite_only and len(vals) != len(self.features):
+            return float(np.percentile(self.features[:, fi], pct))
+        return _sorted_percentile(vals, pct)
+
+    def perturb_params(self, fi: int) -> Tuple[float, float, float]:
+        """(std of non-zero values, 5th pct, 95th pct) used by threshold mutation."""
+        params = self._perturb.get(fi)
+        if params is None:
+            col = self.features[:, fi]
+            std = float(np.nanstd(col[col != 0])) if (col != 0).any() else 0.01
+            params = (std, float(np.nanpercentile(col, 5)), float(np.nanpercentile(col, 95)))
+            self._perturb[fi] = params
+        return params
+
+
+def _sorted_percentile(vals: np.ndarray, pct: float) -> float:
+    """Same result as np.percentile(vals, pct) for an already sorted 1-D array."""
+    n = len(vals)
+    if n == 0:
+        return float(np.percentile(vals, pct))
+    virtual = (n - 1) * (pct / 100)
+    lo = int(np.floor(virtual))
+    hi = min(lo + 1, n - 1)
+    lo = min(lo, n - 1)
+    # numpy's _lerp, evaluated in the array dtype
+    t  = vals.dtype.type(virtual - lo)
+    a, b = vals[lo], vals[hi]
+    diff = b - a
+    return float(b - diff * (1 - t)) if t >= 0.5 else float(a + diff * t)
+
+
+def _random_individual(stats: _FeatureStats, use_importance: bool = False) -> Individual:
     n_conds = random.randint(GA_MIN_CONDS, GA_MAX_CONDS)
     imp     = _feature_importance
 
@@ -691,16 +709,15 @@ def _random_individual(features: np.ndarray, use_importance: bool = False) -> In
 
     conds = []
     for fi in feat_indices:
-        col  = features[:, fi]
-        vals = col[np.isfinite(col)]
-        if len(vals) < 10:
+        fi = int(fi)
+        if len(stats.finite_sorted(fi)) < 10:
             continue
         pct = random.uniform(10, 90)
-        thr = float(np.percentile(vals, pct))
+        thr = stats.percentile(fi, pct)
         d   = random.choice([1, -1])
         conds.append((fi, d, thr))
     if not conds:
-        return _random_individual(features)
+        return _random_individual(stats)
     return Individual(conds)
 
 
@@ -716,21 +733,18 @@ def _crossover(p1: Individual, p2: Individual) -> Individual:
     return Individual(all_unique[:n])
 
 
-def _mutate(ind: Individual, features: np.ndarray) -> Individual:
+def _mutate(ind: Individual, stats: _FeatureStats) -> Individual:
     """Return a mutated copy — mutates entry conditions only."""
-    conds = list(deepcopy(ind.conditions))
+    conds = list(ind.conditions)
     op    = random.random()
 
     if op < 0.35 and conds:
         # Perturb a threshold
         i   = random.randrange(len(conds))
         fi, d, thr = conds[i]
-        col = features[:, fi]
-        std = float(np.nanstd(col[col != 0])) if (col != 0).any() else 0.01
+        std, p5, p95 = stats.perturb_params(fi)
         delta = random.gauss(0, std * 0.2)
-        conds[i] = (fi, d, float(np.clip(thr + delta,
-                                          np.nanpercentile(col, 5),
-                                          np.nanpercentile(col, 95))))
+        conds[i] = (fi, d, float(np.clip(thr + delta, p5, p95)))
     elif op < 0.55 and conds:
         # Flip direction
         i   = random.randrange(len(conds))
@@ -757,30 +771,24 @@ def _mutate(ind: Individual, features: np.ndarray) -> Individual:
                 avail = [fi for fi in range(N_FEATURES) if fi not in used_fi]
                 fi = random.choice(avail) if avail else None
             if fi is not None:
-                col = features[:, fi]
-                thr = float(np.percentile(col, random.uniform(10, 90)))
+                thr = stats.percentile(fi, random.uniform(10, 90), finite_only=False)
                 d   = random.choice([1, -1])
                 conds.append((fi, d, thr))
 
     if not conds:
-        return _random_individual(features)
+        return _random_individual(stats)
     return Individual(conds)
 
 
-def _compute_fitness(
-    ind: Individual,
-    features: np.ndarray,
-    labels:   np.ndarray,
-    entry_prices: np.ndarray,
-    price_highs: List[np.ndarray],
-    price_lows:  List[np.ndarray],
-    data_hours: float,
-    # Ignored legacy arguments kept for call-site compatibility
-    fixed_tiers: Optional[List] = None,
-    fixed_sl:    float = 0.003,
-    fixed_hold:  int   = 2,
-) -> float:
-    """
+class _PopulationEvaluator:
+    """Batch fitness for whole populations on one feature matrix.
+
+    Every distinct condition (feature, direction, threshold) is turned into a
+    packed bitmask once; an individual's signal mask is the AND of its
+    condition rows, and signal / pump / per-quarter counts are popcounts over
+    the (population × words) matrix. Fitness is memoised by condition tuple,
+    so elites, clones and re-discovered rules cost nothing.
+
     Fitness = daily_ev × consistency_mult.
 
     daily_ev = ev_per_trade × signals_per_day, where ev_per_trade uses a
@@ -791,40 +799,104 @@ def _compute_fitness(
 
     Rules with negative EV are hard-rejected regardless of precision.
     """
-    mask  = ind.apply(features)
-    n_sig = int(mask.sum())
-
-    min_abs = max(GA_MIN_SIG_HARD, MIN_SIGNALS) * (data_hours / 24)
-    if n_sig < min_abs:
-        return -999.0
-    if n_sig > MAX_SIGNALS * (data_hours / 24):
-        return -998.0
-
-    precision = float(labels[mask].mean()) if n_sig > 0 else 0.0
-
-    if precision < MIN_DIRECTIONAL_PRECISION:
-        return -997.0
-
-    # EV gate: compute expected PnL per trade using target-and-lock model
-    net_win  = PUMP_THRESHOLD - LOCK_TOLERANCE - COST_PCT
-    net_loss = LIVE_STOP_LOSS + COST_PCT
-    ev_per_trade = precision * net_win - (1.0 - precision) * net_loss
 
-    if ev_per_trade <= 0:
-        return -996.0
+    MAX_CACHED_MASKS   = 20_000      # ~1.4 KB each at 96h of 30s buckets
+    MAX_CACHED_FITNESS = 500_000
+
+    def __init__(self, features: np.ndarray, labels: np.ndarray, data_hours: float):
+        self.features   = features
+        self.data_hours = data_hours
+        n = len(features)
+        self.label_bits = pack_mask(np.asarray(labels) != 0)
+        # Consistency quarters — same slices as mask[k*chunk:(k+1)*chunk]
+        chunk = max(1, n // 4)
+        quarters = np.zeros((4, n), dtype=bool)
+        for k in range(4):
+            quarters[k, k * chunk:(k + 1) * chunk] = True
+        self.quarter_bits = np.vstack([pack_mask(q) for q in quarters])
+        self._all_rows = pack_mask(np.ones(n, dtype=bool))
+        self._reset_masks()
+        self._fitness: Dict[Tuple, float] = {}
+
+    def _reset_masks(self) -> None:
+        self._mask_rows = np.empty((256, self._all_rows.size), dtype=np.uint64)
+        self._mask_rows[0] = self._all_rows           # row 0 = no condition (padding)
+        self._n_rows = 1
+        self._row_of: Dict[Tuple[int, int, float], int] = {}
+
+    def _cond_row(self, cond: Tuple[int, int, float]) -> int:
+        row = self._row_of.get(cond)
+        if row is None:
+            fi, direction, thr = cond
+            col  = self.features[:, fi]
+            mask = col > thr if direction > 0 else col < thr
+            if self._n_rows == len(self._mask_rows):
+                self._mask_rows = np.concatenate([self._mask_rows, np.empty_like(self._mask_rows)])
+            row = self._n_rows
+            self._mask_rows[row] = pack_mask(mask)
+            self._n_rows += 1
+            self._row_of[cond] = row
+        return row
+
+    def _signal_bits(self, keys: Sequence[Tuple]) -> np.ndarray:
+        """(len(keys), words) packed signal masks — AND of each rule's condition rows."""
+        width = max(len(k) for k in keys)
+        if self._n_rows + len(keys) * width > self.MAX_CACHED_MASKS:
+            self._reset_masks()
+        idx = np.zeros((len(keys), width), dtype=np.intp)
+        for i, key in enumerate(keys):
+            idx[i, :len(key)] = [self._cond_row(c) for c in key]
+        return np.bitwise_and.reduce(self._mask_rows[idx], axis=1)
+
+    def evaluate(self, population: Sequence[Individual]) -> None:
+        """Set fitness_val on every individual in one batch."""
+        keys = list(dict.fromkeys(
+            ind.conditions for ind in population if ind.conditions not in self._fitness
+        ))
+        if keys:
+            if len(self._fitness) + len(keys) > self.MAX_CACHED_FITNESS:
+                self._fitness.clear()
+            bits   = self._signal_bits(keys)
+            n_sig  = popcount_rows(bits)
+            n_pump = popcount_rows(bits & self.label_bits)
+            active = ((bits[:, None, :] & self.quarter_bits[None, :, :]) != 0).any(axis=2).sum(axis=1)
+            self._fitness.update(zip(keys, self._fitness_from_counts(n_sig, n_pump, active).tolist()))
+        for ind in population:
+            ind.fitness_val = self._fitness[ind.conditions]
+
+    def signal_stats(self, ind: Individual) -> Tuple[int, float]:
+        """(n_signals, precision) of one individual."""
+        bits  = self._signal_bits([ind.conditions])
+        n_sig = int(popcount_rows(bits)[0])
+        n_pump = int(popcount_rows(bits & self.label_bits)[0])
+        return n_sig, (n_pump / n_sig if n_sig else float("nan"))
+
+    def _fitness_from_counts(
+        self, n_sig: np.ndarray, n_pump: np.ndarray, active_chunks: np.ndarray,
+    ) -> np.ndarray:
+        data_hours = self.data_hours
+        min_abs = max(GA_MIN_SIG_HARD, MIN_SIGNALS) * (data_hours / 24)
+        max_abs = MAX_SIGNALS * (data_hours / 24)
+
+        precision = np.divide(n_pump, n_sig, out=np.zeros(len(n_sig)), where=n_sig > 0)
+
+        # EV gate: compute expected PnL per trade using target-and-lock model
+        net_win  = PUMP_THRESHOLD - LOCK_TOLERANCE - COST_PCT
+        net_loss = LIVE_STOP_LOSS + COST_PCT
+        ev_per_trade = precision * net_win - (1.0 - precision) * net_loss
 
-    sig_per_d = n_sig / data_hours * 24
-    daily_ev  = ev_per_trade * sig_per_d
+        sig_per_d = n_sig / data_hours * 24
+        daily_ev  = ev_per_trade * sig_per_d
 
-    # Consistency multiplier: reward rules that fire more uniformly across time.
-    chunk = max(1, len(features) // 4)
-    active_chunks = sum(
-        1 for k in range(4)
-        if mask[k * chunk: (k + 1) * chunk].any()
-    )
-    consistency_mult = 0.5 + 0.5 * (active_chunks / 4)
+        # Consistency multiplier: reward rules that fire more uniformly across time.
+        consistency_mult = 0.5 + 0.5 * (active_chunks / 4)
 
-    return daily_ev * consistency_mult
+        return np.select(
+            [n_sig < min_abs, n_sig > max_abs,
+             precision < MIN_DIRECTIONAL_PRECISION, ev_per_trade <= 0],
+            [-999.0, -998.0, -997.0, -996.0],
+            daily_ev * consistency_mult,
+        )
 
 
 def _update_feature_importance(top_inds: List[Individual]) -> None:
@@ -848,7 +920,7 @@ def _update_feature_importance(top_inds: List[Individual]) -> None:
         _feature_importance /= _feature_importance.sum()  # keep normalised
 
 
-def _seed_from_db(features: np.ndarray) -> List[Individual]:
+def _seed_from_db(stats: _FeatureStats) -> List[Individual]:
     """Load top-precision rules from simulation_results as starting seeds.
 
     Only loads rules with win_rate ≥ MIN_DIRECTIONAL_PRECISION so we don't
@@ -880,9 +952,7 @@ def _seed_from_db(features: np.ndarray) -> List[Individual]:
                     fi  = FEAT_IDX[feat]
                     d   = 1 if c.get('direction') == '>' else -1
                     thr = float(c.get('threshold', 0.0))
-                    col = features[:, fi]
-                    p5  = float(np.nanpercentile(col, 5))
-                    p95 = float(np.nanpercentile(col, 95))
+                    _std, p5, p95 = stats.perturb_params(fi)
                     thr = float(np.clip(thr, p5, p95))
                     conds.append((fi, d, thr))
 
@@ -919,6 +989,9 @@ def run_genetic_algorithm(
       - Sharpe-weighted fitness (consistent > lucky)
       - DB seeding: 15% of population from previous best results
       - Feature importance bias: 40% of new individuals weighted by historical success
+
+    Each generation's children are scored as one batch by _PopulationEvaluator
+    (cached per-condition bitmasks, popcount counts, fitness memoised per rule).
     """
     logger.info(
         f"GA start: pop={GA_POPULATION}, gen={GA_GENERATIONS}, "
@@ -928,22 +1001,21 @@ def run_genetic_algorithm(
     n_db_seeds = int(GA_POPULATION * GA_DB_SEED_FRAC)
     n_imp_inds = int(GA_POPULATION * GA_IMPORTANCE_FRAC)
 
+    stats     = _FeatureStats(features)
+    evaluator = _PopulationEvaluator(features, labels, data_hours)
+
     # Seed from DB (builds on previous run knowledge)
-    db_seeds = _seed_from_db(features)[:n_db_seeds]
+    db_seeds = _seed_from_db(stats)[:n_db_seeds]
 
     # Mix: DB seeds + importance-biased + pure random
     population: List[Individual] = list(db_seeds)
     for _ in range(n_imp_inds):
-        population.append(_random_individual(features, use_importance=True))
+        population.append(_random_individual(stats, use_importance=True))
     while len(population) < GA_POPULATION:
-        population.append(_random_individual(features, use_importance=False))
+        population.append(_random_individual(stats, use_importance=False))
 
     # Evaluate initial fitness
-    for ind in population:
-        ind.fitness_val = _compute_fitness(
-            ind, features, labels, entry_prices,
-            price_highs, price_lows, data_hours,
-        )
+    evaluator.evaluate(population)
 
     elite_n = max(1, int(GA_POPULATION * GA_ELITE_FRAC))
     best_so_far: float = -np.inf
@@ -962,12 +1034,12 @@ def run_genetic_algorithm(
 
         if gen % 25 == 0 or gen == GA_GENERATIONS - 1:
             best = population[0]
-            prec = labels[best.apply(features)].mean() if population else 0
+            n_sig, prec = evaluator.signal_stats(best)
             logger.info(
                 f"[{run_label}Gen {gen+1:3d}/{GA_GENERATIONS}] "
                 f"best_fitness={best_so_far*100:+.4f} | "
                 f"prec={prec*100:.1f}% | "
-                f"n={int(best.apply(features).sum())} | "
+                f"n={n_sig} | "
                 f"rule: {best}"
             )
 
@@ -977,11 +1049,8 @@ def run_genetic_algorithm(
             n_refresh = GA_POPULATION // 2
             for k in range(-n_refresh, 0):
                 use_imp = random.random() < GA_IMPORTANCE_FRAC
-                population[k] = _random_individual(features, use_importance=use_imp)
-                population[k].fitness_val = _compute_fitness(
-                    population[k], features, labels, entry_prices,
-                    price_highs, price_lows, data_hours,
-                )
+                population[k] = _random_individual(stats, use_importance=use_imp)
+            evaluator.evaluate(population[-n_refresh:])
             logger.info(f"[{run_label}Gen {gen+1}] Diversity injection: refreshed {n_refresh} individuals")
 
         # Hard stop if still stuck after injection
@@ -1002,17 +1071,15 @@ def run_genetic_algorithm(
                 child = _crossover(p1, p2)
             else:
                 p1    = _tournament(population)
-                child = deepcopy(p1)
+                child = p1.clone()
 
             if random.random() < GA_MUTATION:
-                child = _mutate(child, features)
+                child = _mutate(child, stats)
 
-            child.fitness_val = _compute_fitness(
-                child, features, labels, entry_prices,
-                price_highs, price_lows, data_hours,
-            )
             new_pop.append(child)
 
+        # Children are scored together (tournaments only read the old generation)
+        evaluator.evaluate(new_pop[elite_n:])
         population = new_pop
 
     population.sort(key=lambda x: x.fitness_val, reverse=True)
@@ -1063,6 +1130,7 @@ def multi_fold_validate(
     labels   = data["labels"]
     N        = len(features)
 
+    signal = ind.apply(features)
     chunk = max(1, N // (n_folds + 1))
     is_precs:  List[float] = []
     oos_precs: List[float] = []
@@ -1076,13 +1144,11 @@ def multi_fold_validate(
             continue
 
         def prec_for(start: int, end: int) -> float:
-            window_mask = np.zeros(N, dtype=bool)
-            window_mask[start:end] = True
-            combined = ind.apply(features) & window_mask
-            n = int(combined.sum())
+            window = signal[start:end]
+            n = int(window.sum())
             if n < 3:
                 return float("nan")
-            return float(labels[combined].mean())
+            return float(labels[start:end][window].mean())
 
         is_p  = prec_for(0, train_end)
         oos_p = prec_for(test_start, test_end)
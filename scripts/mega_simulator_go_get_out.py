@@ -42,7 +42,6 @@ import random
 import sys
 import time
 from collections import defaultdict
-from copy import deepcopy
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
@@ -53,6 +52,7 @@ PROJECT_ROOT = Path(__file__).parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
 
 from core.database import get_postgres, postgres_execute
+from core.exit_simulation import ForwardPaths
 
 # ── logging ───────────────────────────────────────────────────────────────────
 logging.basicConfig(
@@ -69,7 +69,8 @@ MIN_TRADES_FOR_GA = 20
 FORWARD_MINUTES   = 15             # forward price window for simulation
 
 # GA parameters — sized so full run completes in ~15 min on this hardware
-# (each evaluation runs simulate_exit on ~700 trades × ~300 price points)
+# (each generation replays ~150 param sets × ~700 trades × ~900 price points
+# through core.exit_simulation in one batch)
 GA_POPULATION     = 150
 GA_GENERATIONS    = 60
 GA_ELITE_FRAC     = 0.10
@@ -358,6 +359,10 @@ def simulate_exit(
 
     Returns (exit_pct_gain_after_entry, reason).
     reason is one of: 'stop_loss', 'trailing', 'timeout', 'no_data'.
+
+    Scalar reference for one trade. The GA and OOS validation replay many
+    param sets at once via core.exit_simulation.ForwardPaths, which returns
+    the same exit_pct values.
     """
     if not entry or entry <= 0 or not price_series:
         return 0.0, "no_data"
@@ -590,28 +595,47 @@ def _decode(ind: List[float]) -> Dict[str, Any]:
     }
 
 
+def build_forward_paths(
+    trades: List[Dict[str, Any]],
+    fwd_cache: Dict[int, List[float]],
+) -> ForwardPaths:
+    """Stack the forward price paths of all trades with a valid entry (built once, replayed per param set)."""
+    valid = [t for t in trades if float(t['entry']) > 0]
+    return ForwardPaths(
+        [float(t['entry']) for t in valid],
+        [get_forward_series(t, fwd_cache) for t in valid],
+    )
+
+
+def simulate_exits_batch(
+    individuals: List[List[float]],
+    paths: ForwardPaths,
+) -> List[List[float]]:
+    """Exit % per trade for each individual — same values as simulate_exit() trade by trade."""
+    if not individuals:
+        return []
+    return paths.simulate([_decode(ind) for ind in individuals]).tolist()
+
+
 def _evaluate(
     ind: List[float],
     trades: List[Dict[str, Any]],
     fwd_cache: Dict[int, List[float]],
 ) -> Tuple[float, Dict[str, Any]]:
     """Evaluate one GA individual on full forward price paths. Returns (fitness, stats)."""
-    p = _decode(ind)
-    exits: List[float] = []
+    return _evaluate_batch([ind], build_forward_paths(trades, fwd_cache))[0]
 
-    for t in trades:
-        entry = float(t['entry'])
-        if entry <= 0:
-            continue
-        series = get_forward_series(t, fwd_cache)
-        ep, _ = simulate_exit(
-            entry, series,
-            p['stop_loss'], p['t1_tol'], p['t1_bnd'],
-            p['t2_tol'],    p['t2_bnd'], p['t3_tol'],
-            p['min_hold_steps'], p['consec_drops'], p['grace_steps'],
-        )
-        exits.append(ep)
 
+def _evaluate_batch(
+    individuals: List[List[float]],
+    paths: ForwardPaths,
+) -> List[Tuple[float, Dict[str, Any]]]:
+    """Evaluate a batch of GA individuals in one exit-simulation pass."""
+    return [_fitness(exits) for exits in simulate_exits_batch(individuals, paths)]
+
+
+def _fitness(exits: List[float]) -> Tuple[float, Dict[str, Any]]:
+    """(fitness, stats) from one individual's per-trade exit %."""
     if not exits:
         return -999.0, {}
 
@@ -643,7 +667,7 @@ def _evaluate(
 
 def _tournament(scored: List[Tuple[float, List[float]]], k: int = 5) -> List[float]:
     pool = random.sample(scored, min(k, len(scored)))
-    return deepcopy(max(pool, key=lambda x: x[0])[1])
+    return list(max(pool, key=lambda x: x[0])[1])
 
 
 def _crossover(p1: List[float], p2: List[float]) -> List[float]:
@@ -651,7 +675,7 @@ def _crossover(p1: List[float], p2: List[float]) -> List[float]:
 
 
 def _mutate(ind: List[float], rate: float = 0.25) -> List[float]:
-    result = deepcopy(ind)
+    result = list(ind)
     for i, (lo, hi) in enumerate(PARAM_BOUNDS):
         if random.random() < rate:
             result[i] += random.gauss(0, (hi - lo) * 0.15)
@@ -672,12 +696,13 @@ def run_ga(
     if len(trades) < MIN_TRADES_FOR_GA:
         logger.warning(f"Only {len(trades)} trades — GA results may not generalise well")
 
+    paths = build_forward_paths(trades, fwd_cache)
+
     # Initialise
-    population: List[Tuple[float, List[float], Dict[str, Any]]] = []
-    for _ in range(population_size):
-        ind = _random_individual()
-        f, s = _evaluate(ind, trades, fwd_cache)
-        population.append((f, ind, s))
+    individuals = [_random_individual() for _ in range(population_size)]
+    population: List[Tuple[float, List[float], Dict[str, Any]]] = [
+        (f, ind, s) for ind, (f, s) in zip(individuals, _evaluate_batch(individuals, paths))
+    ]
     population.sort(key=lambda x: -x[0])
 
     elite_n = max(1, int(population_size * GA_ELITE_FRAC))
@@ -686,19 +711,22 @@ def run_ga(
         new_pop: List[Tuple[float, List[float], Dict[str, Any]]] = []
 
         # Carry elites forward
-        new_pop.extend((f, deepcopy(ind), s) for f, ind, s in population[:elite_n])
+        new_pop.extend((f, list(ind), s) for f, ind, s in population[:elite_n])
 
         scored = [(f, ind) for f, ind, _ in population]
 
-        while len(new_pop) < population_size:
+        # Breed the whole generation first, then score it in one batch
+        children: List[List[float]] = []
+        while len(new_pop) + len(children) < population_size:
             if random.random() < GA_CROSSOVER:
                 child = _crossover(_tournament(scored, GA_TOURNAMENT_K),
                                    _tournament(scored, GA_TOURNAMENT_K))
             else:
-                child = deepcopy(_tournament(scored, GA_TOURNAMENT_K))
-            child = _mutate(child, GA_MUTATION)
-            f, s  = _evaluate(child, trades, fwd_cache)
-            new_pop.append((f, child, s))
+                child = _tournament(scored, GA_TOURNAMENT_K)
+            children.append(_mutate(child, GA_MUTATION))
+        new_pop.extend(
+            (f, child, s) for child, (f, s) in zip(children, _evaluate_batch(children, paths))
+        )
 
         population = sorted(new_pop, key=lambda x: -x[0])
 
@@ -731,34 +759,27 @@ def validate_oos(
     n         = len(sorted_trades)
     fold_size = n // n_folds
 
+    individuals = [ind for _, ind, _ in top_results]
+
+    # Replay every top config on each fold at once: fold_exits[fold][config][trade]
+    fold_exits: List[List[List[float]]] = []
+    for fold in range(n_folds):
+        start = fold * fold_size
+        end   = (fold + 1) * fold_size if fold < n_folds - 1 else n
+        oos_trades = sorted_trades[start:end]
+        if len(oos_trades) < 3:
+            continue
+        paths = build_forward_paths(oos_trades, fwd_cache)
+        fold_exits.append([
+            [ep - COST_PCT * 100 for ep in exits]
+            for exits in simulate_exits_batch(individuals, paths)
+        ])
+
     results: List[Dict[str, Any]] = []
 
-    for _, ind, is_stats in top_results:
+    for k, (_, ind, is_stats) in enumerate(top_results):
         p = _decode(ind)
-
-        oos_exits_per_fold: List[List[float]] = []
-
-        for fold in range(n_folds):
-            start = fold * fold_size
-            end   = (fold + 1) * fold_size if fold < n_folds - 1 else n
-            oos_trades = sorted_trades[start:end]
-            if len(oos_trades) < 3:
-                continue
-
-            fold_exits: List[float] = []
-            for t in oos_trades:
-                entry = float(t['entry'])
-                if entry <= 0:
-                    continue
-                series = get_forward_series(t, fwd_cache)
-                ep, _ = simulate_exit(
-                    entry, series,
-                    p['stop_loss'], p['t1_tol'], p['t1_bnd'],
-                    p['t2_tol'],    p['t2_bnd'], p['t3_tol'],
-                    p['min_hold_steps'], p['consec_drops'], p['grace_steps'],
-                )
-                fold_exits.append(ep - COST_PCT * 100)
-            oos_exits_per_fold.append(fold_exits)
+        oos_exits_per_fold = [per_config[k] for per_config in fold_exits]
 
         all_oos  = [e for fold in oos_exits_per_fold for e in fold]
         oos_avg  = sum(all_oos) / len(all_oos) if all_oos else 0.0
@@ -1061,19 +1082,11 @@ def main() -> None:
             ep = simulate_current_config(t, cfg.get('sell_logic', {}), fwd_cache)
             curr_exits.append(ep - COST_PCT * 100)
 
-        best_exits: List[float] = []
-        for t in play_trades:
-            entry = float(t['entry'])
-            if entry <= 0:
-                continue
-            series = get_forward_series(t, fwd_cache)
-            ep, _ = simulate_exit(
-                entry, series,
-                p['stop_loss'], p['t1_tol'], p['t1_bnd'],
-                p['t2_tol'],    p['t2_bnd'], p['t3_tol'],
-                p['min_hold_steps'], p['consec_drops'], p['grace_steps'],
-            )
-            best_exits.append(ep - COST_PCT * 100)
+        best_paths = build_forward_paths(play_trades, fwd_cache)
+        best_exits: List[float] = [
+            ep - COST_PCT * 100
+            for ep in simulate_exits_batch([best['individual']], best_paths)[0]
+        ]
 
         curr_avg = sum(curr_exits) / len(curr_exits) if curr_exits else 0.0
         best_avg = sum(best_exits) / len(best_exits) if best_exits else 0.0
@@ -666,6 +666,8 @@ ALTER TABLE buyin_trail_minutes ADD COLUMN IF NOT EXISTS mm_slippage_estimate DO
 
 -- Sub-minute interval support
 ALTER TABLE buyin_trail_minutes ADD COLUMN IF NOT EXISTS sub_minute SMALLINT DEFAULT 0;
+-- One row per (buyin, 30s interval): lets trail inserts use ON CONFLICT DO NOTHING
+CREATE UNIQUE INDEX IF NOT EXISTS idx_trail_unique ON buyin_trail_minutes(buyin_id, minute, sub_minute);
 
 -- Pre-entry price movement metrics (computed before trade entry)
 ALTER TABLE buyin_trail_minutes ADD COLUMN IF NOT EXISTS pre_entry_price_1m_before DOUBLE PRECISION;
@@ -700,7 +702,7 @@ CREATE TABLE IF NOT EXISTS trade_filter_values (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
-CREATE UNIQUE INDEX IF NOT EXISTS idx_tfv_unique ON trade_filter_values(buyin_id, minute, filter_name);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_tfv_unique_sub ON trade_filter_values(buyin_id, minute, sub_minute, filter_name);
 CREATE INDEX IF NOT EXISTS idx_tfv_buyin_id ON trade_filter_values(buyin_id);
 CREATE INDEX IF NOT EXISTS idx_tfv_filter_name ON trade_filter_values(filter_name);
 CREATE INDEX IF NOT EXISTS idx_tfv_minute ON trade_filter_values(minute);
@@ -76,7 +76,7 @@ def load_raw_data(hours: int = LOOKBACK_HOURS) -> duckdb.DuckDBPyConnection:
                        net_liquidity_change_1s,
                        bid_depth_bps_5, ask_depth_bps_5
                 FROM order_book_features
-                WHERE timestamp >= %s
+                WHERE timestamp >= %s AND symbol = 'SOLUSDT'
                 ORDER BY timestamp
             """, [cutoff])
             ob_rows = cur.fetchall()
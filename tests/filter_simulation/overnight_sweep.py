@@ -12,11 +12,15 @@ Search strategy per interval:
   4. Exhaustive quads from top 20         =  4,845 combos
   5. Exhaustive 5-combos from top 15      =  3,003 combos
   6. Random 6-8 combos from top 30        = 10,000 combos
-  Total per interval: ~22,700 combos x 30 intervals = ~681,000 tested
+  Total per interval: ~22,700 combos x 30 intervals = ~681,000 covered
 
 Each combo is scored on train AND test (time-based 70/30 split).
 Only combos that beat baseline precision on the test set are saved.
 
+Steps 2-5 run on core.filter_search.ComboSearch: bitset masks, shared prefix
+intersections, pruning of branches that can no longer pass, and a process
+pool over the root branches (--workers, default: all CPUs).
+
 Usage:
     # Foreground (watch progress):
     python tests/filter_simulation/overnight_sweep.py
@@ -26,6 +30,9 @@ Usage:
 
     # Quick test on 1 interval:
     python tests/filter_simulation/overnight_sweep.py --test
+
+    # Limit the search pool:
+    python tests/filter_simulation/overnight_sweep.py --workers 4
 """
 
 import sys
@@ -37,7 +44,7 @@ import logging
 import argparse
 import warnings
 from pathlib import Path
-from itertools import combinations
+from math import comb
 from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
 
@@ -49,6 +56,8 @@ import duckdb
 PROJECT_ROOT = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
 
+from core.filter_search import ComboSearch
+
 warnings.filterwarnings("ignore", category=FutureWarning)
 
 # Setup logging - flush every line for nohup visibility
@@ -65,6 +74,10 @@ THRESHOLD = 0.3
 HOURS = 48
 TRAIN_FRAC = 0.70
 
+# Exhaustive search levels: (combo size, top-N ranked features)
+SEARCH_LEVELS = [(2, 40), (3, 30), (4, 20), (5, 15)]
+RANDOM_COMBOS = 10_000
+
 # Reuse exclusion lists from run_simulation
 SKIP_COLUMNS = frozenset([
     'trade_id', 'play_id', 'wallet_address', 'followed_at',
@@ -223,46 +236,6 @@ def precompute_filter_masks(
     return masks
 
 
-def score_combo_fast(
-    combo_cols: Tuple[str, ...],
-    masks: Dict[str, np.ndarray],
-    is_good: np.ndarray,
-    is_bad: np.ndarray,
-    n_total: int,
-) -> Optional[Dict[str, float]]:
-    """
-    Score a filter combination using pre-computed masks.
-    Returns metrics dict or None if combo has too few passing trades.
-    """
-    combined = masks[combo_cols[0]]
-    for col in combo_cols[1:]:
-        combined = combined & masks[col]
-
-    good_after = int((is_good & combined).sum())
-    bad_after = int((is_bad & combined).sum())
-    total_after = good_after + bad_after
-
-    if total_after < 10:
-        return None
-
-    good_before = int(is_good.sum())
-    bad_before = int(is_bad.sum())
-
-    precision = good_after / total_after * 100 if total_after else 0
-    good_kept_pct = good_after / good_before * 100 if good_before else 0
-    bad_removed_pct = (bad_before - bad_after) / bad_before * 100 if bad_before else 0
-    pass_rate = total_after / n_total * 100
-
-    return {
-        'precision': round(precision, 2),
-        'good_kept_pct': round(good_kept_pct, 2),
-        'bad_removed_pct': round(bad_removed_pct, 2),
-        'pass_rate': round(pass_rate, 2),
-        'good_after': good_after,
-        'bad_after': bad_after,
-    }
-
-
 # =============================================================================
 # FEATURE RANKING (Cohen's d + Youden's J for optimal range)
 # =============================================================================
@@ -349,6 +322,7 @@ def sweep_interval(
     columns: List[str],
     interval_idx: int,
     baseline_test_precision: float,
+    workers: int = 1,
 ) -> List[Dict[str, Any]]:
     """
     Run the full combinatorial sweep for one interval.
@@ -364,63 +338,32 @@ def sweep_interval(
 
     # Pre-compute masks on train and test
     is_good_train = (df_train['potential_gains'] >= THRESHOLD).values
-    is_bad_train = ~is_good_train
-    n_train = len(df_train)
-
     is_good_test = (df_test['potential_gains'] >= THRESHOLD).values
-    is_bad_test = ~is_good_test
-    n_test = len(df_test)
 
     masks_train = precompute_filter_masks(df_train, ranked)
     masks_test = precompute_filter_masks(df_test, ranked)
 
-    results = []
-    combos_tested = 0
-
-    def test_combo(cols: Tuple[str, ...]):
-        nonlocal combos_tested
-        combos_tested += 1
-
-        # Must have all columns in masks
-        if not all(c in masks_train and c in masks_test for c in cols):
-            return
-
-        # Score on train
-        train_m = score_combo_fast(cols, masks_train, is_good_train, is_bad_train, n_train)
-        if train_m is None:
-            return
-
-        # Skip if train precision is worse than baseline (not worth testing on test)
-        train_baseline = is_good_train.sum() / n_train * 100
-        if train_m['precision'] <= train_baseline:
-            return
-
-        # Must keep at least 5% of good trades
-        if train_m['good_kept_pct'] < 5:
-            return
-
-        # Score on test
-        test_m = score_combo_fast(cols, masks_test, is_good_test, is_bad_test, n_test)
-        if test_m is None:
-            return
-
-        # Only save if test precision beats baseline
-        if test_m['precision'] <= baseline_test_precision:
-            return
+    # Train must beat the train baseline, keep >= 5% of good trades and pass
+    # >= 10 trades; test must pass >= 10 trades and beat baseline_test_precision.
+    search = ComboSearch(
+        columns=[r['column'] for r in ranked],
+        masks_train=masks_train, is_good_train=is_good_train,
+        masks_test=masks_test, is_good_test=is_good_test,
+        min_passing=10, min_good_kept_pct=5,
+        baseline_test=baseline_test_precision,
+    )
+    ranges_by_col = {r['column']: f"{r['column']}:[{r['from']},{r['to']}]" for r in ranked}
+    interval_label = f"{interval_idx // 2}:{(interval_idx % 2) * 30:02d}"
 
-        # Build filter ranges string for CSV
-        ranges = []
-        for col in cols:
-            feat = next((r for r in ranked if r['column'] == col), None)
-            if feat:
-                ranges.append(f"{col}:[{feat['from']},{feat['to']}]")
+    results = []
 
+    def add_result(cols: Tuple[str, ...], train_m: Dict[str, float], test_m: Dict[str, float]):
         results.append({
             'interval': interval_idx,
-            'interval_label': f"{interval_idx // 2}:{(interval_idx % 2) * 30:02d}",
+            'interval_label': interval_label,
             'n_filters': len(cols),
             'filter_columns': '|'.join(cols),
-            'filter_ranges': '|'.join(ranges),
+            'filter_ranges': '|'.join(ranges_by_col[c] for c in cols),
             'train_precision': train_m['precision'],
             'test_precision': test_m['precision'],
             'test_good_kept': test_m['good_kept_pct'],
@@ -431,42 +374,28 @@ def sweep_interval(
             'overfit_delta': round(train_m['precision'] - test_m['precision'], 2),
         })
 
-    # Get column names at various top-N levels
-    top40 = [r['column'] for r in ranked[:40]]
-    top30 = [r['column'] for r in ranked[:30]]
-    top20 = [r['column'] for r in ranked[:20]]
-    top15 = [r['column'] for r in ranked[:15]]
-
-    # Step 2: Exhaustive pairs from top 40
-    for combo in combinations(top40, 2):
-        test_combo(combo)
-
-    # Step 3: Exhaustive triples from top 30
-    for combo in combinations(top30, 3):
-        test_combo(combo)
-
-    # Step 4: Exhaustive quads from top 20
-    for combo in combinations(top20, 4):
-        test_combo(combo)
-
-    # Step 5: Exhaustive 5-combos from top 15
-    for combo in combinations(top15, 5):
-        test_combo(combo)
+    # Steps 2-5: exhaustive pairs/triples/quads/5-combos (pruned DFS)
+    for cols, train_m, test_m in search.search(SEARCH_LEVELS, workers=workers):
+        add_result(cols, train_m, test_m)
+    combos_tested = sum(comb(min(top_n, len(ranked)), size) for size, top_n in SEARCH_LEVELS)
 
     # Step 6: Random 6-8 combos from top 30
-    for _ in range(10_000):
+    top30 = [r['column'] for r in ranked[:30]]
+    for _ in range(RANDOM_COMBOS):
         size = random.randint(6, 8)
         if len(top30) < size:
             continue
         combo = tuple(sorted(random.sample(top30, size)))
-        test_combo(combo)
+        combos_tested += 1
+        hit = search.evaluate(combo)
+        if hit is not None:
+            add_result(combo, *hit)
 
     elapsed = time.time() - t0
     beats_baseline = len(results)
-    interval_label = f"{interval_idx // 2}:{(interval_idx % 2) * 30:02d}"
     logger.info(f"  Interval {interval_idx} ({interval_label}): "
-                f"{combos_tested:,} combos tested, {beats_baseline} beat baseline, "
-                f"top {len(ranked)} features, {elapsed:.1f}s")
+                f"{combos_tested:,} combos tested ({search.nodes_visited:,} scored after pruning), "
+                f"{beats_baseline} beat baseline, top {len(ranked)} features, {elapsed:.1f}s")
 
     return results
 
@@ -553,7 +482,7 @@ def print_interval_summary(all_results: List[Dict[str, Any]]):
 # MAIN
 # =============================================================================
 
-def run_sweep(test_mode: bool = False):
+def run_sweep(test_mode: bool = False, workers: int = 1):
     """Run the full overnight sweep."""
     sweep_start = time.time()
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -565,6 +494,7 @@ def run_sweep(test_mode: bool = False):
     print(f"  Threshold: {THRESHOLD}%")
     print(f"  Hours: {HOURS}")
     print(f"  Train/Test split: {TRAIN_FRAC*100:.0f}/{(1-TRAIN_FRAC)*100:.0f}")
+    print(f"  Search workers: {workers}")
     if test_mode:
         print("  MODE: TEST (1 interval only)")
     print("=" * 80)
@@ -625,7 +555,8 @@ def run_sweep(test_mode: bool = False):
         baseline_test_precision = (df_test['potential_gains'] >= THRESHOLD).mean() * 100
 
         # Run sweep
-        results = sweep_interval(df_train, df_test, columns, ivl, baseline_test_precision)
+        results = sweep_interval(df_train, df_test, columns, ivl, baseline_test_precision,
+                                 workers=workers)
         all_results.extend(results)
         total_combos += len(results)
 
@@ -694,9 +625,11 @@ def run_sweep(test_mode: bool = False):
 def main():
     parser = argparse.ArgumentParser(description="Overnight Brute-Force Filter Sweep")
     parser.add_argument("--test", action="store_true", help="Quick test on 1 interval only")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Processes for the combo search (default: all CPUs)")
     args = parser.parse_args()
 
-    run_sweep(test_mode=args.test)
+    run_sweep(test_mode=args.test, workers=max(1, args.workers))
 
 
 if __name__ == "__main__":
@@ -39,7 +39,7 @@ import warnings
 from pathlib import Path
 from itertools import combinations
 from typing import Dict, List, Any, Optional, Tuple
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 
 import numpy as np
 import pandas as pd
@@ -147,71 +147,51 @@ FORCE_BEHIND_COLUMNS = {
 RESULTS_DIR = Path(__file__).parent / "results"
 
 
-# =============================================================================
-# DUCKDB CONNECTION TO POSTGRES
-# =============================================================================
-
-def _get_pg_connection_string() -> str:
-    """Build a libpq connection string from project config."""
-    from core.config import settings
-    pg = settings.postgres
-    return f"host={pg.host} port={pg.port} dbname={pg.database} user={pg.user} password={pg.password}"
-
-
 # =============================================================================
 # PHASE 0: LOAD BUYINS + TRAIL DATA
 # =============================================================================
 
 def load_buyin_data(con: duckdb.DuckDBPyConnection, hours: int) -> Dict[str, Any]:
     """
-    Load buyins and their matched trail data directly from PostgreSQL.
+    Load buyins and their matched trail data from the shared feature store.
     Each buyin already has its own trail snapshot -- no joining by timestamp needed.
     """
+    from core.feature_store import get_feature_store
+
     logger.info(f"[Phase 0] Loading buyins + trail data ({hours}h)...")
     t0 = time.time()
 
-    pg_conn = _get_pg_connection_string()
-    con.execute("INSTALL postgres")
-    con.execute("LOAD postgres")
-    con.execute(f"ATTACH '{pg_conn}' AS pg (TYPE POSTGRES, READ_ONLY)")
+    store = get_feature_store()
+    store.sync()
+    since = datetime.now(timezone.utc) - timedelta(hours=hours)
 
     # Step 1: Load buyins with outcome data
     logger.info("  [1/3] Loading buyins with potential_gains...")
     t1 = time.time()
-    con.execute(f"""
-        CREATE TABLE buyins AS
-        SELECT
-            id AS buyin_id,
-            followed_at,
-            our_entry_price,
-            potential_gains,
-            our_status,
-            price_cycle
-        FROM pg.follow_the_goat_buyins
-        WHERE potential_gains IS NOT NULL
-          AND our_entry_price > 0
-          AND followed_at >= (NOW()::TIMESTAMP - INTERVAL '{hours} hours')
-        ORDER BY followed_at
-    """)
+    store_buyins = store.load_buyins(since=since, columns=[
+        'buyin_id', 'followed_at', 'our_entry_price', 'potential_gains', 'our_status', 'price_cycle',
+    ])
+    con.register('store_buyins', store_buyins)
+    con.execute("CREATE TABLE buyins AS SELECT * FROM store_buyins WHERE our_entry_price > 0")
+    con.unregister('store_buyins')
     n_buyins = con.execute("SELECT COUNT(*) FROM buyins").fetchone()[0]
     logger.info(f"    {n_buyins:,} buyins loaded in {time.time()-t1:.1f}s")
 
     if n_buyins < 100:
         logger.error(f"Only {n_buyins} buyins found -- aborting")
-        con.execute("DETACH pg")
         return {'n_buyins': n_buyins, 'error': 'insufficient data'}
 
     # Step 2: Load trail data at minute=0 (entry snapshot)
     logger.info("  [2/3] Loading trail data (minute=0 entry snapshot)...")
     t2 = time.time()
+    store_trail = store.load_trail(since=since, minutes=0, sub_minute=0, buyin_columns=[])
+    con.register('store_trail', store_trail)
     con.execute("""
         CREATE TABLE trail AS
-        SELECT *
-        FROM pg.buyin_trail_minutes
+        SELECT * FROM store_trail
         WHERE buyin_id IN (SELECT buyin_id FROM buyins)
-          AND minute = 0
-          AND COALESCE(sub_minute, 0) = 0
     """)
+    con.unregister('store_trail')
     n_trail = con.execute("SELECT COUNT(*) FROM trail").fetchone()[0]
     logger.info(f"    {n_trail:,} trail rows loaded in {time.time()-t2:.1f}s")
 
@@ -234,8 +214,6 @@ def load_buyin_data(con: duckdb.DuckDBPyConnection, hours: int) -> Dict[str, Any
     n_merged = con.execute("SELECT COUNT(*) FROM merged").fetchone()[0]
     logger.info(f"    {n_merged:,} merged rows in {time.time()-t3:.1f}s")
 
-    con.execute("DETACH pg")
-
     elapsed = time.time() - t0
     logger.info(f"  All data loaded in {elapsed:.1f}s")
 
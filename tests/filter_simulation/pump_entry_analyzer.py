@@ -42,17 +42,20 @@ import warnings
 from pathlib import Path
 from itertools import combinations
 from typing import Dict, List, Any, Optional, Tuple
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 
 import numpy as np
 import pandas as pd
 import duckdb
+import pyarrow as pa
 from scipy import stats
 
 # Add project root to path
 PROJECT_ROOT = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
 
+from core.forward_labels import forward_summary, group_forward_returns
+
 warnings.filterwarnings("ignore", category=FutureWarning)
 
 # Setup logging - flush every line for nohup visibility
@@ -108,38 +111,31 @@ RESULTS_DIR = Path(__file__).parent / "results"
 # PHASE 1: DATA LOADING
 # =============================================================================
 
-def _get_pg_connection_string() -> str:
-    from core.config import settings
-    pg = settings.postgres
-    return f"host={pg.host} port={pg.port} dbname={pg.database} user={pg.user} password={pg.password}"
-
-
 def load_data(hours: int) -> Tuple[Optional[duckdb.DuckDBPyConnection], Dict[str, Any]]:
-    """Stream buyins + trail data from PostgreSQL into local DuckDB."""
-    logger.info(f"Loading data from PostgreSQL (last {hours}h)...")
+    """Load buyins + trail data from the shared feature store into local DuckDB."""
+    from core.feature_store import get_feature_store
+
+    logger.info(f"Loading data from the feature store (last {hours}h)...")
     t0 = time.time()
 
-    con = duckdb.connect(":memory:")
-    con.execute("INSTALL postgres")
-    con.execute("LOAD postgres")
+    store = get_feature_store()
+    store.sync()
+    since = datetime.now(timezone.utc) - timedelta(hours=hours)
 
-    pg_conn = _get_pg_connection_string()
-    con.execute(f"ATTACH '{pg_conn}' AS pg (TYPE POSTGRES, READ_ONLY)")
+    con = duckdb.connect(":memory:")
 
     # 1) Buyins
     logger.info("  [1/3] Loading buyins...")
-    con.execute(f"""
-        CREATE TABLE buyins AS
-        SELECT id AS buyin_id, play_id, followed_at, potential_gains, our_status
-        FROM pg.follow_the_goat_buyins
-        WHERE potential_gains IS NOT NULL
-          AND followed_at >= NOW() - INTERVAL '{hours} hours'
-    """)
+    store_buyins = store.load_buyins(since=since, columns=[
+        'buyin_id', 'play_id', 'followed_at', 'potential_gains', 'our_status',
+    ])
+    con.register('store_buyins', store_buyins)
+    con.execute("CREATE TABLE buyins AS SELECT * FROM store_buyins")
+    con.unregister('store_buyins')
     n_buyins = con.execute("SELECT COUNT(*) FROM buyins").fetchone()[0]
     logger.info(f"    {n_buyins:,} buyins loaded")
 
     if n_buyins == 0:
-        con.execute("DETACH pg")
         return None, {}
 
     # 2) Trail data (all 200+ columns)
@@ -147,13 +143,10 @@ def load_data(hours: int) -> Tuple[Optional[duckdb.DuckDBPyConnection], Dict[str
     #    This avoids cross-product inflation in the forward-return self-join.
     logger.info("  [2/3] Loading buyin_trail_minutes (sub_minute=0)...")
     t1 = time.time()
-    con.execute("""
-        CREATE TABLE trail AS
-        SELECT *
-        FROM pg.buyin_trail_minutes
-        WHERE buyin_id IN (SELECT buyin_id FROM buyins)
-          AND COALESCE(sub_minute, 0) = 0
-    """)
+    store_trail = store.load_trail(since=since, minutes=None, sub_minute=0, buyin_columns=[])
+    con.register('store_trail', store_trail)
+    con.execute("CREATE TABLE trail AS SELECT * FROM store_trail")
+    con.unregister('store_trail')
     n_trail = con.execute("SELECT COUNT(*) FROM trail").fetchone()[0]
     n_buyins_trail = con.execute("SELECT COUNT(DISTINCT buyin_id) FROM trail").fetchone()[0]
     logger.info(f"    {n_trail:,} trail rows ({n_buyins_trail:,} buyins with trail) in {time.time()-t1:.1f}s")
@@ -163,8 +156,6 @@ def load_data(hours: int) -> Tuple[Optional[duckdb.DuckDBPyConnection], Dict[str
     ).fetchone()[0]
     logger.info(f"    {n_with_price:,} rows with valid pm_close_price ({n_with_price/max(n_trail,1)*100:.1f}%)")
 
-    con.execute("DETACH pg")
-
     # 3) Indexes
     logger.info("  [3/3] Creating indexes...")
     con.execute("CREATE INDEX idx_trail_bid ON trail(buyin_id)")
@@ -189,56 +180,32 @@ def compute_forward_returns(
     con: duckdb.DuckDBPyConnection,
     forward_window: int,
 ) -> Dict[str, Any]:
-    """Self-join trail data to compute forward returns at each (buyin, minute)."""
+    """Forward returns at each (buyin, minute): fwd_return_{k}m is the return
+    to the same buyin's row at minute + k (core.forward_labels)."""
     logger.info(f"Computing forward returns (window: +{forward_window} minutes)...")
     t0 = time.time()
 
-    # Build dynamic SQL for each forward offset
-    join_clauses = []
-    select_parts = []
+    path = con.execute("""
+        SELECT buyin_id, minute, pm_close_price
+        FROM trail
+        ORDER BY buyin_id, minute
+    """).fetchnumpy()
+    prices = np.ma.filled(np.ma.asarray(path['pm_close_price'], dtype=np.float64), np.nan)
+    anchors = np.flatnonzero(prices > 0)
+    buyin_ids = np.asarray(path['buyin_id'])
+    minutes = np.asarray(path['minute'])
+    fwd = group_forward_returns(buyin_ids, prices, forward_window, steps=minutes, rows=anchors)
+    max_fwd = forward_summary(fwd)['max_pct']
+
+    # Keep observations with at least one forward return
+    keep = ~np.isnan(max_fwd)
+    columns = {'buyin_id': buyin_ids[anchors][keep], 'minute': minutes[anchors][keep]}
     for k in range(1, forward_window + 1):
-        alias = f"t{k}"
-        join_clauses.append(
-            f"LEFT JOIN trail {alias} ON {alias}.buyin_id = t.buyin_id "
-            f"AND {alias}.minute = t.minute + {k}"
-        )
-        select_parts.append(
-            f"({alias}.pm_close_price - t.pm_close_price) "
-            f"/ NULLIF(t.pm_close_price, 0) * 100 AS fwd_return_{k}m"
-        )
-
-    # GREATEST across all forward windows (treat NULL as -9999 so it's ignored)
-    coalesce_parts = [f"COALESCE(fwd_return_{k}m, -9999)" for k in range(1, forward_window + 1)]
-    greatest_expr = f"GREATEST({', '.join(coalesce_parts)})"
-
-    # At least one forward return must be non-NULL
-    any_not_null = " OR ".join(
-        [f"fwd_return_{k}m IS NOT NULL" for k in range(1, forward_window + 1)]
-    )
-
-    joins_sql = "\n        ".join(join_clauses)
-    selects_sql = ",\n            ".join(select_parts)
-
-    con.execute(f"""
-        CREATE TABLE fwd_returns AS
-        WITH raw_fwd AS (
-            SELECT
-                t.buyin_id,
-                t.minute,
-                {selects_sql}
-            FROM trail t
-            {joins_sql}
-            WHERE t.pm_close_price IS NOT NULL
-              AND t.pm_close_price > 0
-        )
-        SELECT *,
-            CASE WHEN {any_not_null}
-                 THEN {greatest_expr}
-                 ELSE NULL
-            END AS max_fwd_return
-        FROM raw_fwd
-        WHERE ({any_not_null})
-    """)
+        columns[f'fwd_return_{k}m'] = pa.array(fwd[keep, k - 1], from_pandas=True)
+    columns['max_fwd_return'] = max_fwd[keep]
+    con.register('_fwd_arrow', pa.table(columns))
+    con.execute("CREATE TABLE fwd_returns AS SELECT * FROM _fwd_arrow")
+    con.unregister('_fwd_arrow')
 
     row = con.execute("""
         SELECT